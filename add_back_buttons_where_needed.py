@@ -2,7 +2,10 @@
 import os
 import re
 
-pages_dir = '/tmp/cc-agent/62557988/project/src/pages/'
+import edit_plan
+import import_index
+import page_engine
+import tsx_scanner
 
 # Pages qui devraient avoir un bouton retour visible
 pages_needing_back = {
@@ -29,44 +32,111 @@ BACK_BUTTON = '''        <button
           <span className="font-medium">Retour</span>
         </button>'''
 
-for filename in pages_needing_back:
-    filepath = os.path.join(pages_dir, filename)
 
-    if not os.path.exists(filepath):
-        continue
+def _next_tag(content, tags, k):
+    """Index of the tag right after tags[k] when only whitespace separates them"""
+    if k + 1 < len(tags) and not content[tags[k].end:tags[k + 1].start].strip():
+        return k + 1
+    return None
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
 
-    # Check if already has a visible back button (not just logo)
+def _is_div(tag, content, marker):
+    return tag.name == 'div' and not tag.closing and marker in tag.attrs(content)
+
+
+def find_back_button_position(content):
+    """Offset after the `relative` container that follows the logo button
+
+    Same places as the former DOTALL regex
+    `</button>\\s*(?:<div[^>]*inset-0[^>]*>.*?</div>\\s*)?<div[^>]*relative[^>]*>\\s*`,
+    located from the tsx_scanner tags in linear time.
+    """
+    tags = tsx_scanner.scan(content).tags
+
+    # next_close_div[k]: index of the first </div> after tags[k]
+    next_close_div = [None] * len(tags)
+    following = None
+    for k in range(len(tags) - 1, -1, -1):
+        next_close_div[k] = following
+        if tags[k].closing and tags[k].name == 'div':
+            following = k
+
+    for k, tag in enumerate(tags):
+        if not (tag.closing and tag.name == 'button'):
+            continue
+
+        # Optional overlay: <div ... inset-0 ...>...</div>
+        j = _next_tag(content, tags, k)
+        candidates = []
+        if j is not None and _is_div(tags[j], content, 'inset-0'):
+            close = next_close_div[j]
+            if close is not None:
+                candidates.append(_next_tag(content, tags, close))
+        candidates.append(j)
+
+        for r in candidates:
+            if r is not None and _is_div(tags[r], content, 'relative'):
+                return tsx_scanner.skip_whitespace(content, tags[r].end)
+    return None
+
+
+def plan_edits(filepath, content):
+    """Edits adding the back button (and its ArrowLeft import), if missing"""
     if re.search(r'<ArrowLeft.*Retour', content):
-        print(f"✓ Already has back button: {filename}")
-        continue
+        return []
+
+    # Find where to insert the back button (after logo, before main content)
+    pos = find_back_button_position(content)
+    if pos is None:
+        return []
 
     # Ensure ArrowLeft is imported
-    if 'ArrowLeft' not in content:
-        # Add to existing lucide import
-        content = re.sub(
-            r"(import \{ )([^}]*?)( \} from 'lucide-react';)",
-            r"\1\2, ArrowLeft\3",
-            content
-        )
+    imports = import_index.ImportIndex(content)
+    imports.add('ArrowLeft', 'lucide-react')
+    return imports.edits() + [edit_plan.Edit(pos, pos, '\n' + BACK_BUTTON + '\n')]
 
-    # Find where to insert the back button (after logo, before main content)
-    # Look for pattern after the logo button
-    pattern = r'(</button>\s*(?:<div[^>]*inset-0[^>]*>.*?</div>\s*)?<div[^>]*relative[^>]*>\s*)'
 
-    def add_back_button(match):
-        after_logo = match.group(1)
-        return after_logo + '\n' + BACK_BUTTON + '\n'
+class AddBackButtonsRule(page_engine.Rule):
+    name = 'add_back_buttons_where_needed'
+    description = "Bouton retour sur les pages d'information"
+
+    def applies_to(self, filename):
+        return filename in pages_needing_back
+
+    def process(self, page):
+        content = page.content
+        filename = page.filename
+
+        # Check if already has a visible back button (not just logo)
+        if re.search(r'<ArrowLeft.*Retour', content):
+            return f"✓ Already has back button: {filename}"
+
+        edits = plan_edits(page.path, content)
+        if edits:
+            page.apply(edits)
+            return f"✓ Added back button: {filename}"
+        else:
+            return f"⚠️  Could not add back button: {filename} (pattern not found)"
+
+    def findings(self, filename, result):
+        if result.startswith('✓ Added'):
+            return [('note', 'Back button added')]
+        if result.startswith('⚠️'):
+            return [('warning', 'Could not add back button (pattern not found)')]
+        return []
+
+    def report(self, results):
+        # Keep the order of pages_needing_back, like the original loop; results
+        # are keyed by the walked name (pages/X.tsx under --root)
+        messages = {os.path.basename(filename): message for filename, message in results}
+        for filename in pages_needing_back:
+            if filename in messages:
+                print(messages[filename])
+
+        print("\n✅ Back buttons added!")
 
-    new_content = re.sub(pattern, add_back_button, content, count=1, flags=re.DOTALL)
 
-    if new_content != content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        print(f"✓ Added back button: {filename}")
-    else:
-        print(f"⚠️  Could not add back button: {filename} (pattern not found)")
+RULE = AddBackButtonsRule()
 
-print("\n✅ Back buttons added!")
+if __name__ == '__main__':
+    page_engine.main([RULE])
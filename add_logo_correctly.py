@@ -2,8 +2,12 @@
 import os
 import re
 
-pages_dir = '/tmp/cc-agent/62557988/project/src/pages/'
-tsx_files = [f for f in os.listdir(pages_dir) if f.endswith('.tsx')]
+import edit_plan
+import import_index
+import page_engine
+import tsx_scanner
+
+LOGO_SRC = "capture_d'écran_2026-01-20_à_12.07.10.png"
 
 LOGO_BUTTON = '''<button
         onClick={() => navigate('/')}
@@ -16,56 +20,62 @@ LOGO_BUTTON = '''<button
         />
       </button>'''
 
-for filename in tsx_files:
-    filepath = os.path.join(pages_dir, filename)
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
 
+def plan_edits(filepath, content):
+    """Edits adding the logo button (and navigate) to content"""
     # Skip if already has logo
-    if "capture_d'écran_2026-01-20_à_12.07.10.png" in content:
-        print(f"✓ Logo déjà présent: {filename}")
-        continue
+    if LOGO_SRC in content:
+        return []
+
+    builder = edit_plan.EditBuilder(content)
 
     # Ensure useNavigate is imported
-    if 'useNavigate' not in content:
-        # Add import
-        if "from 'react-router-dom'" in content:
-            content = re.sub(
-                r"import \{([^}]*)\} from 'react-router-dom';",
-                lambda m: f"import {{{m.group(1)}, useNavigate}} from 'react-router-dom';",
-                content
-            )
-        else:
-            # Add new import after react import
-            content = re.sub(
-                r"(import .* from 'react';)",
-                r"\1\nimport { useNavigate } from 'react-router-dom';",
-                content,
-                count=1
-            )
+    imports = import_index.ImportIndex(content)
+    imports.add('useNavigate', 'react-router-dom')
+    builder.extend(imports.edits())
 
     # Ensure navigate is declared
     if 'const navigate = useNavigate()' not in content:
-        # Find function declaration
-        func_match = re.search(r'(export (?:default )?function \w+[^{]*\{)', content)
-        if func_match:
-            insert_pos = func_match.end()
-            content = content[:insert_pos] + '\n  const navigate = useNavigate();' + content[insert_pos:]
+        insert_pos = tsx_scanner.function_body_start(content)
+        if insert_pos is not None:
+            builder.insert(insert_pos, '\n  const navigate = useNavigate();')
 
     # Find return statement and add logo button right after opening tag
     # Match: return (\n  <div ... >\n
-    pattern = r'(return \(\s*<(?:div|main|section)[^>]*>\s*)\n'
+    match = re.search(r'(return \(\s*<(?:div|main|section)[^>]*>\s*)\n', content)
+    if match:
+        builder.insert(match.end(1), '\n      ' + LOGO_BUTTON)
+
+    return builder.edits
+
+
+def plan_targets():
+    pages_dir = os.path.join('src', 'pages')
+    return [os.path.join(pages_dir, f) for f in page_engine.list_pages(pages_dir)]
+
+
+class AddLogoRule(page_engine.Rule):
+    name = 'add_logo_correctly'
+    description = "Bouton logo vers la page d'accueil"
+
+    def process(self, page):
+        if LOGO_SRC in page.content:
+            return f"✓ Logo déjà présent: {page.filename}"
+
+        page.apply(plan_edits(page.path, page.content))
+        return f"✓ Logo ajouté: {page.filename}"
+
+    def findings(self, filename, result):
+        return [('note', 'Logo button added')] if result.startswith('✓ Logo ajouté') else []
 
-    def add_logo_after_opening(match):
-        opening = match.group(1)
-        return opening + '\n      ' + LOGO_BUTTON + '\n'
+    def report(self, results):
+        for _, message in results:
+            print(message)
 
-    content = re.sub(pattern, add_logo_after_opening, content, count=1)
+        print("\n✅ Logos ajoutés sur toutes les pages!")
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
 
-    print(f"✓ Logo ajouté: {filename}")
+RULE = AddLogoRule()
 
-print("\n✅ Logos ajoutés sur toutes les pages!")
+if __name__ == '__main__':
+    page_engine.main([RULE])
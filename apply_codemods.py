@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Run several codemods as one transactional batch
+
+Every codemod plans its edits against the same original content of a file;
+edit_plan.EditPlan merges them, rejects a codemod whose edits overlap
+another's on that file, and writes each file at most once, atomically,
+instead of every script rewriting the same pages in turn (each write
+retriggers a Vite HMR rebuild while the batch runs).
+
+Usage:
+    python3 apply_codemods.py [--dry-run] [--codemods fix_back_buttons,add_logo_correctly]
+"""
+
+import argparse
+import importlib
+import os
+
+import edit_plan
+import page_engine
+import profiler
+
+# Same order as running the scripts one after another
+CODEMODS = [
+    'fix_back_buttons',
+    'fix_all_props',
+    'fix_mover_props',
+    'add_logo_correctly',
+]
+
+
+def plan(modules):
+    """Build the EditPlan of modules over their target files (cwd-relative)"""
+    targets = {}
+    for module in modules:
+        for path in module.plan_targets():
+            targets.setdefault(os.path.normpath(path), []).append(module)
+
+    batch = edit_plan.EditPlan()
+    for path, path_modules in targets.items():
+        if not os.path.exists(path):
+            print(f"✗ Not found: {path}")
+            continue
+        content = edit_plan.read_text(path)
+        for module in path_modules:
+            batch.add(path, content, module.__name__, module.plan_edits(path, content))
+    return batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the codemods as one batch, one write per file')
+    parser.add_argument('--codemods', help=f"comma-separated modules (default: {','.join(CODEMODS)})")
+    parser.add_argument('--project-dir', default=page_engine.PROJECT_DIR)
+    parser.add_argument('--dry-run', action='store_true',
+                        help='print unified diffs instead of writing the files')
+    profiler.add_argument(parser)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    modules = [importlib.import_module(name)
+               for name in (args.codemods.split(',') if args.codemods else CODEMODS)]
+    os.chdir(args.project_dir)
+
+    if args.profile:
+        profiler.enable(os.path.join(cwd, args.profile))
+        for module in modules:
+            profiler.profile_function(module, 'plan_edits', module.__name__)
+
+    batch = plan(modules)
+    changed = batch.commit(args.dry_run)
+
+    conflicts = 0
+    for path, applied, path_conflicts in changed:
+        print(f"✓ {path} ({', '.join(applied)})")
+        for source, other in path_conflicts:
+            conflicts += 1
+            print(f"   ✗ Conflit: {source} ignoré (chevauche {other})")
+
+    written = sum(1 for _, applied, _ in changed if applied)
+    print(f"\n✓ {written}/{len(batch.files)} fichiers modifiés, une écriture chacun"
+          f"{' (dry-run)' if args.dry_run else ''}")
+    if conflicts:
+        print(f"⚠️  {conflicts} conflit(s)")
+    profiler.report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+Resized WebP/AVIF variants of the public/ images and srcset rewriting
+
+The pages show public/ images through plain `<img src="/...">` tags (the
+logo button of add_logo_correctly.py: a full-size screenshot displayed 48px
+high). This pipeline:
+
+  - finds those tags in src/ (string src under public/) and their display
+    size: width/height attributes, else the Tailwind h-N / w-N classes of
+    className (N × 4 px, or h-[48px]); the widest value across breakpoints
+  - renders each source at 1x and 2x that size (never upscaled) in AVIF,
+    WebP and the source format, into public/assets/ with content-hashed
+    names (logo-96w.3f2a9c1b.webp), so they can be cached forever; images
+    no tag uses get DEFAULT_WIDTHS variants
+  - rewrites each tag as a <picture> with AVIF and WebP <source>s; the <img>
+    keeps its src (add_logo_correctly.py detects the logo by it, browsers
+    with srcset support never fetch it), gains a srcSet of resized fallbacks,
+    width/height (no layout shift), loading and decoding="async". Logos are
+    above the fold: loading="eager", other images "lazy"; an existing
+    loading attribute is kept
+  - records sources and variants in public/assets/manifest.json. A source
+    whose size and mtime (else content hash) are unchanged keeps its
+    variants: only missing sizes are encoded, and the variants of a source
+    that changed or is gone are deleted
+
+The icons linked from index.html (favicon, apple-touch-icon) keep their
+fixed names and are left alone. AVIF is skipped when Pillow was built
+without it.
+
+Pillow is required (pip install pillow).
+
+Usage:
+    python3 asset_pipeline.py                 # build variants + rewrite tags
+    python3 asset_pipeline.py --dry-run       # build, print the tag diffs
+    python3 asset_pipeline.py --force --json assets.json
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import unicodedata
+
+import add_logo_correctly
+import edit_plan
+import page_engine
+import tree_walk
+import tsx_scanner
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = features = None
+
+PUBLIC_DIR = os.path.join(page_engine.PROJECT_DIR, 'public')
+SRC_DIR = os.path.join(page_engine.PROJECT_DIR, 'src')
+INDEX_HTML = os.path.join(page_engine.PROJECT_DIR, 'index.html')
+ASSETS = 'assets'
+MANIFEST = 'manifest.json'
+MANIFEST_FORMAT = 1
+
+RASTER_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+DENSITIES = (1, 2)
+DEFAULT_WIDTHS = (320, 640, 1280)
+# Encoder settings: changing them re-encodes every variant
+ENCODERS = {
+    'avif': ('AVIF', {'quality': 55, 'speed': 6}, 'image/avif'),
+    'webp': ('WEBP', {'quality': 82, 'method': 6}, 'image/webp'),
+    'png': ('PNG', {'optimize': True}, 'image/png'),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}, 'image/jpeg'),
+}
+FALLBACK_FORMATS = {'.png': 'png', '.jpg': 'jpeg', '.jpeg': 'jpeg', '.webp': 'png'}
+EAGER_SOURCES = {add_logo_correctly.LOGO_SRC}
+
+_LINK_HREF = re.compile(r'''<link\b[^>]*\bhref\s*=\s*["']/([^"']+)["']''', re.IGNORECASE)
+_ATTRIBUTE = re.compile(r'''\s*([A-Za-z_$][\w$:-]*)(?:\s*=\s*("[^"]*"|'[^']*'|\{))?''')
+_SIZE_CLASS = re.compile(r'(?:^|\s)(?:[\w-]+:)*([hw])-(?:(\d+(?:\.5)?)|\[(\d+)px\])(?=\s|$)')
+_SLUG = re.compile(r'[^a-z0-9]+')
+_REWRITTEN = {'src', 'srcSet', 'srcset', 'width', 'height', 'loading', 'decoding'}
+
+
+def require_pillow():
+    if Image is None:
+        raise RuntimeError("Pillow est requis pour générer les variantes (pip install pillow)")
+
+
+def formats():
+    """Encoded formats, best first: AVIF when Pillow supports it, then WebP"""
+    return [name for name in ('avif', 'webp') if features.check(name)]
+
+
+def settings_key():
+    return hashlib.blake2b(json.dumps([ENCODERS, formats()], sort_keys=True).encode(),
+                           digest_size=8).hexdigest()
+
+
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def slug(name):
+    """`capture_d'écran_2026-01-20_à_12.07.10` -> 'capture-d-ecran-2026-01-20-a-12-07-10'"""
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in name if not unicodedata.combining(char)).lower()
+    return _SLUG.sub('-', name).strip('-') or 'image'
+
+
+def linked_icons(index_html=INDEX_HTML):
+    """public/ paths linked from index.html (<link rel="icon" href="/favicon-32.png">)"""
+    try:
+        return set(_LINK_HREF.findall(edit_plan.read_text(index_html)))
+    except OSError:
+        return set()
+
+
+def parse_attributes(text):
+    """[(name, raw value or None, start, end)] of a JSX tag's attribute text;
+    {…} values are matched with their closing brace, {...spread} is kept as is"""
+    attributes = []
+    pos = 0
+    n = len(text)
+    while pos < n:
+        while pos < n and text[pos].isspace():
+            pos += 1
+        if pos >= n:
+            break
+        start = pos
+        if text[pos] == '{':
+            end = _brace_end(text, pos)
+            attributes.append((None, text[pos:end], start, end))
+            pos = end
+            continue
+        match = _ATTRIBUTE.match(text, pos)
+        if match is None or match.end() == pos:
+            break
+        end = match.end()
+        value = match.group(2)
+        if value == '{':
+            end = _brace_end(text, match.end() - 1)
+            value = text[match.end() - 1:end]
+        attributes.append((match.group(1), value, start, end))
+        pos = end
+    return attributes
+
+
+def _brace_end(text, pos):
+    """Offset after the `}` matching the `{` at pos (strings skipped)"""
+    depth = 0
+    quote = None
+    for i in range(pos, len(text)):
+        char = text[i]
+        if quote:
+            if char == '\\':
+                continue
+            if char == quote:
+                quote = None
+        elif char in '"\'`':
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return len(text)
+
+
+def _literal(value):
+    """Text of a "..." / '...' / {"..."} / {48} attribute value, None when computed"""
+    if value is None:
+        return None
+    if value[:1] in '"\'':
+        return value[1:-1]
+    inner = value[1:-1].strip()
+    if re.fullmatch(r'"[^"]*"|\'[^\']*\'', inner):
+        return inner[1:-1]
+    if re.fullmatch(r'\d+(?:\.\d+)?', inner):
+        return inner
+    return None
+
+
+def display_size(attributes):
+    """(width, height) in CSS px from width/height attributes, else from the
+    Tailwind h-N / w-N classes; None for an unknown dimension"""
+    values = {name: _literal(value) for name, value, _, _ in attributes if name}
+    size = {}
+    for dimension in ('width', 'height'):
+        if values.get(dimension) and re.fullmatch(r'\d+(?:\.\d+)?', values[dimension]):
+            size[dimension[0]] = float(values[dimension])
+    for axis, steps, pixels in _SIZE_CLASS.findall(values.get('className') or values.get('class') or ''):
+        px = float(steps) * 4 if steps else float(pixels)
+        key = f'{axis}-class'
+        size[key] = max(size.get(key, 0), px)
+    width = size.get('w', size.get('w-class'))
+    height = size.get('h', size.get('h-class'))
+    return width, height
+
+
+class Usage:
+    """A JSX <img> with a public/ source"""
+
+    def __init__(self, path, tag, src, attributes, replace_start, replace_end):
+        self.path = path
+        self.tag = tag
+        self.src = src                  # '/logo.png'
+        self.attributes = attributes
+        self.start = replace_start      # the <img> or the <picture> wrapping it
+        self.end = replace_end
+        self.width, self.height = display_size(attributes)
+
+    @property
+    def source(self):
+        return self.src.lstrip('/')
+
+
+def find_usages(path, content):
+    """Usages of one file: <img src="/..."> tags, with the <picture> this
+    pipeline wrapped around them on a previous run"""
+    usages = []
+    tags = tsx_scanner.scan(content).tags
+    for i, tag in enumerate(tags):
+        if tag.name != 'img' or tag.closing or tag.end is None:
+            continue
+        attributes = parse_attributes(tag.attrs(content))
+        src = next((_literal(value) for name, value, _, _ in attributes if name == 'src'), None)
+        if not src or not src.startswith('/') or src.startswith('//'):
+            continue
+        start, end = tag.start, tag.end
+        j = i - 1
+        while j >= 0 and tags[j].name == 'source' and not tags[j].closing:
+            j -= 1
+        if (j >= 0 and j < i - 1 and tags[j].name == 'picture' and not tags[j].closing
+                and i + 1 < len(tags) and tags[i + 1].name == 'picture' and tags[i + 1].closing):
+            start, end = tags[j].start, tags[i + 1].end
+        usages.append(Usage(path, tag, src, attributes, start, end))
+    return usages
+
+
+def scan_usages(src_dir=SRC_DIR):
+    usages = []
+    for _, entry in tree_walk.walk([src_dir], include=('*.tsx', '*.jsx')):
+        content = edit_plan.read_text(entry.path)
+        if '<img' in content:
+            usages.extend(find_usages(entry.path, content))
+    return usages
+
+
+def wanted_widths(source_size, usages):
+    """Variant widths of a source: 1x/2x of each display size, else DEFAULT_WIDTHS"""
+    width, height = source_size
+    widths = set()
+    for usage in usages:
+        shown = usage.width or (usage.height * width / height if usage.height else None)
+        if shown:
+            widths.update(min(width, round(shown * density)) for density in DENSITIES)
+    if not widths:
+        widths = {w for w in DEFAULT_WIDTHS if w < width} | {width}
+    return sorted(widths)
+
+
+class Pipeline:
+    def __init__(self, public_dir=PUBLIC_DIR, force=False):
+        require_pillow()
+        self.public_dir = public_dir
+        self.assets_dir = os.path.join(public_dir, ASSETS)
+        self.manifest_path = os.path.join(self.assets_dir, MANIFEST)
+        self.force = force
+        self.settings = settings_key()
+        self.formats = formats()
+        self.sources = {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') == MANIFEST_FORMAT and data.get('settings') == self.settings:
+                self.sources = data['sources']
+        except (OSError, ValueError, KeyError):
+            pass
+        self.built = []
+        self.skipped = []
+        self.missing = []
+        self.encoded = 0
+
+    def source_files(self):
+        icons = linked_icons()
+        found = []
+        for dirpath, dirnames, filenames in os.walk(self.public_dir):
+            dirnames[:] = sorted(d for d in dirnames if os.path.join(dirpath, d) != self.assets_dir)
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                relative = os.path.relpath(path, self.public_dir).replace(os.sep, '/')
+                if filename.lower().endswith(RASTER_EXTENSIONS) and relative not in icons:
+                    found.append(relative)
+        return found
+
+    def build(self, usages):
+        """Encode the missing variants; returns {source: manifest entry}"""
+        by_source = {}
+        for usage in usages:
+            by_source.setdefault(usage.source, []).append(usage)
+        for source in sorted(by_source):
+            if not os.path.isfile(os.path.join(self.public_dir, source)):
+                self.missing.append((source, by_source[source]))
+        sources = sorted(set(self.source_files()) | {source for source in by_source
+                                                      if os.path.isfile(os.path.join(self.public_dir, source))})
+        os.makedirs(self.assets_dir, exist_ok=True)
+        previous = self.sources
+        self.sources = {}
+        for source in sources:
+            self.sources[source] = self._build_source(source, previous.get(source), by_source.get(source, []))
+        kept = {variant['file'] for entry in self.sources.values() for variant in entry['variants']}
+        for entry in previous.values():
+            for variant in entry['variants']:
+                if variant['file'] not in kept:
+                    path = os.path.join(self.public_dir, variant['file'])
+                    if os.path.exists(path):
+                        os.remove(path)
+        self._save()
+        return self.sources
+
+    def _build_source(self, source, entry, usages):
+        path = os.path.join(self.public_dir, source)
+        st = os.stat(path)
+        if entry and not self.force and (entry['size'], entry['mtime_ns']) != (st.st_size, st.st_mtime_ns):
+            if entry['hash'] != file_hash(path):
+                entry = None
+        elif self.force:
+            entry = None
+        if entry is None:
+            with Image.open(path) as image:
+                size = image.size
+            entry = {'hash': file_hash(path), 'width': size[0], 'height': size[1], 'bytes': st.st_size,
+                     'variants': []}
+        entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+        widths = wanted_widths((entry['width'], entry['height']), usages)
+        fallback = FALLBACK_FORMATS[os.path.splitext(source)[1].lower()]
+        wanted = [(width, fmt) for width in widths for fmt in self.formats + [fallback]]
+        existing = {(variant['width'], variant['format']): variant for variant in entry['variants']
+                    if os.path.exists(os.path.join(self.public_dir, variant['file']))}
+        todo = [key for key in wanted if key not in existing]
+        if not todo:
+            self.skipped.append(source)
+        else:
+            self.built.append(source)
+            with Image.open(path) as image:
+                image.load()
+                for width, fmt in todo:
+                    existing[(width, fmt)] = self._encode(image, source, width, fmt)
+        entry['variants'] = [existing[key] for key in wanted]
+        return entry
+
+    def _encode(self, image, source, width, fmt):
+        height = max(1, round(width * image.height / image.width))
+        resized = image if (width, height) == image.size else image.resize((width, height), Image.LANCZOS)
+        if fmt == 'jpeg' and resized.mode not in ('RGB', 'L'):
+            resized = resized.convert('RGB')
+        pil_format, options, _ = ENCODERS[fmt]
+        buffer = io.BytesIO()
+        resized.save(buffer, pil_format, **options)
+        data = buffer.getvalue()
+        digest = hashlib.blake2b(data, digest_size=4).hexdigest()
+        stem = slug(os.path.splitext(os.path.basename(source))[0])
+        relative = f"{ASSETS}/{stem}-{width}w.{digest}.{'jpg' if fmt == 'jpeg' else fmt}"
+        target = os.path.join(self.public_dir, relative)
+        if not os.path.exists(target):
+            with open(target + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(target + '.tmp', target)
+        self.encoded += 1
+        return {'file': relative, 'width': width, 'height': height, 'format': fmt, 'bytes': len(data)}
+
+    def _save(self):
+        data = {'format': MANIFEST_FORMAT, 'settings': self.settings, 'sources': self.sources}
+        content = json.dumps(data, indent=2, ensure_ascii=False, sort_keys=True) + '\n'
+        if not os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        else:
+            edit_plan.write_if_changed(self.manifest_path, edit_plan.read_text(self.manifest_path), content)
+
+    def srcset(self, entry, fmt, widths):
+        variants = {variant['width']: variant for variant in entry['variants'] if variant['format'] == fmt}
+        return ', '.join(f"/{variants[width]['file']} {density}x" for density, width in widths if width in variants)
+
+
+def markup(usage, entry, pipeline, indent):
+    """<picture> JSX replacing usage, or None when its display size is unknown"""
+    width, height = usage.width, usage.height
+    if width is None and height is None:
+        return None
+    ratio = entry['width'] / entry['height']
+    width = width if width is not None else height * ratio
+    height = height if height is not None else width / ratio
+    widths = []
+    for density in DENSITIES:
+        variant_width = min(entry['width'], round(width * density))
+        if not any(width_ == variant_width for _, width_ in widths):
+            widths.append((density, variant_width))
+    fallback = FALLBACK_FORMATS[os.path.splitext(usage.source)[1].lower()]
+    loading = next((value for name, value, _, _ in usage.attributes if name == 'loading'), None)
+    if loading is None:
+        eager = usage.source in EAGER_SOURCES or 'logo' in usage.source.lower()
+        loading = '"eager"' if eager else '"lazy"'
+
+    pad = ' ' * indent
+    lines = [f'{pad}<picture>']
+    for fmt in pipeline.formats:
+        lines.append(f'{pad}  <source type="{ENCODERS[fmt][2]}" srcSet="{pipeline.srcset(entry, fmt, widths)}" />')
+    lines.append(f'{pad}  <img')
+    lines.append(f'{pad}    src="{usage.src}"')
+    lines.append(f'{pad}    srcSet="{pipeline.srcset(entry, fallback, widths)}"')
+    lines.append(f'{pad}    width={{{round(width)}}}')
+    lines.append(f'{pad}    height={{{round(height)}}}')
+    lines.append(f'{pad}    loading={loading}')
+    lines.append(f'{pad}    decoding="async"')
+    for name, value, _, _ in usage.attributes:
+        if name in _REWRITTEN:
+            continue
+        lines.append(f'{pad}    {name if name else value}' + (f'={value}' if name and value is not None else ''))
+    lines.append(f'{pad}  />')
+    lines.append(f'{pad}</picture>')
+    return '\n'.join(lines).lstrip()
+
+
+def rewrite(usages, pipeline, dry_run=False):
+    """Rewrite the tags of usages; returns [(path, rewritten count)] and the
+    usages left as they were (unknown display size, missing source)"""
+    plan = edit_plan.EditPlan()
+    by_path = {}
+    for usage in usages:
+        by_path.setdefault(usage.path, []).append(usage)
+    counts = {}
+    left = []
+    for path, file_usages in by_path.items():
+        content = edit_plan.read_text(path)
+        edits = []
+        for usage in file_usages:
+            entry = pipeline.sources.get(usage.source)
+            text = markup(usage, entry, pipeline, usage.start - content.rfind('\n', 0, usage.start) - 1) \
+                if entry else None
+            if text is None:
+                left.append(usage)
+            elif text != content[usage.start:usage.end]:
+                edits.append(edit_plan.Edit(usage.start, usage.end, text))
+                counts[path] = counts.get(path, 0) + 1
+        plan.add(path, content, 'asset_pipeline', edits)
+    plan.commit(dry_run)
+    return sorted(counts.items()), left
+
+
+def kb(size):
+    return f"{size / 1024:.1f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build resized WebP/AVIF variants of public/ images and rewrite <img> tags')
+    parser.add_argument('--public-dir', default=PUBLIC_DIR)
+    parser.add_argument('--src-dir', default=SRC_DIR)
+    parser.add_argument('--force', action='store_true', help='re-encode every variant')
+    parser.add_argument('--no-rewrite', action='store_true', help='only build the variants and the manifest')
+    parser.add_argument('--dry-run', action='store_true', help='print the tag rewrites as a diff')
+    parser.add_argument('--json', metavar='FILE', help='write the manifest entries as JSON')
+    args = parser.parse_args()
+
+    try:
+        pipeline = Pipeline(args.public_dir, args.force)
+    except RuntimeError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    usages = scan_usages(args.src_dir)
+    sources = pipeline.build(usages)
+
+    print("=" * 80)
+    print(f"ASSETS PUBLIC ({len(sources)} images, formats: {', '.join(pipeline.formats)} + original)")
+    print("=" * 80)
+    if 'avif' not in pipeline.formats:
+        print("⚠️  Pillow sans support AVIF: variantes AVIF ignorées")
+    for source, entry in sorted(sources.items()):
+        status = '🔄 encodé' if source in pipeline.built else '✓ inchangé'
+        best = min(entry['variants'], key=lambda variant: variant['bytes'], default=None)
+        sizes = ', '.join(sorted({str(variant['width']) for variant in entry['variants']}, key=int))
+        print(f"{status:12} {source:40} {entry['width']}×{entry['height']} {kb(entry['bytes']):>9}  "
+              f"→ {len(entry['variants'])} variantes ({sizes}w)"
+              + (f", min {kb(best['bytes'])} {best['format']}" if best else ''))
+    print(f"\n{len(pipeline.built)} source(s) encodée(s) ({pipeline.encoded} variantes), "
+          f"{len(pipeline.skipped)} inchangée(s)")
+
+    for source, source_usages in pipeline.missing:
+        files = sorted({os.path.relpath(usage.path, args.src_dir) for usage in source_usages})
+        print(f"⚠️  /{source} absent de {args.public_dir}: {len(source_usages)} balise(s) "
+              f"non réécrite(s) ({', '.join(files[:3])}{'…' if len(files) > 3 else ''})")
+
+    if not args.no_rewrite:
+        changed, left = rewrite([usage for usage in usages if usage.source in sources], pipeline, args.dry_run)
+        print(f"\n🖼️  {len(usages)} balise(s) <img> vers public/, "
+              f"{sum(count for _, count in changed)} réécrite(s) dans {len(changed)} fichier(s)")
+        for path, count in changed:
+            print(f"   {os.path.relpath(path, args.src_dir)}: {count}")
+        for usage in left:
+            line = edit_plan.read_text(usage.path).count('\n', 0, usage.start) + 1
+            print(f"   ⚠️  {os.path.relpath(usage.path, args.src_dir)}:{line} {usage.src}: "
+                  f"taille d'affichage inconnue (width/height ou classe h-N/w-N)")
+        for usage in usages:
+            entry = sources.get(usage.source)
+            if entry and usage not in left:
+                webp = [variant for variant in entry['variants'] if variant['format'] == pipeline.formats[-1]]
+                shown = max(webp, key=lambda variant: variant['width'], default=None) if webp else None
+                if shown:
+                    print(f"   {usage.src}: {kb(entry['bytes'])} → {kb(shown['bytes'])} "
+                          f"({shown['format']} {shown['width']}w, 2x)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(sources, f, indent=2, ensure_ascii=False)
+        print(f"📝 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
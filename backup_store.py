@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Incremental, deduplicated backups of the project tree
+
+backup.sh re-tars and re-gzips everything on each run (the markdown reports,
+package-lock.json, the zip blob at the root) and reads the archive twice
+more to list and count it. Here a snapshot is a small JSON manifest of
+file -> chunk hashes, and file contents live in a content-addressed chunk
+store shared by every snapshot:
+
+    STORE/store.json                  format and chunking parameters
+    STORE/chunks/ab/abcdef....        one chunk, zlib-compressed (or stored)
+    STORE/snapshots/YYYYMMDD-HHMMSS.json
+
+Files are split with content-defined chunking (a 32-byte gear rolling hash,
+cut where its top bits are zero, chunks of 4 to 64 KiB), so an
+edit in the middle of a file only changes the chunks around it. Files whose
+size and mtime match the previous snapshot are taken from its manifest
+without being read; when the stat changed the file is hashed and only
+re-chunked if the content did. New chunks are compressed and written by
+--jobs threads (zlib and hashlib release the GIL). A snapshot costs the
+changed files in time and their new chunks in space.
+
+Same files as backup.sh: the whole tree minus .git, node_modules, dist and
+*.tar.gz (and the store itself).
+
+Usage:
+    python3 backup_store.py                            # snapshot into /tmp/trouveton-demenageur-backups
+    python3 backup_store.py --store /mnt/backups --json backup.json
+    python3 backup_store.py --list
+    python3 backup_store.py --restore latest --to /tmp/restore
+    python3 backup_store.py --restore 20260210-020000 --file src/App.tsx --to -
+    python3 backup_store.py --prune 30                 # keep the 30 latest snapshots
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from page_engine import PROJECT_DIR
+import tree_walk
+
+STORE_FORMAT = 1
+DEFAULT_STORE = os.path.join(tempfile.gettempdir(), 'trouveton-demenageur-backups')
+EXCLUDE = ('*.tar.gz',)
+READ_BLOCK = 1 << 20
+WINDOW = 32
+# Files modified this close to the previous snapshot may have changed again
+# within the same mtime tick, so their stat is not trusted
+RACY_WINDOW_NS = 2 * 10**9
+STORED, ZLIB = b'0', b'z'
+
+
+def _gear_table():
+    """256 pseudo-random 32-bit values, fixed so every run cuts the same chunks"""
+    values = []
+    for byte in range(256):
+        values.append(int.from_bytes(hashlib.blake2b(bytes([byte]), digest_size=4).digest(), 'little'))
+    return values
+
+
+GEAR = _gear_table()
+
+
+def content_hash():
+    return hashlib.blake2b(digest_size=16)
+
+
+class Chunker:
+    """Content-defined chunking with a gear hash over the last WINDOW bytes
+
+    The hash at byte i is sum(GEAR[data[i - k]] << k for k < 32) mod 2**32,
+    so it only depends on the 32 bytes ending at i, and a chunk ends after
+    byte i when its top log2(avg_size) bits are zero, the chunk is at least
+    min_size long, or it reached max_size.
+    """
+
+    def __init__(self, min_size=4096, avg_size=16384, max_size=65536):
+        if not min_size < avg_size < max_size or avg_size & (avg_size - 1):
+            raise ValueError('chunk sizes: min < avg < max, avg a power of 2')
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        bits = avg_size.bit_length() - 1
+        self.mask = ((1 << bits) - 1) << (32 - bits)
+        self.gear = np.array(GEAR, dtype=np.uint32) if np is not None else None
+
+    def params(self):
+        return {'min_size': self.min_size, 'avg_size': self.avg_size, 'max_size': self.max_size}
+
+    def boundaries(self, block, tail):
+        """Offsets in block after which the hash says cut; tail is the
+        (up to WINDOW - 1) bytes before block"""
+        if self.gear is not None:
+            data = np.frombuffer(tail + block, dtype=np.uint8)
+            gear = self.gear[data]
+            hashes = gear.copy()
+            for k in range(1, min(WINDOW, len(data))):
+                hashes[k:] += gear[:-k] << np.uint32(k)
+            ends = np.flatnonzero((hashes[len(tail):] & np.uint32(self.mask)) == 0) + 1
+            return ends.tolist()
+        mask = self.mask
+        gear = GEAR
+        h = 0
+        for byte in tail:
+            h = ((h << 1) + gear[byte]) & 0xFFFFFFFF
+        ends = []
+        for offset, byte in enumerate(block, 1):
+            h = ((h << 1) + gear[byte]) & 0xFFFFFFFF
+            if not h & mask:
+                ends.append(offset)
+        return ends
+
+    def split(self, f):
+        """Yield the chunks (bytes) of a binary file object"""
+        buffer = b''
+        cuts = []
+        tail = b''
+        while True:
+            block = f.read(READ_BLOCK)
+            if block:
+                cuts += [len(buffer) + end for end in self.boundaries(block, tail)]
+                buffer += block
+                tail = buffer[-(WINDOW - 1):]
+            start = 0
+            while len(buffer) - start >= (self.max_size if block else 1):
+                i = bisect.bisect_left(cuts, start + self.min_size)
+                end = cuts[i] if i < len(cuts) and cuts[i] <= start + self.max_size else start + self.max_size
+                end = min(end, len(buffer))
+                yield buffer[start:end]
+                start = end
+            if not block:
+                return
+            buffer = buffer[start:]
+            cuts = [cut - start for cut in cuts if cut > start]
+
+
+class Store:
+    """Chunk store and snapshot manifests under one directory"""
+
+    def __init__(self, path, chunker=None):
+        self.path = path
+        self.chunks_dir = os.path.join(path, 'chunks')
+        self.snapshots_dir = os.path.join(path, 'snapshots')
+        meta_path = os.path.join(path, 'store.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('format') != STORE_FORMAT:
+                raise ValueError(f"{path}: format de dépôt {meta.get('format')} inconnu")
+            # Chunk boundaries must not move between snapshots
+            self.chunker = Chunker(**meta['chunker'])
+        else:
+            self.chunker = chunker or Chunker()
+            os.makedirs(self.chunks_dir, exist_ok=True)
+            os.makedirs(self.snapshots_dir, exist_ok=True)
+            _write_json(meta_path, {'format': STORE_FORMAT, 'chunker': self.chunker.params()})
+        self.lock = threading.Lock()
+        self.known = None
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def load_known(self):
+        self.known = set()
+        if os.path.isdir(self.chunks_dir):
+            for prefix in os.scandir(self.chunks_dir):
+                if prefix.is_dir():
+                    self.known.update(entry.name for entry in os.scandir(prefix.path)
+                                      if not entry.name.endswith('.tmp'))
+        return self.known
+
+    def put(self, digest, data, level):
+        """Store a chunk unless present; returns the bytes written"""
+        with self.lock:
+            if digest in self.known:
+                return 0
+            self.known.add(digest)
+        compressed = zlib.compress(data, level)
+        payload = ZLIB + compressed if len(compressed) < len(data) else STORED + data
+        path = self._chunk_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, path)
+        return len(payload)
+
+    def get(self, digest):
+        with open(self._chunk_path(digest), 'rb') as f:
+            payload = f.read()
+        data = zlib.decompress(payload[1:]) if payload[:1] == ZLIB else payload[1:]
+        if content_hash_of(data) != digest:
+            raise ValueError(f'chunk {digest} corrompu')
+        return data
+
+    def snapshots(self):
+        """Snapshot names, oldest first"""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.snapshots_dir) if name.endswith('.json'))
+
+    def manifest(self, name):
+        if name == 'latest':
+            names = self.snapshots()
+            if not names:
+                raise ValueError('aucun snapshot')
+            name = names[-1]
+        try:
+            with open(os.path.join(self.snapshots_dir, name + '.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f'snapshot {name} introuvable') from None
+
+    def save_manifest(self, manifest):
+        _write_json(os.path.join(self.snapshots_dir, manifest['name'] + '.json'), manifest)
+
+    def prune(self, keep):
+        """Drop all but the keep latest snapshots and the chunks only they used;
+        returns (snapshots removed, chunks removed)"""
+        names = self.snapshots()
+        removed = names[:-keep] if keep else names
+        for name in removed:
+            os.remove(os.path.join(self.snapshots_dir, name + '.json'))
+        used = set()
+        for name in self.snapshots():
+            for entry in self.manifest(name)['files'].values():
+                used.update(digest for digest, _ in entry['chunks'])
+        swept = 0
+        for digest in self.load_known() - used:
+            os.remove(self._chunk_path(digest))
+            swept += 1
+        return len(removed), swept
+
+
+def content_hash_of(data):
+    digest = content_hash()
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _write_json(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def file_hash(path):
+    digest = content_hash()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def backup_file(store, path, st, previous, parent_ns, level):
+    """Manifest entry of one file and how it was obtained:
+    ('unchanged' | 'touched' | 'changed' | 'new', entry, bytes written)"""
+    if previous is not None and previous['size'] == st.st_size and previous['mtime_ns'] == st.st_mtime_ns \
+            and st.st_mtime_ns < parent_ns - RACY_WINDOW_NS:
+        return 'unchanged', previous, 0
+    entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'mode': st.st_mode & 0o7777}
+    if previous is not None and previous['size'] == st.st_size:
+        digest = file_hash(path)
+        if digest == previous['hash']:
+            return 'touched', dict(entry, hash=digest, chunks=previous['chunks']), 0
+    digest = content_hash()
+    chunks = []
+    written = 0
+    with open(path, 'rb') as f:
+        for chunk in store.chunker.split(f):
+            digest.update(chunk)
+            chunk_digest = content_hash_of(chunk)
+            written += store.put(chunk_digest, chunk, level)
+            chunks.append([chunk_digest, len(chunk)])
+    entry.update(hash=digest.hexdigest(), chunks=chunks)
+    return ('changed' if previous is not None else 'new'), entry, written
+
+
+def backup(store, root, jobs, level):
+    started = time.perf_counter()
+    names = store.snapshots()
+    parent = store.manifest(names[-1]) if names else None
+    previous_files = parent['files'] if parent else {}
+    parent_ns = parent['created_ns'] if parent else 0
+    store.load_known()
+    chunks_before = len(store.known)
+
+    exclude = list(EXCLUDE)
+    store_path = os.path.abspath(store.path)
+    if store_path.startswith(os.path.abspath(root) + os.sep):
+        exclude.append(os.path.relpath(store_path, root).replace(os.sep, '/'))
+    files = [(rel, entry.path, entry.stat()) for rel, entry in
+             tree_walk.walk([root], include=('*',), exclude=exclude, gitignore=False)]
+
+    created_ns = time.time_ns()
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {rel: pool.submit(backup_file, store, path, st, previous_files.get(rel), parent_ns, level)
+                   for rel, path, st in files}
+        for rel, future in futures.items():
+            results[rel] = future.result()
+
+    name = time.strftime('%Y%m%d-%H%M%S', time.localtime(created_ns / 1e9))
+    if name in names:
+        name += f'-{created_ns % 10**9:09d}'
+    manifest = {
+        'format': STORE_FORMAT, 'name': name, 'created_ns': created_ns, 'parent': parent['name'] if parent else None,
+        'root': os.path.abspath(root), 'files': {rel: entry for rel, (_, entry, _) in results.items()},
+    }
+    store.save_manifest(manifest)
+
+    counts = dict.fromkeys(('new', 'changed', 'touched', 'unchanged'), 0)
+    for status, _, _ in results.values():
+        counts[status] += 1
+    return {
+        'snapshot': name, 'parent': manifest['parent'], 'files': len(results), **counts,
+        'deleted': len(set(previous_files) - set(results)),
+        'bytes': sum(entry['size'] for _, entry, _ in results.values()),
+        'bytes_read': sum(entry['size'] for status, entry, _ in results.values() if status != 'unchanged'),
+        'new_chunks': len(store.known) - chunks_before,
+        'bytes_written': sum(written for _, _, written in results.values()),
+        'manifest_bytes': os.path.getsize(os.path.join(store.snapshots_dir, name + '.json')),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def restore_file(store, entry, out):
+    """Stream a file's chunks to a binary file object, checking its hash"""
+    digest = content_hash()
+    for chunk_digest, _ in entry['chunks']:
+        data = store.get(chunk_digest)
+        digest.update(data)
+        out.write(data)
+    if digest.hexdigest() != entry['hash']:
+        raise ValueError('contenu restauré différent du snapshot')
+
+
+def restore(store, name, target, only=None):
+    """Restore a snapshot (or one of its files) under target, or to stdout
+    when target is '-'; returns (files, bytes)"""
+    manifest = store.manifest(name)
+    files = manifest['files']
+    if only is not None:
+        only = only.replace(os.sep, '/').removeprefix('./')
+        if only not in files:
+            raise ValueError(f"{only} absent du snapshot {manifest['name']}")
+        files = {only: files[only]}
+    elif target == '-':
+        raise ValueError('--to - ne restaure qu\'un fichier (--file)')
+    for rel, entry in files.items():
+        if target == '-':
+            restore_file(store, entry, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+            continue
+        path = os.path.join(target, *rel.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.restore.tmp'
+        with open(tmp, 'wb') as f:
+            restore_file(store, entry, f)
+        os.chmod(tmp, entry['mode'])
+        os.utime(tmp, ns=(entry['mtime_ns'], entry['mtime_ns']))
+        os.replace(tmp, path)
+    return len(files), sum(entry['size'] for entry in files.values())
+
+
+def _size(n):
+    for unit in ('o', 'Ko', 'Mo'):
+        if n < 1024:
+            return f'{n:.0f} {unit}' if unit == 'o' else f'{n:.1f} {unit}'
+        n /= 1024
+    return f'{n:.1f} Go'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental deduplicated backups of the project tree')
+    parser.add_argument('--store', default=DEFAULT_STORE, help=f'backup store directory (default: {DEFAULT_STORE})')
+    parser.add_argument('--root', default=PROJECT_DIR, help='tree to back up')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='files read and compressed in parallel')
+    parser.add_argument('--level', type=int, default=6, help='zlib compression level')
+    parser.add_argument('--list', action='store_true', help='list the snapshots')
+    parser.add_argument('--restore', metavar='SNAPSHOT', help="snapshot to restore ('latest' for the last one)")
+    parser.add_argument('--file', metavar='PATH', help='restore only this file')
+    parser.add_argument('--to', metavar='DIR', help="restore destination ('-' streams --file to stdout)")
+    parser.add_argument('--prune', type=int, metavar='N', help='keep the N latest snapshots, drop unused chunks')
+    parser.add_argument('--json', metavar='FILE', help='write the backup report as JSON')
+    args = parser.parse_args()
+
+    try:
+        store = Store(args.store)
+        if args.restore:
+            if not args.to:
+                print("❌ --restore demande --to DIR (ou --to - avec --file)")
+                sys.exit(1)
+            files, size = restore(store, args.restore, args.to, args.file)
+            if args.to != '-':
+                print(f"✅ {files} fichier(s) restauré(s) ({_size(size)}) dans {args.to}")
+            return
+        if args.list:
+            names = store.snapshots()
+            print("=" * 80)
+            print(f"SNAPSHOTS ({len(names)}) - {args.store}")
+            print("=" * 80)
+            for name in names:
+                files = store.manifest(name)['files']
+                print(f"   {name}  {len(files):>6} fichiers  {_size(sum(entry['size'] for entry in files.values())):>10}")
+            return
+        if args.prune is not None:
+            removed, swept = store.prune(args.prune)
+            print(f"🧹 {removed} snapshot(s) et {swept} chunk(s) supprimés")
+            return
+        report = backup(store, args.root, max(1, args.jobs), args.level)
+    except (OSError, ValueError, zlib.error) as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
+    print("=" * 80)
+    print(f"SAUVEGARDE {report['snapshot']} -> {args.store}")
+    print("=" * 80)
+    print(f"📁 {report['files']} fichiers ({_size(report['bytes'])}): {report['new']} nouveaux, "
+          f"{report['changed']} modifiés, {report['touched']} touchés sans changement, "
+          f"{report['unchanged']} inchangés, {report['deleted']} supprimés")
+    print(f"📖 lus: {_size(report['bytes_read'])}")
+    print(f"💾 écrits: {report['new_chunks']} chunks, {_size(report['bytes_written'])} "
+          f"+ manifeste {_size(report['manifest_bytes'])}")
+    print(f"⏱️  {report['seconds']:.2f} s" + (f" (parent {report['parent']})" if report['parent'] else ''))
+    print(f"\n📝 Pour restaurer: python3 backup_store.py --store {args.store} --restore {report['snapshot']} "
+          f"--to /destination/path")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Rapport: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark of the fix_* codemods over a process pool
+
+Generates a synthetic corpus (synthetic_pages.py), then runs
+fix_back_buttons and fix_mover_props over it with 1, 2, 4, ... up to --max-jobs
+workers, each time on a fresh copy. Also checks that the printed log and the
+"Fixed X/Y" counts are identical to the serial run.
+
+Usage:
+    python3 benchmark_codemods.py --pages 5000 --max-jobs 8
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import codemod_runner
+import fix_back_buttons
+import fix_mover_props
+import synthetic_pages
+
+CODEMODS = [
+    ('fix_back_buttons', fix_back_buttons.fix_path),
+    ('fix_mover_props', fix_mover_props.fix_file),
+]
+
+
+def job_counts(max_jobs):
+    counts = []
+    jobs = 1
+    while jobs < max_jobs:
+        counts.append(jobs)
+        jobs *= 2
+    counts.append(max_jobs)
+    return counts
+
+
+def run_codemods(corpus_dir, workdir, jobs):
+    """Run every codemod on a fresh copy; return (elapsed, log, fixed counts)"""
+    pages_dir = os.path.join(workdir, 'pages')
+    if os.path.exists(pages_dir):
+        shutil.rmtree(pages_dir)
+    shutil.copytree(corpus_dir, pages_dir)
+    files = sorted(os.path.join(pages_dir, f) for f in os.listdir(pages_dir))
+
+    out = io.StringIO()
+    counts = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        for _, fix in CODEMODS:
+            counts.append(codemod_runner.run(fix, files, jobs))
+    return time.perf_counter() - start, out.getvalue(), counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the fix_* codemods over a process pool')
+    parser.add_argument('--pages', type=int, default=5000)
+    parser.add_argument('--max-jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK CODEMODS ({args.pages} synthetic pages, {os.cpu_count()} CPUs)")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus_dir = os.path.join(workdir, 'corpus')
+        synthetic_pages.generate(corpus_dir, args.pages)
+
+        baseline = None
+        for jobs in job_counts(args.max_jobs):
+            elapsed, log, counts = run_codemods(corpus_dir, workdir, jobs)
+            if baseline is None:
+                baseline = (elapsed, log, counts)
+            same = (log, counts) == baseline[1:]
+            print(f"--jobs {jobs:<3}: {elapsed:7.2f} s   x{baseline[0] / elapsed:5.2f}   "
+                  f"fixed {'+'.join(map(str, counts))}   log {'identique ✓' if same else 'DIFFERENT ✗'}")
+
+
+if __name__ == '__main__':
+    main()
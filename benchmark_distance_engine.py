@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: distance_engine.py route cache and vectorized estimates
+
+Builds a synthetic postal index (--codes centroids over mainland France) and
+two days of --trips quote requests: --popular-share of them between a few
+hundred busy pairs (Zipf-distributed, like Paris→Lyon), the rest between
+random codes. A stand-in router sleeps --latency-ms per call, the cost of one
+calculate-distance round trip. Reports, against one uncached call per quote
+(calculateRealDistance today): router calls, hit rate and time of a cold
+and a warm day through DistanceService. Then times estimate() on
+--estimate-pairs pairs against a per-pair math.* haversine loop.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+import benchmark_suite
+import distance_engine
+
+
+def synthetic_index(codes, rng):
+    numbers = rng.sample(range(1000, 96000), codes)
+    return distance_engine.PostalIndex(numbers, [rng.uniform(42.5, 51) for _ in numbers],
+                                       [rng.uniform(-4.5, 7.5) for _ in numbers])
+
+
+def synthetic_trips(index, busy, trips, popular_share, rng):
+    codes = [f'{code:05d}' for code in index.codes.tolist()]
+    weights = [1 / (rank + 1) for rank in range(len(busy))]
+    result = []
+    for _ in range(trips):
+        if rng.random() < popular_share:
+            from_code, to_code = rng.choices(busy, weights)[0]
+            if rng.random() < 0.5:
+                from_code, to_code = to_code, from_code
+        else:
+            from_code, to_code = rng.choice(codes), rng.choice(codes)
+        result.append((from_code, '', to_code, ''))
+    return result
+
+
+class SlowRouter:
+    """Stand-in for calculate-distance: the index estimate after a fixed delay"""
+
+    def __init__(self, index, latency):
+        self.estimate = distance_engine.EstimateRouter(index)
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, origin, destination):
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.estimate(origin, destination)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the distance engine route cache')
+    parser.add_argument('--codes', type=int, default=6000)
+    parser.add_argument('--trips', type=int, default=20_000, help='quote requests per simulated day')
+    parser.add_argument('--popular-share', type=float, default=0.8)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--jobs', type=int, default=16)
+    parser.add_argument('--estimate-pairs', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        distance_engine.require_numpy()
+    except RuntimeError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    rng = random.Random(args.seed)
+    index = synthetic_index(args.codes, rng)
+    codes = [f'{code:05d}' for code in index.codes.tolist()]
+    busy = [(rng.choice(codes), rng.choice(codes)) for _ in range(300)]
+    days = [synthetic_trips(index, busy, args.trips, args.popular_share, rng) for _ in range(2)]
+    latency = args.latency_ms / 1000
+
+    print("=" * 80)
+    print(f"BENCHMARK DISTANCES ({args.trips} demandes/jour, {args.latency_ms:g} ms par appel, {args.jobs} appels "
+          f"concurrents)")
+    print("=" * 80)
+    print(f"sans cache (1 appel par demande): {args.trips} appels, {args.trips * latency:8.1f} s par jour")
+
+    os.makedirs(benchmark_suite.BENCH_DIR, exist_ok=True)
+    cache_path = os.path.join(benchmark_suite.BENCH_DIR, 'distance-cache.json')
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+    router = SlowRouter(index, latency)
+    results = []
+    for label, trips in (('jour 1, cache vide ', days[0]), ('jour 2, cache chaud', days[1])):
+        cache = distance_engine.RouteCache(cache_path)
+        service = distance_engine.DistanceService(router, cache, index, args.jobs)
+        calls = router.calls
+        started = time.perf_counter()
+        results.append(service.distances(trips))
+        seconds = time.perf_counter() - started
+        cache.save()
+        stats = service.stats.as_dict()
+        print(f"{label}: {router.calls - calls:6} appels, hit {stats['hit_rate']:6.1%} ({stats['hits']:5} cache), "
+              f"{seconds:6.2f} s ({seconds / len(trips) * 1000:.3f} ms/demande, "
+              f"p95 appel {stats['router_latency_ms']['p95']:.0f} ms)")
+
+    estimated = distance_engine.estimate(index, [trip[0] for trip in days[1]], [trip[2] for trip in days[1]])[0]
+    mismatches = sum(1 for (distance, _, _), expected in zip(results[1], estimated.tolist())
+                     if distance != expected)
+
+    n = args.estimate_pairs
+    from_codes = [rng.choice(codes) for _ in range(n)]
+    to_codes = [rng.choice(codes) for _ in range(n)]
+    started = time.perf_counter()
+    distance_engine.estimate(index, from_codes, to_codes)
+    vectorized = time.perf_counter() - started
+
+    centroids = {code: (float(lat), float(lon))
+                 for code, lat, lon in zip(codes, index.latitudes.tolist(), index.longitudes.tolist())}
+    sample = min(n, 200_000)
+    started = time.perf_counter()
+    for from_code, to_code in zip(from_codes[:sample], to_codes[:sample]):
+        lat1, lon1 = map(math.radians, centroids[from_code])
+        lat2, lon2 = map(math.radians, centroids[to_code])
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        round(2 * distance_engine.EARTH_RADIUS_KM * math.asin(math.sqrt(a)) * distance_engine.ROAD_FACTOR, 1)
+    loop = (time.perf_counter() - started) * n / sample
+    print(f"\nestimate() vectorisé : {vectorized:6.2f} s   {n / vectorized:>12,.0f} paires/s")
+    print(f"boucle math.*        : {loop:6.2f} s   {n / loop:>12,.0f} paires/s (extrapolé de {sample})   "
+          f"x{loop / vectorized:.1f}")
+    if mismatches:
+        print(f"\n❌ {mismatches} distance(s) du cache différentes de l'estimation")
+        sys.exit(1)
+    print("\n✅ Distances servies par le cache identiques au routeur")
+
+
+if __name__ == '__main__':
+    main()
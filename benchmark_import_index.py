@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ImportIndex vs the substring checks and re.sub import patches
+
+Over every .ts/.tsx file of src/:
+  - queries: `'X' in content and "from 'Y'" in content` (whole-file scans,
+    as the scripts did) vs one ImportIndex build + set lookups
+  - edits: one re.sub pass over the whole file per added import vs
+    ImportIndex.add + a single header splice
+
+Also reports how many files the two query styles disagree on (substring
+checks also match comments, JSX text and other modules).
+"""
+
+import argparse
+import os
+import re
+import time
+
+import import_index
+import page_engine
+
+QUERIES = [
+    ('useNavigate', 'react-router-dom'),
+    ('useParams', 'react-router-dom'),
+    ('ArrowLeft', 'lucide-react'),
+    ('X', 'lucide-react'),
+    ('useState', 'react'),
+    ('supabase', '../lib/supabase'),
+    ('showToast', '../utils/toast'),
+    ('useAuth', '../contexts/AuthContext'),
+]
+
+
+def load_sources(root):
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            if filename.endswith(('.ts', '.tsx')):
+                with open(os.path.join(dirpath, filename), 'r', encoding='utf-8') as f:
+                    sources.append(f.read())
+    return sources
+
+
+def substring_queries(sources):
+    return [[name in content and f"from '{module}'" in content for name, module in QUERIES]
+            for content in sources]
+
+
+def index_queries(sources):
+    results = []
+    for content in sources:
+        index = import_index.ImportIndex(content)
+        results.append([index.has(name, module) for name, module in QUERIES])
+    return results
+
+
+def regex_edits(sources):
+    for content in sources:
+        if 'ArrowLeft' not in content:
+            content = re.sub(r"(import \{ )([^}]*?)( \} from 'lucide-react';)",
+                             r"\1\2, ArrowLeft\3", content)
+        if 'useNavigate' not in content:
+            content = re.sub(r"import \{([^}]*)\} from 'react-router-dom';",
+                             lambda m: f"import {{{m.group(1)}, useNavigate}} from 'react-router-dom';",
+                             content)
+
+
+def index_edits(sources):
+    for content in sources:
+        index = import_index.ImportIndex(content)
+        index.add('ArrowLeft', 'lucide-react')
+        index.add('useNavigate', 'react-router-dom')
+        index.apply(content)
+
+
+def best(func, sources, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(sources)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ImportIndex on the src/ tree')
+    parser.add_argument('--root', default=os.path.join(page_engine.PROJECT_DIR, 'src'))
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    sources = load_sources(args.root)
+    size = sum(len(content) for content in sources)
+
+    print("=" * 80)
+    print(f"BENCHMARK IMPORT INDEX ({len(sources)} files, {size / 1024:.0f} KB, "
+          f"{len(QUERIES)} queries/file, best of {args.repeat})")
+    print("=" * 80)
+
+    sub_q = best(substring_queries, sources, args.repeat)
+    idx_q = best(index_queries, sources, args.repeat)
+    sub_e = best(regex_edits, sources, args.repeat)
+    idx_e = best(index_edits, sources, args.repeat)
+
+    print(f"Queries, substring scans   : {sub_q * 1000:8.2f} ms")
+    print(f"Queries, ImportIndex       : {idx_q * 1000:8.2f} ms   x{sub_q / idx_q:.2f}")
+    print(f"Edits, re.sub per import   : {sub_e * 1000:8.2f} ms")
+    print(f"Edits, ImportIndex splice  : {idx_e * 1000:8.2f} ms   x{sub_e / idx_e:.2f}")
+
+    disagreements = sum(a != b for a, b in zip(substring_queries(sources), index_queries(sources)))
+    print(f"\nFichiers où les deux méthodes divergent: {disagreements}/{len(sources)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: import_validator.py on a synthetic movers CSV
+
+Writes a MODELE_IMPORT_DEMENAGEURS.csv layout file of --rows rows into .bench/
+(kept between runs): valid SIRETs (Luhn and SIREN keys computed), a share of
+broken emails, SIRETs, phones and postal codes, repeated emails / SIRETs and
+a few quoted fields with `;`, `,` and line breaks. Then validates it
+serially and with --jobs workers, checks that both runs give the same
+outputs and reports rows per minute and the peak memory of the parent.
+"""
+
+import argparse
+import csv
+import filecmp
+import os
+import random
+import resource
+import sys
+
+import benchmark_suite
+import import_validator
+
+CITIES = [('Paris', '75011'), ('Lyon', '69003'), ('Marseille', '13008'), ('Lille', '59000'),
+          ('Bordeaux', '33000'), ('Nantes', '44000'), ('Ajaccio', '20000'), ('Fort-de-France', '97200')]
+# Luhn doubling: 2 * digit, minus 9 above 9
+DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+NAMES = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand', 'Leroy', 'Moreau']
+
+
+def luhn_key(digits, double_even):
+    """Check digit to append so that digits + key passes validateSiret's sums"""
+    total = sum(DOUBLED[digit] if (i % 2 == 0) == double_even else digit
+                for i, digit in enumerate(digits))
+    return (10 - total % 10) % 10
+
+
+def siret(rng):
+    siren = [rng.randint(0, 9) for _ in range(8)]
+    siren.append(luhn_key(siren, double_even=False))
+    body = siren + [rng.randint(0, 9) for _ in range(4)]
+    body.append(luhn_key(body, double_even=True))
+    return ''.join(map(str, body))
+
+
+def synthetic_csv(path, rows, seed=0):
+    rng = random.Random(seed)
+    sirets = []
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(import_validator.LAYOUTS['mover']['columns'])
+        for n in range(rows):
+            name = rng.choice(NAMES)
+            city, postal_code = rng.choice(CITIES)
+            email = f'contact{n}@demenagement-{name.lower()}.fr'
+            number = siret(rng)
+            phone = f'0{rng.choice("1234567")} {rng.randint(10, 99)} {rng.randint(10, 99)} ' \
+                    f'{rng.randint(10, 99)} {rng.randint(10, 99)}'
+            company = f'Déménagements {name}'
+            draw = rng.random()
+            if draw < 0.03:
+                email = email.replace('@', ' at ')
+            elif draw < 0.06:
+                number = number[:-1] + str((int(number[-1]) + 1) % 10)
+            elif draw < 0.08:
+                phone = '12 34'
+            elif draw < 0.09:
+                postal_code = '96000'
+            elif draw < 0.12 and sirets:
+                number = rng.choice(sirets)
+            elif draw < 0.14 and n:
+                email = f'CONTACT{rng.randrange(n)}@demenagement-{rng.choice(NAMES).lower()}.fr'
+            elif draw < 0.15:
+                company = f'{company} ; Fils, "{name}"\nTransports'
+            if len(sirets) < 1000:
+                sirets.append(number)
+            writer.writerow([email, company, number, 'Jean', name, phone,
+                             f'{rng.randint(1, 200)} rue de la Gare', city, postal_code])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the streaming CSV import validator')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jobs', type=int, default=0, help='workers of the parallel run (0 = one per CPU)')
+    parser.add_argument('--chunk-size', type=int, default=import_validator.CHUNK_SIZE)
+    parser.add_argument('--min-rows-per-minute', type=float, default=0,
+                        help='fail if the parallel run is slower than this')
+    args = parser.parse_args()
+
+    os.makedirs(benchmark_suite.BENCH_DIR, exist_ok=True)
+    path = os.path.join(benchmark_suite.BENCH_DIR, f'import-{args.rows}-s{args.seed}.csv')
+    if not os.path.exists(path):
+        synthetic_csv(path, args.rows, args.seed)
+    jobs = args.jobs or os.cpu_count() or 1
+
+    print("=" * 80)
+    print(f"BENCHMARK IMPORT VALIDATOR ({args.rows} lignes, {os.path.getsize(path) / 1e6:.0f} Mo, "
+          f"chunks de {args.chunk_size})")
+    print("=" * 80)
+    reports = {}
+    for label, workers in (('serial', 1), (f'{jobs} worker(s)', jobs)):
+        output_dir = os.path.join(benchmark_suite.BENCH_DIR, f'import-out-{workers}')
+        report = import_validator.run(path, output_dir, jobs=workers, chunk_size=args.chunk_size)
+        reports[workers] = report
+        print(f"{label:<14}: {report.seconds:7.2f} s  {report.rows_per_second * 60:>14,.0f} lignes/min  "
+              f"(acceptées {report.accepted}, rejetées {report.rejected}, "
+              f"doublons {sum(report.duplicates.values())})")
+
+    same = all(filecmp.cmp(os.path.join(reports[1].output_dir, name), os.path.join(reports[jobs].output_dir, name),
+                           shallow=False)
+               for name in ('accepted.csv', 'rejected.csv', 'duplicates.csv'))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nMémoire max du processus principal: {peak:.0f} Mo")
+    if not same:
+        print("❌ Les sorties séquentielle et parallèle diffèrent")
+        sys.exit(1)
+    print("✅ Sorties identiques en séquentiel et en parallèle")
+    rate = reports[jobs].rows_per_second * 60
+    if rate < args.min_rows_per_minute:
+        print(f"❌ {rate:,.0f} lignes/min, moins que {args.min_rows_per_minute:,.0f}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: market_price.price() (NumPy batch) vs price_row() one quote at a time
+
+Builds --rows synthetic quote requests as columns (the shape load_csv()
+returns: lists with NULLs, services lists, city and postal code texts) and
+times the batch engine on all of them, best of --repeat: once on the lists,
+once with the numeric and boolean columns already typed arrays (what a
+columnar Parquet read gives). The row engine, the same computation as the
+TS function called per quote, is timed on --row-sample rows and
+extrapolated. The engines must agree on the sample.
+"""
+
+import argparse
+import math
+import sys
+import time
+
+import check_market_price
+import market_price
+
+
+def synthetic_columns(rows, seed):
+    np = market_price.np
+    rng = np.random.default_rng(seed)
+
+    def pick(values, nulls=0.0):
+        chosen = np.array(values, dtype=object)[rng.integers(0, len(values), rows)]
+        if nulls:
+            chosen[rng.random(rows) < nulls] = None
+        return chosen.tolist()
+
+    def numbers(low, high, share, decimals=1):
+        values = np.round(rng.uniform(low, high, rows), decimals).astype(object)
+        values[rng.random(rows) >= share] = None
+        return values.tolist()
+
+    services = [list(combo) for combo in ([], ['packing'], ['piano', 'storage'], ['Garde-meubles'],
+                                          ['Emballage/Déballage', 'Fourniture de cartons'], ['cleaning'])]
+    return {
+        'volume_m3': numbers(0, 120, 0.4),
+        'surface_m2': numbers(10, 200, 0.3),
+        'distance_km': numbers(0, 1200, 0.8, 2),
+        'floor_from': pick([0, 1, 2, 3, 5, 8], nulls=0.05),
+        'floor_to': pick([0, 1, 2, 4, 6], nulls=0.05),
+        'elevator_from': pick([True, False], nulls=0.1),
+        'elevator_to': pick([True, False], nulls=0.1),
+        'furniture_lift_needed_departure': (rng.random(rows) < 0.1).tolist(),
+        'furniture_lift_needed_arrival': (rng.random(rows) < 0.1).tolist(),
+        'accepts_groupage': (rng.random(rows) < 0.2).tolist(),
+        'home_size': pick(check_market_price.HOME_SIZES),
+        'from_postal_code': pick(check_market_price.POSTAL_CODES),
+        'to_postal_code': pick(check_market_price.POSTAL_CODES),
+        'from_city': pick(check_market_price.CITIES),
+        'to_city': pick(check_market_price.CITIES),
+        'services_needed': pick(services),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the batch market price engine')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--row-sample', type=int, default=50_000,
+                        help='rows priced one at a time by price_row (extrapolated)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        market_price.require_numpy()
+    except RuntimeError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    columns = synthetic_columns(args.rows, args.seed)
+
+    np = market_price.np
+    typed = dict(columns)
+    for name in market_price.NUMERIC_COLUMNS:
+        typed[name] = market_price._numbers(columns[name])
+    for name in market_price.BOOLEAN_COLUMNS:
+        typed[name] = np.array([value is True for value in columns[name]])
+
+    def best(batch_columns):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = market_price.price(batch_columns)
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    batch_time, batch = best(columns)
+    typed_time, typed_batch = best(typed)
+
+    sample = min(args.row_sample, args.rows)
+    rows = [{name: values[i] for name, values in columns.items()} for i in range(sample)]
+    start = time.perf_counter()
+    totals = [market_price.price_row(row)['total_market_price'] for row in rows]
+    row_time = (time.perf_counter() - start) * args.rows / sample
+
+    mismatches = sum(1 for i, total in enumerate(totals)
+                     for result in (batch, typed_batch)
+                     if not (total == result['total_market_price'][i]
+                             or (math.isnan(total) and math.isnan(result['total_market_price'][i]))))
+
+    print("=" * 80)
+    print(f"BENCHMARK PRIX MARCHÉ ({args.rows} demandes, best of {args.repeat})")
+    print("=" * 80)
+    print(f"price_row, une par une : {row_time:8.2f} s   {args.rows / row_time:>12,.0f} lignes/s "
+          f"(extrapolé de {sample})")
+    print(f"price, lot NumPy       : {batch_time:8.2f} s   {args.rows / batch_time:>12,.0f} lignes/s   "
+          f"x{row_time / batch_time:.1f}")
+    print(f"price, colonnes typées : {typed_time:8.2f} s   {args.rows / typed_time:>12,.0f} lignes/s   "
+          f"x{row_time / typed_time:.1f}")
+    if mismatches:
+        print(f"\n❌ {mismatches} total(aux) différent(s) entre les deux moteurs")
+        sys.exit(1)
+    print(f"\n✅ Moteurs identiques sur {sample} lignes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: mover_matching.MatchIndex vs the all-pairs trigger scans
+
+Builds the synthetic snapshot of check_mover_matching.py at scale (--movers
+movers, --missions missions and accepted moves) and a day of --requests new
+quote requests. Times the index build, match_batch() on the whole day and
+match() one request at a time (what a trigger would call), against
+reference_matches() (every mover scanned per request, as the triggers do)
+on --sample requests, extrapolated. Both must give the same matches on the
+sample.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import check_mover_matching
+import mover_matching
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the mover matching index')
+    parser.add_argument('--movers', type=int, default=10_000)
+    parser.add_argument('--missions', type=int, default=2_000, help='accepted missions and accepted moves')
+    parser.add_argument('--requests', type=int, default=100_000)
+    parser.add_argument('--sample', type=int, default=200, help='requests matched by the all-pairs scan')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        mover_matching.require_numpy()
+    except RuntimeError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    rng = random.Random(args.seed)
+    snapshot = check_mover_matching.synthetic_snapshot(args.movers, args.missions, rng)
+    requests = [mover_matching.Request(row) for row in check_mover_matching.synthetic_requests(args.requests, rng)]
+    today = check_mover_matching.TODAY.toordinal()
+
+    started = time.perf_counter()
+    index = mover_matching.MatchIndex(snapshot, today)
+    build = time.perf_counter() - started
+
+    counts = dict.fromkeys((mover_matching.ZONE, mover_matching.RETURN_TRIP, mover_matching.NEARBY), 0)
+    started = time.perf_counter()
+    for match in index.match_batch(requests):
+        for kind in counts:
+            counts[kind] += len(match[kind])
+    batch = time.perf_counter() - started
+
+    sample = requests[:min(args.sample, len(requests))]
+    started = time.perf_counter()
+    single = [index.match(request) for request in sample]
+    one_by_one = (time.perf_counter() - started) / len(sample)
+
+    missions = snapshot.missions(today)
+    started = time.perf_counter()
+    expected = [mover_matching.reference_matches(snapshot, request, today, missions) for request in sample]
+    scan = (time.perf_counter() - started) / len(sample)
+
+    mismatches = 0
+    for match, reference in zip(single, expected):
+        nearby = sorted((mover_id, mission_id) for mover_id, mission_id, _ in match[mover_matching.NEARBY])
+        if (sorted(match[mover_matching.ZONE]) != reference[mover_matching.ZONE]
+                or sorted(match[mover_matching.RETURN_TRIP]) != reference[mover_matching.RETURN_TRIP]
+                or nearby != reference[mover_matching.NEARBY]):
+            mismatches += 1
+
+    n = len(requests)
+    print("=" * 80)
+    print(f"BENCHMARK APPARIEMENT ({args.movers} déménageurs × {n} demandes, {len(index.grid)} missions à venir)")
+    print("=" * 80)
+    print(f"index                 : {build:8.2f} s")
+    print(f"match_batch (journée) : {batch:8.2f} s   {n / batch:>10,.0f} demandes/s")
+    print(f"match, une par une    : {one_by_one * n:8.2f} s   {1 / one_by_one:>10,.0f} demandes/s "
+          f"(extrapolé de {len(sample)})")
+    print(f"scan tous les couples : {scan * n:8.2f} s   {1 / scan:>10,.0f} demandes/s "
+          f"(extrapolé de {len(sample)})   x{scan * n / batch:.0f}")
+    print(f"\ncorrespondances: zones {counts[mover_matching.ZONE]:,}, trajets retour "
+          f"{counts[mover_matching.RETURN_TRIP]:,}, missions proches {counts[mover_matching.NEARBY]:,}")
+    if mismatches:
+        print(f"\n❌ {mismatches} demande(s) où l'index et le scan diffèrent")
+        sys.exit(1)
+    print(f"✅ Index et scan identiques sur {len(sample)} demandes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: page scripts run one after another vs a single page_engine pass
+
+Every run works on a fresh copy of src/pages/ (the codemods rewrite files),
+so both sides do exactly the same work. Two comparisons are made:
+
+  - processes: `python3 <script>.py` x5 (the pre-deploy chain) vs one
+    `python3 page_engine.py`
+  - in-process: one engine pass per rule vs one pass with all rules
+
+The checks are also timed against page_cache, cold (empty cache) and warm
+(no file changed since the previous run).
+
+Exits with status 1 if the process speedup is below --min-speedup.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import page_cache
+import page_engine
+
+
+def fresh_copy(src_dir, workdir):
+    pages_dir = os.path.join(workdir, 'pages')
+    if os.path.exists(pages_dir):
+        shutil.rmtree(pages_dir)
+    shutil.copytree(src_dir, pages_dir)
+    return pages_dir
+
+
+def run_script(script, pages_dir):
+    subprocess.run(
+        [sys.executable, os.path.join(page_engine.PROJECT_DIR, script), '--pages-dir', pages_dir, '--no-cache'],
+        check=True, stdout=subprocess.DEVNULL
+    )
+
+
+def time_best(func, src_dir, workdir, repeat):
+    """Best wall time of func(pages_dir) over repeat runs on fresh copies"""
+    best = None
+    for _ in range(repeat):
+        pages_dir = fresh_copy(src_dir, workdir)
+        start = time.perf_counter()
+        func(pages_dir)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def time_cache(pages_dir, cache_path, repeat):
+    """Best cold and warm wall times of the cacheable checks on pages_dir"""
+    checks = [rule for rule in page_engine.load_rules() if rule.cacheable]
+    cold = warm = None
+    for _ in range(repeat):
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        start = time.perf_counter()
+        page_engine.run(checks, pages_dir, page_cache.PageCache(cache_path))
+        elapsed = time.perf_counter() - start
+        cold = elapsed if cold is None else min(cold, elapsed)
+
+        start = time.perf_counter()
+        page_engine.run(checks, pages_dir, page_cache.PageCache(cache_path))
+        elapsed = time.perf_counter() - start
+        warm = elapsed if warm is None else min(warm, elapsed)
+    return cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the single-pass page engine')
+    parser.add_argument('--pages-dir', default=page_engine.PAGES_DIR)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-speedup', type=float, default=2.0,
+                        help='fail if the process speedup is below this factor')
+    args = parser.parse_args()
+
+    scripts = [name + '.py' for name in page_engine.RULE_MODULES]
+    rules = page_engine.load_rules()
+
+    def scripts_sequential(pages_dir):
+        for script in scripts:
+            run_script(script, pages_dir)
+
+    def engine_process(pages_dir):
+        run_script('page_engine.py', pages_dir)
+
+    def rules_sequential(pages_dir):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for rule in rules:
+                page_engine.run([rule], pages_dir)
+
+    def rules_single_pass(pages_dir):
+        with contextlib.redirect_stdout(io.StringIO()):
+            page_engine.run(rules, pages_dir)
+
+    pages = page_engine.list_pages(args.pages_dir)
+    print("=" * 80)
+    print(f"BENCHMARK PAGE ENGINE ({len(pages)} pages, {len(rules)} rules, best of {args.repeat})")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        seq_proc = time_best(scripts_sequential, args.pages_dir, workdir, args.repeat)
+        one_proc = time_best(engine_process, args.pages_dir, workdir, args.repeat)
+        seq_rules = time_best(rules_sequential, args.pages_dir, workdir, args.repeat)
+        one_rules = time_best(rules_single_pass, args.pages_dir, workdir, args.repeat)
+        cold, warm = time_cache(fresh_copy(args.pages_dir, workdir),
+                                os.path.join(workdir, 'cache.json'), args.repeat)
+
+    proc_speedup = seq_proc / one_proc
+    print(f"Scripts one after another : {seq_proc * 1000:8.1f} ms")
+    print(f"page_engine.py (1 pass)   : {one_proc * 1000:8.1f} ms   x{proc_speedup:.2f}")
+    print(f"In-process, pass per rule : {seq_rules * 1000:8.1f} ms")
+    print(f"In-process, single pass   : {one_rules * 1000:8.1f} ms   x{seq_rules / one_rules:.2f}")
+    print(f"Checks, cold cache        : {cold * 1000:8.1f} ms")
+    print(f"Checks, warm cache        : {warm * 1000:8.1f} ms   x{cold / warm:.2f}")
+
+    if proc_speedup < args.min_speedup:
+        print(f"\n❌ Speedup x{proc_speedup:.2f} below required x{args.min_speedup:.2f}")
+        sys.exit(1)
+    print(f"\n✅ Speedup x{proc_speedup:.2f} (required x{args.min_speedup:.2f})")
+
+
+if __name__ == '__main__':
+    main()
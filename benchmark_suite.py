@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Scalability benchmark of every page script on synthetic corpora
+
+For each corpus size (100, 1k, 10k and 50k pages by default, generated once
+with synthetic_pages.py and kept in .bench/), every script is timed:
+
+  - end to end: `python3 <script>.py --pages-dir ...` in a subprocess, the
+    scripts chained in pre-deploy order on the same copy of the corpus
+    (plus one page_engine.py pass and one apply_codemods.py batch, each on
+    its own copy)
+  - per phase, in-process, over the same chain: listing (target files),
+    read, match (rule / plan_edits), rewrite (apply_edits) and write
+    (atomic write of the changed pages)
+
+Results go to a JSON file (--output) that can be kept per commit. With
+--compare BASELINE.json every timing is checked against the baseline and the
+script exits with status 1 if one is more than --threshold slower (timings
+under --min-seconds are too noisy to compare). The per-page cost of each
+script (in-process phases, or end to end for page_engine.py and
+apply_codemods.py) is also compared between the smallest and the largest
+corpus, to show where a script stops scaling linearly.
+
+Usage:
+    python3 benchmark_suite.py --sizes 100,1000 --output bench.json
+    python3 benchmark_suite.py --compare bench.json --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+import edit_plan
+import page_engine
+import synthetic_pages
+
+BENCH_DIR = os.path.join(page_engine.PROJECT_DIR, '.bench')
+
+# Pre-deploy order: each script runs on the output of the previous one
+SCRIPTS = [
+    'fix_back_buttons',
+    'fix_all_props',
+    'fix_mover_props',
+    'fix_navigate_placement',
+    'add_logo_correctly',
+    'add_back_buttons_where_needed',
+    'check_navigate_declaration',
+    'verify_navigation',
+]
+
+PHASES = ['listing', 'read', 'match', 'rewrite', 'write']
+
+
+def corpus(size, seed):
+    """Directory of the cached synthetic corpus of size pages"""
+    directory = os.path.join(BENCH_DIR, f'corpus-{size}-s{seed}')
+    marker = os.path.join(directory, '.complete')
+    if not os.path.exists(marker):
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        start = time.perf_counter()
+        synthetic_pages.generate(directory, size, seed)
+        open(marker, 'w').close()
+        print(f"   corpus {size} pages généré en {time.perf_counter() - start:.1f}s")
+    return directory
+
+
+def fresh_copy(src_dir, workdir):
+    """Copy src_dir to workdir/src/pages and return the pages directory
+
+    Files are hard-linked: every script writes through edit_plan.atomic_write
+    (temp file + rename), so the corpus itself is never modified and a 50k
+    page copy costs no disk space.
+    """
+    if os.path.exists(workdir):
+        shutil.rmtree(workdir)
+    pages_dir = os.path.join(workdir, 'src', 'pages')
+    shutil.copytree(src_dir, pages_dir, copy_function=os.link,
+                    ignore=shutil.ignore_patterns('.complete'))
+    return pages_dir
+
+
+def command(script, pages_dir):
+    path = os.path.join(page_engine.PROJECT_DIR, script + '.py')
+    if script == 'apply_codemods':
+        return [sys.executable, path, '--project-dir', os.path.dirname(os.path.dirname(pages_dir))]
+    if script == 'page_engine' or hasattr(__import__(script), 'RULE'):
+        return [sys.executable, path, '--pages-dir', pages_dir, '--no-cache']
+    return [sys.executable, path, '--pages-dir', pages_dir]
+
+
+def time_command(script, pages_dir):
+    start = time.perf_counter()
+    subprocess.run(command(script, pages_dir), check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def planner(module, pages_dir):
+    """Target paths of a script over pages_dir and its per-file match function
+
+    The match function returns the planned edits of a codemod, or None for a
+    read-only check (run through its rule).
+    """
+    if module.__name__ == 'fix_all_props':
+        configs = {fix_config['file']: fix_config for fix_config in module.rebase(module.fixes, pages_dir)}
+        return list(configs), lambda path, content: module.config_edits(configs[path], content)
+
+    filenames = page_engine.list_pages(pages_dir)
+    rule = getattr(module, 'RULE', None)
+    if rule is not None:
+        filenames = [f for f in filenames if rule.applies_to(f)]
+    paths = [os.path.join(pages_dir, f) for f in filenames]
+
+    if hasattr(module, 'plan_edits'):
+        return paths, module.plan_edits
+
+    def check(path, content):
+        rule.process(page_engine.Page(path, content))
+    return paths, check
+
+
+def time_phases(module, pages_dir):
+    """Wall time of each phase of one script over pages_dir, in-process"""
+    phases = dict.fromkeys(PHASES, 0.0)
+    clock = time.perf_counter
+
+    start = clock()
+    paths, match = planner(module, pages_dir)
+    phases['listing'] = clock() - start
+
+    for path in paths:
+        start = clock()
+        try:
+            original = edit_plan.read_text(path)
+        except FileNotFoundError:
+            continue
+        read = clock()
+        edits = match(path, original)
+        matched = clock()
+        phases['read'] += read - start
+        phases['match'] += matched - read
+        if edits is None:
+            continue
+
+        content = edit_plan.apply_edits(original, edits)
+        rewritten = clock()
+        edit_plan.write_if_changed(path, original, content)
+        phases['rewrite'] += rewritten - matched
+        phases['write'] += clock() - rewritten
+    return phases
+
+
+def bench_size(size, args):
+    src_dir = corpus(size, args.seed)
+    workdir = os.path.join(BENCH_DIR, 'work')
+    results = {}
+
+    for _ in range(args.repeat):
+        pages_dir = fresh_copy(src_dir, workdir)
+        for script in SCRIPTS:
+            elapsed = time_command(script, pages_dir)
+            entry = results.setdefault(script, {})
+            entry['e2e'] = min(entry.get('e2e', elapsed), elapsed)
+
+        for script in ('page_engine', 'apply_codemods'):
+            pages_dir = fresh_copy(src_dir, workdir)
+            elapsed = time_command(script, pages_dir)
+            entry = results.setdefault(script, {})
+            entry['e2e'] = min(entry.get('e2e', elapsed), elapsed)
+
+        pages_dir = fresh_copy(src_dir, workdir)
+        for script in SCRIPTS:
+            phases = time_phases(__import__(script), pages_dir)
+            entry = results[script]
+            for phase, elapsed in phases.items():
+                entry[phase] = min(entry.get(phase, elapsed), elapsed)
+
+    shutil.rmtree(workdir)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=page_engine.PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_size(size, results):
+    print(f"\n📄 {size} pages (phases en ms)")
+    print(f"{'script':32} {'e2e':>9} {'µs/page':>9} " + ' '.join(f'{phase:>9}' for phase in PHASES))
+    for script, entry in results.items():
+        phases = ' '.join(f"{entry[phase] * 1000:9.1f}" if phase in entry else f"{'-':>9}"
+                          for phase in PHASES)
+        print(f"{script:32} {entry['e2e']:8.2f}s {entry['e2e'] / size * 1e6:9.0f} {phases}")
+
+
+def cost(entry):
+    """In-process time of a script if its phases were timed (no interpreter
+    startup, which dominates the small corpora), end-to-end time otherwise"""
+    if 'read' in entry:
+        return sum(entry[phase] for phase in PHASES)
+    return entry['e2e']
+
+
+def scaling(report):
+    """(script, smallest size, largest size, per-page cost ratio) of each script"""
+    sizes = sorted(report['results'], key=int)
+    if len(sizes) < 2:
+        return []
+    small, large = sizes[0], sizes[-1]
+    rows = []
+    for script, entry in report['results'][large].items():
+        if script not in report['results'][small]:
+            continue
+        per_page_small = cost(report['results'][small][script]) / int(small)
+        per_page_large = cost(entry) / int(large)
+        rows.append((script, small, large, per_page_large / per_page_small))
+    return rows
+
+
+def compare(baseline, report, threshold, min_seconds):
+    """Return the (size, script, metric, old, new) timings that regressed"""
+    regressions = []
+    for size, scripts in report['results'].items():
+        for script, entry in scripts.items():
+            old_entry = baseline['results'].get(size, {}).get(script, {})
+            for metric, new in entry.items():
+                old = old_entry.get(metric)
+                if old is None or max(old, new) < min_seconds:
+                    continue
+                if new > old * (1 + threshold):
+                    regressions.append((size, script, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every page script on synthetic corpora')
+    parser.add_argument('--sizes', default='100,1000,10000,50000',
+                        help='comma-separated corpus sizes (default: 100,1000,10000,50000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help='keep the best of N runs')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', metavar='BASELINE', help='results JSON of a previous commit')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown against the baseline (default: 0.2 = +20%%)')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='ignore timings shorter than this in the comparison')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    os.makedirs(BENCH_DIR, exist_ok=True)
+
+    print("=" * 80)
+    print(f"BENCHMARK SUITE ({', '.join(map(str, sizes))} pages, best of {args.repeat})")
+    print("=" * 80)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': {},
+    }
+    for size in sizes:
+        results = bench_size(size, args)
+        report['results'][str(size)] = results
+        print_size(size, results)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Résultats écrits dans {args.output}")
+
+    rows = scaling(report)
+    if rows:
+        print(f"\n📈 Coût par page, {rows[0][2]} vs {rows[0][1]} pages:")
+        for script, _, _, ratio in rows:
+            flag = '⚠️ ' if ratio > 1 + args.threshold else '✓ '
+            print(f"   {flag}{script:32} x{ratio:.2f}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold, args.min_seconds)
+        print(f"\n🔍 Comparaison avec {args.compare} (commit {baseline['meta'].get('commit')}, "
+              f"seuil +{args.threshold:.0%})")
+        for size, script, metric, old, new in regressions:
+            print(f"   ❌ {size} pages, {script} {metric}: {old * 1000:.1f} ms → {new * 1000:.1f} ms "
+                  f"(+{(new / old - 1):.0%})")
+        if regressions:
+            print(f"\n❌ {len(regressions)} régression(s)")
+            sys.exit(1)
+        print("   ✓ Aucune régression")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tsx_scanner vs the former DOTALL regexes, including pathological inputs
+
+Compares, on the largest real page and on generated worst cases of growing
+size, the time to locate:
+  - the back-button insertion point (add_back_buttons_where_needed.py)
+  - the onBack Props blocks (fix_mover_props.py)
+
+The regexes grow quadratically on the pathological inputs (many candidate
+starts, no match), the scanner stays linear.
+"""
+
+import argparse
+import os
+import re
+import time
+
+import add_back_buttons_where_needed
+import fix_mover_props
+import page_engine
+import tsx_scanner
+
+BACK_BUTTON_REGEX = re.compile(
+    r'(</button>\s*(?:<div[^>]*inset-0[^>]*>.*?</div>\s*)?<div[^>]*relative[^>]*>\s*)', re.DOTALL)
+PROPS_TYPE_REGEX = re.compile(r'type\s+\w+Props\s*=\s*\{[^}]*onBack[^}]*\};\s*\n', re.DOTALL)
+
+
+def no_overlay_close(size):
+    """Logo buttons followed by an overlay that is never closed"""
+    head = "export function P() {\n  return (\n    <div>\n"
+    unit = '      <button onClick={() => navigate(\'/\')}>Logo</button>\n      <div className="absolute inset-0">\n'
+    return head + unit * size
+
+
+def unterminated_props(size):
+    """A Props type mentioning onBack on every line and never closed"""
+    return "type PageProps = {\n" + "  onBack: () => void;\n" * size
+
+
+def timed(func, content, repeat=3):
+    best = None
+    for _ in range(repeat):
+        tsx_scanner.scan.cache_clear()
+        start = time.perf_counter()
+        func(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def row(label, content, regex_func, scanner_func):
+    regex_time = timed(regex_func, content)
+    scanner_time = timed(scanner_func, content)
+    print(f"{label:<34} {len(content) / 1024:8.0f} KB  regex {regex_time * 1000:9.1f} ms"
+          f"   scanner {scanner_time * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tsx_scanner against the DOTALL regexes')
+    parser.add_argument('--sizes', default='250,500,1000,2000',
+                        help='comma-separated repetition counts for the pathological inputs')
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    back_regex = lambda content: BACK_BUTTON_REGEX.search(content)
+    back_scanner = add_back_buttons_where_needed.find_back_button_position
+    props_regex = lambda content: PROPS_TYPE_REGEX.search(content)
+    props_scanner = fix_mover_props.props_edits
+
+    print("=" * 80)
+    print("BENCHMARK TSX SCANNER")
+    print("=" * 80)
+
+    largest = max(page_engine.list_pages(),
+                  key=lambda f: os.path.getsize(os.path.join(page_engine.PAGES_DIR, f)))
+    with open(os.path.join(page_engine.PAGES_DIR, largest), 'r', encoding='utf-8') as f:
+        content = f.read()
+    print(f"\n📄 {largest}")
+    row('back button', content, back_regex, back_scanner)
+    row('onBack Props', content, props_regex, props_scanner)
+
+    print("\n💣 Overlay jamais fermé (back button)")
+    for size in sizes:
+        row(f'{size} logo buttons', no_overlay_close(size), back_regex, back_scanner)
+
+    print("\n💣 Props onBack sans accolade fermante")
+    for size in sizes:
+        row(f'{size} onBack lines', unterminated_props(size), props_regex, props_scanner)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Behaviour check: distance_engine.RouteCache and DistanceService with a stub router
+
+A StubRouter stands in for calculate-distance: it answers instantly from the
+pair, counts its calls and fails on demand. Checked, on a temporary cache
+file:
+
+  - (from, to) normalization: A→B, B→A, ' 75 011', 75011.0 and 1000 (Excel
+    dropped the 0) share one cache entry and one router call
+  - hit / miss counts of random batches against an independent count of the
+    distinct pairs, first on an empty cache then on the warm one
+  - router failures: not cached, asked again next batch
+  - TTL expiry: entries older than ttl are routed again and counted expired
+  - LRU eviction beyond max_entries, a read refreshing its entry
+  - persistence: save() then a fresh RouteCache on the same file serves
+    every pair from the cache
+
+NumPy is not needed: DistanceService without a postal index never estimates.
+
+Usage:
+    python3 check_distance_engine.py
+    python3 check_distance_engine.py --trips 20000 --codes 300 --seed 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import distance_engine
+
+
+class StubRouter:
+    """(origin, destination) -> deterministic (distance_km, duration_min); RouterError for codes in failing"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, origin, destination):
+        self.calls.append((origin[0], destination[0]))
+        if origin[0] in self.failing or destination[0] in self.failing:
+            raise distance_engine.RouterError(f"échec simulé: {origin[0]} / {destination[0]}")
+        return self.distance(origin[0], destination[0]), 60.0
+
+    @staticmethod
+    def distance(from_code, to_code):
+        return float(abs(int(from_code) - int(to_code)) % 1000 + 1)
+
+
+def synthetic_trips(count, codes, rng):
+    pool = [f'{rng.randint(1000, 95999):05d}' for _ in range(codes)]
+    trips = []
+    for _ in range(count):
+        from_code, to_code = rng.choice(pool), rng.choice(pool)
+        if rng.random() < 0.1:
+            from_code = int(from_code)
+        if rng.random() < 0.05:
+            to_code = f'{to_code[:2]} {to_code[2:]}'
+        if rng.random() < 0.02:
+            to_code = rng.choice(['', None, '7501', 'Paris'])
+        trips.append((from_code, 'Ville', to_code, 'Ville'))
+    return trips
+
+
+def _expected_pairs(trips):
+    """Distinct sorted (from, to) pairs and the count of invalid trips, without pair_key()"""
+    pairs, invalid = set(), 0
+    for from_code, _, to_code, _ in trips:
+        codes = []
+        for value in (from_code, to_code):
+            text = ''.join(str(value if value is not None else '').split())
+            codes.append(text.zfill(5) if text.isdigit() and 4 <= len(text) <= 5 else None)
+        if None in codes:
+            invalid += 1
+        else:
+            pairs.add(tuple(sorted(codes)))
+    return pairs, invalid
+
+
+def check_normalization(path, failures):
+    cache = distance_engine.RouteCache(path)
+    router = StubRouter()
+    service = distance_engine.DistanceService(router, cache, jobs=4)
+    results = service.distances([
+        ('75011', 'Paris', '69001', 'Lyon'),
+        ('69001', 'Lyon', '75011', 'Paris'),
+        (' 75 011', '', 69001.0, ''),
+        ('75011.0', '', '69 001', ''),
+        (1000, 'Bourg-en-Bresse', '01000', 'Bourg-en-Bresse'),
+        ('01000', '', '1000', ''),
+    ])
+    if len(router.calls) != 2:
+        failures.append(f"normalisation: {len(router.calls)} appels au routeur au lieu de 2 ({router.calls})")
+    if sorted(cache.entries) != ['01000-01000', '69001-75011']:
+        failures.append(f"normalisation: clés en cache {sorted(cache.entries)}")
+    if len({result[:2] for result in results[:4]}) != 1:
+        failures.append(f"normalisation: A→B et B→A diffèrent: {results[:4]}")
+    stats = service.stats.as_dict()
+    if (stats['hits'], stats['coalesced'], stats['router_calls']) != (0, 4, 2):
+        failures.append(f"normalisation: stats {stats}")
+
+
+def check_hit_counts(path, trips, failures):
+    pairs, invalid = _expected_pairs(trips)
+    cache = distance_engine.RouteCache(path)
+    router = StubRouter()
+    service = distance_engine.DistanceService(router, cache, jobs=8)
+    results = service.distances(trips)
+    stats = service.stats.as_dict()
+    expected = {'pairs': len(trips), 'invalid': invalid, 'hits': 0, 'router_calls': len(pairs),
+                'coalesced': len(trips) - invalid - len(pairs)}
+    actual = {name: stats[name] for name in expected}
+    if actual != expected:
+        failures.append(f"cache vide: {actual} au lieu de {expected}")
+    if len(router.calls) != len(pairs) or {tuple(sorted(call)) for call in router.calls} != pairs:
+        failures.append(f"cache vide: {len(router.calls)} appels pour {len(pairs)} paires distinctes")
+    for trip, (distance, _, source) in zip(trips, results):
+        key = distance_engine.pair_key(trip[0], trip[2])
+        if key is None:
+            if source is not None:
+                failures.append(f"cache vide: {trip} sans code valide servi par {source}")
+        elif source != 'router' or distance != StubRouter.distance(*key.split('-')):
+            failures.append(f"cache vide: {trip} -> {distance} ({source})")
+            break
+
+    warm = distance_engine.DistanceService(StubRouter(), cache, jobs=8)
+    results = warm.distances(trips)
+    stats = warm.stats.as_dict()
+    if stats['router_calls'] or stats['hits'] != len(trips) - invalid or stats['hit_rate'] != 1.0:
+        failures.append(f"cache chaud: {stats['router_calls']} appels, {stats['hits']} hits "
+                        f"pour {len(trips) - invalid} trajets valides, taux {stats['hit_rate']}")
+    if any(source not in ('cache', None) for _, _, source in results):
+        failures.append("cache chaud: des trajets ne sont pas servis par le cache")
+    return cache
+
+
+def check_errors(path, failures):
+    cache = distance_engine.RouteCache(path)
+    trips = [('13001', '', '75001', ''), ('13001', '', '06000', '')]
+    service = distance_engine.DistanceService(StubRouter(failing={'06000'}), cache)
+    results = service.distances(trips)
+    stats = service.stats.as_dict()
+    if results[1] != (None, None, None) or (stats['router_calls'], stats['router_errors']) != (2, 1):
+        failures.append(f"erreur du routeur: {results}, {stats}")
+    if '06000-13001' in cache.entries:
+        failures.append("erreur du routeur: l'échec est en cache")
+    retry = StubRouter()
+    distance_engine.DistanceService(retry, cache).distances(trips)
+    if retry.calls != [('13001', '06000')]:
+        failures.append(f"erreur du routeur: nouvel essai {retry.calls} au lieu de la seule paire en échec")
+
+
+def check_ttl(path, failures):
+    ttl = 3600
+    cache = distance_engine.RouteCache(path, ttl=ttl)
+    now = time.time()
+    cache.put('44000-75001', 1.0, 1.0, now - ttl - 60)
+    cache.put('33000-75001', 2.0, 2.0, now - ttl + 600)
+    router = StubRouter()
+    service = distance_engine.DistanceService(router, cache)
+    results = service.distances([('75001', '', '44000', ''), ('75001', '', '33000', '')])
+    if router.calls != [('75001', '44000')] or cache.expired != 1:
+        failures.append(f"TTL: appels {router.calls}, {cache.expired} expirés au lieu de 1")
+    if [source for _, _, source in results] != ['router', 'cache'] or results[1][0] != 2.0:
+        failures.append(f"TTL: {results}")
+    if cache.entries['44000-75001'][2] < now - 1:
+        failures.append("TTL: l'entrée expirée n'a pas été renouvelée")
+
+
+def check_lru(path, failures):
+    cache = distance_engine.RouteCache(path, max_entries=3)
+    router = StubRouter()
+    service = distance_engine.DistanceService(router, cache, jobs=1)
+    service.distances([('75001', '', code, '') for code in ('13001', '69001', '31000')])
+    service.distances([('13001', '', '75001', '')])  # refreshes 13001-75001
+    service.distances([('75001', '', '59000', '')])
+    if sorted(cache.entries) != ['13001-75001', '31000-75001', '59000-75001'] or cache.evicted != 1:
+        failures.append(f"LRU: {sorted(cache.entries)}, {cache.evicted} évincé(s) au lieu de 69001-75001")
+    calls = len(router.calls)
+    service.distances([('69001', '', '75001', '')])
+    if len(router.calls) != calls + 1 or sorted(cache.entries) != ['13001-75001', '59000-75001', '69001-75001']:
+        failures.append(f"LRU: après 69001, {sorted(cache.entries)} au lieu d'évincer 31000-75001")
+
+
+def check_persistence(path, cache, trips, failures):
+    cache.save()
+    if cache.dirty or not os.path.exists(path):
+        failures.append("persistance: save() n'a pas écrit le cache")
+        return
+    reopened = distance_engine.RouteCache(path)
+    if reopened.entries != cache.entries or list(reopened.entries) != list(cache.entries):
+        failures.append(f"persistance: {len(reopened)} entrées relues sur {len(cache)} (ou ordre LRU perdu)")
+    router = StubRouter()
+    service = distance_engine.DistanceService(router, reopened)
+    service.distances(trips)
+    if router.calls:
+        failures.append(f"persistance: {len(router.calls)} appels au routeur après réouverture")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"format": 0, "routes": {"75001-75002": [1, 1, 0]}}')
+    if len(distance_engine.RouteCache(path)):
+        failures.append("persistance: un cache d'un autre format est relu")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the route cache of distance_engine with a stub router')
+    parser.add_argument('--trips', type=int, default=5000)
+    parser.add_argument('--codes', type=int, default=150, help='distinct postal codes in the random trips')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    trips = synthetic_trips(args.trips, args.codes, rng)
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        def path(name):
+            return os.path.join(directory, f'{name}.json')
+
+        check_normalization(path('normalization'), failures)
+        cache = check_hit_counts(path('hits'), trips, failures)
+        check_errors(path('errors'), failures)
+        check_ttl(path('ttl'), failures)
+        check_lru(path('lru'), failures)
+        check_persistence(path('hits'), cache, trips, failures)
+
+    print("=" * 80)
+    print(f"CACHE DES DISTANCES: {len(trips)} trajets, {len(cache)} paires distinctes en cache")
+    print("=" * 80)
+    if failures:
+        print(f"❌ {len(failures)} écart(s):")
+        for failure in failures[:10]:
+            print(f"   {failure}")
+        sys.exit(1)
+    print("✅ Normalisation, hits / appels, erreurs, TTL, LRU et persistance conformes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Parity check: market_price.py against src/utils/marketPriceCalculation.ts
+
+The TS module is transpiled with the project's typescript package (npm
+install) and run by node on the same quote requests as market_price.price()
+(the NumPy batch) and market_price.price_row(): hand-picked edge cases
+(tier boundaries at 50/200/500 km, halves for Math.round, foreign cities,
+postal codes such as '2A004' or '', negative and NULL values, groupage) and
+--cases random ones. The five amounts of every breakdown must be equal;
+NaN totals (TS) are compared as NaN.
+
+Usage:
+    python3 check_market_price.py
+    python3 check_market_price.py --cases 200000 --seed 3
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+import market_price
+import page_engine
+
+SOURCE = os.path.join(page_engine.PROJECT_DIR, 'src', 'utils', 'marketPriceCalculation.ts')
+
+FIELDS = [('basePrice', 'base_price'), ('distanceCost', 'distance_cost'), ('floorCost', 'floor_cost'),
+          ('servicesCost', 'services_cost'), ('totalMarketPrice', 'total_market_price')]
+
+RUNNER = r"""
+const fs = require('fs');
+const ts = require('typescript');
+const [source, casesPath] = process.argv.slice(1);
+const js = ts.transpileModule(fs.readFileSync(source, 'utf8'), {
+  compilerOptions: { module: ts.ModuleKind.CommonJS, target: ts.ScriptTarget.ES2020 },
+}).outputText;
+const module = { exports: {} };
+new Function('exports', 'require', 'module', js)(module.exports, require, module);
+const cases = JSON.parse(fs.readFileSync(casesPath, 'utf8'));
+const fields = ['basePrice', 'distanceCost', 'floorCost', 'servicesCost', 'totalMarketPrice'];
+const out = cases.map((quote) => {
+  const breakdown = module.exports.calculateMarketPriceWithBreakdown(quote);
+  return fields.map((field) => breakdown[field]);
+});
+process.stdout.write(JSON.stringify(out));
+"""
+
+CITIES = ['Paris', 'Lyon', 'Bruxelles', 'Genève', 'Zürich', 'Luxembourg', 'Amsterdam', 'Köln', 'Forest',
+          'Saint-Denis', 'Mons-en-Barœul', 'Essen', '', None]
+POSTAL_CODES = ['75011', '69003', '13008', '2A004', '20000', '97200', '01000', '1000', ' 59', '-1', '0x12',
+                'B-1000', '']
+HOME_SIZES = ['studio', 'T1', 't2', 't3', 'T4', 't5', 'Maison', 'loft', '']
+SERVICES = list(market_price.SERVICE_COSTS) + ['unknown', 'Piano']
+EDGES = [
+    {'distance_km': 50}, {'distance_km': 50.5}, {'distance_km': 200}, {'distance_km': 200.01},
+    {'distance_km': 500}, {'distance_km': 500.5}, {'distance_km': -30}, {'distance_km': None},
+    {'volume_m3': 10.01}, {'volume_m3': 0.01}, {'surface_m2': 45.5}, {'surface_m2': -3},
+    {'volume_m3': 1, 'distance_km': 51.25}, {'accepts_groupage': True, 'volume_m3': 0.1},
+    {'from_postal_code': '', 'to_postal_code': '75011'},
+    {'from_postal_code': '2A004', 'to_postal_code': '20000'},
+    {'from_city': None, 'from_postal_code': 'Bruxelles', 'to_postal_code': '75011'},
+    {'floor_from': 3, 'elevator_from': False, 'floor_to': -2, 'elevator_to': None},
+    {'furniture_lift_needed_departure': True, 'furniture_lift_needed_arrival': True},
+    {'services_needed': ['piano', 'piano', 'packing']},
+]
+
+
+def random_quote(rng):
+    quote = {
+        'home_size': rng.choice(HOME_SIZES),
+        'floor_from': rng.choice([0, 1, 2, 5, None, rng.randint(-1, 12)]),
+        'floor_to': rng.choice([0, 1, 3, None, rng.randint(-1, 12)]),
+        'elevator_from': rng.choice([True, False, None]),
+        'elevator_to': rng.choice([True, False, None]),
+        'services_needed': rng.sample(SERVICES, rng.randint(0, 4)),
+        'from_postal_code': rng.choice(POSTAL_CODES),
+        'to_postal_code': rng.choice(POSTAL_CODES),
+        'from_city': rng.choice(CITIES),
+        'to_city': rng.choice(CITIES),
+        'furniture_lift_needed_departure': rng.random() < 0.1,
+        'furniture_lift_needed_arrival': rng.random() < 0.1,
+        'accepts_groupage': rng.choice([True, False, None]),
+    }
+    draw = rng.random()
+    if draw < 0.4:
+        quote['volume_m3'] = rng.choice([round(rng.uniform(0, 120), rng.choice([0, 1, 2])), 0, -5])
+    elif draw < 0.6:
+        quote['surface_m2'] = round(rng.uniform(0, 200), rng.choice([0, 1, 2]))
+    distance = rng.random()
+    if distance < 0.7:
+        quote['distance_km'] = round(rng.uniform(0, 1200), rng.choice([0, 1, 2, 3]))
+    elif distance < 0.8:
+        quote['distance_km'] = rng.choice([0, None, 50, 200, 500, -10])
+    return quote
+
+
+def run_typescript(cases, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cases, f)
+    result = subprocess.run(['node', '-e', RUNNER, SOURCE, path], capture_output=True, text=True,
+                            cwd=page_engine.PROJECT_DIR)
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if 'Error' in line]
+        raise RuntimeError(errors[0].strip() if errors else 'node a échoué')
+    return json.loads(result.stdout)
+
+
+def same(expected, actual):
+    if expected is None:
+        return math.isnan(actual)
+    return expected == actual
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare market_price.py with marketPriceCalculation.ts')
+    parser.add_argument('--cases', type=int, default=20000, help='random quote requests (default: 20000)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        market_price.require_numpy()
+    except RuntimeError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    rng = random.Random(args.seed)
+    cases = []
+    for edge in EDGES:
+        case = random_quote(random.Random(len(cases)))
+        case.update(edge)
+        cases.append(case)
+    cases.extend(random_quote(rng) for _ in range(args.cases))
+    for case in cases:
+        case['home_size'] = case.get('home_size') or ''
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            expected = run_typescript(cases, os.path.join(workdir, 'cases.json'))
+    except (OSError, RuntimeError) as exc:
+        print(f"❌ marketPriceCalculation.ts non exécutable (node + typescript, npm install): {exc}")
+        sys.exit(1)
+
+    batch = market_price.price({name: [case.get(name) for case in cases] for name in market_price.COLUMNS})
+    mismatches = []
+    for i, (case, values) in enumerate(zip(cases, expected)):
+        row = market_price.price_row(case)
+        for (ts_name, name), value in zip(FIELDS, values):
+            for engine, actual in (('price', float(batch[name][i])), ('price_row', float(row[name]))):
+                if not same(value, actual):
+                    mismatches.append((engine, ts_name, value, actual, case))
+
+    print("=" * 80)
+    print(f"PARITÉ PRIX MARCHÉ: {len(cases)} demandes ({len(EDGES)} cas limites)")
+    print("=" * 80)
+    nan = sum(1 for values in expected if values[-1] is None)
+    print(f"   {len(cases) * len(FIELDS)} montants comparés par moteur, {nan} totaux NaN côté TS")
+    if mismatches:
+        print(f"❌ {len(mismatches)} écart(s):")
+        for engine, field, value, actual, case in mismatches[:10]:
+            print(f"   {engine}.{field}: TS {value} ≠ {actual}  {json.dumps(case, ensure_ascii=False)}")
+        sys.exit(1)
+    print("✅ price() et price_row() identiques à calculateMarketPriceWithBreakdown")
+
+
+if __name__ == '__main__':
+    main()
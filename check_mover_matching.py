@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Parity check: mover_matching.MatchIndex against the quote_requests triggers
+
+Generates a random snapshot (movers with every coverage_type, NULL and '{}'
+activity_departments, NULL booleans, accepted moves in and out of the
+return-trip window, missions past and upcoming, duplicated accepted quotes)
+and --requests new quote requests (NULL postal codes, cities, dates and
+coordinates included), then compares, request by request, the matches of
+MatchIndex.match_batch() with reference_matches(), the SQL of
+detect_activity_zone_matches, detect_return_trip_opportunities and
+notify_movers_with_nearby_missions transcribed. Nearby missions at
+NEARBY_RADIUS_KM ± 1e-6 km may differ in the last float bit and are only
+counted.
+
+Usage:
+    python3 check_mover_matching.py
+    python3 check_mover_matching.py --movers 2000 --requests 5000 --seed 4
+"""
+
+import argparse
+import datetime
+import random
+import sys
+
+import mover_matching
+
+TODAY = datetime.date(2026, 2, 10)
+DEPARTMENTS = [f'{n:02d}' for n in range(1, 96) if n != 20] + ['2A', '2B', '97']
+CITIES = ['Paris', 'paris', 'Lyon', 'Marseille', 'Lille', 'Bordeaux', 'Nantes', 'Toulouse', 'Nice', 'Strasbourg',
+          'Rennes', 'Saint-Étienne', 'Ajaccio', 'Brest', 'Metz'] + [f'Ville-{n}' for n in range(200)]
+# Mainland France and Corsica
+LATITUDES = (41.3, 51.1)
+LONGITUDES = (-5.1, 9.6)
+
+
+def _maybe(rng, value, null_share):
+    return '' if rng.random() < null_share else value
+
+
+def _boolean(rng, true_share, null_share=0.05):
+    return _maybe(rng, 'true' if rng.random() < true_share else 'false', null_share)
+
+
+def _day(offset):
+    return (TODAY + datetime.timedelta(days=offset)).isoformat()
+
+
+def _point(rng):
+    return f'{rng.uniform(*LATITUDES):.7f}', f'{rng.uniform(*LONGITUDES):.7f}'
+
+
+def synthetic_movers(count, rng):
+    movers = []
+    for n in range(count):
+        draw = rng.random()
+        if draw < 0.6:
+            coverage, departments = 'departments', '{' + ','.join(rng.sample(DEPARTMENTS, rng.randint(1, 6))) + '}'
+        elif draw < 0.7:
+            coverage, departments = 'departments', '{}'
+        elif draw < 0.78:
+            coverage, departments = 'departments', ''
+        elif draw < 0.9:
+            coverage, departments = 'all_france', rng.choice(['{}', '', '{75}'])
+        elif draw < 0.97:
+            coverage, departments = 'custom', '{' + ','.join(rng.sample(DEPARTMENTS, 2)) + '}'
+        else:
+            coverage, departments = '', '{13}'
+        movers.append({
+            'id': f'mover-{n}', 'user_id': f'user-{n}',
+            'verification_status': rng.choices(['verified', 'pending', 'approved', 'rejected', ''],
+                                               [80, 8, 5, 4, 3])[0],
+            'is_active': _boolean(rng, 0.9), 'email_notifications_enabled': _boolean(rng, 0.9),
+            'return_trip_alerts_enabled': _boolean(rng, 0.85),
+            'coverage_type': coverage, 'activity_departments': departments,
+        })
+    return movers
+
+
+def synthetic_missions(movers, count, rng):
+    """(accepted_moves, quotes, quote_requests) rows"""
+    accepted_moves, quotes, quote_requests = [], [], []
+    for n in range(count):
+        mover = rng.choice(movers)
+        latitude, longitude = _point(rng)
+        request_id = f'mission-{n}'
+        quote_requests.append({
+            'id': request_id, 'status': rng.choices(['accepted', 'ongoing', 'completed', 'pending'], [60, 20, 10, 10])[0],
+            'to_city': rng.choice(CITIES), 'moving_date': _maybe(rng, _day(rng.randint(-20, 60)), 0.02),
+            'to_latitude': _maybe(rng, latitude, 0.05), 'to_longitude': longitude,
+        })
+        status = rng.choices(['accepted', 'pending', 'rejected'], [85, 10, 5])[0]
+        quotes.append({'mover_id': mover['id'], 'quote_request_id': request_id, 'status': status})
+        if rng.random() < 0.03:
+            quotes.append({'mover_id': mover['id'], 'quote_request_id': request_id, 'status': 'accepted'})
+        accepted_moves.append({
+            'mover_id': mover['id'], 'arrival_city': _maybe(rng, rng.choice(CITIES), 0.02),
+            'estimated_arrival_date': _maybe(rng, _day(rng.randint(-10, 70)), 0.02),
+            'status': rng.choices(['scheduled', 'completed', 'cancelled', ''], [80, 10, 8, 2])[0],
+        })
+    return accepted_moves, quotes, quote_requests
+
+
+def synthetic_requests(count, rng):
+    requests = []
+    for n in range(count):
+        latitude, longitude = _point(rng)
+        requests.append({
+            'id': f'request-{n}',
+            'from_postal_code': _maybe(rng, f'{rng.choice(DEPARTMENTS)}{rng.randint(0, 999):03d}'[:5], 0.03),
+            'to_postal_code': rng.choice([f'{rng.choice(DEPARTMENTS)}{rng.randint(0, 999):03d}'[:5], '', '7']),
+            'from_city': _maybe(rng, rng.choice(CITIES), 0.02), 'to_city': rng.choice(CITIES),
+            'moving_date': _maybe(rng, _day(rng.randint(0, 60)), 0.03),
+            'from_latitude': _maybe(rng, latitude, 0.05), 'from_longitude': longitude,
+        })
+    return requests
+
+
+def synthetic_snapshot(movers, missions, rng):
+    mover_rows = synthetic_movers(movers, rng)
+    return mover_matching.Snapshot(mover_rows, *synthetic_missions(mover_rows, missions, rng))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare MatchIndex with the SQL semantics of the matching triggers')
+    parser.add_argument('--movers', type=int, default=500)
+    parser.add_argument('--missions', type=int, default=1500)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        mover_matching.require_numpy()
+    except RuntimeError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    rng = random.Random(args.seed)
+    snapshot = synthetic_snapshot(args.movers, args.missions, rng)
+    requests = [mover_matching.Request(row) for row in synthetic_requests(args.requests, rng)]
+    today = TODAY.toordinal()
+    index = mover_matching.MatchIndex(snapshot, today)
+    missions = snapshot.missions(today)
+
+    mismatches = []
+    boundary = 0
+    totals = dict.fromkeys((mover_matching.ZONE, mover_matching.RETURN_TRIP, mover_matching.NEARBY), 0)
+    for request, match in zip(requests, index.match_batch(requests)):
+        expected = mover_matching.reference_matches(snapshot, request, today, missions)
+        actual = {
+            mover_matching.ZONE: sorted(set(match[mover_matching.ZONE])),
+            mover_matching.RETURN_TRIP: sorted(match[mover_matching.RETURN_TRIP]),
+            mover_matching.NEARBY: sorted((mover_id, mission_id)
+                                          for mover_id, mission_id, _ in match[mover_matching.NEARBY]),
+        }
+        if len(actual[mover_matching.ZONE]) != len(match[mover_matching.ZONE]):
+            mismatches.append((request.id, 'doublon', mover_matching.ZONE))
+        for kind, values in expected.items():
+            totals[kind] += len(values)
+            if actual[kind] == values:
+                continue
+            differences = set(actual[kind]) ^ set(values)
+            if kind == mover_matching.NEARBY:
+                differences = {pair for pair in differences
+                               if abs(_mission_distance(snapshot, pair[1], request)
+                                      - mover_matching.NEARBY_RADIUS_KM) > 1e-6}
+                boundary += len(set(actual[kind]) ^ set(values)) - len(differences)
+            if differences:
+                mismatches.append((request.id, kind, sorted(differences)[:3]))
+
+    print("=" * 80)
+    print(f"PARITÉ APPARIEMENT: {len(requests)} demandes × {len(snapshot.movers)} déménageurs, "
+          f"{len(index.grid)} missions à venir")
+    print("=" * 80)
+    for kind, total in totals.items():
+        print(f"   {kind:28}: {total:>8} correspondances attendues")
+    if boundary:
+        print(f"   {boundary} mission(s) à {mover_matching.NEARBY_RADIUS_KM} km ± 1e-6 (arrondi flottant) ignorée(s)")
+    if mismatches:
+        print(f"❌ {len(mismatches)} écart(s):")
+        for request_id, kind, detail in mismatches[:10]:
+            print(f"   {request_id} {kind}: {detail}")
+        sys.exit(1)
+    print("✅ MatchIndex identique aux triggers (zones, trajets retour, missions proches)")
+
+
+def _mission_distance(snapshot, mission_id, request):
+    mission = snapshot.quote_requests[mission_id]
+    return mover_matching.sql_distance_km(mission.to_latitude, mission.to_longitude,
+                                          request.from_latitude, request.from_longitude)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Root layouts check: verify_navigation reports the same pages whatever --root
+
+Builds two small page trees, a/ and b/ (b/ with a nested folder), where
+AboutUsPage.tsx and ContactPage.tsx are information pages without a back
+button, then runs verify_navigation through page_engine.main() with:
+
+  - --pages-dir a           walked names are bare file names
+  - --root a --root b       names carry the root (a/AboutUsPage.tsx)
+  - --root <above a and b>  same, from a directory above the pages
+
+In each layout the information pages without a back button must appear in
+the text report, in the jsonl findings and as ❌ in the watch status, and
+no other page may.
+
+Usage:
+    python3 check_verify_navigation.py
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+import page_engine
+import verify_navigation
+
+BACK_WARNING = "Page d'information sans bouton retour"
+LOGO = f'<img src="/{verify_navigation.LOGO_SRC}" alt="Logo" />'
+BACK = '<button onClick={() => navigate(-1)}><ArrowLeft /> Retour</button>'
+
+# path under the temporary directory -> has a back button
+PAGES = {
+    'a/AboutUsPage.tsx': False,
+    'a/HomePage.tsx': False,  # not an information page
+    'a/FAQPage.tsx': True,
+    'b/PricingPage.tsx': True,
+    'b/sub/ContactPage.tsx': False,
+    'b/sub/DashboardPage.tsx': False,
+}
+
+
+def write_pages(directory):
+    for path, has_back in PAGES.items():
+        filepath = os.path.join(directory, path)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        body = f'      {LOGO}\n' + (f'      {BACK}\n' if has_back else '')
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(f'export default function Page() {{\n  return (\n    <div>\n{body}    </div>\n  );\n}}\n')
+
+
+def expected_pages(roots):
+    return sorted(os.path.basename(path) for path, has_back in PAGES.items()
+                  if not has_back and os.path.basename(path) in verify_navigation.should_have_back
+                  and any(path.startswith(root + '/') for root in roots))
+
+
+def run_main(argv):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        page_engine.main([verify_navigation.RULE], argv + ['--no-cache', '--no-gitignore'])
+    return out.getvalue()
+
+
+def check_layout(label, walked, pages, failures):
+    """walked: the engine roots; pages: the page trees (a, b) they cover"""
+    expected = expected_pages(pages)
+    args = ['--pages-dir', walked[0]] if label.startswith('--pages-dir') else \
+        [arg for root in walked for arg in ('--root', root)]
+
+    text = run_main(args)
+    reported = sorted(os.path.basename(line.split()[1]) for line in text.splitlines()
+                      if line.startswith('⚠️') and "Page d'information" in line)
+    if reported != expected:
+        failures.append(f"{label}, rapport texte: {reported} au lieu de {expected}")
+
+    records = [json.loads(line) for line in run_main(args + ['--format', 'jsonl']).splitlines()]
+    flagged = sorted(os.path.basename(record['file']) for record in records if record['type'] == 'result'
+                     and any(finding['message'] == BACK_WARNING for finding in record['findings']))
+    if flagged != expected:
+        failures.append(f"{label}, jsonl: {flagged} au lieu de {expected}")
+
+    failing = []
+    for name, result in page_engine.run([verify_navigation.RULE], walked)[verify_navigation.RULE.name]:
+        if verify_navigation.RULE.status(name, result).startswith('❌'):
+            failing.append(os.path.basename(name))
+    if sorted(failing) != expected:
+        failures.append(f"{label}, statut --watch: {sorted(failing)} au lieu de {expected}")
+    return len(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check verify_navigation under --pages-dir and several --root')
+    parser.parse_args()
+
+    failures = []
+    checked = 0
+    with tempfile.TemporaryDirectory() as directory:
+        write_pages(directory)
+        a, b = os.path.join(directory, 'a'), os.path.join(directory, 'b')
+        checked += check_layout('--pages-dir a', [a], ['a'], failures)
+        checked += check_layout('--root a --root b', [a, b], ['a', 'b'], failures)
+        checked += check_layout('--root au-dessus', [directory], ['a', 'b'], failures)
+
+    print("=" * 80)
+    print(f"VERIFY_NAVIGATION PAR RACINE: {len(PAGES)} pages, 3 dispositions, {checked} pages sans retour attendues")
+    print("=" * 80)
+    if failures:
+        print(f"❌ {len(failures)} écart(s):")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print("✅ Pages d'information sans bouton retour signalées sous chaque disposition (texte, jsonl, statut)")
+
+
+if __name__ == '__main__':
+    main()
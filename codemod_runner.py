@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Serial or process-pool execution of the fix_* codemods
+
+Each codemod keeps its `fix_file(item)` function, which prints its ✓/-/✗
+line and returns True when the file was fixed. With --jobs N the calls are
+fanned out over N worker processes; their output is captured and printed in
+file-list order, so the log is the same as a serial run. An exception in one
+file is reported as a ✗ line and does not abort the batch; neither does a
+worker crash (segfault, os._exit, OOM kill): the files it had not finished
+are retried one per task in a fresh pool, until the one that kills a worker
+runs alone and is reported as crashed.
+
+With --format jsonl|sarif the printed lines are replaced by one record per
+file (fixed, error, captured output), streamed in the same order.
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import emitters
+import page_engine
+import profiler
+import tree_walk
+
+
+def parse_args(description, argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='worker processes (0 = one per CPU, default: 1)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='print unified diffs instead of writing the files')
+    parser.add_argument('--pages-dir',
+                        help='fix every .tsx page of this directory instead of the built-in file list')
+    tree_walk.add_arguments(parser)
+    emitters.add_argument(parser)
+    profiler.add_argument(parser)
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiler.enable(args.profile)
+    return args
+
+
+def targets(args, files):
+    """The built-in file list, or every file walked from --pages-dir / --root"""
+    roots = args.root or ([args.pages_dir] if args.pages_dir else None)
+    if not roots:
+        return files
+    return [entry.path for _, entry in tree_walk.walk(roots, args.include, args.exclude, args.gitignore)]
+
+
+class CodemodRule(page_engine.Rule):
+    """A fix_* script seen by the jsonl/sarif emitters"""
+
+    def __init__(self, name, description=None):
+        self.name = name
+        self.description = description
+
+    def findings(self, filename, result):
+        if result['error']:
+            return [('error', result['error'])]
+        if result['fixed']:
+            return [('note', 'fixed')]
+        return []
+
+
+def make_emitter(args, name, description=None):
+    """Emitter for --format, or None for the usual text output"""
+    if args.format == 'text':
+        return None
+    return emitters.make(args.format, [CodemodRule(name, description)])
+
+
+def _call(fix_file, item):
+    """Run fix_file in a worker; return (fixed, printed output, error)"""
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            fixed = bool(fix_file(item))
+        return fixed, out.getvalue(), None
+    except Exception as exc:
+        return False, out.getvalue(), f"{type(exc).__name__}: {exc}"
+
+
+def _call_chunk(fix_file, chunk):
+    return [_call(fix_file, item) for item in chunk]
+
+
+def _isolated(fix_file, item):
+    """Run one item alone in a fresh worker, so a crash can only be its own"""
+    try:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            return pool.submit(_call, fix_file, item).result()
+    except BrokenProcessPool as exc:
+        return False, '', f"worker crashed ({exc})"
+
+
+def _outcomes(fix_file, items, jobs):
+    if jobs == 1 or len(items) <= 1:
+        yield from map(functools.partial(_call, fix_file), items)
+        return
+
+    # A few chunks per worker keeps the IPC overhead low on large corpora
+    chunksize = max(1, len(items) // (jobs * 4))
+    outcomes = {}   # index -> outcome, done but not yielded yet
+    next_index = 0
+    pending = list(range(len(items)))
+    while pending:
+        broken = False
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            chunks = [pending[i:i + chunksize] for i in range(0, len(pending), chunksize)]
+            futures = [(chunk, pool.submit(_call_chunk, fix_file, [items[i] for i in chunk])) for chunk in chunks]
+            for chunk, future in futures:
+                try:
+                    outcomes.update(zip(chunk, future.result()))
+                except BrokenProcessPool:
+                    broken = True
+                    break
+                while next_index in outcomes:
+                    yield outcomes.pop(next_index)
+                    next_index += 1
+            if broken:
+                # Chunks other workers finished before the crash keep their outcomes
+                for chunk, future in futures:
+                    if future.done() and not future.cancelled() and future.exception() is None:
+                        outcomes.update(zip(chunk, future.result()))
+        if not broken:
+            return
+        pending = [i for i in pending if i >= next_index and i not in outcomes]
+        if chunksize == 1 and pending:
+            # Still crashing one file per task: the file in front may only
+            # have been in flight next to the culprit, so it runs alone
+            index = pending.pop(0)
+            outcomes[index] = _isolated(fix_file, items[index])
+        # A worker died and took its chunk with it: retry the rest one file per task
+        chunksize = 1
+        while next_index in outcomes:
+            yield outcomes.pop(next_index)
+            next_index += 1
+
+
+def run(fix_file, items, jobs=1, label=str, emitter=None):
+    """Apply fix_file to every item and return the number of fixed files
+
+    Output is printed (or emitted, with an emitter) as soon as the next item
+    in list order is done.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs != 1 and profiler.enabled():
+        print("⏱  --profile: exécution en série, les workers ne sont pas profilés", file=sys.stderr)
+        jobs = 1
+
+    fixed_count = 0
+    try:
+        for item, (fixed, output, error) in zip(items, _outcomes(fix_file, items, jobs)):
+            if emitter is not None:
+                emitter.emit(label(item), label(item), emitter.rules[0],
+                             {'fixed': fixed, 'error': error, 'output': output})
+            else:
+                print(output, end='')
+                if error:
+                    print(f"✗ Error: {label(item)} ({error})")
+            if fixed:
+                fixed_count += 1
+        if emitter is not None:
+            emitter.close()
+    except BrokenPipeError:
+        emitters.exit_on_broken_pipe()
+    return fixed_count
@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""
+Batch distances between postal codes: offline estimates and cached routes
+
+calculateRealDistance() (src/utils/distanceCalculator.ts) posts every quote
+request to the calculate-distance edge function, which asks Google each
+time, Paris→Lyon included for the hundredth time. This engine:
+
+  - PostalIndex: French postal code centroids in sorted arrays (int32 codes,
+    float32 latitudes / longitudes, ~12 bytes a code), loaded from a local
+    file: the La Poste "base officielle des codes postaux" CSV (Code_postal +
+    coordonnees_gps, or code_postal + latitude + longitude), or the .npz
+    save() writes. Codes shared by several communes get their mean; unknown
+    codes fall back to the centroid of their department
+  - estimate(): vectorized haversine × ROAD_FACTOR (French road network vs
+    great circle) and AVERAGE_SPEED_KMH, for bulk pre-estimates of a whole
+    export without any API call
+  - RouteCache: real route results persisted in .distance_cache.json, keyed
+    by the normalized postal code pair (sorted: A→B and B→A share an entry),
+    LRU-evicted beyond max_entries and expired after ttl seconds
+  - DistanceService: routes a batch through the cache; each missing pair is
+    asked once to the router, a pluggable callable
+    (origin, destination) -> (distance_km, duration_min), concurrently with
+    --jobs threads. EdgeFunctionRouter calls calculate-distance like the
+    front-end; any stand-in (EstimateRouter, a fake in a benchmark) works.
+    Router failures fall back to the estimate, uncached. Stats: hit rate,
+    router calls and errors, per-pair latency percentiles
+
+Input: a quote_requests export (CSV or Parquet, as market_price.py), with
+from_postal_code / to_postal_code and, for the router, from_city / to_city.
+
+NumPy is required (pip install numpy).
+
+Usage:
+    python3 distance_engine.py quote_requests.csv --postal-index laposte_hexasmal.csv
+    python3 distance_engine.py quote_requests.csv --postal-index cp.npz --router edge --output distances.csv
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import market_price
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+# Road distance / great-circle distance, average of French intercity trips
+ROAD_FACTOR = 1.3
+AVERAGE_SPEED_KMH = 75
+
+CACHE_FORMAT = 1
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.distance_cache.json')
+DEFAULT_TTL_DAYS = 90
+DEFAULT_MAX_ENTRIES = 100_000
+
+COLUMNS = ['id', 'from_postal_code', 'from_city', 'to_postal_code', 'to_city', 'distance_km']
+POSTAL_HEADERS = ('code_postal', 'postal_code', 'cp', 'code postal')
+LATITUDE_HEADERS = ('latitude', 'lat')
+LONGITUDE_HEADERS = ('longitude', 'lon', 'lng')
+GPS_HEADERS = ('coordonnees_gps', 'coordonnees_geographiques', 'coordonnées géographiques', '_geopoint', 'geopoint')
+
+_POSTAL_CODE = re.compile(r'\d{4,5}')
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy est requis pour le moteur de distances (pip install numpy)")
+
+
+def normalize_postal_code(value):
+    """'75011' / ' 75 011' / 1000 (Excel dropped the 0) -> '75011' / '01000'; None if not a code"""
+    text = re.sub(r'\s', '', str(value or ''))
+    if text.endswith('.0'):
+        text = text[:-2]
+    if not _POSTAL_CODE.fullmatch(text):
+        return None
+    return text.zfill(5)
+
+
+def pair_key(from_code, to_code):
+    """Cache key of a trip, None unless both codes are valid; A→B and B→A are the same road"""
+    from_code = normalize_postal_code(from_code)
+    to_code = normalize_postal_code(to_code)
+    if from_code is None or to_code is None:
+        return None
+    return '-'.join(sorted((from_code, to_code)))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distances between arrays of coordinates in degrees"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class PostalIndex:
+    """Centroids of French postal codes in sorted parallel arrays"""
+
+    def __init__(self, codes, latitudes, longitudes):
+        require_numpy()
+        order = np.argsort(codes, kind='stable')
+        self.codes = np.asarray(codes, dtype=np.int32)[order]
+        self.latitudes = np.asarray(latitudes, dtype=np.float32)[order]
+        self.longitudes = np.asarray(longitudes, dtype=np.float32)[order]
+        departments = self.codes // 1000
+        self.departments, first = np.unique(departments, return_index=True)
+        counts = np.diff(np.append(first, len(self.codes)))
+        self.department_latitudes = (np.add.reduceat(self.latitudes.astype(np.float64), first) / counts
+                                     if len(first) else np.zeros(0))
+        self.department_longitudes = (np.add.reduceat(self.longitudes.astype(np.float64), first) / counts
+                                      if len(first) else np.zeros(0))
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Index of (postal code, latitude, longitude) rows; repeated codes are averaged"""
+        sums = {}
+        for code, latitude, longitude in rows:
+            code = normalize_postal_code(code)
+            if code is None or latitude is None or longitude is None:
+                continue
+            entry = sums.setdefault(int(code), [0.0, 0.0, 0])
+            entry[0] += latitude
+            entry[1] += longitude
+            entry[2] += 1
+        codes = list(sums)
+        return cls(codes, [sums[code][0] / sums[code][2] for code in codes],
+                   [sums[code][1] / sums[code][2] for code in codes])
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith('.npz'):
+            require_numpy()
+            with np.load(path) as data:
+                return cls(data['codes'], data['latitudes'], data['longitudes'])
+        return cls.from_rows(read_centroids(path))
+
+    def save(self, path):
+        np.savez_compressed(path, codes=self.codes, latitudes=self.latitudes, longitudes=self.longitudes)
+
+    def locate(self, postal_codes):
+        """(latitudes, longitudes, found) of a sequence of postal codes: NaN when
+        unknown, the department centroid when only the department is known"""
+        values = market_price._encode(postal_codes, _code_number, np.int64)
+        position = np.minimum(np.searchsorted(self.codes, values), max(len(self.codes) - 1, 0))
+        found = (self.codes[position] == values) if len(self.codes) else np.zeros(len(values), dtype=bool)
+        latitudes = np.where(found, self.latitudes[position] if len(self.codes) else np.nan, np.nan)
+        longitudes = np.where(found, self.longitudes[position] if len(self.codes) else np.nan, np.nan)
+
+        missing = ~found & (values >= 0)
+        if missing.any() and len(self.departments):
+            departments = values[missing] // 1000
+            slot = np.minimum(np.searchsorted(self.departments, departments), len(self.departments) - 1)
+            known = self.departments[slot] == departments
+            latitudes[np.flatnonzero(missing)[known]] = self.department_latitudes[slot[known]]
+            longitudes[np.flatnonzero(missing)[known]] = self.department_longitudes[slot[known]]
+        return latitudes, longitudes, found
+
+
+def _code_number(value):
+    code = normalize_postal_code(value)
+    return int(code) if code is not None else -1
+
+
+def _float(text):
+    try:
+        return float(str(text).replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def read_centroids(path):
+    """(postal code, latitude, longitude) rows of a postal code CSV (',' or ';')"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.readline()
+        f.seek(0)
+        reader = csv.reader(f, delimiter=';' if sample.count(';') > sample.count(',') else ',')
+        header = [name.strip().lower() for name in next(reader, [])]
+
+        def column(names):
+            return next((header.index(name) for name in names if name in header), None)
+
+        postal = column(POSTAL_HEADERS)
+        latitude, longitude, gps = column(LATITUDE_HEADERS), column(LONGITUDE_HEADERS), column(GPS_HEADERS)
+        if postal is None or (gps is None and (latitude is None or longitude is None)):
+            raise RuntimeError(f"{path}: colonnes code postal + latitude/longitude (ou coordonnees_gps) introuvables")
+        for row in reader:
+            if len(row) <= postal:
+                continue
+            if latitude is not None and longitude is not None and len(row) > max(latitude, longitude):
+                yield row[postal], _float(row[latitude]), _float(row[longitude])
+            elif gps is not None and len(row) > gps and ',' in row[gps]:
+                lat, lon = row[gps].split(',', 1)
+                yield row[postal], _float(lat), _float(lon)
+
+
+def estimate(index, from_codes, to_codes):
+    """(distance_km, duration_min) arrays of road estimates; NaN when a code is unknown"""
+    from_lat, from_lon, _ = index.locate(from_codes)
+    to_lat, to_lon, _ = index.locate(to_codes)
+    distance = np.round(haversine_km(from_lat, from_lon, to_lat, to_lon) * ROAD_FACTOR, 1)
+    return distance, np.round(distance / AVERAGE_SPEED_KMH * 60)
+
+
+class RouteCache:
+    """On-disk LRU map of pair key -> [distance_km, duration_min, stored at]"""
+
+    def __init__(self, path=CACHE_FILE, ttl=DEFAULT_TTL_DAYS * 86400, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}  # insertion order = least recently used first
+        self.dirty = False
+        self.expired = 0
+        self.evicted = 0
+        if path:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('format') == CACHE_FORMAT:
+                    self.entries = data['routes']
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, now=None):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        if (now or time.time()) - entry[2] > self.ttl:
+            self.expired += 1
+            self.dirty = True
+            return None
+        self.entries[key] = entry
+        self.dirty = True
+        return entry[0], entry[1]
+
+    def put(self, key, distance_km, duration_min, now=None):
+        self.entries.pop(key, None)
+        self.entries[key] = [distance_km, duration_min, round(now or time.time())]
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+            self.evicted += 1
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty or not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': CACHE_FORMAT, 'routes': self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+class RouterError(Exception):
+    pass
+
+
+class EdgeFunctionRouter:
+    """calculate-distance edge function, called as calculateRealDistance() does"""
+
+    def __init__(self, url=None, anon_key=None, timeout=15):
+        url = url or os.environ.get('VITE_SUPABASE_URL') or os.environ.get('SUPABASE_URL')
+        self.anon_key = anon_key or os.environ.get('VITE_SUPABASE_ANON_KEY') or os.environ.get('SUPABASE_ANON_KEY')
+        if not url or not self.anon_key:
+            raise RuntimeError("VITE_SUPABASE_URL et VITE_SUPABASE_ANON_KEY sont requis pour --router edge")
+        self.url = url.rstrip('/') + '/functions/v1/calculate-distance'
+        self.timeout = timeout
+
+    def __call__(self, origin, destination):
+        body = json.dumps({'fromAddress': '', 'fromPostalCode': origin[0], 'fromCity': origin[1] or '',
+                           'toAddress': '', 'toPostalCode': destination[0], 'toCity': destination[1] or ''})
+        request = urllib.request.Request(self.url, data=body.encode(), method='POST', headers={
+            'Content-Type': 'application/json', 'Authorization': f'Bearer {self.anon_key}'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = json.load(response)
+        except urllib.error.HTTPError as exc:
+            try:
+                data = json.load(exc)
+            except ValueError:
+                raise RouterError(f"HTTP {exc.code}")
+        except (OSError, ValueError) as exc:
+            raise RouterError(str(exc))
+        if not data.get('success'):
+            raise RouterError(data.get('error') or 'calculate-distance a échoué')
+        return data['distance'], data['duration']
+
+
+class EstimateRouter:
+    """Offline stand-in router: the haversine estimate of the postal index"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __call__(self, origin, destination):
+        distance, duration = estimate(self.index, [origin[0]], [destination[0]])
+        if math.isnan(distance[0]):
+            raise RouterError(f"code postal inconnu: {origin[0]} / {destination[0]}")
+        return float(distance[0]), float(duration[0])
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))]
+
+
+class Stats:
+    def __init__(self):
+        self.pairs = 0
+        self.invalid = 0
+        self.hits = 0
+        self.coalesced = 0  # repeats of a pair routed in the same batch
+        self.routed = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.router_latencies = []
+        self.lock = threading.Lock()
+
+    @property
+    def hit_rate(self):
+        served = self.hits + self.coalesced + self.routed + self.errors
+        return (self.hits + self.coalesced) / served if served else 0.0
+
+    def as_dict(self):
+        latencies = sorted(self.router_latencies)
+        return {
+            'pairs': self.pairs, 'invalid': self.invalid, 'hits': self.hits, 'coalesced': self.coalesced,
+            'router_calls': self.routed + self.errors, 'router_errors': self.errors,
+            'estimate_fallbacks': self.fallbacks, 'hit_rate': round(self.hit_rate, 4),
+            'router_latency_ms': {name: round(percentile(latencies, q) * 1000, 1)
+                                  for name, q in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))},
+        }
+
+
+class DistanceService:
+    """Distances of (from code, from city, to code, to city) trips through a route cache"""
+
+    def __init__(self, router, cache, index=None, jobs=8):
+        self.router = router
+        self.cache = cache
+        self.index = index
+        self.jobs = jobs
+        self.stats = Stats()
+
+    def _route(self, key, origin, destination):
+        started = time.perf_counter()
+        try:
+            distance, duration = self.router(origin, destination)
+            error = None
+        except RouterError as exc:
+            distance = duration = None
+            error = str(exc)
+        elapsed = time.perf_counter() - started
+        with self.stats.lock:
+            self.stats.router_latencies.append(elapsed)
+        return key, distance, duration, error
+
+    def distances(self, trips):
+        """[(distance_km, duration_min, source)] in trips order; source is 'cache',
+        'router', 'estimate' (router failed) or None (no valid postal codes)"""
+        now = time.time()
+        stats = self.stats
+        keys = []
+        results = {}
+        todo = {}
+        for from_code, from_city, to_code, to_city in trips:
+            key = pair_key(from_code, to_code)
+            keys.append(key)
+            stats.pairs += 1
+            if key is None:
+                stats.invalid += 1
+            elif key in todo:
+                stats.coalesced += 1
+            elif key in results:
+                stats.hits += 1
+            else:
+                cached = self.cache.get(key, now)
+                if cached is not None:
+                    results[key] = (cached[0], cached[1], 'cache')
+                    stats.hits += 1
+                else:
+                    todo[key] = ((normalize_postal_code(from_code), from_city),
+                                 (normalize_postal_code(to_code), to_city))
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=max(1, self.jobs)) as pool:
+            for key, distance, duration, error in pool.map(lambda item: self._route(item[0], *item[1]),
+                                                           todo.items()):
+                if error is None:
+                    stats.routed += 1
+                    self.cache.put(key, distance, duration, now)
+                    results[key] = (distance, duration, 'router')
+                else:
+                    stats.errors += 1
+                    failed.append(key)
+                    results[key] = (None, None, None)
+
+        if failed and self.index is not None:
+            distance, duration = estimate(self.index, [todo[key][0][0] for key in failed],
+                                          [todo[key][1][0] for key in failed])
+            for i, key in enumerate(failed):
+                if not math.isnan(distance[i]):
+                    results[key] = (float(distance[i]), float(duration[i]), 'estimate')
+                    stats.fallbacks += 1
+        return [results.get(key, (None, None, None)) if key is not None else (None, None, None) for key in keys]
+
+
+def _format(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    return f'{value:g}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch distances of quote requests: offline estimates and cached routes')
+    parser.add_argument('file', help='CSV or Parquet export of quote_requests')
+    parser.add_argument('--postal-index', metavar='FILE', required=True,
+                        help='postal code centroids: La Poste CSV or .npz')
+    parser.add_argument('--save-index', metavar='FILE.npz', help='save the postal index in compact form')
+    parser.add_argument('--router', choices=('estimate', 'edge'), default='estimate',
+                        help='estimate: vectorized haversine only; edge: calculate-distance through the cache')
+    parser.add_argument('--cache', default=CACHE_FILE, metavar='FILE')
+    parser.add_argument('--ttl-days', type=float, default=DEFAULT_TTL_DAYS)
+    parser.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES)
+    parser.add_argument('--jobs', type=int, default=8, help='concurrent router calls')
+    parser.add_argument('--output', metavar='FILE', help='write id + distance_km + duration_min + source as CSV')
+    parser.add_argument('--json', metavar='FILE', help='write the stats as JSON')
+    args = parser.parse_args()
+
+    try:
+        require_numpy()
+        index = PostalIndex.load(args.postal_index)
+        if args.file.endswith(('.parquet', '.pq')):
+            columns = market_price.load_parquet(args.file, COLUMNS)
+        else:
+            columns = market_price.load_csv(args.file, COLUMNS)
+        if 'from_postal_code' not in columns or 'to_postal_code' not in columns:
+            raise RuntimeError(f"{args.file}: colonnes from_postal_code / to_postal_code introuvables")
+        router = EdgeFunctionRouter() if args.router == 'edge' else None
+    except (OSError, RuntimeError) as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    loaded = time.perf_counter()
+    if args.save_index:
+        index.save(args.save_index)
+
+    n = len(columns['from_postal_code'])
+    from_cities = columns.get('from_city', [''] * n)
+    to_cities = columns.get('to_city', [''] * n)
+    estimated, estimated_duration = estimate(index, columns['from_postal_code'], columns['to_postal_code'])
+    estimated_at = time.perf_counter()
+
+    print("=" * 80)
+    print(f"DISTANCES: {n} demandes de devis ({os.path.basename(args.file)}), {len(index)} codes postaux indexés")
+    print("=" * 80)
+    known = ~np.isnan(estimated)
+    print(f"   estimation vectorisée: {estimated_at - loaded:.3f}s ({n / max(estimated_at - loaded, 1e-9):,.0f} paires/s), "
+          f"{int(known.sum())}/{n} estimées")
+    summary = {'rows': n, 'estimated': int(known.sum()), 'estimate_seconds': round(estimated_at - loaded, 4)}
+    if 'distance_km' in columns and known.any():
+        stored = market_price._numbers(columns['distance_km'])
+        compared = known & ~np.isnan(stored) & (stored > 0)
+        if compared.any():
+            ratio = estimated[compared] / stored[compared]
+            print(f"   estimation / distance_km enregistrée: médiane {np.median(ratio):.2f} "
+                  f"(p10 {np.percentile(ratio, 10):.2f}, p90 {np.percentile(ratio, 90):.2f}) sur {int(compared.sum())}")
+
+    results = [(float(d), float(t), 'estimate') if not math.isnan(d) else (None, None, None)
+               for d, t in zip(estimated.tolist(), estimated_duration.tolist())]
+    if router is not None:
+        cache = RouteCache(args.cache, args.ttl_days * 86400, args.max_entries)
+        cached_before = len(cache)
+        service = DistanceService(router, cache, index, args.jobs)
+        trips = zip(columns['from_postal_code'], from_cities, columns['to_postal_code'], to_cities)
+        routed_started = time.perf_counter()
+        results = service.distances(list(trips))
+        routed_seconds = time.perf_counter() - routed_started
+        cache.save()
+        stats = service.stats.as_dict()
+        latency = stats['router_latency_ms']
+        print(f"\n🛣️  Itinéraires ({cached_before} en cache au départ, {len(cache)} après"
+              f"{f', {cache.expired} expirés' if cache.expired else ''}"
+              f"{f', {cache.evicted} évincés' if cache.evicted else ''})")
+        print(f"   taux de hit: {stats['hit_rate']:.1%} ({stats['hits']} cache + {stats['coalesced']} paires répétées), "
+              f"{stats['router_calls']} appels calculate-distance, {stats['router_errors']} erreurs "
+              f"({stats['estimate_fallbacks']} remplacées par l'estimation)")
+        print(f"   latence par appel: p50 {latency['p50']:.0f} ms, p95 {latency['p95']:.0f} ms, max {latency['max']:.0f} ms; "
+              f"{routed_seconds / max(n, 1) * 1000:.2f} ms par demande en moyenne")
+        if stats['invalid']:
+            print(f"   ⚠️  {stats['invalid']} demandes sans code postal valide")
+        summary.update(stats, route_seconds=round(routed_seconds, 3), cache_entries=len(cache))
+
+    if args.output:
+        ids = columns.get('id', [''] * n)
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(['id', 'distance_km', 'duration_min', 'source'])
+            for i, (distance, duration, source) in enumerate(results):
+                writer.writerow([ids[i], _format(distance), _format(duration), source or ''])
+        print(f"\n📝 {args.output}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"📝 Rapport: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
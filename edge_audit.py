@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Cold-start and import-cost audit of the Supabase Edge Functions
+
+Each directory of supabase/functions/ is one Deno function (index.ts plus
+the local modules it imports). For every function the audit inventories:
+
+  - its imports: npm:, jsr:, https:// and node: specifiers with package and
+    version, local modules with their size; `.d.ts` type imports are free
+  - its module-scope work: what runs once per isolate at cold start
+    (top-level await, calls, large literal tables) as opposed to types and
+    declarations
+  - its request handler (Deno.serve): database and API clients built there
+    are rebuilt on every request instead of once per isolate
+
+and flags:
+
+  - heavy packages (PACKAGE_COSTS), the same package pulled at several
+    versions or from several registries across functions, floating versions
+  - createClient()/new Stripe() inside the handler, when the client does not
+    depend on the request (a client forwarding the caller's Authorization
+    header has to be per request)
+  - unbounded fetches: list selects with no .limit()/.range() and queries
+    run per item of a loop (query_audit), one-to-many embeds with no limit,
+    fetch() calls made one at a time in a loop or without a timeout
+
+and gives each function a cold-start risk score: the estimated cost of its
+imports, module-scope work and source size, plus the per-request client
+construction. Functions on latency-sensitive paths (LATENCY_SENSITIVE) are
+marked ⚡.
+
+With --measure, each function's module is loaded by `deno run` with a stub
+runtime (Deno.serve replaced by a no-op, dummy secrets in the environment)
+and the time of the dynamic import() is reported: the first run includes
+the download of the dependencies, the following ones (--runs) load them from
+the Deno cache. Without deno on the PATH the measure is skipped.
+
+Usage:
+    python3 edge_audit.py
+    python3 edge_audit.py --function stripe-webhook --function calculate-distance
+    python3 edge_audit.py --measure --runs 5 --json edge.json
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import tempfile
+
+import edit_plan
+import emitters
+import migration_replay
+import page_engine
+import query_audit
+import supabase_queries
+import tsx_scanner
+
+FUNCTIONS_DIR = os.path.join(page_engine.PROJECT_DIR, 'supabase', 'functions')
+
+LATENCY_SENSITIVE = {'calculate-distance', 'create-payment-intent', 'stripe-webhook', 'validate-payment-card',
+                     'estimate-market-price'}
+
+# Estimated cold-start cost of loading a package, in arbitrary units
+PACKAGE_COSTS = {
+    'stripe': 40,
+    'openai': 35,
+    'xlsx': 40,
+    'pdf-lib': 35,
+    'jspdf': 35,
+    'puppeteer': 80,
+    '@supabase/supabase-js': 25,
+    'resend': 10,
+    'zod': 8,
+}
+REGISTRY_COSTS = {'npm': 15, 'jsr': 10, 'https': 15, 'node': 1}
+HEAVY = 30
+
+# Module-scope work, per item
+COSTS = {
+    'top_level_await': 30,
+    'top_level_call': 5,
+    'handler_client': 10,
+    'kilobyte': 1,
+}
+
+# Dummy environment of the stub runtime, so module-scope code reading secrets does not throw
+STUB_ENV = {
+    'SUPABASE_URL': 'http://127.0.0.1:54321',
+    'SUPABASE_ANON_KEY': 'stub-anon-key',
+    'SUPABASE_SERVICE_ROLE_KEY': 'stub-service-role-key',
+    'STRIPE_SECRET_KEY': 'sk_test_stub',
+    'STRIPE_WEBHOOK_SECRET': 'whsec_stub',
+}
+
+STUB_LOADER = '''
+try {
+  Object.defineProperty(Deno, "serve", {
+    value: () => ({ finished: Promise.resolve(), shutdown: async () => {}, ref() {}, unref() {} }),
+  });
+} catch {
+  // Deno.serve is not replaceable here: the module binds the port, the process exits right after
+}
+const start = performance.now();
+await import(Deno.args[0]);
+console.log(JSON.stringify({ load_ms: performance.now() - start }));
+Deno.exit(0);
+'''
+
+_SPECIFIER = re.compile(r'^(npm|jsr|node):(@?[^@/]+(?:/[^@/]+)?)(?:@([^/]+))?')
+_URL_PACKAGE = re.compile(r'^https?://(?:esm\.sh|cdn\.skypack\.dev|deno\.land/x|cdn\.jsdelivr\.net/npm)/'
+                          r'(@?[^@/]+(?:/[^@/]+)?)(?:@([^/?]+))?')
+_DYNAMIC_IMPORT = re.compile(r'''\bimport\s*\(\s*(['"])([^'"]+)\1''')
+_HANDLER = re.compile(r'\b(?:Deno\.serve|serve)\s*\(')
+_CLIENT = re.compile(r'\b(createClient|new\s+(?:Stripe|OpenAI|Resend|S3Client))\s*\(')
+_PER_REQUEST = re.compile(r'\breq(?:uest)?\.|[Aa]uthorization')
+_FETCH = re.compile(r'(?<![\w$.])fetch\s*\(')
+_DECLARATION = re.compile(r'(?:export\s+)?(?:default\s+)?(?:declare\s+)?(?:interface|type|enum|class|(?:async\s+)?function)\b')
+_VALUE = re.compile(r'(?:export\s+)?(?:const|let|var)\s+[^=]+?=\s*(.*)$', re.DOTALL)
+_LITERAL_VALUE = re.compile(r'''[\[{'"`\d-]|(?:async\s*)?(?:\([^()]*\)|[A-Za-z_$][\w$]*)\s*(?::[^=]+)?=>|true\b|false\b|null\b''')
+
+
+class Import:
+    def __init__(self, specifier, line, dynamic=False):
+        self.specifier = specifier
+        self.line = line
+        self.dynamic = dynamic
+        self.registry, self.package, self.version = _parse_specifier(specifier)
+        self.size = 0             # bytes, for local modules
+
+    @property
+    def cost(self):
+        if self.registry in ('types', 'local'):
+            return self.size / 1024 * COSTS['kilobyte']
+        if self.dynamic:
+            return 0              # loaded on first use, not at cold start
+        return PACKAGE_COSTS.get(self.package, REGISTRY_COSTS.get(self.registry, 15))
+
+
+class Finding:
+    def __init__(self, kind, line, message, suggestion=None):
+        self.kind = kind
+        self.line = line
+        self.message = message
+        self.suggestion = suggestion
+
+
+class EdgeFunction:
+    def __init__(self, directory):
+        self.directory = directory
+        self.name = os.path.basename(directory)
+        self.path = os.path.join(directory, 'index.ts')
+        self.content = edit_plan.read_text(self.path)
+        self.size = len(self.content.encode('utf-8'))
+        self.imports = []
+        self.items = []           # (line, kind, text) of module-scope statements
+        self.handler = None       # (start, end) of the Deno.serve(...) call
+        self.clients = []         # (line, constructor, in handler, per request)
+        self.findings = []
+        self.load_ms = []
+        self._line = _lines(self.content)
+        self._collect_imports()
+        self._collect_items()
+        self._collect_clients()
+
+    def _collect_imports(self):
+        for entry in tsx_scanner.scan(self.content).imports:
+            self.imports.append(Import(entry.module, self._line(entry.start)))
+        for match in _DYNAMIC_IMPORT.finditer(self.content):
+            self.imports.append(Import(match.group(2), self._line(match.start()), dynamic=True))
+        for entry in self.imports:
+            if entry.registry == 'local':
+                path = os.path.normpath(os.path.join(self.directory, entry.specifier))
+                if os.path.isfile(path):
+                    entry.size = os.path.getsize(path)
+                    self.size += entry.size
+
+    def _collect_items(self):
+        for start, text in _top_level(self.content):
+            line = self._line(start)
+            if text.startswith('import'):
+                continue
+            handler = _HANDLER.match(text)
+            if handler:
+                end = supabase_queries._close_paren(self.content, start + handler.end())
+                self.handler = (start, end or len(self.content))
+                self.items.append((line, 'handler', text))
+            elif _DECLARATION.match(text):
+                self.items.append((line, 'declaration', text))
+            elif text.startswith('await') or re.match(r'(?:export\s+)?(?:const|let|var)\s+[^=]+=\s*await\b', text):
+                self.items.append((line, 'top_level_await', text))
+            else:
+                value = _VALUE.match(text)
+                if value and _LITERAL_VALUE.match(value.group(1)):
+                    self.items.append((line, 'data', text))
+                elif value and re.match(r'Deno\.env\.get\b', value.group(1)):
+                    self.items.append((line, 'env', text))
+                elif value and _CLIENT.match(value.group(1)):
+                    self.items.append((line, 'client', text))
+                else:
+                    self.items.append((line, 'top_level_call', text))
+
+    def _collect_clients(self):
+        for match in _CLIENT.finditer(self.content):
+            inside = self.handler is not None and self.handler[0] <= match.start() < self.handler[1]
+            end = supabase_queries._close_paren(self.content, match.end()) or match.end()
+            per_request = bool(_PER_REQUEST.search(self.content, match.end(), end))
+            constructor = ' '.join(match.group(1).split())
+            self.clients.append((self._line(match.start()), constructor, inside, per_request))
+
+    @property
+    def latency_sensitive(self):
+        return self.name in LATENCY_SENSITIVE
+
+    def score(self):
+        """Estimated cold-start risk: imports, module-scope work, size, and
+        the clients rebuilt on each request"""
+        total = sum(entry.cost for entry in self.imports if entry.registry != 'local')
+        total += sum(COSTS[kind] for _, kind, _ in self.items if kind in COSTS)
+        total += self.size / 1024 * COSTS['kilobyte']
+        total += COSTS['handler_client'] * sum(1 for _, _, inside, per_request in self.clients
+                                               if inside and not per_request)
+        return round(total)
+
+    def risk(self):
+        score = self.score()
+        return 'élevé' if score >= 60 else 'moyen' if score >= 30 else 'faible'
+
+
+def _lines(content):
+    def line(offset):
+        return content.count('\n', 0, offset) + 1
+    return line
+
+
+def _parse_specifier(specifier):
+    """(registry, package, version) of an import specifier"""
+    if specifier.endswith('.d.ts'):
+        return 'types', specifier, None
+    if specifier.startswith('.'):
+        return 'local', specifier, None
+    match = _SPECIFIER.match(specifier)
+    if match:
+        return match.group(1), match.group(2), match.group(3)
+    match = _URL_PACKAGE.match(specifier)
+    if match:
+        return 'https', match.group(1), match.group(2)
+    return ('https' if specifier.startswith('http') else 'bare'), specifier, None
+
+
+def _top_level(content):
+    """(offset, text) of each module-scope statement: the lines starting at
+    column 0 outside any bracket, each running to the next one"""
+    depth = 0
+    starts = []
+    pos = 0
+    at_line_start = True
+    n = len(content)
+    while pos < n:
+        match = supabase_queries._ARG_TOKEN.match(content, pos)
+        token = match.group()
+        if depth == 0 and at_line_start and not token[0].isspace() and not token.startswith(('//', '/*')):
+            starts.append(pos)
+        if len(token) == 1 and token in '([{':
+            depth += 1
+        elif len(token) == 1 and token in ')]}':
+            depth = max(0, depth - 1)
+        if token.startswith('//') or token.startswith('/*') or len(token) == 1 or token[0] in '\'"`':
+            at_line_start = False
+            pos = match.end()
+            continue
+        # Plain text: split it at newlines so a new statement can start mid-token
+        newline = token.rfind('\n')
+        if newline >= 0 and depth == 0:
+            rest = token[newline + 1:]
+            if rest and not rest[0].isspace():
+                starts.append(match.start() + newline + 1)
+                at_line_start = False
+            else:
+                at_line_start = not rest.strip()
+        else:
+            at_line_start = False
+        pos = match.end()
+    starts = sorted(set(starts))
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else n
+        yield start, content[start:end].strip()
+
+
+class Auditor:
+    def __init__(self, functions, schema):
+        self.functions = functions
+        self.schema = schema
+
+    def audit(self):
+        for function in self.functions:
+            self._imports(function)
+            self._module_scope(function)
+            self._clients(function)
+            self._queries(function)
+            self._fetches(function)
+        return self.duplicates()
+
+    def _imports(self, function):
+        seen = {}
+        for entry in function.imports:
+            if entry.registry in ('types', 'local'):
+                continue
+            if entry.cost >= HEAVY:
+                function.findings.append(Finding(
+                    'heavy_import', entry.line, f"{entry.specifier}: dépendance lourde (coût {entry.cost})",
+                    "import() dynamique dans la branche qui l'utilise, ou appel REST direct" if not entry.dynamic
+                    else None))
+            if entry.registry in ('npm', 'jsr') and entry.version and re.fullmatch(r'\^?~?\d+', entry.version):
+                function.findings.append(Finding(
+                    'floating_version', entry.line, f"{entry.specifier}: version flottante",
+                    "épingler la version exacte utilisée par les autres fonctions"))
+            if entry.package in seen:
+                function.findings.append(Finding(
+                    'duplicate_import', entry.line,
+                    f"{entry.package} importé deux fois ({seen[entry.package]} et {entry.specifier})"))
+            seen.setdefault(entry.package, entry.specifier)
+
+    def _module_scope(self, function):
+        for line, kind, text in function.items:
+            head = ' '.join(text.split())[:70]
+            if kind == 'top_level_await':
+                function.findings.append(Finding(
+                    kind, line, f"await au niveau module: bloque le démarrage ({head})",
+                    "déplacer dans le handler, mis en cache dans une variable du module"))
+            elif kind == 'top_level_call':
+                function.findings.append(Finding(kind, line, f"travail au chargement du module ({head})"))
+        if function.handler is None:
+            function.findings.append(Finding('no_handler', 1, "aucun Deno.serve() au niveau module"))
+
+    def _clients(self, function):
+        for line, constructor, inside, per_request in function.clients:
+            if inside and not per_request:
+                function.findings.append(Finding(
+                    'handler_client', line, f"{constructor}() construit à chaque requête",
+                    "le construire une fois au niveau module (variables d'environnement lues au chargement)"))
+
+    def _queries(self, function):
+        queries = supabase_queries.scan(function.path, function.content)
+        auditor = query_audit.Auditor(self.schema, queries)
+        for query in queries:
+            for finding in auditor.pagination(query) + auditor.n_plus_one(query):
+                function.findings.append(Finding(
+                    'unbounded_select' if finding.kind == 'pagination' else 'query_in_loop',
+                    query.line, finding.message, finding.suggestion))
+            function.findings.extend(self._embeds(query))
+
+    def _embeds(self, query):
+        """One-to-many embedded selects with no limit on the embedded rows"""
+        text, _, _ = query_audit.select_list(query)
+        base = self.schema.tables.get(query.table)
+        if not text or base is None:
+            return []
+        limited = {call.first_string() for call in query.find('limit')}
+        limited |= set(re.findall(r'''(?:foreignTable|referencedTable)\s*:\s*['"](\w+)['"]''',
+                                  ' '.join(call.args for call in query.find('limit'))))
+        findings = []
+        for entry in query_audit._entries(text):
+            match = re.match(r'^(?:(\w+)\s*:\s*)?(\w+)(?:\s*!\s*(\w+))?\s*\(', entry)
+            if match is None:
+                continue
+            alias, target = match.group(1) or match.group(2), match.group(2)
+            if target in base.columns or any(fk.ref_table == target for fk in base.foreign_keys()):
+                continue          # many-to-one: one row per parent
+            other = self.schema.tables.get(target)
+            if other is None or not any(fk.ref_table == query.table for fk in other.foreign_keys()):
+                continue
+            if alias in limited or target in limited:
+                continue
+            findings.append(Finding(
+                'unbounded_embed', query.line,
+                f"select embarqué {target} sur {query.table}: toutes les lignes liées sont renvoyées",
+                f".limit(n, {{ referencedTable: '{alias}' }}) ou un .order() + .limit() sur l'embarqué"))
+        return findings
+
+    def _fetches(self, function):
+        content = function.content
+        loops = supabase_queries._loops(content, function._line)
+        for match in _FETCH.finditer(content):
+            line = function._line(match.start())
+            end = supabase_queries._close_paren(content, match.end()) or match.end()
+            loop = supabase_queries._innermost([(loop.start, loop.end, loop) for loop in loops], match.start())
+            if loop is not None:
+                loop = loop[2]
+                function.findings.append(Finding(
+                    'fetch_in_loop', line, f"fetch() séquentiel dans la boucle {loop.kind} ligne {loop.line}",
+                    f"Promise.all par lots sur {loop.collection or 'la collection'}, ou un envoi groupé"))
+            if 'signal' not in content[match.end():end]:
+                function.findings.append(Finding(
+                    'fetch_without_timeout', line, "fetch() sans timeout",
+                    "signal: AbortSignal.timeout(ms) pour borner la latence"))
+
+    def duplicates(self):
+        """{package: {version: [function names]}} of the packages imported at
+        several versions or from several registries"""
+        versions = {}
+        for function in self.functions:
+            for entry in function.imports:
+                if entry.registry in ('npm', 'jsr', 'https'):
+                    label = f"{entry.registry}:{entry.version or '*'}"
+                    versions.setdefault(entry.package, {}).setdefault(label, []).append(function.name)
+        return {package: found for package, found in versions.items() if len(found) > 1}
+
+
+def deno_available():
+    return shutil.which('deno') is not None
+
+
+def measure(function, runs):
+    """Module-load times (ms) of function under the stub runtime; the first
+    run resolves the dependencies, the others hit the Deno cache"""
+    with tempfile.NamedTemporaryFile('w', suffix='.ts', delete=False) as f:
+        f.write(STUB_LOADER)
+        loader = f.name
+    env = dict(os.environ, **STUB_ENV)
+    url = 'file://' + os.path.abspath(function.path)
+    try:
+        for _ in range(runs + 1):
+            result = subprocess.run(['deno', 'run', '--allow-all', '--no-check', loader, url],
+                                    capture_output=True, text=True, env=env, timeout=300)
+            lines = [line for line in result.stdout.splitlines() if line.startswith('{"load_ms"')]
+            if result.returncode != 0 or not lines:
+                raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else
+                                   f"code {result.returncode}")
+            function.load_ms.append(json.loads(lines[-1])['load_ms'])
+    finally:
+        os.unlink(loader)
+    return function.load_ms
+
+
+def load_functions(directory=FUNCTIONS_DIR, names=None):
+    functions = []
+    for entry in sorted(os.listdir(directory)):
+        path = os.path.join(directory, entry)
+        if entry.startswith(('_', '.')) or not os.path.isfile(os.path.join(path, 'index.ts')):
+            continue
+        if names and entry not in names:
+            continue
+        functions.append(EdgeFunction(path))
+    return functions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit the cold-start cost and request path of the Edge Functions')
+    parser.add_argument('--functions-dir', default=FUNCTIONS_DIR)
+    parser.add_argument('--migrations-dir', default=migration_replay.MIGRATIONS_DIR)
+    parser.add_argument('--function', action='append', help='only these functions (repeatable)')
+    parser.add_argument('--measure', action='store_true', help='time the module load with deno and a stub runtime')
+    parser.add_argument('--runs', type=int, default=3, help='cached loads per function with --measure')
+    parser.add_argument('--json', metavar='FILE', help='write the inventory and findings as JSON')
+    args = parser.parse_args()
+
+    functions = load_functions(args.functions_dir, args.function)
+    schema = migration_replay.Schema().replay(migration_replay.migration_files(args.migrations_dir))
+    duplicates = Auditor(functions, schema).audit()
+
+    if args.measure:
+        if not deno_available():
+            print("⚠️  deno introuvable dans le PATH: mesure du chargement ignorée")
+        else:
+            for function in functions:
+                try:
+                    measure(function, args.runs)
+                except (RuntimeError, subprocess.TimeoutExpired) as e:
+                    print(f"⚠️  {function.name}: chargement impossible ({e})")
+
+    print("=" * 80)
+    print(f"AUDIT DES EDGE FUNCTIONS ({len(functions)} fonctions)")
+    print("=" * 80)
+    for function in sorted(functions, key=lambda f: (-f.latency_sensitive, -f.score(), f.name)):
+        packages = [f"{entry.package}@{entry.version or '*'}" for entry in function.imports
+                    if entry.registry not in ('types', 'local')]
+        flag = '⚡' if function.latency_sensitive else '  '
+        print(f"\n{flag} {function.name}: risque {function.risk()} (score {function.score()}), "
+              f"{function.size / 1024:.1f} KB, imports: {', '.join(packages) or 'aucun'}")
+        if function.load_ms:
+            cold, cached = function.load_ms[0], function.load_ms[1:]
+            timing = f"   chargement: {cold:.0f} ms (1er)"
+            if cached:
+                timing += f", {statistics.median(cached):.0f} ms (cache, médiane de {len(cached)})"
+            print(timing)
+        for finding in sorted(function.findings, key=lambda f: f.line):
+            print(f"   {emitters.display_path(function.path)}:{finding.line}  {finding.message}")
+            if finding.suggestion:
+                print(f"      → {finding.suggestion}")
+
+    if duplicates:
+        print("\n📦 Dépendances en plusieurs versions:")
+        for package, found in sorted(duplicates.items()):
+            print(f"   {package}:")
+            for label, names in sorted(found.items()):
+                print(f"      {label:12} {len(names):2} fonction(s): {', '.join(names)}")
+
+    print("\n" + "=" * 80)
+    counts = {}
+    for function in functions:
+        for finding in function.findings:
+            counts[finding.kind] = counts.get(finding.kind, 0) + 1
+    print(', '.join(f"{kind} {count}" for kind, count in sorted(counts.items())))
+    print("=" * 80)
+
+    if args.json:
+        report = {
+            function.name: {
+                'score': function.score(),
+                'risk': function.risk(),
+                'latency_sensitive': function.latency_sensitive,
+                'bytes': function.size,
+                'imports': [{'specifier': e.specifier, 'registry': e.registry, 'package': e.package,
+                             'version': e.version, 'dynamic': e.dynamic, 'line': e.line} for e in function.imports],
+                'module_scope': [{'line': line, 'kind': kind} for line, kind, _ in function.items],
+                'findings': [vars(finding) for finding in function.findings],
+                'load_ms': function.load_ms,
+            }
+            for function in functions
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'functions': report, 'duplicates': duplicates}, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Rapport écrit dans {args.json}")
+
+
+if __name__ == '__main__':
+    main()
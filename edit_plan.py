@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Offset-based edit planning shared by the codemods
+
+Codemods no longer rewrite strings: they emit Edit(start, end, text) tuples
+against the content they read. EditBuilder collects one codemod's edits on
+one file (a later edit overlapping an earlier one is dropped, like a second
+re.sub would no longer see the replaced text). EditPlan merges the edits of
+several codemods on the same file, collapses identical ones, rejects a
+codemod whose edits overlap another's, and writes each file once, atomically
+(temp file + rename), only when its content changed. In dry-run mode a
+unified diff is printed instead.
+"""
+
+import difflib
+import os
+import re
+import shutil
+import sys
+import tempfile
+from collections import namedtuple
+
+Edit = namedtuple('Edit', 'start end text')
+
+
+def overlaps(a, b):
+    """True if the two edits touch the same text
+
+    Insertions at the same offset do not overlap (they are applied in order),
+    nor does an insertion at either end of a replaced range.
+    """
+    if a.start == a.end:
+        return b.start < a.start < b.end
+    if b.start == b.end:
+        return a.start < b.start < a.end
+    return a.start < b.end and b.start < a.end
+
+
+def apply_edits(content, edits):
+    """Apply non-overlapping edits in one pass; same-offset edits keep their order"""
+    if not edits:
+        return content
+    pieces = []
+    last = 0
+    for edit in sorted(edits, key=lambda edit: (edit.start, edit.end)):
+        pieces.append(content[last:edit.start])
+        pieces.append(edit.text)
+        last = edit.end
+    pieces.append(content[last:])
+    return ''.join(pieces)
+
+
+class EditBuilder:
+    """Non-overlapping edits of one codemod on one file"""
+
+    def __init__(self, content):
+        self.content = content
+        self.edits = []
+
+    def replace(self, start, end, text):
+        edit = Edit(start, end, text)
+        if any(overlaps(edit, other) for other in self.edits):
+            return False
+        self.edits.append(edit)
+        return True
+
+    def insert(self, pos, text):
+        return self.replace(pos, pos, text)
+
+    def extend(self, edits):
+        for edit in edits:
+            self.replace(*edit)
+
+    def sub(self, pattern, repl, count=0, flags=0):
+        """re.sub equivalent emitting edits; returns the number of replacements"""
+        done = 0
+        for match in re.finditer(pattern, self.content, flags):
+            text = repl(match) if callable(repl) else match.expand(repl)
+            if self.replace(match.start(), match.end(), text):
+                done += 1
+                if count and done >= count:
+                    break
+        return done
+
+    def result(self):
+        return apply_edits(self.content, self.edits)
+
+
+def merge(sources):
+    """Merge [(source, edits)] given in codemod order
+
+    Returns (edits, conflicts): identical edits are kept once; a source with
+    an edit overlapping an already accepted one is rejected as a whole, and
+    reported as (source, other source).
+    """
+    accepted = []  # (edit, source)
+    conflicts = []
+    for source, edits in sources:
+        new = []
+        conflict = None
+        for edit in edits:
+            if any(edit == other for other, _ in accepted):
+                continue
+            owner = next((owner for other, owner in accepted if overlaps(edit, other)), None)
+            if owner is not None:
+                conflict = owner
+                break
+            new.append((edit, source))
+        if conflict is not None:
+            conflicts.append((source, conflict))
+        else:
+            accepted.extend(new)
+    return [edit for edit, _ in accepted], conflicts
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def unified_diff(path, old, new):
+    name = os.path.relpath(path) if os.path.isabs(path) else path
+    return ''.join(difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True),
+        fromfile=f'a/{name}', tofile=f'b/{name}'))
+
+
+def atomic_write(path, content):
+    """Write content to a temp file next to path, then rename it over path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        try:
+            shutil.copymode(path, tmp_path)
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_if_changed(path, original, content, dry_run=False, out=None):
+    """Write content if it differs from original; returns True if it does
+
+    With dry_run the unified diff is printed to out (stdout) instead.
+    """
+    if content == original:
+        return False
+    if dry_run:
+        (out or sys.stdout).write(unified_diff(path, original, content))
+    else:
+        atomic_write(path, content)
+    return True
+
+
+class EditPlan:
+    """Edits of several codemods over several files, applied one write per file"""
+
+    def __init__(self):
+        self.files = {}  # path -> [original content, [(source, edits)]]
+
+    def add(self, path, original, source, edits):
+        entry = self.files.setdefault(path, [original, []])
+        if edits:
+            entry[1].append((source, edits))
+
+    def commit(self, dry_run=False, out=None):
+        """Merge and write every file
+
+        Returns [(path, applied sources, conflicts)] for the files that were
+        written (or would be, in dry-run) or had conflicts.
+        """
+        changed = []
+        for path, (original, sources) in self.files.items():
+            edits, conflicts = merge(sources)
+            content = apply_edits(original, edits)
+            written = write_if_changed(path, original, content, dry_run, out)
+            if written or conflicts:
+                rejected = {source for source, _ in conflicts}
+                applied = [source for source, _ in sources if source not in rejected] if written else []
+                changed.append((path, applied, conflicts))
+        return changed
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Streaming output formats of the page scripts (--format)
+
+Results arrive one (name, path, rule, result) at a time, as soon as a page is
+processed, and each emitter writes them out immediately:
+
+  - text:  the scripts' usual human summary; it needs every result, so it
+           collects them and calls each rule's report() at the end
+  - jsonl: one JSON object per page and rule, flushed line by line, then a
+           final {"type": "summary"} line
+  - sarif: a SARIF 2.1.0 log whose results (the rules' findings) are written
+           as they come; the JSON document is closed by close()
+
+jsonl and sarif keep nothing in memory but counters, so a scan of 50k pages
+can be piped into jq or a CI uploader while it runs:
+
+    python3 verify_navigation.py --format jsonl | jq -c 'select(.findings != [])'
+    python3 page_engine.py --format sarif > pages.sarif
+"""
+
+import json
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FORMATS = ['text', 'jsonl', 'sarif']
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+
+def add_argument(parser):
+    parser.add_argument('--format', choices=FORMATS, default='text',
+                        help='text summary (default), or JSON Lines / SARIF streamed page by page')
+
+
+def display_path(path):
+    """Path relative to the project when inside it, absolute otherwise"""
+    path = os.path.abspath(path)
+    if path.startswith(PROJECT_DIR + os.sep):
+        return os.path.relpath(path, PROJECT_DIR)
+    return path
+
+
+class TextEmitter:
+    def __init__(self, rules, out=None):
+        self.rules = rules
+        self.results = {rule.name: [] for rule in rules}
+
+    def emit(self, name, path, rule, result):
+        self.results[rule.name].append((name, result))
+
+    def close(self):
+        for rule in self.rules:
+            rule.report(self.results[rule.name])
+
+
+class JsonlEmitter:
+    def __init__(self, rules, out=None):
+        self.rules = rules
+        self.out = out or sys.stdout
+        self.records = 0
+        self.levels = {}
+
+    def emit(self, name, path, rule, result):
+        findings = rule.findings(name, result)
+        for level, _ in findings:
+            self.levels[level] = self.levels.get(level, 0) + 1
+        self.records += 1
+        self.out.write(json.dumps({
+            'type': 'result',
+            'file': display_path(path),
+            'rule': rule.name,
+            'result': result,
+            'findings': [{'level': level, 'message': message} for level, message in findings],
+        }, ensure_ascii=False) + '\n')
+        self.out.flush()
+
+    def close(self):
+        self.out.write(json.dumps({'type': 'summary', 'records': self.records,
+                                   'findings': self.levels}) + '\n')
+        self.out.flush()
+
+
+class SarifEmitter:
+    def __init__(self, rules, out=None):
+        self.rules = rules
+        self.out = out or sys.stdout
+        self.count = 0
+
+        # Everything but the results array is known up front: write the head
+        # of the document now and close it in close()
+        head = json.dumps({
+            '$schema': SARIF_SCHEMA,
+            'version': '2.1.0',
+            'runs': [{
+                'tool': {'driver': {
+                    'name': 'ttd-page-scripts',
+                    'rules': [{'id': rule.name,
+                               'shortDescription': {'text': rule.description or rule.name}}
+                              for rule in rules],
+                }},
+                'results': [],
+            }],
+        }, ensure_ascii=False, indent=2)
+        self.tail = head[head.rindex('[]') + 2:]
+        self.out.write(head[:head.rindex('[]') + 1] + '\n')
+        self.out.flush()
+
+    def emit(self, name, path, rule, result):
+        for level, message in rule.findings(name, result):
+            record = json.dumps({
+                'ruleId': rule.name,
+                'level': level,
+                'message': {'text': message},
+                'locations': [{'physicalLocation': {'artifactLocation': {
+                    'uri': display_path(path).replace(os.sep, '/'),
+                }}}],
+            }, ensure_ascii=False)
+            self.out.write((',\n' if self.count else '') + record)
+            self.count += 1
+        self.out.flush()
+
+    def close(self):
+        self.out.write('\n]' + self.tail + '\n')
+        self.out.flush()
+
+
+def exit_on_broken_pipe():
+    """The reader went away (`| head`): stop quietly, without a traceback"""
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    sys.exit(1)
+
+
+def make(fmt, rules, out=None):
+    """Emitter of format fmt for rules (objects with name, description, findings, report)"""
+    return {'text': TextEmitter, 'jsonl': JsonlEmitter, 'sarif': SarifEmitter}[fmt](rules, out)
@@ -3,8 +3,14 @@
 Script to fix all remaining prop issues in pages
 """
 
+import functools
 import os
 import re
+import sys
+
+import codemod_runner
+import edit_plan
+import profiler
 
 fixes = [
     {
@@ -67,36 +73,54 @@ fixes = [
     },
 ]
 
-def fix_file(fix_config):
-    """Fix a single file according to configuration"""
-    filepath = fix_config['file']
-
-    if not os.path.exists(filepath):
-        print(f"✗ File not found: {filepath}")
-        return False
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    original_content = content
+def config_edits(fix_config, content):
+    """Edits applying fix_config to content"""
+    builder = edit_plan.EditBuilder(content)
 
     # Remove type definition
     if fix_config.get('type_removal'):
-        content = re.sub(fix_config['type_removal'], '', content, flags=re.DOTALL)
+        builder.sub(fix_config['type_removal'], '', flags=re.DOTALL)
 
     # Fix function signature
     if fix_config.get('func_signature'):
         old_sig, new_sig = fix_config['func_signature']
-        content = re.sub(old_sig, new_sig, content)
+        builder.sub(old_sig, new_sig)
 
     # Apply replacements
     for old, new in fix_config.get('replacements', []):
-        content = re.sub(old, new, content)
+        builder.sub(old, new)
+
+    return builder.edits
+
+def plan_targets():
+    return [fix_config['file'] for fix_config in fixes]
+
+def plan_edits(filepath, content):
+    """Edits of the fix configured for filepath"""
+    for fix_config in fixes:
+        if os.path.normpath(fix_config['file']) == os.path.normpath(filepath):
+            return config_edits(fix_config, content)
+    return []
+
+def rebase(fix_configs, pages_dir):
+    """Configs pointing at the same page names inside pages_dir"""
+    return [dict(fix_config, file=os.path.join(pages_dir, os.path.basename(fix_config['file'])))
+            for fix_config in fix_configs]
+
+def fix_file(fix_config, dry_run=False):
+    """Fix a single file according to configuration"""
+    filepath = fix_config['file']
+
+    if not os.path.exists(filepath):
+        print(f"✗ File not found: {filepath}")
+        return False
+
+    original_content = edit_plan.read_text(filepath)
+
+    content = edit_plan.apply_edits(original_content, config_edits(fix_config, original_content))
 
     # Only write if content changed
-    if content != original_content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+    if edit_plan.write_if_changed(filepath, original_content, content, dry_run):
         print(f"✓ Fixed: {filepath}")
         return True
     else:
@@ -104,12 +128,16 @@ def fix_file(fix_config):
         return False
 
 def main():
-    fixed_count = 0
-    for fix_config in fixes:
-        if fix_file(fix_config):
-            fixed_count += 1
+    args = codemod_runner.parse_args(__doc__.strip())
+    profiler.profile_function(sys.modules[__name__], 'config_edits', 'fix_all_props')
+    configs = rebase(fixes, args.pages_dir) if args.pages_dir else fixes
+    emitter = codemod_runner.make_emitter(args, 'fix_all_props', 'Props restants des pages configurées')
+    fixed_count = codemod_runner.run(functools.partial(fix_file, dry_run=args.dry_run), configs, args.jobs,
+                                     label=lambda fix_config: fix_config['file'], emitter=emitter)
 
-    print(f"\n✓ Fixed {fixed_count}/{len(fixes)} files")
+    if emitter is None:
+        print(f"\n✓ Fixed {fixed_count}/{len(configs)} files")
+    profiler.report()
 
 if __name__ == '__main__':
     main()
@@ -4,8 +4,15 @@ Script to fix all back buttons in pages that use onBack prop
 by replacing them with navigate(-1)
 """
 
+import functools
 import os
-import re
+import sys
+
+import codemod_runner
+import edit_plan
+import import_index
+import profiler
+import tsx_scanner
 
 # Files to fix
 files_to_fix = [
@@ -34,91 +41,81 @@ files_to_fix = [
     'src/pages/FAQPage.tsx',
 ]
 
-def fix_file(filepath):
-    """Fix back button implementation in a single file"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    original_content = content
+def plan_edits(filepath, content):
+    """Edits replacing the onBack back buttons of content with navigate(-1)"""
+    builder = edit_plan.EditBuilder(content)
 
     # 1. Remove type definitions with onBack
     # Match: type PageProps = { onBack: () => void; ... }
-    content = re.sub(
+    builder.sub(
         r'type\s+\w+Props\s*=\s*\{\s*onBack:\s*\(\)\s*=>\s*void;?\s*\};?\s*\n',
-        '',
-        content
+        ''
     )
 
     # 2. Remove onBack from function parameters
     # Match: export function PageName({onBack}: PageProps)
     # or: export function PageName({onBack }: PageProps)
-    content = re.sub(
+    builder.sub(
         r'export\s+function\s+(\w+)\(\{onBack\s*\}:\s*\w+Props\)',
-        r'export function \1()',
-        content
+        r'export function \1()'
     )
 
     # 3. Replace onClick={onBack} with onClick={() => navigate(-1)}
-    content = re.sub(
+    replaced = builder.sub(
         r'onClick=\{onBack\}',
-        r'onClick={() => navigate(-1)}',
-        content
+        r'onClick={() => navigate(-1)}'
     )
 
     # 4. Make sure useNavigate is imported if navigate is used
-    if 'navigate(-1)' in content or "navigate('/')" in content:
-        # Check if useNavigate is already imported
-        if 'useNavigate' not in content:
-            # Add useNavigate to existing react-router-dom import
-            if "from 'react-router-dom'" in content:
-                # Find the import line
-                import_match = re.search(
-                    r"import\s+\{([^}]+)\}\s+from\s+'react-router-dom'",
-                    content
-                )
-                if import_match:
-                    existing_imports = import_match.group(1)
-                    if 'useNavigate' not in existing_imports:
-                        new_imports = existing_imports.rstrip() + ', useNavigate'
-                        content = content.replace(
-                            f"import {{{existing_imports}}} from 'react-router-dom'",
-                            f"import {{{new_imports}}} from 'react-router-dom'"
-                        )
-            else:
-                # Add new import line after other imports
-                first_import = re.search(r'^import\s+.*$', content, re.MULTILINE)
-                if first_import:
-                    insert_pos = first_import.end()
-                    content = content[:insert_pos] + "\nimport { useNavigate } from 'react-router-dom';" + content[insert_pos:]
+    if replaced or 'navigate(-1)' in content or "navigate('/')" in content:
+        imports = import_index.ImportIndex(content)
+        imports.add('useNavigate', 'react-router-dom')
+        builder.extend(imports.edits())
 
         # Check if navigate const is defined
         if 'const navigate = useNavigate()' not in content:
-            # Find the function body start and add navigate const
-            func_match = re.search(r'export function \w+\([^)]*\)\s*\{', content)
-            if func_match:
-                insert_pos = func_match.end()
-                content = content[:insert_pos] + '\n  const navigate = useNavigate();' + content[insert_pos:]
+            # Add navigate const at the function body start
+            insert_pos = tsx_scanner.function_body_start(content)
+            if insert_pos is not None:
+                builder.insert(insert_pos, '\n  const navigate = useNavigate();')
+
+    return builder.edits
+
+def fix_file(filepath, dry_run=False):
+    """Fix back button implementation in a single file"""
+    original_content = edit_plan.read_text(filepath)
+
+    content = edit_plan.apply_edits(original_content, plan_edits(filepath, original_content))
 
     # Only write if content changed
-    if content != original_content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+    if edit_plan.write_if_changed(filepath, original_content, content, dry_run):
         print(f"✓ Fixed: {filepath}")
         return True
     else:
         print(f"- Skipped (no changes): {filepath}")
         return False
 
+def plan_targets():
+    return files_to_fix
+
+def fix_path(filepath, dry_run=False):
+    """Fix filepath if it exists"""
+    if os.path.exists(filepath):
+        return fix_file(filepath, dry_run)
+    print(f"✗ Not found: {filepath}")
+    return False
+
 def main():
-    fixed_count = 0
-    for filepath in files_to_fix:
-        if os.path.exists(filepath):
-            if fix_file(filepath):
-                fixed_count += 1
-        else:
-            print(f"✗ Not found: {filepath}")
-
-    print(f"\n✓ Fixed {fixed_count}/{len(files_to_fix)} files")
+    args = codemod_runner.parse_args(__doc__.strip())
+    profiler.profile_function(sys.modules[__name__], 'plan_edits', 'fix_back_buttons')
+    targets = codemod_runner.targets(args, files_to_fix)
+    emitter = codemod_runner.make_emitter(args, 'fix_back_buttons', 'onBack remplacé par navigate(-1)')
+    fixed_count = codemod_runner.run(functools.partial(fix_path, dry_run=args.dry_run),
+                                     targets, args.jobs, emitter=emitter)
+
+    if emitter is None:
+        print(f"\n✓ Fixed {fixed_count}/{len(targets)} files")
+    profiler.report()
 
 if __name__ == '__main__':
     main()
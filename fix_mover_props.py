@@ -3,8 +3,15 @@
 Script to fix remaining Mover pages props
 """
 
+import functools
 import os
 import re
+import sys
+
+import codemod_runner
+import edit_plan
+import profiler
+import tsx_scanner
 
 files = [
     'src/pages/MoverQuoteRequestsPage.tsx',
@@ -14,50 +21,63 @@ files = [
     'src/pages/MoverFinancesPage.tsx',
 ]
 
-def fix_file(filepath):
+def props_edits(content):
+    """Edits removing onBack from the Props and signatures
+
+    Blocks and signatures are located with tsx_scanner instead of DOTALL
+    regexes like `\\{[^}]*onBack[^}]*\\}`, which backtrack on large pages.
+    """
+    scan = tsx_scanner.scan(content)
+    edits = []
+
+    # Remove type/interface definitions with onBack
+    for block in scan.types:
+        if block.end is None or not block.name.endswith('Props'):
+            continue
+        if 'onBack' not in content[block.body_start:block.end]:
+            continue
+        if block.kind == 'type' and content[block.end - 1] != ';':
+            continue
+        end = tsx_scanner.extend_through_newline(content, block.end)
+        if end is not None:
+            edits.append(edit_plan.Edit(block.start, end, ''))
+
+    for function in scan.functions:
+        if not function.default or function.params_end is None:
+            continue
+        params = content[function.params_start + 1:function.params_end - 1]
+
+        # Fix function signature - remove props object completely if only onBack
+        if re.fullmatch(r'\{onBack\s*\}:\s*\w+Props', params):
+            edits.append(edit_plan.Edit(function.params_start + 1, function.params_end - 1, ''))
+            continue
+
+        # Fix function signature - remove onBack but keep other props
+        m = re.fullmatch(r'\{\s*onBack,\s*([^}]+)\}:\s*\w+Props', params)
+        if m:
+            edits.append(edit_plan.Edit(function.params_start + 1, function.params_end - 1,
+                                        f'{{ {m.group(1)} }}: any'))
+
+    return edits
+
+def plan_targets():
+    return files
+
+def plan_edits(filepath, content):
+    return props_edits(content)
+
+def fix_file(filepath, dry_run=False):
     """Fix MoverPage props"""
     if not os.path.exists(filepath):
         print(f"✗ File not found: {filepath}")
         return False
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    original_content = content
-
-    # Remove type definition with onBack
-    content = re.sub(
-        r'type\s+\w+Props\s*=\s*\{[^}]*onBack[^}]*\};\s*\n',
-        '',
-        content,
-        flags=re.DOTALL
-    )
-
-    content = re.sub(
-        r'interface\s+\w+Props\s*\{[^}]*onBack[^}]*\}\s*\n',
-        '',
-        content,
-        flags=re.DOTALL
-    )
-
-    # Fix function signature - remove props object completely if only onBack
-    content = re.sub(
-        r'export default function (\w+)\(\{onBack\s*\}:\s*\w+Props\)',
-        r'export default function \1()',
-        content
-    )
-
-    # Fix function signature - remove onBack but keep other props
-    content = re.sub(
-        r'export default function (\w+)\(\{\s*onBack,\s*([^}]+)\}:\s*\w+Props\)',
-        r'export default function \1({ \2 }: any)',
-        content
-    )
+    original_content = edit_plan.read_text(filepath)
+
+    content = edit_plan.apply_edits(original_content, props_edits(original_content))
 
     # Only write if content changed
-    if content != original_content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+    if edit_plan.write_if_changed(filepath, original_content, content, dry_run):
         print(f"✓ Fixed: {filepath}")
         return True
     else:
@@ -65,12 +85,16 @@ def fix_file(filepath):
         return False
 
 def main():
-    fixed_count = 0
-    for filepath in files:
-        if fix_file(filepath):
-            fixed_count += 1
+    args = codemod_runner.parse_args(__doc__.strip())
+    profiler.profile_function(sys.modules[__name__], 'props_edits', 'fix_mover_props')
+    targets = codemod_runner.targets(args, files)
+    emitter = codemod_runner.make_emitter(args, 'fix_mover_props', 'onBack retiré des props des pages Mover')
+    fixed_count = codemod_runner.run(functools.partial(fix_file, dry_run=args.dry_run), targets, args.jobs,
+                                     emitter=emitter)
 
-    print(f"\n✓ Fixed {fixed_count}/{len(files)} files")
+    if emitter is None:
+        print(f"\n✓ Fixed {fixed_count}/{len(targets)} files")
+    profiler.report()
 
 if __name__ == '__main__':
     main()
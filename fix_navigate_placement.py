@@ -1,30 +1,43 @@
 #!/usr/bin/env python3
-import os
-import re
+import edit_plan
+import page_engine
 
-pages_dir = '/tmp/cc-agent/62557988/project/src/pages/'
-tsx_files = [f for f in os.listdir(pages_dir) if f.endswith('.tsx')]
+# Fix pattern: function Name({ const navigate = useNavigate(); ...
+pattern = r'(export (?:default )?function \w+\(\{)\s*const navigate = useNavigate\(\);\s*([^}]*\}[^{]*\{)'
 
-for filename in tsx_files:
-    filepath = os.path.join(pages_dir, filename)
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+def plan_edits(filepath, content):
+    """Edits moving the navigate declaration out of the destructured params"""
+    builder = edit_plan.EditBuilder(content)
+    builder.sub(pattern, r'\1\2\n  const navigate = useNavigate();')
+    return builder.edits
 
-    # Fix pattern: function Name({ const navigate = useNavigate(); ...
-    pattern = r'(export (?:default )?function \w+\(\{)\s*const navigate = useNavigate\(\);\s*([^}]*\}[^{]*\{)'
 
-    if re.search(pattern, content):
-        print(f"Fixing {filename}...")
-        content = re.sub(
-            pattern,
-            r'\1\2\n  const navigate = useNavigate();',
-            content
-        )
+class FixNavigatePlacementRule(page_engine.Rule):
+    name = 'fix_navigate_placement'
+    description = 'const navigate déclaré dans les paramètres destructurés'
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+    def process(self, page):
+        edits = plan_edits(page.path, page.content)
+        if not edits:
+            return False
 
-        print(f"✓ Fixed {filename}")
+        page.apply(edits)
+        return True
 
-print("\n✅ Navigate placement fixed!")
+    def findings(self, filename, result):
+        return [('note', 'navigate declaration moved into the function body')] if result else []
+
+    def report(self, results):
+        for filename, fixed in results:
+            if fixed:
+                print(f"Fixing {filename}...")
+                print(f"✓ Fixed {filename}")
+
+        print("\n✅ Navigate placement fixed!")
+
+
+RULE = FixNavigatePlacementRule()
+
+if __name__ == '__main__':
+    page_engine.main([RULE])
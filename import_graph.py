@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Import graph of the TypeScript sources under src/
+
+Each module is parsed once with tsx_scanner (static imports) plus regexes
+for dynamic `import('...')` calls, `import * as` and re-exports, and its
+exports are listed. Relative specifiers are resolved like Vite does: the
+path as written, then with .tsx/.ts/.jsx/.js, then as a directory with an
+index file. Bare specifiers (react, lucide-react, ...) live in node_modules
+and are left out of the graph.
+
+The parsed modules are kept in .import_graph.json, validated like
+.page_cache.json (size + mtime, then content hash), so a run only re-parses
+the files that changed since the last one; refresh() does the same in
+process for a long-lived graph (watch mode, navigation checks).
+
+Run as a script, it reports from the entry points (main.tsx, Router.tsx):
+  - dead modules: source files no import chain reaches
+  - unused exports: names exported but imported by no module
+  - near-duplicate files: token 8-gram shingles compared through bottom-k
+    sketches (ClientPaymentPage.tsx vs ClientPaymentPageNew.tsx, ...)
+
+    graph = ImportGraph()
+    initial = graph.closure([os.path.join(graph.src_dir, 'main.tsx')])
+    print(graph.size(initial))
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+import time
+import zlib
+
+import edit_plan
+import page_cache
+import page_engine
+import tree_walk
+import tsx_scanner
+
+SRC_DIR = os.path.join(page_engine.PROJECT_DIR, 'src')
+CACHE_FILE = os.path.join(page_engine.PROJECT_DIR, '.import_graph.json')
+CACHE_FORMAT = 1
+
+EXTENSIONS = ('.tsx', '.ts', '.jsx', '.js')
+SOURCE_GLOBS = tuple('*' + ext for ext in EXTENSIONS)
+ENTRIES = ('main.tsx', 'Router.tsx')
+
+# Shingles of SHINGLE tokens; SKETCH_SIZE smallest hashes kept per file
+SHINGLE = 8
+SKETCH_SIZE = 128
+# Files with fewer tokens are too small to call duplicates
+MIN_TOKENS = 200
+
+# Stands for "every export" in the names a module imports from another
+ALL = '*'
+
+_DYNAMIC_IMPORT = re.compile(r'''\bimport\(\s*(['"])([^'"\n]+)\1\s*\)''')
+_NAMESPACE_IMPORT = re.compile(r'''^import\s+\*\s*as\s+[A-Za-z_$][\w$]*\s+from\s*(['"])([^'"\n]+)\1''',
+                               re.MULTILINE)
+_RE_EXPORT = re.compile(r'''^export\s+(?:type\s+)?(?:\*|\{([^}]*)\})\s*from\s*(['"])([^'"\n]+)\2''',
+                        re.MULTILINE)
+_EXPORT_DECLARATION = re.compile(
+    r'^export\s+(?:declare\s+)?(?:async\s+)?(?:const|let|var|function\*?|class|interface|type|enum)\s+([A-Za-z_$][\w$]*)',
+    re.MULTILINE)
+_EXPORT_DEFAULT = re.compile(r'^export\s+default\b', re.MULTILINE)
+_EXPORT_LIST = re.compile(r'^export\s*(?:type\s+)?\{([^}]*)\}(?!\s*from)', re.MULTILINE)
+_COMMENT = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_SHINGLE_TOKEN = re.compile(r'[A-Za-z_$][\w$]*|\d+|[^\s\w]')
+
+
+def _names(specifiers):
+    """Imported names of a `{ a, b as c, type D }` list"""
+    names = []
+    for name in specifiers.split(','):
+        name = name.strip()
+        if name.startswith('type '):
+            name = name[5:].strip()
+        if name:
+            names.append(name.split(' as ')[0].strip())
+    return names
+
+
+def sketch(content):
+    """(token count, bottom-k hashes of the token shingles) of content"""
+    tokens = _SHINGLE_TOKEN.findall(_COMMENT.sub(' ', content))
+    if len(tokens) < SHINGLE:
+        return len(tokens), []
+    hashes = {zlib.crc32('\x00'.join(tokens[i:i + SHINGLE]).encode('utf-8'))
+              for i in range(len(tokens) - SHINGLE + 1)}
+    return len(tokens), heapq.nsmallest(SKETCH_SIZE, hashes)
+
+
+def similarity(a, b):
+    """Jaccard similarity of two shingle sets estimated from their sketches"""
+    if not a or not b:
+        return 0.0
+    a, b = set(a), set(b)
+    union = heapq.nsmallest(SKETCH_SIZE, a | b)
+    return sum(1 for h in union if h in a and h in b) / len(union)
+
+
+class Module:
+    """One source file: its imports (resolved or bare) and its exports"""
+
+    FIELDS = ('size', 'imports', 'dynamic_imports', 'exports', 'default_export', 'tokens', 'sketch')
+
+    def __init__(self, path, content=None):
+        self.path = path
+        if content is None:
+            return
+        self.size = len(content.encode('utf-8'))
+        scan = tsx_scanner.scan(content)
+        # [specifier, default binding, [imported names]] of the static imports;
+        # ALL for `import * as` and `export * from`
+        self.imports = [[entry.module, entry.default, _names(', '.join(entry.names))]
+                        for entry in scan.imports]
+        for match in _NAMESPACE_IMPORT.finditer(content):
+            self.imports.append([match.group(2), None, [ALL]])
+        for match in _RE_EXPORT.finditer(content):
+            names = _names(match.group(1)) if match.group(1) is not None else [ALL]
+            self.imports.append([match.group(3), None, names])
+        self.dynamic_imports = [m.group(2) for m in _DYNAMIC_IMPORT.finditer(content)]
+        exports = set(_EXPORT_DECLARATION.findall(content))
+        for names in _EXPORT_LIST.findall(content):
+            for name in names.split(','):
+                if name.strip():
+                    exports.add(name.split(' as ')[-1].strip())
+        self.exports = sorted(exports)
+        self.default_export = bool(_EXPORT_DEFAULT.search(content))
+        self.tokens, self.sketch = sketch(content)
+
+    @classmethod
+    def asset(cls, path):
+        """Stylesheets and assets count for their size only"""
+        module = cls(path, '')
+        module.size = os.path.getsize(path)
+        return module
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, path, data):
+        module = cls(path)
+        for field in cls.FIELDS:
+            setattr(module, field, data[field])
+        return module
+
+
+def _stat_key(st):
+    return st.st_size, st.st_mtime_ns
+
+
+def resolve(from_path, specifier):
+    """Absolute path of a relative specifier imported by from_path, or None"""
+    if not specifier.startswith('.'):
+        return None
+    base = os.path.normpath(os.path.join(os.path.dirname(from_path), specifier))
+    candidates = [base] + [base + ext for ext in EXTENSIONS] + \
+                 [os.path.join(base, 'index' + ext) for ext in EXTENSIONS]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+class ImportGraph:
+    """Lazily parsed modules and their resolved edges
+
+    With a cache_path, parsed modules are reused across runs as long as the
+    file is unchanged; call save() to write the cache back.
+    """
+
+    def __init__(self, src_dir=SRC_DIR, cache_path=None):
+        self.src_dir = os.path.abspath(src_dir)
+        self.cache_path = cache_path
+        self.modules = {}
+        self.files = []
+        self.parsed = 0
+        self._stats = {}     # path -> (size, mtime_ns) of the loaded module
+        self._entries = {}   # path -> cache entry {size, mtime_ns, hash, module}
+        self._dirty = False
+        self._importers = None
+        if cache_path:
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('format') == CACHE_FORMAT and data.get('src_dir') == self.src_dir:
+                    self._entries = data['files']
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def module(self, path):
+        module = self.modules.get(path)
+        if module is None:
+            module = self.modules[path] = self._load(path)
+        return module
+
+    def _load(self, path):
+        if not path.endswith(EXTENSIONS):
+            return Module.asset(path)
+        st = os.stat(path)
+        self._stats[path] = _stat_key(st)
+        entry = self._entries.get(path)
+        if entry is not None and (entry['size'], entry['mtime_ns']) == self._stats[path]:
+            return Module.from_dict(path, entry['module'])
+
+        content = edit_plan.read_text(path)
+        digest = page_cache.content_hash(content)
+        if entry is not None and entry['hash'] == digest:
+            module = Module.from_dict(path, entry['module'])
+        else:
+            module = Module(path, content)
+            self.parsed += 1
+        if self.cache_path:
+            self._entries[path] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                                   'hash': digest, 'module': module.to_dict()}
+            self._dirty = True
+        return module
+
+    def refresh(self):
+        """Re-list the sources and drop the modules whose file changed
+
+        Returns the paths that were added, changed or removed since the
+        previous refresh (everything on the first call).
+        """
+        files = sorted(os.path.abspath(entry.path) for _, entry in
+                       tree_walk.walk([self.src_dir], include=SOURCE_GLOBS))
+        changed = set(self.files).symmetric_difference(files)
+        for path in files:
+            if path in self.modules and self._stats.get(path) != _stat_key(os.stat(path)):
+                del self.modules[path]
+                changed.add(path)
+        for path in changed.difference(files):
+            self.modules.pop(path, None)
+        for path in [path for path in self._entries if path not in files]:
+            del self._entries[path]
+            self._dirty = True
+        self.files = files
+        if changed:
+            self._importers = None
+        return changed
+
+    def invalidate(self, path):
+        """Forget path's module (a watcher saw it change)"""
+        self.modules.pop(os.path.abspath(path), None)
+        self._importers = None
+
+    def edges(self, path, dynamic=False):
+        """Resolved static (or dynamic) dependencies of path"""
+        module = self.module(path)
+        specifiers = module.dynamic_imports if dynamic else [spec for spec, _, _ in module.imports]
+        for specifier in specifiers:
+            target = resolve(path, specifier)
+            if target is not None:
+                yield target
+
+    def closure(self, starts, skip=None, dynamic=False):
+        """Modules reachable from starts through static imports (and dynamic
+        ones with dynamic=True); skip(src, dst) drops edges"""
+        seen = set()
+        stack = list(starts)
+        while stack:
+            path = stack.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            targets = list(self.edges(path))
+            if dynamic and path.endswith(EXTENSIONS):
+                targets.extend(self.edges(path, dynamic=True))
+            for target in targets:
+                if target not in seen and not (skip and skip(path, target)):
+                    stack.append(target)
+        return seen
+
+    def size(self, paths):
+        return sum(self.module(path).size for path in paths)
+
+    def importers(self, path):
+        """Source files importing path (statically or dynamically)"""
+        if self._importers is None:
+            self._importers = {}
+            for source in self.files:
+                for target in set(self.edges(source)) | set(self.edges(source, dynamic=True)):
+                    self._importers.setdefault(target, set()).add(source)
+        return self._importers.get(path, set())
+
+    def used_exports(self):
+        """{path: set of names other modules import from it}, ALL when a
+        namespace import or a dynamic import can reach any export"""
+        used = {}
+        for source in self.files:
+            module = self.module(source)
+            for specifier, default, names in module.imports:
+                target = resolve(source, specifier)
+                if target is not None:
+                    used.setdefault(target, set()).update(names + (['default'] if default else []))
+            for target in self.edges(source, dynamic=True):
+                used.setdefault(target, set()).add(ALL)
+        return used
+
+    def save(self):
+        if not (self.cache_path and self._dirty):
+            return
+        racy_after = time.time_ns() - page_cache.RACY_WINDOW_NS
+        for entry in self._entries.values():
+            if entry['mtime_ns'] is not None and entry['mtime_ns'] >= racy_after:
+                entry['mtime_ns'] = None
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': CACHE_FORMAT, 'src_dir': self.src_dir, 'files': self._entries}, f)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+
+def dead_modules(graph, entries):
+    """Source files unreachable from entries, in path order"""
+    reachable = graph.closure(entries, dynamic=True)
+    return [path for path in graph.files if path not in reachable and not path.endswith('.d.ts')]
+
+
+def unused_exports(graph, paths):
+    """[(path, [names])] of the exports of paths no module imports"""
+    used = graph.used_exports()
+    unused = []
+    for path in paths:
+        names = used.get(path, set())
+        if ALL in names:
+            continue
+        module = graph.module(path)
+        exported = list(module.exports) + (['default'] if module.default_export else [])
+        missing = [name for name in exported if name not in names]
+        if missing:
+            unused.append((path, missing))
+    return unused
+
+
+def duplicates(graph, threshold):
+    """[(similarity, path a, path b)] of the file pairs at least threshold alike"""
+    sketched = [(path, graph.module(path)) for path in graph.files]
+    sketched = [(path, set(module.sketch)) for path, module in sketched if module.tokens >= MIN_TOKENS]
+    pairs = []
+    for i, (path_a, sketch_a) in enumerate(sketched):
+        for path_b, sketch_b in sketched[i + 1:]:
+            # Only hashes in both sketches count, out of at least the larger sketch
+            if len(sketch_a & sketch_b) < threshold * max(len(sketch_a), len(sketch_b)):
+                continue
+            score = similarity(sketch_a, sketch_b)
+            if score >= threshold:
+                pairs.append((score, path_a, path_b))
+    return sorted(pairs, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report dead modules, unused exports and near-duplicate files under src/')
+    parser.add_argument('--src-dir', default=SRC_DIR)
+    parser.add_argument('--entry', action='append', metavar='FILE',
+                        help=f"entry point, relative to --src-dir (repeatable, default: {', '.join(ENTRIES)})")
+    parser.add_argument('--similarity', type=float, default=0.5,
+                        help='near-duplicate threshold, estimated Jaccard of token shingles (default: 0.5)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='ignore and do not update .import_graph.json')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = ImportGraph(args.src_dir, None if args.no_cache else CACHE_FILE)
+    graph.refresh()
+    entries = [os.path.join(graph.src_dir, entry) for entry in (args.entry or ENTRIES)]
+    for entry in entries:
+        if not os.path.isfile(entry):
+            parser.error(f"entry point not found: {entry}")
+
+    dead = dead_modules(graph, entries)
+    live = [path for path in graph.files if path not in set(dead)]
+    unused = unused_exports(graph, [path for path in live if path not in entries])
+    similar = duplicates(graph, args.similarity)
+    graph.save()
+
+    def show(path):
+        return os.path.relpath(path, graph.src_dir)
+
+    print("=" * 80)
+    print(f"GRAPHE D'IMPORTS ({len(graph.files)} modules, {graph.parsed} analysés, "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms)")
+    print("=" * 80)
+
+    print(f"\n💀 Modules morts ({len(dead)}), injoignables depuis {', '.join(show(e) for e in entries)}:")
+    for path in dead:
+        print(f"   {show(path)} ({graph.module(path).size / 1024:.1f} KB)")
+    if dead:
+        print(f"   → {graph.size(dead) / 1024:.1f} KB de sources")
+
+    print(f"\n📤 Exports inutilisés ({sum(len(names) for _, names in unused)}):")
+    for path, names in unused:
+        print(f"   {show(path)}: {', '.join(names)}")
+
+    print(f"\n👯 Fichiers quasi identiques (≥ {args.similarity:.0%}):")
+    for score, path_a, path_b in similar:
+        print(f"   {score:4.0%}  {show(path_a)} ↔ {show(path_b)}")
+    if not similar:
+        print("   aucun")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Per-file import index with batched import edits
+
+The index is built once per file from its import header (it stops at the
+first statement that is not an import) and maps each module to its imported
+names with their offsets, so "is X imported from Y" is a set lookup instead
+of a substring scan of the whole file. Import additions are collected and
+written back in a single splice of the header.
+
+    index = ImportIndex(content)
+    if not index.has('useNavigate', 'react-router-dom'):
+        index.add('useNavigate', 'react-router-dom', after='react')
+    ...                                  # edits below the import header
+    content = index.apply(content)       # or builder.extend(index.edits())
+"""
+
+import re
+
+from edit_plan import Edit, apply_edits
+from tsx_scanner import IMPORT, Import
+
+_SKIP = re.compile(r'(?:\s+|//[^\n]*|/\*.*?\*/)+', re.DOTALL)
+
+
+class ImportIndex:
+    def __init__(self, content):
+        self.content = content
+        self.imports = []
+        self.modules = {}     # module -> set of imported names (default included)
+        self.bindings = {}    # local name -> module
+        self.header_end = 0
+        self._additions = {}  # module -> [names], in call order
+        self._anchors = {}    # new module -> module it is inserted after
+
+        pos = 0
+        while True:
+            skip = _SKIP.match(content, pos)
+            if skip:
+                pos = skip.end()
+            match = IMPORT.match(content, pos) if content.startswith('import', pos) else None
+            if match is None:
+                break
+            entry = Import(match)
+            self.imports.append(entry)
+            names = self.modules.setdefault(entry.module, set())
+            for name in entry.names + ([entry.default] if entry.default else []):
+                local = name.split(' as ')[-1].strip()
+                names.add(local)
+                self.bindings[local] = entry.module
+            pos = self.header_end = entry.end
+
+    def has(self, name, module):
+        """True if name is imported from module"""
+        return name in self.modules.get(module, ())
+
+    def module_of(self, name):
+        """Module name is imported from, or None"""
+        return self.bindings.get(name)
+
+    def add(self, name, module, after=None):
+        """Queue `name` for import from module
+
+        If module is not imported yet, a new import line is inserted after the
+        import of `after` (after the first import when None or not found).
+        """
+        if self.has(name, module):
+            return
+        self.modules.setdefault(module, set()).add(name)
+        self.bindings[name] = module
+        self._additions.setdefault(module, []).append(name)
+        self._anchors.setdefault(module, after)
+
+    @property
+    def changed(self):
+        return bool(self._additions)
+
+    def _find(self, module):
+        return next((entry for entry in self.imports if entry.module == module), None)
+
+    def edits(self):
+        """Queued additions as edit_plan.Edit insertions into the import header"""
+        edits = []
+        for module, names in self._additions.items():
+            entry = self._find(module)
+            if entry is not None and entry.names_span is not None:
+                start, end = entry.names_span
+                existing = self.content[start:end].rstrip()
+                offset = start + len(existing)
+                separator = ' ' if not existing.strip() or existing.endswith(',') else ', '
+                edits.append(Edit(offset, offset, separator + ', '.join(names)))
+            elif entry is not None and entry.default:
+                offset = entry.default_span[1]
+                edits.append(Edit(offset, offset, f", {{ {', '.join(names)} }}"))
+            else:
+                anchor = self._find(self._anchors[module]) or (self.imports[0] if self.imports else None)
+                line = f"import {{ {', '.join(names)} }} from '{module}';"
+                if anchor is None:
+                    edits.append(Edit(0, 0, line + '\n'))
+                else:
+                    edits.append(Edit(anchor.end, anchor.end, '\n' + line))
+        return edits
+
+    def apply(self, content):
+        """Return content with every queued addition written in one splice
+
+        content may differ from the indexed one only after header_end.
+        """
+        return apply_edits(content, self.edits())
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Streaming validation of bulk client / mover CSV imports
+
+Checks every row of a MODELE_IMPORT_CLIENTS.csv / MODELE_IMPORT_DEMENAGEURS.csv
+style file with the rules of src/utils/validation.ts (validateEmail,
+validatePhone, validateSiret with its Luhn and SIREN checks,
+validatePostalCode), without sending the rows to the analyze-import-file
+edge function:
+
+  - the file is read line by line and cut into chunks of --chunk-size
+    records (a chunk never ends inside a quoted field); at most two chunks
+    per worker are in flight, so memory does not grow with the file
+  - with --jobs N the chunks are parsed and validated by N worker processes;
+    their results are consumed in file order
+  - valid rows are deduplicated on the email (case-insensitive) and the
+    SIRET: the index keeps a 64-bit hash per key, not the keys themselves
+    (about 70 bytes per key, the only memory that grows with the file).
+    The first occurrence wins; --known FILE preloads the emails / SIRETs of
+    an export of the existing accounts
+
+Columns are matched by name (accents, case and common synonyms such as
+`e-mail`, `tél`, `cp`, `raison sociale` are accepted); the layout is the
+movers one when the header has a siret or entreprise column, unless --type
+says otherwise. Required cells: email, nom (clients); email, entreprise,
+siret (movers). telephone and code_postal are checked when filled.
+
+Outputs, in --output-dir (default: <file>_import/ next to the input):
+  accepted.csv    rows to import (email lowercased, SIRET and postal code
+                  without spaces)
+  rejected.csv    ligne, original columns, erreurs
+  duplicates.csv  ligne, columns, doublon (email, siret or both)
+
+Usage:
+    python3 import_validator.py MODELE_IMPORT_DEMENAGEURS.csv
+    python3 import_validator.py movers.csv --jobs 0 --known existing.csv --json report.json
+"""
+
+import argparse
+import codecs
+import collections
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_SIZE = 20000
+
+BLOCKED_DOMAINS = {'example.com', 'test.com', 'fake.com'}
+
+_EMAIL = re.compile(r'[a-zA-Z0-9._-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_PHONE_CLEAN = re.compile(r'[\s\-.()]')
+_FRENCH_MOBILE = re.compile(r'(\+33|0033|0)[67][0-9]{8}')
+_FRENCH_LANDLINE = re.compile(r'(\+33|0033|0)[1-5][0-9]{8}')
+_EUROPEAN = re.compile(r'(\+|00)(32|41|49|34|39|351|352|353|44|31|43|45|46|47|358|420|421|48)[0-9]{7,13}')
+_SIRET_CLEAN = re.compile(r'[\s\-]')
+_DIGITS_14 = re.compile(r'[0-9]{14}')
+_DIGITS_5 = re.compile(r'[0-9]{5}')
+_SPACES = re.compile(r'\s')
+
+# Luhn doubling of a digit character: 2 * digit, minus 9 above 9
+_DOUBLED = str.maketrans('0123456789', '0246813579')
+
+SIRET_ERRORS = {
+    'length': 'Le numéro SIRET doit contenir exactement 14 chiffres',
+    'repeated': 'Le numéro SIRET saisi est invalide (chiffres identiques)',
+    'luhn': 'Le numéro SIRET saisi est invalide (vérification Luhn échouée)',
+    'siren': 'Le numéro SIREN (9 premiers chiffres) est invalide',
+}
+POSTAL_CODE_ERRORS = {
+    'length': 'Le code postal doit contenir exactement 5 chiffres',
+    'invalid': 'Le code postal saisi est invalide',
+}
+
+LAYOUTS = {
+    'client': {
+        'columns': ['email', 'nom', 'telephone'],
+        'required': ['email', 'nom'],
+    },
+    'mover': {
+        'columns': ['email', 'entreprise', 'siret', 'prenom', 'nom', 'telephone',
+                    'adresse', 'ville', 'code_postal'],
+        'required': ['email', 'entreprise', 'siret'],
+    },
+}
+
+ALIASES = {
+    'e_mail': 'email', 'mail': 'email', 'courriel': 'email', 'adresse_email': 'email',
+    'adresse_mail': 'email',
+    'tel': 'telephone', 'phone': 'telephone', 'portable': 'telephone', 'mobile': 'telephone',
+    'numero_de_telephone': 'telephone',
+    'societe': 'entreprise', 'raison_sociale': 'entreprise', 'company': 'entreprise',
+    'company_name': 'entreprise', 'nom_entreprise': 'entreprise',
+    'numero_siret': 'siret', 'n_siret': 'siret', 'no_siret': 'siret',
+    'prenom_contact': 'prenom', 'first_name': 'prenom',
+    'name': 'nom', 'full_name': 'nom', 'last_name': 'nom', 'nom_complet': 'nom',
+    'address': 'adresse', 'city': 'ville',
+    'cp': 'code_postal', 'codepostal': 'code_postal', 'postal_code': 'code_postal',
+}
+
+
+def validate_email(email):
+    """validateEmail of validation.ts"""
+    if not _EMAIL.fullmatch(email):
+        return False
+    return email.split('@')[1].lower() not in BLOCKED_DOMAINS
+
+
+def validate_phone(phone):
+    """validatePhone of validation.ts: French mobile / landline or European number"""
+    clean = _PHONE_CLEAN.sub('', phone)
+    return bool(_FRENCH_MOBILE.fullmatch(clean) or _FRENCH_LANDLINE.fullmatch(clean)
+                or _EUROPEAN.fullmatch(clean))
+
+
+def clean_siret(siret):
+    return _SIRET_CLEAN.sub('', siret)
+
+
+def validate_siret(siret):
+    """validateSiret of validation.ts: (is_valid, error message or None)"""
+    clean = clean_siret(siret)
+    if not _DIGITS_14.fullmatch(clean):
+        return False, SIRET_ERRORS['length']
+    if clean == clean[0] * 14:
+        return False, SIRET_ERRORS['repeated']
+    # Positions 0, 2, 4, ... are doubled over the 14 digits
+    if sum(map(int, clean[0::2].translate(_DOUBLED) + clean[1::2])) % 10:
+        return False, SIRET_ERRORS['luhn']
+    # Positions 1, 3, 5, 7 are doubled over the SIREN (9 first digits)
+    if sum(map(int, clean[0:9:2] + clean[1:9:2].translate(_DOUBLED))) % 10:
+        return False, SIRET_ERRORS['siren']
+    return True, None
+
+
+def clean_postal_code(postal_code):
+    return _SPACES.sub('', postal_code)
+
+
+def validate_postal_code(postal_code):
+    """validatePostalCode of validation.ts: (is_valid, error message or None)"""
+    clean = clean_postal_code(postal_code)
+    if not _DIGITS_5.fullmatch(clean):
+        return False, POSTAL_CODE_ERRORS['length']
+    if clean == clean[0] * 5:
+        return False, POSTAL_CODE_ERRORS['invalid']
+    department = int(clean[:2])
+    if department == 0 or department == 96 or department > 98:
+        return False, POSTAL_CODE_ERRORS['invalid']
+    return True, None
+
+
+def normalize_header(name):
+    """`Téléphone ` -> 'telephone', `Raison sociale` -> 'entreprise'"""
+    name = unicodedata.normalize('NFKD', name.strip().lstrip('\ufeff'))
+    name = ''.join(char for char in name if not unicodedata.combining(char)).lower()
+    name = re.sub(r'[^a-z0-9]+', '_', name).strip('_')
+    return ALIASES.get(name, name)
+
+
+def detect_kind(columns):
+    return 'mover' if 'siret' in columns or 'entreprise' in columns else 'client'
+
+
+def detect_encoding(path):
+    """utf-8-sig when the first 64 KB decode as UTF-8, cp1252 (Excel FR) otherwise"""
+    with open(path, 'rb') as f:
+        sample = f.read(65536)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return 'cp1252'
+    return 'utf-8-sig'
+
+
+def detect_delimiter(header_line):
+    counts = {delimiter: header_line.count(delimiter) for delimiter in (',', ';', '\t')}
+    return max(counts, key=counts.get) if any(counts.values()) else ','
+
+
+class Plan:
+    """What a worker needs to validate a chunk (small, sent with each chunk)"""
+
+    def __init__(self, kind, header, delimiter):
+        self.kind = kind
+        self.header = header
+        self.delimiter = delimiter
+        columns = [normalize_header(name) for name in header]
+        self.index = {}
+        for position, column in enumerate(columns):
+            self.index.setdefault(column, position)
+        self.required = [(column, self.index[column]) for column in LAYOUTS[kind]['required']]
+        self.missing = [column for column in LAYOUTS[kind]['required'] if column not in self.index]
+        self.email = self.index.get('email')
+        self.siret = self.index.get('siret') if kind == 'mover' else None
+        self.phone = self.index.get('telephone')
+        self.postal_code = self.index.get('code_postal')
+
+
+def check_row(plan, row):
+    """Errors of one row (list of messages, empty when valid); normalizes row in place"""
+    errors = []
+    width = len(plan.header)
+    if len(row) != width:
+        if len(row) < width:
+            row.extend([''] * (width - len(row)))
+        elif any(cell.strip() for cell in row[width:]):
+            errors.append(f"{len(row)} colonnes au lieu de {width}")
+        del row[width:]
+    row[:] = [cell.strip() for cell in row]
+    for column, position in plan.required:
+        if not row[position]:
+            errors.append(f"{column}: champ requis")
+    if plan.email is not None and row[plan.email]:
+        if validate_email(row[plan.email]):
+            row[plan.email] = row[plan.email].lower()
+        else:
+            errors.append('email: adresse email invalide')
+    if plan.siret is not None and row[plan.siret]:
+        valid, error = validate_siret(row[plan.siret])
+        if valid:
+            row[plan.siret] = clean_siret(row[plan.siret])
+        else:
+            errors.append(f"siret: {error}")
+    if plan.phone is not None and row[plan.phone] and not validate_phone(row[plan.phone]):
+        errors.append('telephone: numéro de téléphone invalide (français ou européen)')
+    if plan.postal_code is not None and row[plan.postal_code]:
+        valid, error = validate_postal_code(row[plan.postal_code])
+        if valid:
+            row[plan.postal_code] = clean_postal_code(row[plan.postal_code])
+        else:
+            errors.append(f"code_postal: {error}")
+    return errors
+
+
+def _csv_line(writer, buffer, row):
+    buffer.seek(0)
+    buffer.truncate()
+    writer.writerow(row)
+    return buffer.getvalue()[:-1]
+
+
+def validate_chunk(plan, text, first_line):
+    """Parse and check one chunk of records
+
+    Returns (valid, rejected, errors): valid is a list of (line, email,
+    SIRET, CSV text of the normalized row), rejected the CSV lines of the
+    rejected rows and errors the count of each message.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    valid = []
+    rejected = []
+    errors = collections.Counter()
+    reader = csv.reader(io.StringIO(text, newline=''), delimiter=plan.delimiter)
+    previous = 0
+    for row in reader:
+        line = first_line + previous
+        previous = reader.line_num
+        if not ''.join(row).strip():
+            continue
+        original = list(row)
+        row_errors = check_row(plan, row)
+        if row_errors:
+            errors.update(row_errors)
+            rejected.append(_csv_line(writer, buffer, [line] + original + [' | '.join(row_errors)]) + '\n')
+            continue
+        email = row[plan.email] if plan.email is not None else ''
+        siret = row[plan.siret] if plan.siret is not None else ''
+        valid.append((line, email, siret, _csv_line(writer, buffer, row)))
+    return valid, rejected, errors
+
+
+def _validate_chunk(args):
+    return validate_chunk(*args)
+
+
+def read_chunks(f, chunk_size, first_line):
+    """Yield (text, first line number) of chunk_size records; a record
+    continues on the next line while its count of `"` is odd"""
+    lines = []
+    records = 0
+    quotes = 0
+    line_number = first_line
+    start = first_line
+    for text in f:
+        lines.append(text)
+        line_number += 1
+        quotes += text.count('"')
+        if quotes % 2:
+            continue
+        quotes = 0
+        records += 1
+        if records >= chunk_size:
+            yield ''.join(lines), start
+            lines = []
+            records = 0
+            start = line_number
+    if lines:
+        yield ''.join(lines), start
+
+
+class KeyIndex:
+    """Seen emails and SIRETs, one 64-bit hash per key
+
+    hash() of a str is SipHash, 64 bits on CPython: a false duplicate needs
+    a collision, about n² / 2^65 (3e-6 for ten million keys).
+    """
+
+    def __init__(self):
+        self.hashes = set()
+
+    def add_email(self, email):
+        self.hashes.add(hash(('email', email.lower())))
+
+    def add_siret(self, siret):
+        self.hashes.add(hash(('siret', siret)))
+
+    def check(self, email, siret):
+        """'email', 'siret', 'email+siret' when already seen, else None; adds the keys"""
+        email_key = hash(('email', email.lower())) if email else None
+        siret_key = hash(('siret', siret)) if siret else None
+        seen = [name for name, key in (('email', email_key), ('siret', siret_key))
+                if key is not None and key in self.hashes]
+        if seen:
+            return '+'.join(seen)
+        if email_key is not None:
+            self.hashes.add(email_key)
+        if siret_key is not None:
+            self.hashes.add(siret_key)
+        return None
+
+    def __len__(self):
+        return len(self.hashes)
+
+
+def load_known(path, index):
+    """Add the email / siret columns of an existing accounts export to index"""
+    encoding = detect_encoding(path)
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        first = f.readline()
+        reader = csv.reader(io.StringIO(first), delimiter=detect_delimiter(first))
+        columns = [normalize_header(name) for name in next(reader, [])]
+        email = columns.index('email') if 'email' in columns else None
+        siret = columns.index('siret') if 'siret' in columns else None
+        count = 0
+        for row in csv.reader(f, delimiter=detect_delimiter(first)):
+            if email is not None and email < len(row) and row[email].strip():
+                index.add_email(row[email].strip())
+                count += 1
+            if siret is not None and siret < len(row) and row[siret].strip():
+                index.add_siret(clean_siret(row[siret]))
+                count += 1
+    return count
+
+
+class Report:
+    def __init__(self, path, kind, output_dir):
+        self.path = path
+        self.kind = kind
+        self.output_dir = output_dir
+        self.rows = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.duplicates = collections.Counter()
+        self.errors = collections.Counter()
+        self.known = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def to_dict(self):
+        return {
+            'file': self.path,
+            'kind': self.kind,
+            'output_dir': self.output_dir,
+            'rows': self.rows,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'duplicates': dict(self.duplicates),
+            'errors': dict(self.errors.most_common()),
+            'known_keys': self.known,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second),
+        }
+
+
+def _results(plan, chunks, jobs):
+    """validate_chunk results in file order, at most 2 chunks per worker in flight"""
+    if jobs == 1:
+        for text, first_line in chunks:
+            yield validate_chunk(plan, text, first_line)
+        return
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for text, first_line in chunks:
+            pending.append(pool.submit(_validate_chunk, (plan, text, first_line)))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run(path, output_dir=None, kind=None, jobs=1, chunk_size=CHUNK_SIZE, known=None):
+    """Validate path and write the three outputs; returns the Report
+
+    Raises ValueError when the header lacks a required column.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if output_dir is None:
+        output_dir = os.path.splitext(path)[0] + '_import'
+    started = time.perf_counter()
+    index = KeyIndex()
+    with open(path, 'r', encoding=detect_encoding(path), newline='') as f:
+        header_line = f.readline()
+        delimiter = detect_delimiter(header_line)
+        header = next(csv.reader(io.StringIO(header_line), delimiter=delimiter), [])
+        columns = [normalize_header(name) for name in header]
+        kind = kind or detect_kind(columns)
+        plan = Plan(kind, [name.strip().lstrip('\ufeff') for name in header], delimiter)
+        if plan.missing:
+            raise ValueError(f"colonne(s) requise(s) absente(s) pour un import {kind}: "
+                             f"{', '.join(plan.missing)} (en-tête: {', '.join(plan.header)})")
+        report = Report(path, kind, output_dir)
+        if known:
+            report.known = load_known(known, index)
+
+        os.makedirs(output_dir, exist_ok=True)
+        outputs = {name: open(os.path.join(output_dir, f'{name}.csv'), 'w', encoding='utf-8', newline='')
+                   for name in ('accepted', 'rejected', 'duplicates')}
+        try:
+            header_writer = csv.writer(outputs['accepted'], lineterminator='\n')
+            header_writer.writerow(plan.header)
+            csv.writer(outputs['rejected'], lineterminator='\n').writerow(['ligne'] + plan.header + ['erreurs'])
+            csv.writer(outputs['duplicates'], lineterminator='\n').writerow(['ligne'] + plan.header + ['doublon'])
+            for valid, rejected, errors in _results(plan, read_chunks(f, chunk_size, 2), jobs):
+                outputs['rejected'].write(''.join(rejected))
+                report.errors.update(errors)
+                report.rejected += len(rejected)
+                accepted = []
+                duplicates = []
+                for line, email, siret, text in valid:
+                    seen = index.check(email, siret)
+                    if seen is None:
+                        accepted.append(text)
+                    else:
+                        report.duplicates[seen] += 1
+                        duplicates.append(f"{line},{text},{seen}")
+                report.accepted += len(accepted)
+                if accepted:
+                    outputs['accepted'].write('\n'.join(accepted) + '\n')
+                if duplicates:
+                    outputs['duplicates'].write('\n'.join(duplicates) + '\n')
+        finally:
+            for output in outputs.values():
+                output.close()
+    report.rows = report.accepted + report.rejected + sum(report.duplicates.values())
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate and deduplicate a bulk client / mover CSV import')
+    parser.add_argument('file', help='CSV to import (header line required)')
+    parser.add_argument('--type', choices=sorted(LAYOUTS), help='layout (default: detected from the header)')
+    parser.add_argument('--output-dir', help='where to write accepted/rejected/duplicates.csv '
+                                             '(default: <file>_import/)')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='worker processes (0 = one per CPU, default: 0)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help=f'records per chunk (default: {CHUNK_SIZE})')
+    parser.add_argument('--known', metavar='FILE', help='CSV export of the existing accounts (email / siret columns)')
+    parser.add_argument('--json', metavar='FILE', help='write the report as JSON')
+    args = parser.parse_args()
+
+    try:
+        report = run(args.file, args.output_dir, args.type, args.jobs, args.chunk_size, args.known)
+    except (OSError, ValueError) as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
+    print("=" * 80)
+    print(f"IMPORT {report.kind.upper()}: {args.file}")
+    print("=" * 80)
+    print(f"   {report.rows} lignes en {report.seconds:.2f}s "
+          f"({report.rows_per_second:,.0f} lignes/s, {report.rows_per_second * 60:,.0f} lignes/min)")
+    if report.known:
+        print(f"   {report.known} clés existantes chargées depuis {args.known}")
+    print(f"   ✅ acceptées: {report.accepted}")
+    print(f"   ❌ rejetées: {report.rejected}")
+    duplicates = sum(report.duplicates.values())
+    detail = ', '.join(f'{reason} {count}' for reason, count in sorted(report.duplicates.items()))
+    print(f"   🔁 doublons: {duplicates}" + (f" ({detail})" if detail else ''))
+    if report.errors:
+        print("\n📋 Erreurs:")
+        for message, count in report.errors.most_common():
+            print(f"   {count:>8}  {message}")
+    print(f"\n📁 {report.output_dir}/accepted.csv, rejected.csv, duplicates.csv")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+        print(f"📝 Rapport: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
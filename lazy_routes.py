@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Route-level code splitting of src/Router.tsx
+
+Every page of the route table is imported statically by Router.tsx, so the
+whole app ends up in the initial chunk. This script reads the route table,
+estimates what each page pulls in (its transitive imports under src/) and
+how much of that leaves the initial chunk once the page is loaded with
+React.lazy, then, with --apply, rewrites the chosen routes:
+
+    import { MissionPage } from './pages/MissionPage';
+  becomes
+    const MissionPage = lazy(() => import('./pages/MissionPage').then((module) => ({ default: module.MissionPage })));
+
+(default exports keep the plain `lazy(() => import('./pages/X'))`), and
+wraps <Routes> in <Suspense fallback={<LoadingSpinner />}>.
+
+A page stays eager when it is used outside a Route element (UnauthorizedPage
+is rendered by the protected routes), when its route is in EAGER_PATHS, or
+when Router.tsx imports it as named/default but the page does not export it
+that way. Weights are source bytes under src/: node_modules packages
+(react, lucide-react, ...) are shared by the initial chunk anyway and are
+left out.
+
+Usage:
+    python3 lazy_routes.py                          # report only
+    python3 lazy_routes.py --apply --dry-run        # diff of the rewrite
+    python3 lazy_routes.py --apply --pages AdminDashboard,BlogPage
+"""
+
+import argparse
+import os
+import re
+
+import edit_plan
+import import_graph
+import page_engine
+import tsx_scanner
+from import_index import ImportIndex
+
+ROUTER = os.path.join(page_engine.PROJECT_DIR, 'src', 'Router.tsx')
+ENTRY = os.path.join(page_engine.PROJECT_DIR, 'src', 'main.tsx')
+
+# Routes whose page must be there on first paint
+EAGER_PATHS = {'/', '*'}
+
+SPINNER_NAME = 'LoadingSpinner'
+SPINNER_MODULE = './components/LoadingSpinner'
+
+_PATH_ATTR = re.compile(r'''\bpath\s*=\s*(?:\{\s*)?(['"])([^'"]*)\1''')
+_LAZY_DECLARATION = re.compile(
+    r'''^const\s+([A-Za-z_$][\w$]*)\s*=\s*(?:React\.)?lazy\(\s*\(\)\s*=>\s*import\(\s*(['"])([^'"]+)\2''',
+    re.MULTILINE)
+
+
+class RoutePage:
+    """A component rendered by the route table and imported from a local module"""
+
+    def __init__(self, name, specifier, path, default, entry):
+        self.name = name
+        self.specifier = specifier
+        self.path = path            # resolved module, or None
+        self.default = default      # imported as default (else named)
+        self.entry = entry          # tsx_scanner.Import, None when already lazy
+        self.routes = []
+        self.reason = None          # why it stays eager
+        self.total = 0              # bytes of its static closure
+        self.own = 0                # bytes that leave the initial chunk
+
+
+class Analysis:
+    def __init__(self, router=ROUTER, entry=ENTRY, graph=None):
+        self.router = os.path.abspath(router)
+        self.entry = os.path.abspath(entry)
+        self.graph = graph or import_graph.ImportGraph(os.path.dirname(self.router))
+        self.content = edit_plan.read_text(self.router)
+        self.scan = tsx_scanner.scan(self.content)
+        self.pages = {}
+        self.warnings = []
+        self._collect_pages()
+        self._collect_routes()
+        self._check_pages()
+
+    def _collect_pages(self):
+        for entry in self.scan.imports:
+            if not entry.module.startswith('.'):
+                continue
+            path = import_graph.resolve(self.router, entry.module)
+            if entry.default:
+                self.pages[entry.default] = RoutePage(entry.default, entry.module, path, True, entry)
+            for name in entry.names:
+                imported, _, local = name.partition(' as ')
+                local = (local or imported).strip()
+                self.pages[local] = RoutePage(local, entry.module, path, False, entry)
+        for match in _LAZY_DECLARATION.finditer(self.content):
+            name, specifier = match.group(1), match.group(3)
+            page = RoutePage(name, specifier, import_graph.resolve(self.router, specifier), None, None)
+            page.reason = 'déjà lazy'
+            self.pages[name] = page
+
+    def _collect_routes(self):
+        """Attach each Route's path to the pages rendered in its element"""
+        self.route_spans = []
+        tags = self.scan.tags
+        for i, tag in enumerate(tags):
+            if tag.name != 'Route' or tag.closing:
+                continue
+            # A Route's end comes after the tags nested in its attributes
+            match = _PATH_ATTR.search(self.content, tag.name_end, tag.end)
+            route_path = match.group(2) if match else '(index)'
+            self.route_spans.append((tag.start, tag.end))
+            for nested in tags[i + 1:]:
+                if nested.start >= tag.end:
+                    break
+                page = self.pages.get(nested.name)
+                if page is not None and not nested.closing and route_path not in page.routes:
+                    page.routes.append(route_path)
+        self.routes_tag = next((tag for tag in tags if tag.name == 'Routes' and not tag.closing), None)
+        self.routes_close = next((tag for tag in tags if tag.name == 'Routes' and tag.closing), None)
+
+    def _used_outside_routes(self, name):
+        pattern = re.compile(r'(?<![\w$.])' + re.escape(name) + r'(?![\w$])')
+        for match in pattern.finditer(self.content):
+            if any(start <= match.start() < end for start, end in self.route_spans):
+                continue
+            if any(entry.start <= match.start() < entry.end for entry in self.scan.imports):
+                continue
+            return True
+        return False
+
+    def _check_pages(self):
+        for page in list(self.pages.values()):
+            if not page.routes:
+                del self.pages[page.name]
+                continue
+            if page.reason:
+                continue
+            if page.path is None:
+                page.reason = 'module introuvable'
+            elif EAGER_PATHS.intersection(page.routes):
+                page.reason = 'route initiale'
+            elif self._used_outside_routes(page.name):
+                page.reason = 'utilisé hors des routes'
+            elif len(page.entry.names) + bool(page.entry.default) > 1:
+                page.reason = 'import partagé avec un autre nom'
+            else:
+                module = self.graph.module(page.path)
+                imported = page.name if page.default else page.entry.names[0].split(' as ')[0].strip()
+                exported = module.default_export if page.default else imported in module.exports
+                if not exported:
+                    kind = 'par défaut' if page.default else f"nommé '{imported}'"
+                    self.warnings.append(f"{page.name}: importé {kind} mais {page.specifier} ne l'exporte pas ainsi")
+                    page.reason = 'export incohérent'
+
+    def candidates(self):
+        return [page for page in self.pages.values() if page.reason is None]
+
+    def estimate(self, lazy_names):
+        """Initial chunk bytes before and after making lazy_names lazy
+
+        Also fills each page's total and own bytes for that split.
+        """
+        lazy_paths = {self.pages[name].path for name in lazy_names}
+        before = self.graph.closure([self.entry])
+
+        def skip(src, dst):
+            return src == self.router and dst in lazy_paths
+        after = self.graph.closure([self.entry], skip)
+
+        for page in self.pages.values():
+            if page.path is None:
+                continue
+            reachable = self.graph.closure([page.path])
+            page.total = self.graph.size(reachable)
+            page.own = self.graph.size(reachable - after)
+        return self.graph.size(before), self.graph.size(after)
+
+    def edits(self, lazy_names):
+        """Edits turning lazy_names into React.lazy pages under a Suspense"""
+        builder = edit_plan.EditBuilder(self.content)
+        index = ImportIndex(self.content)
+        pages = [self.pages[name] for name in lazy_names]
+        removed = {page.entry.start for page in pages}
+
+        for page in pages:
+            end = tsx_scanner.extend_through_newline(self.content, page.entry.end) or page.entry.end
+            builder.replace(page.entry.start, end, '')
+
+        index.add('lazy', 'react')
+        index.add('Suspense', 'react')
+        kept = [entry for entry in index.imports if entry.start not in removed]
+        if not index.has(SPINNER_NAME, SPINNER_MODULE):
+            index.add(SPINNER_NAME, SPINNER_MODULE, after=kept[-1].module if kept else None)
+        builder.extend(index.edits())
+
+        declarations = []
+        for page in pages:
+            if page.default:
+                declarations.append(f"const {page.name} = lazy(() => import('{page.specifier}'));")
+            else:
+                imported = page.entry.names[0].split(' as ')[0].strip()
+                declarations.append(f"const {page.name} = lazy(() => import('{page.specifier}')"
+                                    f".then((module) => ({{ default: module.{imported} }})));")
+        builder.insert(index.header_end, '\n\n' + '\n'.join(declarations))
+
+        if not any(tag.name == 'Suspense' for tag in self.scan.tags) and self.routes_tag and self.routes_close:
+            line_start = self.content.rfind('\n', 0, self.routes_tag.start) + 1
+            indent = self.content[line_start:self.routes_tag.start]
+            close_end = self.routes_close.end
+            block = self.content[line_start:close_end]
+            wrapped = '\n'.join(('  ' + line) if line.strip() else line for line in block.split('\n'))
+            builder.replace(line_start, close_end,
+                            f"{indent}<Suspense fallback={{<{SPINNER_NAME} />}}>\n"
+                            f"{wrapped}\n{indent}</Suspense>")
+        return builder.edits
+
+
+def kb(size):
+    return f"{size / 1024:.1f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estimate and apply route-level lazy loading in Router.tsx')
+    parser.add_argument('--router', default=ROUTER)
+    parser.add_argument('--entry', default=ENTRY, help='app entry point (default: src/main.tsx)')
+    parser.add_argument('--pages', help='comma-separated pages to make lazy (default: every candidate)')
+    parser.add_argument('--apply', action='store_true', help='rewrite Router.tsx')
+    parser.add_argument('--dry-run', action='store_true', help='with --apply, print the diff instead')
+    args = parser.parse_args()
+
+    analysis = Analysis(args.router, args.entry)
+    candidates = analysis.candidates()
+    chosen = [page.name for page in candidates]
+    if args.pages:
+        wanted = [name.strip() for name in args.pages.split(',') if name.strip()]
+        unknown = [name for name in wanted if name not in chosen]
+        for name in unknown:
+            page = analysis.pages.get(name)
+            print(f"⚠️  {name}: {page.reason if page else 'absent de la table des routes'}, ignoré")
+        chosen = [name for name in wanted if name in chosen]
+
+    before, after = analysis.estimate(chosen)
+
+    print("=" * 80)
+    print("LAZY LOADING DES ROUTES")
+    print("=" * 80)
+    print(f"{'page':34} {'export':8} {'total':>10} {'hors init.':>10}  routes")
+    for page in sorted(analysis.pages.values(), key=lambda page: page.own, reverse=True):
+        kind = '-' if page.default is None else ('default' if page.default else 'named')
+        routes = ', '.join(page.routes)
+        status = '→ lazy' if page.name in chosen else f"({page.reason or 'non retenu'})"
+        print(f"{page.name:34} {kind:8} {kb(page.total):>10} {kb(page.own):>10}  {routes} {status}")
+
+    for warning in analysis.warnings:
+        print(f"⚠️  {warning}")
+
+    print("\n" + "=" * 80)
+    print(f"Chunk initial (sources src/): {kb(before)} → {kb(after)}")
+    if before:
+        print(f"Réduction estimée: {kb(before - after)} ({(before - after) / before:.0%}), "
+              f"{len(chosen)} page(s) en lazy")
+    print("=" * 80)
+
+    if args.apply and chosen:
+        content = edit_plan.apply_edits(analysis.content, analysis.edits(chosen))
+        if edit_plan.write_if_changed(analysis.router, analysis.content, content, args.dry_run):
+            if not args.dry_run:
+                print(f"\n✅ {os.path.relpath(analysis.router)} réécrit ({len(chosen)} route(s) en lazy)")
+    elif args.apply:
+        print("\nAucune page à passer en lazy")
+
+
+if __name__ == '__main__':
+    main()
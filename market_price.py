@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Batch market prices of quote requests, as src/utils/marketPriceCalculation.ts
+
+calculateMarketPriceWithBreakdown() prices one QuoteRequestData at a time;
+re-pricing every historical quote request after a tariff change that way
+means one call per row. price() computes the same breakdown (basePrice,
+distanceCost, floorCost, servicesCost, totalMarketPrice) for a whole column
+batch with NumPy:
+
+  - numeric columns (volume_m3, surface_m2, distance_km, floors) are float64
+    arrays, NULL / empty as NaN: JS `x || 0` and `x > 0` tests behave the same
+  - text columns are dictionary-encoded: home_size, the cities (international
+    detection), the postal code departments and the services lists are
+    evaluated once per distinct value, then gathered by code
+  - every formula is applied with np.where in the order of the TS code, in
+    float64 like JS numbers, and rounded like Math.round (half up), so the
+    results are the same to the euro, NaN included (the TS gives NaN when no
+    distance is known and a postal code does not start with digits)
+
+The `details` strings of the TS breakdown are not produced. A NULL home_size
+(legacy rows that only have from_home_size) is priced as an unknown size
+(30 m³) where the TS would throw on .toLowerCase().
+
+price_row() is the same computation for one dict, kept as the reference
+implementation for check_market_price.py and benchmark_market_price.py.
+
+Input: a CSV export of quote_requests (Supabase table export: booleans as
+true/false, services_needed as a Postgres {a,"b c"} or JSON array) or a
+Parquet file (needs pyarrow). Output: id, the five amounts and, when the
+export has market_price_estimate, the previous estimate.
+
+NumPy is required for the batch engine (pip install numpy).
+
+Usage:
+    python3 market_price.py quote_requests.csv --output repriced.csv
+    python3 market_price.py quote_requests.parquet --json report.json
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MARKET_RATE_PER_M3 = 50
+MARKET_RATE_PER_M3_NATIONAL = 65
+MARKET_RATE_PER_M3_INTERNATIONAL = 100
+MARKET_RATE_PER_M2 = 22
+
+HOME_SIZE_BASE_VOLUMES = {
+    'studio': 15,
+    't1': 20,
+    't2': 30,
+    't3': 45,
+    't4': 60,
+    't5': 75,
+    'maison': 90,
+}
+DEFAULT_VOLUME = 30
+
+SERVICE_COSTS = {
+    'packing': 250,
+    'furniture_disassembly': 300,
+    'furniture_assembly': 300,
+    'storage': 150,
+    'piano': 350,
+    'fragile_items': 120,
+    'cleaning': 180,
+    'Emballage/Déballage': 250,
+    'Démontage/Remontage meubles': 300,
+    'Fourniture de cartons': 80,
+    'Garde-meubles': 150,
+    "Transport d'objets fragiles": 120,
+    'Nettoyage après déménagement': 180,
+}
+
+FLOOR_COST_WITHOUT_ELEVATOR = 80
+FURNITURE_LIFT_COST = 400
+GROUPAGE_DISCOUNT = 0.25
+
+# Same order as countryIndicators: the last country with a match wins
+COUNTRY_INDICATORS = {
+    'BE': ['bruxelles', 'brussels', 'liège', 'anvers', 'gand', 'namur', 'mons', 'charleroi', 'woluwe',
+           'ixelles', 'schaerbeek', 'anderlecht', 'uccle', 'etterbeek', 'molenbeek', 'forest', 'jette',
+           'auderghem', 'evere', 'oostende', 'bruges', 'leuven', 'mechelen', 'kortrijk', 'aalst',
+           'hasselt', 'genk', 'turnhout'],
+    'CH': ['zurich', 'zürich', 'bern', 'berne', 'basel', 'bâle', 'genève', 'geneva', 'lausanne',
+           'lucerne', 'luzern', 'winterthur', 'lugano', 'fribourg', 'neuchâtel', 'sion', 'yverdon',
+           'thun'],
+    'DE': ['berlin', 'münchen', 'munich', 'hamburg', 'köln', 'cologne', 'frankfurt', 'stuttgart',
+           'düsseldorf', 'dortmund', 'essen', 'bremen', 'dresden', 'leipzig', 'hannover', 'nürnberg',
+           'bonn', 'aachen', 'mannheim', 'karlsruhe'],
+    'LU': ['luxembourg', 'esch-sur-alzette', 'differdange', 'dudelange'],
+    'NL': ['amsterdam', 'rotterdam', 'den haag', 'utrecht', 'eindhoven', 'groningen', 'maastricht',
+           'breda', 'arnhem'],
+}
+
+NUMERIC_COLUMNS = ['volume_m3', 'surface_m2', 'distance_km', 'floor_from', 'floor_to']
+BOOLEAN_COLUMNS = ['elevator_from', 'elevator_to', 'furniture_lift_needed_departure',
+                   'furniture_lift_needed_arrival', 'accepts_groupage']
+TEXT_COLUMNS = ['home_size', 'from_postal_code', 'to_postal_code', 'from_city', 'to_city']
+LIST_COLUMNS = ['services_needed']
+COLUMNS = NUMERIC_COLUMNS + BOOLEAN_COLUMNS + TEXT_COLUMNS + LIST_COLUMNS
+AMOUNTS = ['base_price', 'distance_cost', 'floor_cost', 'services_cost', 'total_market_price']
+
+TRUE_VALUES = {'true', 't', '1', 'yes', 'y'}
+
+_JS_SPACE = re.compile(r'^[\s\ufeff]*')
+_PG_ARRAY_ITEM = re.compile(r'"((?:[^"\\]|\\.)*)"|([^,]+)')
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("numpy est requis pour le calcul par lot (pip install numpy)")
+
+
+def js_parse_int(text):
+    """parseInt(text) without radix: leading integer, NaN when there is none"""
+    text = _JS_SPACE.sub('', text)
+    sign = 1
+    if text[:1] in ('-', '+'):
+        sign = -1 if text[0] == '-' else 1
+        text = text[1:]
+    if text[:2] in ('0x', '0X'):
+        match = re.match(r'[0-9a-fA-F]+', text[2:])
+        return sign * int(match.group(), 16) if match else math.nan
+    match = re.match(r'[0-9]+', text)
+    return sign * int(match.group()) if match else math.nan
+
+
+def js_round(value):
+    """Math.round: halves go up (2.5 -> 3, -2.5 -> -2), NaN stays NaN"""
+    if math.isnan(value):
+        return value
+    floor = math.floor(value)
+    return floor + 1 if value - floor >= 0.5 else floor
+
+
+def country(city):
+    """detectInternationalMove's country of a city or postal code ('FR' by default)"""
+    city = str(city or '').lower()
+    found = 'FR'
+    for code, indicators in COUNTRY_INDICATORS.items():
+        if any(indicator in city for indicator in indicators):
+            found = code
+    return found
+
+
+def _pair_country(pair):
+    """country(from_city || from_postal_code)"""
+    return country(pair[0] or pair[1])
+
+
+def department(postal_code):
+    """parseInt(postal_code.substring(0, 2))"""
+    return js_parse_int(str(postal_code or '')[:2])
+
+
+def services_cost(services):
+    return sum(SERVICE_COSTS.get(service, 0) for service in services or [])
+
+
+def _services_cost(value):
+    return services_cost(parse_services(value) if value is None or isinstance(value, str) else value)
+
+
+def parse_services(text):
+    """['a', 'b c'] from a Postgres array literal {a,"b c"} or a JSON array"""
+    text = (text or '').strip()
+    if not text:
+        return []
+    if text.startswith('['):
+        try:
+            return [str(item) for item in json.loads(text)]
+        except ValueError:
+            return []
+    if text.startswith('{') and text.endswith('}'):
+        items = []
+        for match in _PG_ARRAY_ITEM.finditer(text[1:-1]):
+            if match.group(1) is not None:
+                items.append(re.sub(r'\\(.)', r'\1', match.group(1)))
+            elif match.group(2).strip() != 'NULL':
+                items.append(match.group(2).strip())
+        return items
+    return [text]
+
+
+def price_row(row):
+    """calculateMarketPriceWithBreakdown for one row (dict of JS-like values)"""
+    def number(name):
+        value = row.get(name)
+        return math.nan if value is None else float(value)
+
+    distance = number('distance_km')
+    distance = 0.0 if math.isnan(distance) else distance
+    international = (country(row.get('from_city') or row.get('from_postal_code'))
+                     != country(row.get('to_city') or row.get('to_postal_code'))) or distance > 500
+    national = not international and distance > 200
+    rate = (MARKET_RATE_PER_M3_INTERNATIONAL if international
+            else MARKET_RATE_PER_M3_NATIONAL if national else MARKET_RATE_PER_M3)
+
+    volume, surface = number('volume_m3'), number('surface_m2')
+    if volume > 0:
+        base = volume * rate
+    elif surface > 0:
+        base = surface * MARKET_RATE_PER_M2
+    else:
+        base = HOME_SIZE_BASE_VOLUMES.get((row.get('home_size') or '').lower(), DEFAULT_VOLUME) * rate
+
+    if distance > 0:
+        if international:
+            distance_cost = distance * 2.0 + 400
+        elif distance > 200:
+            distance_cost = 90 + (distance - 200) * 0.45
+        elif distance > 50:
+            distance_cost = (distance - 50) * 0.60
+        else:
+            distance_cost = 0
+    else:
+        difference = abs(department(row.get('from_postal_code')) - department(row.get('to_postal_code')))
+        distance_cost = 0 if difference == 0 else difference * 25
+
+    floor_cost = 0
+    for floor, elevator in (('floor_from', 'elevator_from'), ('floor_to', 'elevator_to')):
+        if number(floor) > 0 and not row.get(elevator):
+            floor_cost += number(floor) * FLOOR_COST_WITHOUT_ELEVATOR
+    if row.get('furniture_lift_needed_departure'):
+        floor_cost += FURNITURE_LIFT_COST
+    if row.get('furniture_lift_needed_arrival'):
+        floor_cost += FURNITURE_LIFT_COST
+
+    services = services_cost(row.get('services_needed'))
+    total = js_round(base + distance_cost + floor_cost + services)
+    if row.get('accepts_groupage'):
+        total -= js_round(total * GROUPAGE_DISCOUNT)
+    return {
+        'base_price': js_round(base),
+        'distance_cost': js_round(distance_cost),
+        'floor_cost': js_round(floor_cost),
+        'services_cost': js_round(services),
+        'total_market_price': total,
+    }
+
+
+def _encode(values, function, dtype):
+    """function applied once per distinct value of values, gathered back per row"""
+    codes = dict.fromkeys(values)
+    for code, value in enumerate(codes):
+        codes[value] = code
+    index = np.fromiter(map(codes.__getitem__, values), dtype=np.intp, count=len(values))
+    table = np.array([function(value) for value in codes], dtype=dtype)
+    return table[index] if len(table) else np.zeros(0, dtype=dtype)
+
+
+def _round(values):
+    floor = np.floor(values)
+    return floor + (values - floor >= 0.5)
+
+
+def _numbers(values):
+    """float64 array of a column: numbers, numeric strings, '' / None as NaN"""
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'fiub':
+        return values.astype(np.float64)
+    array = np.array(values, dtype=object)
+    array[(array == '') | np.equal(array, None)] = np.nan
+    return array.astype(np.float64)
+
+
+def _booleans(values):
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'b':
+        return values
+    return _encode(values, lambda value: value is True or str(value).strip().lower() in TRUE_VALUES, bool)
+
+
+def price(columns):
+    """Breakdown arrays {base_price, distance_cost, floor_cost, services_cost,
+    total_market_price} of a batch; columns maps the COLUMNS names to
+    sequences of the same length (missing columns are NULL)"""
+    require_numpy()
+    n = len(next(iter(columns.values()))) if columns else 0
+    number = {name: _numbers(columns[name]) if name in columns else np.full(n, np.nan)
+              for name in NUMERIC_COLUMNS}
+    flag = {name: _booleans(columns[name]) if name in columns else np.zeros(n, dtype=bool)
+            for name in BOOLEAN_COLUMNS}
+    text = {name: columns.get(name) or [None] * n for name in TEXT_COLUMNS}
+
+    distance = np.nan_to_num(number['distance_km'], nan=0.0)
+    from_country = _encode(list(zip(text['from_city'], text['from_postal_code'])), _pair_country, 'U2')
+    to_country = _encode(list(zip(text['to_city'], text['to_postal_code'])), _pair_country, 'U2')
+    international = (from_country != to_country) | (distance > 500)
+    national = ~international & (distance > 200)
+    rate = np.where(international, MARKET_RATE_PER_M3_INTERNATIONAL,
+                    np.where(national, MARKET_RATE_PER_M3_NATIONAL, MARKET_RATE_PER_M3)).astype(np.float64)
+
+    volume, surface = number['volume_m3'], number['surface_m2']
+    home_volume = _encode(text['home_size'],
+                          lambda size: HOME_SIZE_BASE_VOLUMES.get((size or '').lower(), DEFAULT_VOLUME), np.float64)
+    with np.errstate(invalid='ignore'):
+        base = np.where(volume > 0, volume * rate,
+                        np.where(surface > 0, surface * MARKET_RATE_PER_M2, home_volume * rate))
+
+        departments = abs(_encode(text['from_postal_code'], department, np.float64)
+                          - _encode(text['to_postal_code'], department, np.float64))
+        distance_cost = np.where(
+            distance > 0,
+            np.where(international, distance * 2.0 + 400,
+                     np.where(distance > 200, 90 + (distance - 200) * 0.45,
+                              np.where(distance > 50, (distance - 50) * 0.60, 0.0))),
+            np.where(departments == 0, 0.0, departments * 25))
+
+        floor_cost = np.zeros(n)
+        for floor, elevator in (('floor_from', 'elevator_from'), ('floor_to', 'elevator_to')):
+            floor_cost = floor_cost + np.where((number[floor] > 0) & ~flag[elevator],
+                                               number[floor] * FLOOR_COST_WITHOUT_ELEVATOR, 0.0)
+        floor_cost = floor_cost + np.where(flag['furniture_lift_needed_departure'], FURNITURE_LIFT_COST, 0)
+        floor_cost = floor_cost + np.where(flag['furniture_lift_needed_arrival'], FURNITURE_LIFT_COST, 0)
+
+        services = columns.get('services_needed')
+        if services is None:
+            service = np.zeros(n)
+        else:
+            try:
+                service = _encode(services, _services_cost, np.float64)
+            except TypeError:
+                # Lists (Parquet, in-memory rows) are not hashable
+                service = _encode([value if value is None or isinstance(value, str) else tuple(value)
+                                   for value in services], _services_cost, np.float64)
+
+        total = _round(base + distance_cost + floor_cost + service)
+        total = np.where(flag['accepts_groupage'], total - _round(total * GROUPAGE_DISCOUNT), total)
+    return {
+        'base_price': _round(base),
+        'distance_cost': _round(distance_cost),
+        'floor_cost': _round(floor_cost),
+        'services_cost': _round(service),
+        'total_market_price': total,
+    }
+
+
+def load_csv(path, columns=COLUMNS + ['id', 'market_price_estimate']):
+    """{column: list of strings} of the columns of a CSV export present in its header"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        wanted = [(name, header.index(name)) for name in columns if name in header]
+        if not wanted:
+            return {}
+        width = len(header)
+        rows = [row + [''] * (width - len(row)) if len(row) < width else row for row in reader if row]
+    return {name: [row[position] for row in rows] for name, position in wanted}
+
+
+def load_parquet(path, columns=COLUMNS + ['id', 'market_price_estimate']):
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("pyarrow est requis pour lire un fichier Parquet (pip install pyarrow)")
+    names = pyarrow.parquet.read_schema(path).names
+    table = pyarrow.parquet.read_table(path, columns=[name for name in columns if name in names])
+    return {name: table.column(name).to_pylist() for name in table.column_names}
+
+
+def load(path):
+    if path.endswith(('.parquet', '.pq')):
+        return load_parquet(path)
+    return load_csv(path)
+
+
+def _format(value):
+    return '' if math.isnan(value) else str(int(value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-price a quote_requests export with the market price formulas')
+    parser.add_argument('file', help='CSV or Parquet export of quote_requests')
+    parser.add_argument('--output', metavar='FILE', help='write id + price breakdown as CSV')
+    parser.add_argument('--json', metavar='FILE', help='write the summary as JSON')
+    args = parser.parse_args()
+
+    try:
+        require_numpy()
+        started = time.perf_counter()
+        columns = load(args.file)
+        loaded = time.perf_counter()
+        if not columns:
+            raise RuntimeError(f"aucune colonne de quote_requests reconnue dans {args.file}")
+        prices = price(columns)
+        priced = time.perf_counter()
+    except (OSError, RuntimeError) as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
+    total = prices['total_market_price']
+    n = len(total)
+    known = ~np.isnan(total)
+    print("=" * 80)
+    print(f"PRIX MARCHÉ: {n} demandes de devis ({os.path.basename(args.file)})")
+    print("=" * 80)
+    print(f"   lecture {loaded - started:.2f}s, calcul {priced - loaded:.3f}s "
+          f"({n / max(priced - loaded, 1e-9):,.0f} lignes/s)")
+    missing = [name for name in COLUMNS if name not in columns]
+    if missing:
+        print(f"   ⚠️  colonnes absentes (traitées comme NULL): {', '.join(missing)}")
+    if known.any():
+        print(f"   total: min {np.min(total[known]):.0f}€, médiane {np.median(total[known]):.0f}€, "
+              f"max {np.max(total[known]):.0f}€")
+    if (~known).any():
+        print(f"   ⚠️  {int((~known).sum())} prix NaN (pas de distance et code postal non numérique)")
+
+    summary = {'rows': n, 'nan': int((~known).sum()), 'seconds': round(priced - loaded, 4)}
+    if 'market_price_estimate' in columns:
+        previous = _numbers(columns['market_price_estimate'])
+        compared = known & ~np.isnan(previous)
+        changed = compared & (previous != total)
+        delta = total[changed] - previous[changed]
+        print(f"\n💶 market_price_estimate: {int(changed.sum())}/{int(compared.sum())} prix modifiés"
+              + (f", écart moyen {delta.mean():+.0f}€" if len(delta) else ''))
+        summary.update(compared=int(compared.sum()), changed=int(changed.sum()),
+                       mean_delta=round(float(delta.mean()), 2) if len(delta) else 0.0)
+
+    if args.output:
+        ids = columns.get('id', [''] * n)
+        previous = columns.get('market_price_estimate')
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(['id'] + AMOUNTS + (['previous_market_price_estimate'] if previous else []))
+            arrays = [prices[name].tolist() for name in AMOUNTS]
+            for i in range(n):
+                writer.writerow([ids[i]] + [_format(array[i]) for array in arrays]
+                                + ([previous[i]] if previous else []))
+        print(f"\n📝 {args.output}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"📝 Rapport: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
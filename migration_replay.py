@@ -0,0 +1,897 @@
+#!/usr/bin/env python3
+"""
+Replay of supabase/migrations/ into an in-memory schema model
+
+The migrations are read one file at a time, in file name (timestamp) order,
+and split into statements (comments, quoted identifiers, strings and
+$tag$...$tag$ bodies are skipped, so a `;` inside a function body does not
+end the statement). Each DDL statement is applied to the model as Postgres
+would: CREATE/ALTER/DROP TABLE (columns, constraints, row level security),
+CREATE/DROP INDEX, CREATE/ALTER/DROP POLICY, CREATE/DROP TRIGGER,
+CREATE/DROP FUNCTION and VIEW. The DDL inside DO $$ ... $$ blocks (the
+`IF NOT EXISTS (...) THEN ALTER TABLE ...` guards) is applied too: the
+guards only make it idempotent, and the model ignores a column or index
+that already exists. So is DDL run with EXECUTE '...' (a guarded view is
+only created if missing), and the `FOR ... IN SELECT policyname FROM
+pg_policies WHERE tablename = ... LOOP EXECUTE format('DROP POLICY ...')`
+loops drop the matching policies. Data statements (INSERT, UPDATE, GRANT,
+COMMENT, ...) are counted and skipped.
+
+PRIMARY KEY and UNIQUE constraints create their index like Postgres, with
+its default names (<table>_pkey, <table>_<col>_key, <table>_<col>_fkey,
+<table>_<col>_check), so later `DROP CONSTRAINT` statements find them.
+
+Run as a script, it reports the slow-query candidates of the final schema:
+  - foreign keys with no index on their columns (joins and ON DELETE
+    cascades scan the referencing table)
+  - columns filtered with .eq() or sorted with .order() in src/ that no index
+    leads with (nor follows an .eq() column of the same query)
+
+Usage:
+    python3 migration_replay.py
+    python3 migration_replay.py --json schema.json --verbose
+"""
+
+import argparse
+import json
+import os
+import re
+
+import edit_plan
+import emitters
+import page_engine
+import supabase_queries
+
+MIGRATIONS_DIR = os.path.join(page_engine.PROJECT_DIR, 'supabase', 'migrations')
+
+_SQL_TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>[EeBbXx]?'(?:[^']|'')*')
+  | (?P<ident>"(?:[^"]|"")*")
+  | (?P<dollar>\$(?:[A-Za-z_][\w]*)?\$)
+  | (?P<semi>;)
+  | (?P<word>[^\s'";$/-]+|.)
+''', re.VERBOSE | re.DOTALL)
+
+IDENT = r'(?:"(?:[^"]|"")+"|[A-Za-z_][\w$]*)'
+QUALIFIED = rf'{IDENT}(?:\s*\.\s*{IDENT})?'
+
+_IF_NOT_EXISTS = r'(?:IF\s+NOT\s+EXISTS\s+)?'
+_IF_EXISTS = r'(?:IF\s+EXISTS\s+)?'
+
+_CREATE_TABLE = re.compile(
+    rf'CREATE\s+(?:(?:GLOBAL\s+|LOCAL\s+)?(?:TEMP|TEMPORARY|UNLOGGED)\s+)?TABLE\s+{_IF_NOT_EXISTS}({QUALIFIED})\s*\(',
+    re.IGNORECASE)
+_DROP_TABLE = re.compile(rf'DROP\s+TABLE\s+({_IF_EXISTS})(.+?)\s*(CASCADE|RESTRICT)?\s*$', re.IGNORECASE | re.DOTALL)
+_ALTER_TABLE = re.compile(rf'ALTER\s+TABLE\s+{_IF_EXISTS}(?:ONLY\s+)?({QUALIFIED})\s+(.*)$',
+                          re.IGNORECASE | re.DOTALL)
+_CREATE_INDEX = re.compile(
+    rf'CREATE\s+(UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?{_IF_NOT_EXISTS}({IDENT})?\s*ON\s+(?:ONLY\s+)?({QUALIFIED})'
+    r'\s*(?:USING\s+(\w+)\s*)?\(',
+    re.IGNORECASE)
+_DROP_INDEX = re.compile(rf'DROP\s+INDEX\s+(?:CONCURRENTLY\s+)?{_IF_EXISTS}(.+?)\s*(?:CASCADE|RESTRICT)?\s*$',
+                         re.IGNORECASE | re.DOTALL)
+_CREATE_POLICY = re.compile(rf'CREATE\s+POLICY\s+({IDENT})\s+ON\s+({QUALIFIED})\s*(.*)$', re.IGNORECASE | re.DOTALL)
+_ALTER_POLICY = re.compile(rf'ALTER\s+POLICY\s+({IDENT})\s+ON\s+({QUALIFIED})\s*(.*)$', re.IGNORECASE | re.DOTALL)
+_DROP_POLICY = re.compile(rf'DROP\s+POLICY\s+{_IF_EXISTS}({IDENT})\s+ON\s+({QUALIFIED})', re.IGNORECASE)
+_CREATE_TRIGGER = re.compile(
+    rf'CREATE\s+(?:OR\s+REPLACE\s+)?(?:CONSTRAINT\s+)?TRIGGER\s+({IDENT})\s+(BEFORE|AFTER|INSTEAD\s+OF)\s+(.+?)'
+    rf'\s+ON\s+({QUALIFIED}).*?EXECUTE\s+(?:FUNCTION|PROCEDURE)\s+({QUALIFIED})',
+    re.IGNORECASE | re.DOTALL)
+_DROP_TRIGGER = re.compile(rf'DROP\s+TRIGGER\s+{_IF_EXISTS}({IDENT})\s+ON\s+({QUALIFIED})', re.IGNORECASE)
+_CREATE_FUNCTION = re.compile(rf'CREATE\s+(?:OR\s+REPLACE\s+)?FUNCTION\s+({QUALIFIED})\s*\(', re.IGNORECASE)
+_DROP_FUNCTION = re.compile(rf'DROP\s+FUNCTION\s+{_IF_EXISTS}(.+?)\s*(CASCADE|RESTRICT)?\s*$',
+                            re.IGNORECASE | re.DOTALL)
+_CREATE_VIEW = re.compile(rf'CREATE\s+(?:OR\s+REPLACE\s+)?(?:MATERIALIZED\s+)?VIEW\s+{_IF_NOT_EXISTS}({QUALIFIED})',
+                          re.IGNORECASE)
+_DROP_VIEW = re.compile(rf'DROP\s+(?:MATERIALIZED\s+)?VIEW\s+{_IF_EXISTS}(.+?)\s*(?:CASCADE|RESTRICT)?\s*$',
+                        re.IGNORECASE | re.DOTALL)
+_DO_BLOCK = re.compile(r'DO\s*(?:LANGUAGE\s+\w+\s*)?(\$\w*\$)(.*)\1', re.IGNORECASE | re.DOTALL)
+# EXECUTE 'CREATE ...' of a DO block: DDL in a string literal
+_EXECUTE_LITERAL = re.compile(r"EXECUTE\s+'((?:[^']|'')*)'\s*$", re.IGNORECASE | re.DOTALL)
+_POLICY_DROP_LOOP = re.compile(r"\bFROM\s+pg_policies\s+WHERE\s+(.*?)\s+LOOP\s+EXECUTE\s+format\s*\(\s*'DROP\s+POLICY",
+                               re.IGNORECASE | re.DOTALL)
+# Control flow in front of a statement of a DO block body
+_PLPGSQL_PREFIX = re.compile(
+    r'(?:\s*(?:DECLARE\b.*?\bBEGIN\b|BEGIN\b|ELSE\b|LOOP\b|END\s+IF\b|END\s+LOOP\b|END\b'
+    r'|(?:IF|ELSIF|WHEN)\b.*?\bTHEN\b|EXCEPTION\b))*\s*',
+    re.IGNORECASE | re.DOTALL)
+
+# First keyword ending the type of a column definition
+_COLUMN_CONSTRAINT = re.compile(
+    r'\s+(?:NOT\s+NULL|NULL|DEFAULT|REFERENCES|PRIMARY\s+KEY|UNIQUE|CHECK|CONSTRAINT|GENERATED|COLLATE)\b',
+    re.IGNORECASE)
+_REFERENCES = re.compile(
+    rf'REFERENCES\s+({QUALIFIED})\s*(?:\(([^)]*)\))?((?:\s+(?:ON\s+(?:DELETE|UPDATE)\s+'
+    r'(?:SET\s+NULL|SET\s+DEFAULT|NO\s+ACTION|CASCADE|RESTRICT)|MATCH\s+\w+|DEFERRABLE|NOT\s+DEFERRABLE'
+    r'|INITIALLY\s+\w+))*)',
+    re.IGNORECASE)
+_ON_DELETE = re.compile(r'ON\s+DELETE\s+(SET\s+NULL|SET\s+DEFAULT|NO\s+ACTION|CASCADE|RESTRICT)', re.IGNORECASE)
+_DEFAULT = re.compile(
+    r'DEFAULT\s+(.+?)(?=\s+(?:NOT\s+NULL|NULL|REFERENCES|PRIMARY\s+KEY|UNIQUE|CHECK|CONSTRAINT|GENERATED)\b|\s*$)',
+    re.IGNORECASE | re.DOTALL)
+_NOT_NULL_PARTIAL = r'^\(*\s*{col}\s+IS\s+NOT\s+NULL\s*\)*$'
+
+
+def name(raw):
+    """Normalized name of a possibly quoted, possibly qualified identifier
+
+    Unquoted parts are lowercased, quotes removed, and the public schema is
+    implied: public.movers, "movers" and Movers are all 'movers'.
+    """
+    parts = [part.strip() for part in re.findall(r'"(?:[^"]|"")+"|[^.\s]+', raw)]
+    parts = [part[1:-1].replace('""', '"') if part.startswith('"') else part.lower() for part in parts]
+    if len(parts) == 2 and parts[0] == 'public':
+        parts = parts[1:]
+    return '.'.join(parts)
+
+
+def split_top(text, separator=','):
+    """Split text on separator outside parentheses, strings and quoted names"""
+    parts = []
+    depth = 0
+    start = 0
+    for match in re.finditer(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|[()]|" + re.escape(separator), text):
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif token == separator and depth == 0:
+            parts.append(text[start:match.start()].strip())
+            start = match.end()
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def paren_group(text, pos):
+    """(inner text, offset after `)`) of the parenthesized group opening at
+    or after pos, or (None, pos)"""
+    start = text.find('(', pos)
+    if start < 0:
+        return None, pos
+    depth = 0
+    for match in re.finditer(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|[()]", text[start:]):
+        if match.group() == '(':
+            depth += 1
+        elif match.group() == ')':
+            depth -= 1
+            if depth == 0:
+                end = start + match.end()
+                return text[start + 1:end - 1], end
+    return None, pos
+
+
+class Statement:
+    def __init__(self, text, path, line):
+        self.text = text
+        self.path = path
+        self.line = line
+
+    def location(self):
+        return f"{os.path.basename(self.path)}:{self.line}"
+
+
+def split_statements(content, path=None):
+    """Yield the Statements of an SQL script, comments removed"""
+    pieces = []
+    start_line = None
+    line = 1
+    pos = 0
+    n = len(content)
+    while pos < n:
+        match = _SQL_TOKEN.match(content, pos)
+        kind = match.lastgroup
+        token = match.group()
+        end = match.end()
+        if kind == 'dollar':
+            close = content.find(token, end)
+            end = n if close < 0 else close + len(token)
+            token = content[pos:end]
+        if kind == 'semi':
+            text = ''.join(pieces).strip()
+            if text:
+                yield Statement(text, path, start_line)
+            pieces = []
+            start_line = None
+        elif kind == 'comment':
+            pieces.append(' ')
+        else:
+            if start_line is None and kind != 'space':
+                start_line = line
+            pieces.append(token)
+        line += content.count('\n', pos, end)
+        pos = end
+    text = ''.join(pieces).strip()
+    if text:
+        yield Statement(text, path, start_line)
+
+
+class Column:
+    def __init__(self, name, type, not_null=False, default=None):
+        self.name = name
+        self.type = type
+        self.not_null = not_null
+        self.default = default
+
+
+class Constraint:
+    """PRIMARY KEY, UNIQUE, FOREIGN KEY or CHECK constraint of a table"""
+
+    def __init__(self, name, kind, columns, ref_table=None, ref_columns=None, on_delete=None, expr=None):
+        self.name = name
+        self.kind = kind          # 'primary', 'unique', 'foreign' or 'check'
+        self.columns = columns
+        self.ref_table = ref_table
+        self.ref_columns = ref_columns
+        self.on_delete = on_delete
+        self.expr = expr
+
+
+class Index:
+    def __init__(self, name, table, columns, unique=False, where=None, method=None, constraint=None, statement=None):
+        self.name = name
+        self.table = table
+        self.columns = columns    # column names, or expressions as written
+        self.unique = unique
+        self.where = where
+        self.method = method
+        self.constraint = constraint  # backing constraint name, if any
+        self.statement = statement    # CREATE INDEX Statement, if any
+
+
+class Policy:
+    def __init__(self, name, table, command='ALL', roles=None, using=None, check=None, permissive=True):
+        self.name = name
+        self.table = table
+        self.command = command
+        self.roles = roles or ['public']
+        self.using = using
+        self.check = check
+        self.permissive = permissive
+
+
+class Trigger:
+    def __init__(self, name, table, timing, events, function, statement=None):
+        self.name = name
+        self.table = table
+        self.timing = timing
+        self.events = events
+        self.function = function
+        self.statement = statement
+
+
+class Table:
+    def __init__(self, name):
+        self.name = name
+        self.columns = {}         # name -> Column, in definition order
+        self.constraints = {}     # name -> Constraint
+        self.policies = {}        # name -> Policy
+        self.triggers = {}        # name -> Trigger
+        self.rls = False
+        self.rls_forced = False
+
+    def foreign_keys(self):
+        return [c for c in self.constraints.values() if c.kind == 'foreign']
+
+
+class Schema:
+    """Tables, indexes, functions and views after the statements applied so far"""
+
+    def __init__(self):
+        self.tables = {}
+        self.indexes = {}         # name -> Index (index names are schema-wide)
+        self.functions = {}       # name -> Statement of its last definition
+        self.views = {}           # name -> Statement
+        self.counts = {}          # statement kind -> count
+        self.unparsed = []        # DDL statements the model did not understand
+
+    # -- Statements --------------------------------------------------------
+
+    def apply(self, statement):
+        """Apply one Statement to the model"""
+        text = statement.text
+        head = ' '.join(text[:80].split()[:4]).upper() + ' '
+        for prefix, handler in self._HANDLERS:
+            if head.startswith(prefix + ' '):
+                kind = handler(self, statement)
+                break
+        else:
+            kind = 'ignored'
+            if re.match(r'(?:CREATE|ALTER|DROP)\b', head) and not re.match(
+                    r'(?:CREATE|ALTER|DROP)\s+(?:EXTENSION|SCHEMA|TYPE|SEQUENCE|PUBLICATION|ROLE)|ALTER\s+VIEW', head):
+                self.unparsed.append(statement)
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def replay(self, paths):
+        """Apply the statements of each migration file, in the order given"""
+        for path in paths:
+            for statement in split_statements(edit_plan.read_text(path), path):
+                self.apply(statement)
+        return self
+
+    def _do_block(self, statement):
+        match = _DO_BLOCK.match(statement.text)
+        if match is None:
+            return 'ignored'
+        applied = False
+        for inner in split_statements(match.group(2), statement.path):
+            text = inner.text[_PLPGSQL_PREFIX.match(inner.text).end():]
+            dynamic = _EXECUTE_LITERAL.match(text)
+            if dynamic:
+                text = dynamic.group(1).replace("''", "'").strip()
+                view = _CREATE_VIEW.match(text)
+                # IF NOT EXISTS (SELECT ... FROM information_schema.views ...) THEN EXECUTE 'CREATE OR REPLACE VIEW'
+                if view and name(view.group(1)) in self.views and re.search(
+                        r'\bIF\s+NOT\s+EXISTS\b', match.group(2), re.IGNORECASE):
+                    continue
+            if re.match(r'(?:CREATE|ALTER|DROP)\s', text, re.IGNORECASE):
+                self.apply(Statement(text, statement.path, statement.line + inner.line - 1))
+                applied = True
+        # FOR r IN SELECT policyname FROM pg_policies WHERE tablename = '...'
+        # LOOP EXECUTE format('DROP POLICY ...') END LOOP
+        for loop in _POLICY_DROP_LOOP.finditer(match.group(2)):
+            conditions = dict((column.lower(), value) for column, value in
+                              re.findall(r"\b(tablename|cmd)\s*=\s*'([^']*)'", loop.group(1), re.IGNORECASE))
+            table = self.tables.get(conditions.get('tablename', ''))
+            if table is None:
+                continue
+            for policy in list(table.policies.values()):
+                if conditions.get('cmd', policy.command).upper() == policy.command:
+                    del table.policies[policy.name]
+            applied = True
+        return 'do' if applied else 'ignored'
+
+    def _create_table(self, statement):
+        match = _CREATE_TABLE.match(statement.text)
+        if match is None:
+            self.unparsed.append(statement)
+            return 'unparsed'
+        table_name = name(match.group(1))
+        if table_name in self.tables:
+            return 'create table'
+        body, _ = paren_group(statement.text, match.end() - 1)
+        table = self.tables[table_name] = Table(table_name)
+        for element in split_top(body or ''):
+            if re.match(r'(?:CONSTRAINT|PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|CHECK|EXCLUDE|LIKE)\b', element, re.IGNORECASE):
+                self._add_constraint(table, element)
+            else:
+                self._add_column(table, element)
+        return 'create table'
+
+    def _drop_table(self, statement):
+        match = _DROP_TABLE.match(statement.text)
+        if match is None:
+            self.unparsed.append(statement)
+            return 'unparsed'
+        cascade = bool(match.group(3)) and match.group(3).upper() == 'CASCADE'
+        for raw in split_top(match.group(2)):
+            self.drop_table(name(raw), cascade)
+        return 'drop table'
+
+    def _alter_table(self, statement):
+        match = _ALTER_TABLE.match(statement.text)
+        if match is None:
+            self.unparsed.append(statement)
+            return 'unparsed'
+        table = self.tables.get(name(match.group(1)))
+        if table is None:
+            return 'alter table'
+        for action in split_top(match.group(2)):
+            if not self._alter_action(table, action):
+                self.unparsed.append(Statement(f"ALTER TABLE {table.name} {action}", statement.path, statement.line))
+        return 'alter table'
+
+    def _create_index(self, statement):
+        match = _CREATE_INDEX.match(statement.text)
+        if match is None:
+            self.unparsed.append(statement)
+            return 'unparsed'
+        table_name = name(match.group(3))
+        body, end = paren_group(statement.text, match.end() - 1)
+        where = re.search(r'\bWHERE\s+(.*)$', statement.text[end:], re.IGNORECASE | re.DOTALL)
+        index_name = name(match.group(2)) if match.group(2) else f"{table_name}_idx"
+        if index_name in self.indexes or table_name not in self.tables:
+            return 'create index'
+        columns = [_index_column(part) for part in split_top(body or '')]
+        self.indexes[index_name] = Index(index_name, table_name, columns, bool(match.group(1)),
+                                         where.group(1).strip() if where else None,
+                                         match.group(4).lower() if match.group(4) else None,
+                                         statement=statement)
+        return 'create index'
+
+    def _drop_index(self, statement):
+        match = _DROP_INDEX.match(statement.text)
+        if match is None:
+            self.unparsed.append(statement)
+            return 'unparsed'
+        for raw in split_top(match.group(1)):
+            self.indexes.pop(name(raw).split('.')[-1], None)
+        return 'drop index'
+
+    def _create_policy(self, statement):
+        match = _CREATE_POLICY.match(statement.text)
+        table = self.tables.get(name(match.group(2))) if match else None
+        if table is None:
+            # Policies on storage.objects and other non-modeled tables
+            return 'create policy'
+        policy = Policy(name(match.group(1)), table.name)
+        _policy_clauses(policy, match.group(3))
+        table.policies[policy.name] = policy
+        return 'create policy'
+
+    def _alter_policy(self, statement):
+        match = _ALTER_POLICY.match(statement.text)
+        table = self.tables.get(name(match.group(2))) if match else None
+        policy = table.policies.get(name(match.group(1))) if table else None
+        if policy is None:
+            return 'alter policy'
+        rename = re.match(rf'RENAME\s+TO\s+({IDENT})', match.group(3), re.IGNORECASE)
+        if rename:
+            del table.policies[policy.name]
+            policy.name = name(rename.group(1))
+            table.policies[policy.name] = policy
+        else:
+            _policy_clauses(policy, match.group(3))
+        return 'alter policy'
+
+    def _drop_policy(self, statement):
+        match = _DROP_POLICY.match(statement.text)
+        table = self.tables.get(name(match.group(2))) if match else None
+        if table is not None:
+            table.policies.pop(name(match.group(1)), None)
+        return 'drop policy'
+
+    def _create_trigger(self, statement):
+        match = _CREATE_TRIGGER.match(statement.text)
+        if match is None:
+            self.unparsed.append(statement)
+            return 'unparsed'
+        table = self.tables.get(name(match.group(4)))
+        if table is not None:
+            events = [event.strip().upper() for event in re.split(r'\s+OR\s+', match.group(3), flags=re.IGNORECASE)]
+            trigger = Trigger(name(match.group(1)), table.name, ' '.join(match.group(2).upper().split()),
+                              events, name(match.group(5)), statement)
+            table.triggers[trigger.name] = trigger
+        return 'create trigger'
+
+    def _drop_trigger(self, statement):
+        match = _DROP_TRIGGER.match(statement.text)
+        table = self.tables.get(name(match.group(2))) if match else None
+        if table is not None:
+            table.triggers.pop(name(match.group(1)), None)
+        return 'drop trigger'
+
+    def _create_function(self, statement):
+        match = _CREATE_FUNCTION.match(statement.text)
+        if match is None:
+            self.unparsed.append(statement)
+            return 'unparsed'
+        self.functions[name(match.group(1))] = statement
+        return 'create function'
+
+    def _drop_function(self, statement):
+        match = _DROP_FUNCTION.match(statement.text)
+        if match is not None:
+            cascade = (match.group(2) or '').upper() == 'CASCADE'
+            for raw in split_top(match.group(1)):
+                function_name = name(raw.split('(')[0])
+                self.functions.pop(function_name, None)
+                if cascade:
+                    # The triggers executing it go with it
+                    for table in self.tables.values():
+                        for trigger in [t for t in table.triggers.values() if t.function == function_name]:
+                            del table.triggers[trigger.name]
+        return 'drop function'
+
+    def _create_view(self, statement):
+        match = _CREATE_VIEW.match(statement.text)
+        if match is None:
+            self.unparsed.append(statement)
+            return 'unparsed'
+        self.views[name(match.group(1))] = statement
+        return 'create view'
+
+    def _drop_view(self, statement):
+        match = _DROP_VIEW.match(statement.text)
+        if match is not None:
+            for raw in split_top(match.group(1)):
+                self.views.pop(name(raw), None)
+        return 'drop view'
+
+    _HANDLERS = [
+        ('DO', _do_block),
+        ('CREATE TABLE', _create_table),
+        ('CREATE TEMP', _create_table),
+        ('CREATE UNLOGGED', _create_table),
+        ('DROP TABLE', _drop_table),
+        ('ALTER TABLE', _alter_table),
+        ('CREATE INDEX', _create_index),
+        ('CREATE UNIQUE INDEX', _create_index),
+        ('DROP INDEX', _drop_index),
+        ('CREATE POLICY', _create_policy),
+        ('ALTER POLICY', _alter_policy),
+        ('DROP POLICY', _drop_policy),
+        ('CREATE TRIGGER', _create_trigger),
+        ('CREATE OR REPLACE TRIGGER', _create_trigger),
+        ('CREATE CONSTRAINT TRIGGER', _create_trigger),
+        ('DROP TRIGGER', _drop_trigger),
+        ('CREATE FUNCTION', _create_function),
+        ('CREATE OR REPLACE FUNCTION', _create_function),
+        ('DROP FUNCTION', _drop_function),
+        ('CREATE VIEW', _create_view),
+        ('CREATE OR REPLACE VIEW', _create_view),
+        ('CREATE MATERIALIZED VIEW', _create_view),
+        ('DROP VIEW', _drop_view),
+        ('DROP MATERIALIZED VIEW', _drop_view),
+    ]
+
+    # -- Tables ------------------------------------------------------------
+
+    def _add_column(self, table, definition):
+        match = re.match(rf'({IDENT})\s+(.*)$', definition, re.DOTALL)
+        if match is None:
+            return False
+        column_name = name(match.group(1))
+        if column_name in table.columns:
+            return True
+        rest = ' ' + match.group(2)
+        constraint = _COLUMN_CONSTRAINT.search(rest)
+        column_type = ' '.join(rest[:constraint.start() if constraint else len(rest)].split())
+        clauses = rest[constraint.start():] if constraint else ''
+        default = _DEFAULT.search(clauses)
+        column = Column(column_name, column_type, bool(re.search(r'\bNOT\s+NULL\b|\bPRIMARY\s+KEY\b', clauses, re.I)),
+                        default.group(1).strip() if default else None)
+        table.columns[column_name] = column
+
+        if re.search(r'\bPRIMARY\s+KEY\b', clauses, re.IGNORECASE):
+            self._add(table, Constraint(f"{table.name}_pkey", 'primary', [column_name]))
+        if re.search(r'\bUNIQUE\b', clauses, re.IGNORECASE):
+            self._add(table, Constraint(f"{table.name}_{column_name}_key", 'unique', [column_name]))
+        references = _REFERENCES.search(clauses)
+        if references:
+            self._add(table, _foreign_key(f"{table.name}_{column_name}_fkey", [column_name], references))
+        check = re.search(r'\bCHECK\s*\(', clauses, re.IGNORECASE)
+        if check:
+            expr, _ = paren_group(clauses, check.end() - 1)
+            self._add(table, Constraint(f"{table.name}_{column_name}_check", 'check', [column_name], expr=expr))
+        return True
+
+    def _add_constraint(self, table, definition):
+        named = re.match(rf'CONSTRAINT\s+({IDENT})\s+(.*)$', definition, re.IGNORECASE | re.DOTALL)
+        constraint_name, body = (name(named.group(1)), named.group(2)) if named else (None, definition)
+        match = re.match(r'(PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|CHECK)\b', body, re.IGNORECASE)
+        if match is None:
+            return False
+        kind = ' '.join(match.group(1).upper().split())
+        group, end = paren_group(body, match.end())
+        columns = [name(column) for column in split_top(group or '')] if kind != 'CHECK' else []
+        if kind == 'PRIMARY KEY':
+            constraint = Constraint(constraint_name or f"{table.name}_pkey", 'primary', columns)
+            for column in columns:
+                if column in table.columns:
+                    table.columns[column].not_null = True
+        elif kind == 'UNIQUE':
+            constraint = Constraint(constraint_name or f"{table.name}_{'_'.join(columns)}_key", 'unique', columns)
+        elif kind == 'FOREIGN KEY':
+            references = _REFERENCES.search(body, end)
+            if references is None:
+                return False
+            constraint = _foreign_key(constraint_name or f"{table.name}_{'_'.join(columns)}_fkey", columns, references)
+        else:
+            referenced = [column for column in table.columns if re.search(rf'\b{re.escape(column)}\b', group or '')]
+            default_name = f"{table.name}_{referenced[0]}_check" if referenced else f"{table.name}_check"
+            constraint = Constraint(constraint_name or default_name, 'check', referenced, expr=group)
+        self._add(table, constraint)
+        return True
+
+    def _add(self, table, constraint):
+        """Add constraint (and the index backing a primary key or unique constraint)"""
+        base = constraint.name
+        suffix = 1
+        while constraint.name in table.constraints:
+            constraint.name = f"{base}{suffix}"
+            suffix += 1
+        table.constraints[constraint.name] = constraint
+        if constraint.kind in ('primary', 'unique'):
+            self.indexes[constraint.name] = Index(constraint.name, table.name, list(constraint.columns),
+                                                  unique=True, constraint=constraint.name)
+
+    def _alter_action(self, table, action):
+        upper = action.upper()
+        words = upper.split()
+        if re.match(r'(?:ENABLE|DISABLE|FORCE|NO\s+FORCE)\s+ROW\s+LEVEL\s+SECURITY', upper):
+            if words[0] in ('ENABLE', 'DISABLE'):
+                table.rls = words[0] == 'ENABLE'
+            else:
+                table.rls_forced = words[0] == 'FORCE'
+            return True
+        add_column = re.match(rf'ADD\s+(?:COLUMN\s+)?{_IF_NOT_EXISTS}(.*)$', action, re.IGNORECASE | re.DOTALL)
+        if add_column and not re.match(r'ADD\s+(?:CONSTRAINT|PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|CHECK)\b', upper):
+            return self._add_column(table, add_column.group(1))
+        if upper.startswith('ADD'):
+            return self._add_constraint(table, action[3:].strip())
+        drop_column = re.match(rf'DROP\s+(?:COLUMN\s+)?{_IF_EXISTS}({IDENT})', action, re.IGNORECASE)
+        if drop_column and not re.match(r'DROP\s+CONSTRAINT\b', upper):
+            self.drop_column(table, name(drop_column.group(1)))
+            return True
+        drop_constraint = re.match(rf'DROP\s+CONSTRAINT\s+{_IF_EXISTS}({IDENT})', action, re.IGNORECASE)
+        if drop_constraint:
+            self.drop_constraint(table, name(drop_constraint.group(1)))
+            return True
+        rename_column = re.match(rf'RENAME\s+(?:COLUMN\s+)?({IDENT})\s+TO\s+({IDENT})', action, re.IGNORECASE)
+        if rename_column and not re.match(r'RENAME\s+(?:TO|CONSTRAINT)\b', upper):
+            self.rename_column(table, name(rename_column.group(1)), name(rename_column.group(2)))
+            return True
+        rename_constraint = re.match(rf'RENAME\s+CONSTRAINT\s+({IDENT})\s+TO\s+({IDENT})', action, re.IGNORECASE)
+        if rename_constraint:
+            constraint = table.constraints.pop(name(rename_constraint.group(1)), None)
+            if constraint is not None:
+                index = self.indexes.pop(constraint.name, None)
+                constraint.name = name(rename_constraint.group(2))
+                table.constraints[constraint.name] = constraint
+                if index is not None:
+                    index.name = index.constraint = constraint.name
+                    self.indexes[index.name] = index
+            return True
+        rename_table = re.match(rf'RENAME\s+TO\s+({QUALIFIED})', action, re.IGNORECASE)
+        if rename_table:
+            self.rename_table(table, name(rename_table.group(1)))
+            return True
+        alter_column = re.match(rf'ALTER\s+(?:COLUMN\s+)?({IDENT})\s+(.*)$', action, re.IGNORECASE | re.DOTALL)
+        if alter_column:
+            column = table.columns.get(name(alter_column.group(1)))
+            change = alter_column.group(2)
+            if column is None:
+                return True
+            type_change = re.match(r'(?:SET\s+DATA\s+)?TYPE\s+(.+?)(?:\s+USING\s+.*)?$', change, re.IGNORECASE | re.DOTALL)
+            if type_change:
+                column.type = ' '.join(type_change.group(1).split())
+            elif re.match(r'SET\s+DEFAULT\s', change, re.IGNORECASE):
+                column.default = change.split(None, 2)[2].strip()
+            elif re.match(r'DROP\s+DEFAULT', change, re.IGNORECASE):
+                column.default = None
+            elif re.match(r'(SET|DROP)\s+NOT\s+NULL', change, re.IGNORECASE):
+                column.not_null = change.split()[0].upper() == 'SET'
+            else:
+                return False
+            return True
+        return bool(re.match(r'(?:OWNER\s+TO|REPLICA\s+IDENTITY|SET\s+|RESET\s*\(|CLUSTER|VALIDATE\s+CONSTRAINT)', upper))
+
+    def drop_table(self, table_name, cascade=False):
+        table = self.tables.pop(table_name, None)
+        if table is None:
+            return
+        for index_name in [n for n, index in self.indexes.items() if index.table == table_name]:
+            del self.indexes[index_name]
+        if cascade:
+            # Foreign keys to the table go with it (the referencing columns stay)
+            for other in self.tables.values():
+                for constraint in other.foreign_keys():
+                    if constraint.ref_table == table_name:
+                        del other.constraints[constraint.name]
+
+    def drop_column(self, table, column_name):
+        if table.columns.pop(column_name, None) is None:
+            return
+        for constraint in list(table.constraints.values()):
+            if column_name in constraint.columns:
+                self.drop_constraint(table, constraint.name)
+        for index_name in [n for n, index in self.indexes.items()
+                           if index.table == table.name and column_name in index.columns]:
+            del self.indexes[index_name]
+
+    def drop_constraint(self, table, constraint_name):
+        if table.constraints.pop(constraint_name, None) is not None:
+            self.indexes.pop(constraint_name, None)
+
+    def rename_column(self, table, old, new):
+        column = table.columns.get(old)
+        if column is None:
+            return
+        table.columns = {new if key == old else key: value for key, value in table.columns.items()}
+        column.name = new
+        for constraint in table.constraints.values():
+            constraint.columns = [new if c == old else c for c in constraint.columns]
+        for other in self.tables.values():
+            for constraint in other.foreign_keys():
+                if constraint.ref_table == table.name:
+                    constraint.ref_columns = [new if c == old else c for c in constraint.ref_columns]
+        for index in self.indexes.values():
+            if index.table == table.name:
+                index.columns = [new if c == old else c for c in index.columns]
+
+    def rename_table(self, table, new):
+        old = table.name
+        del self.tables[old]
+        table.name = new
+        self.tables[new] = table
+        for index in self.indexes.values():
+            if index.table == old:
+                index.table = new
+        for other in self.tables.values():
+            for constraint in other.foreign_keys():
+                if constraint.ref_table == old:
+                    constraint.ref_table = new
+        for item in list(table.policies.values()) + list(table.triggers.values()):
+            item.table = new
+
+    # -- Queries -----------------------------------------------------------
+
+    def table_indexes(self, table_name):
+        return [index for index in self.indexes.values() if index.table == table_name]
+
+    def covering_index(self, table_name, columns):
+        """An index whose leading columns are exactly columns (in any order)
+
+        A partial index only counts when its predicate is `<col> IS NOT NULL`
+        on one of those columns, which every equality lookup satisfies.
+        """
+        partial = None
+        for index in self.table_indexes(table_name):
+            if set(index.columns[:len(columns)]) != set(columns):
+                continue
+            if index.where is None:
+                return index
+            if any(re.match(_NOT_NULL_PARTIAL.format(col=re.escape(column)), index.where, re.IGNORECASE)
+                   for column in columns):
+                return index
+            partial = partial or index
+        return partial if partial is not None and partial.where is None else None
+
+    def unindexed_foreign_keys(self):
+        """[(table, Constraint)] of the foreign keys no index covers"""
+        missing = []
+        for table in self.tables.values():
+            for constraint in table.foreign_keys():
+                if self.covering_index(table.name, constraint.columns) is None:
+                    missing.append((table, constraint))
+        return missing
+
+    def to_dict(self):
+        return {
+            'tables': {
+                table.name: {
+                    'rls': table.rls,
+                    'rls_forced': table.rls_forced,
+                    'columns': {c.name: {'type': c.type, 'not_null': c.not_null, 'default': c.default}
+                                for c in table.columns.values()},
+                    'constraints': {c.name: {k: v for k, v in vars(c).items() if k != 'name' and v is not None}
+                                    for c in table.constraints.values()},
+                    'policies': {p.name: {k: v for k, v in vars(p).items() if k not in ('name', 'table')}
+                                 for p in table.policies.values()},
+                    'triggers': {t.name: {'timing': t.timing, 'events': t.events, 'function': t.function}
+                                 for t in table.triggers.values()},
+                }
+                for table in self.tables.values()
+            },
+            'indexes': {i.name: {k: v for k, v in vars(i).items()
+                                 if k not in ('name', 'statement') and v not in (None, False)}
+                        for i in self.indexes.values()},
+            'functions': sorted(self.functions),
+            'views': sorted(self.views),
+        }
+
+
+def _index_column(expression):
+    """Column name of an index element (`created_at DESC`), or the expression"""
+    match = re.match(rf'({IDENT})(?:\s+(?:ASC|DESC|NULLS\s+(?:FIRST|LAST)|[a-z_]+_ops))*\s*$',
+                     expression, re.IGNORECASE)
+    return name(match.group(1)) if match else ' '.join(expression.split())
+
+
+def _foreign_key(constraint_name, columns, references):
+    ref_columns = [name(c) for c in split_top(references.group(2))] if references.group(2) else ['id']
+    on_delete = _ON_DELETE.search(references.group(3) or '')
+    return Constraint(constraint_name, 'foreign', columns, name(references.group(1)), ref_columns,
+                      ' '.join(on_delete.group(1).upper().split()) if on_delete else 'NO ACTION')
+
+
+def _policy_clauses(policy, text):
+    """Fill policy from the AS/FOR/TO/USING/WITH CHECK clauses of text"""
+    permissive = re.search(r'\bAS\s+(PERMISSIVE|RESTRICTIVE)\b', text, re.IGNORECASE)
+    if permissive:
+        policy.permissive = permissive.group(1).upper() == 'PERMISSIVE'
+    command = re.search(r'\bFOR\s+(ALL|SELECT|INSERT|UPDATE|DELETE)\b', text, re.IGNORECASE)
+    if command:
+        policy.command = command.group(1).upper()
+    roles = re.search(r'\bTO\s+(.+?)(?=\s+(?:USING|WITH\s+CHECK)\b|\s*$)', text, re.IGNORECASE | re.DOTALL)
+    if roles:
+        policy.roles = [name(role) for role in split_top(roles.group(1))]
+    using = re.search(r'\bUSING\s*\(', text, re.IGNORECASE)
+    if using:
+        policy.using = ' '.join(paren_group(text, using.end() - 1)[0].split())
+    check = re.search(r'\bWITH\s+CHECK\s*\(', text, re.IGNORECASE)
+    if check:
+        policy.check = ' '.join(paren_group(text, check.end() - 1)[0].split())
+
+
+def migration_files(directory=MIGRATIONS_DIR):
+    return [os.path.join(directory, f) for f in sorted(os.listdir(directory)) if f.endswith('.sql')]
+
+
+def unsupported_query_columns(schema, queries):
+    """{(table, column, method): [(Query, Call)]} of the .eq()/.order()
+    columns that no index supports
+
+    An index supports a column when the columns before it in the index are
+    all .eq() columns of the same query: (user_id, read) serves
+    .eq('user_id', ...).eq('read', false) and .eq('mover_id', ...) followed by
+    .order('created_at') wants (mover_id, created_at). Partial indexes count
+    (their predicate usually mirrors the query's filters). Tables the model
+    does not know (views, storage) are skipped.
+    """
+    found = {}
+    for query in queries:
+        if query.table not in schema.tables:
+            continue
+        equal = [call.first_string() for call in query.find('eq')]
+        for call in query.calls:
+            if call.method not in ('eq', 'order'):
+                continue
+            column = call.first_string()
+            if column is None or '.' in column or '(' in column:
+                continue
+            supported = any(column in index.columns
+                            and set(index.columns[:index.columns.index(column)]) <= set(equal)
+                            for index in schema.table_indexes(query.table))
+            if not supported:
+                found.setdefault((query.table, column, call.method), []).append((query, call))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay supabase/migrations into a schema model and flag missing indexes')
+    parser.add_argument('--migrations-dir', default=MIGRATIONS_DIR)
+    parser.add_argument('--src-dir', default=supabase_queries.SRC_DIR)
+    parser.add_argument('--json', metavar='FILE', help='write the final schema model as JSON')
+    parser.add_argument('--verbose', action='store_true', help='list the DDL statements the model skipped')
+    args = parser.parse_args()
+
+    paths = migration_files(args.migrations_dir)
+    schema = Schema().replay(paths)
+
+    print("=" * 80)
+    print(f"SCHÉMA FINAL ({len(paths)} migrations)")
+    print("=" * 80)
+    columns = sum(len(table.columns) for table in schema.tables.values())
+    foreign_keys = sum(len(table.foreign_keys()) for table in schema.tables.values())
+    policies = sum(len(table.policies) for table in schema.tables.values())
+    triggers = sum(len(table.triggers) for table in schema.tables.values())
+    print(f"   {len(schema.tables)} tables, {columns} colonnes, {foreign_keys} clés étrangères, "
+          f"{len(schema.indexes)} index, {policies} policies, {triggers} triggers, "
+          f"{len(schema.functions)} fonctions, {len(schema.views)} vues")
+    print(f"   statements: {', '.join(f'{kind} {count}' for kind, count in sorted(schema.counts.items()))}")
+    if schema.unparsed:
+        print(f"   ⚠️  {len(schema.unparsed)} DDL non modélisé(s) (--verbose pour la liste)")
+        if args.verbose:
+            for statement in schema.unparsed:
+                print(f"      {statement.location()}: {' '.join(statement.text.split())[:100]}")
+
+    missing = schema.unindexed_foreign_keys()
+    print(f"\n🔑 Clés étrangères sans index ({len(missing)}):")
+    for table, constraint in sorted(missing, key=lambda item: (item[0].name, item[1].columns)):
+        cols = ', '.join(constraint.columns)
+        print(f"   {table.name}({cols}) → {constraint.ref_table}({', '.join(constraint.ref_columns)}) "
+              f"ON DELETE {constraint.on_delete}")
+        print(f"      CREATE INDEX IF NOT EXISTS idx_{table.name}_{'_'.join(constraint.columns)} "
+              f"ON {table.name}({cols});")
+
+    queries = list(supabase_queries.iter_queries([args.src_dir]))
+    unsupported = unsupported_query_columns(schema, queries)
+    print(f"\n🐢 Colonnes filtrées/triées sans index ({len(unsupported)}, {len(queries)} requêtes analysées):")
+    for (table, column, method), uses in sorted(unsupported.items(), key=lambda item: -len(item[1])):
+        known = '' if column in schema.tables[table].columns else ' ⚠️ colonne absente du schéma'
+        first = ', '.join(f"{emitters.display_path(query.path)}:{call.line}" for query, call in uses[:3])
+        more = f" (+{len(uses) - 3})" if len(uses) > 3 else ''
+        print(f"   {table}.{column} .{method}() x{len(uses)}{known}  {first}{more}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(schema.to_dict(), f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Schéma écrit dans {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Bulk matching of quote requests to movers, as the quote_requests triggers
+
+Three AFTER INSERT triggers on quote_requests fan a new request out to
+movers, each scanning the movers table row by row:
+
+  - detect_activity_zone_matches (20260122180858): verified, active movers
+    with email notifications, coverage_type 'all_france', or 'departments'
+    with LEFT(from/to_postal_code, 2) in activity_departments, or
+    'departments' with no departments at all (discovery mode)
+  - detect_return_trip_opportunities (20260103082613): verified movers with
+    return trip alerts and a scheduled accepted_moves row arriving in the
+    request's from_city between moving_date - 3 days and moving_date + 1 day
+  - notify_movers_with_nearby_missions (20260127225000): verified, active
+    movers with email notifications, for each upcoming mission (accepted
+    quote, request accepted / ongoing, moving_date >= today) whose arrival
+    point is within NEARBY_RADIUS_KM of the request's departure point
+
+MatchIndex answers the same questions without the scans:
+
+  - zones: eligible movers bucketed by department, plus the list of movers
+    matching everywhere; the mover list of a (from, to) department pair is
+    merged once and shared by every request of that pair
+  - return trips: scheduled arrivals per arrival city, sorted by date; a
+    request bisects its date window
+  - nearby missions: arrival points in a grid of NEARBY_RADIUS_KM cells
+    (degrees of latitude); a request only measures the missions of the
+    cells its radius can reach (3 rows, the columns of the cap's longitude
+    span), and match_batch() measures all the requests of a cell against
+    their candidates in one NumPy distance matrix
+
+Results follow the SQL to the letter, quirks included: NULL tests are
+three-valued, `array_length('{}', 1)` is NULL so a mover whose
+activity_departments is the empty default '{}' (not NULL) gets no
+discovery-mode match, arrival cities are compared case-sensitively, and
+distances use calculate_distance_km's formula (radius 6371, atan2).
+reference_matches() is the trigger loops transcribed, kept for
+check_mover_matching.py and benchmark_mover_matching.py.
+
+Input: CSV exports of movers, accepted_moves, quotes and quote_requests
+(NULL as an empty field, arrays as {75,92}); the requests to match are a
+quote_requests export (new rows of the day).
+
+NumPy is required (pip install numpy).
+
+Usage:
+    python3 mover_matching.py new_requests.csv --movers movers.csv --accepted-moves accepted_moves.csv \\
+        --quotes quotes.csv --quote-requests quote_requests.csv --output matches.csv
+"""
+
+import argparse
+import bisect
+import csv
+import datetime
+import json
+import math
+import sys
+import time
+
+import market_price
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_KM = 6371
+NEARBY_RADIUS_KM = 200
+RETURN_TRIP_DAYS_BEFORE = 3
+RETURN_TRIP_DAYS_AFTER = 1
+MISSION_STATUSES = ('accepted', 'ongoing')
+# Requests grouped per grid cell by match_batch(), and its distance matrix size (requests × candidates)
+BATCH_SIZE = 20_000
+MATRIX_CELLS = 1 << 21
+
+ZONE, RETURN_TRIP, NEARBY = 'activity_zone', 'return_trip', 'nearby_mission_opportunity'
+
+MOVER_COLUMNS = ['id', 'user_id', 'verification_status', 'is_active', 'email_notifications_enabled',
+                 'return_trip_alerts_enabled', 'coverage_type', 'activity_departments']
+ACCEPTED_MOVE_COLUMNS = ['mover_id', 'arrival_city', 'estimated_arrival_date', 'status']
+QUOTE_COLUMNS = ['mover_id', 'quote_request_id', 'status']
+REQUEST_COLUMNS = ['id', 'status', 'from_postal_code', 'to_postal_code', 'from_city', 'to_city', 'moving_date',
+                   'from_latitude', 'from_longitude', 'to_latitude', 'to_longitude']
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy est requis pour l'appariement par lot (pip install numpy)")
+
+
+def _null(value):
+    return None if value is None or value == '' else value
+
+
+def _bool(value):
+    """True / False / None (NULL) of an exported boolean"""
+    value = _null(value)
+    if value is None or isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in market_price.TRUE_VALUES
+
+
+def _float(value):
+    value = _null(value)
+    return None if value is None else float(value)
+
+
+def _day(value):
+    """Ordinal of a date / timestamp, None for NULL"""
+    value = _null(value)
+    if value is None:
+        return None
+    if isinstance(value, datetime.date):
+        return value.toordinal()
+    return datetime.date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def _array(value):
+    """Postgres text[]: None for NULL, [] for '{}'"""
+    if value is None or isinstance(value, (list, tuple)):
+        return None if value is None else list(value)
+    if value == '':
+        return None
+    return market_price.parse_services(value)
+
+
+def left(text, n):
+    """SQL LEFT(text, n), NULL-preserving"""
+    return None if text is None else text[:n]
+
+
+def sql_distance_km(lat1, lon1, lat2, lon2):
+    """calculate_distance_km(): NULL if a coordinate is NULL"""
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return None
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) * math.sin(dlat / 2)
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) * math.sin(dlon / 2))
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+class Mover:
+    def __init__(self, row):
+        self.id = row['id']
+        self.user_id = _null(row.get('user_id'))
+        self.verification_status = _null(row.get('verification_status'))
+        self.is_active = _bool(row.get('is_active'))
+        self.email_notifications_enabled = _bool(row.get('email_notifications_enabled'))
+        self.return_trip_alerts_enabled = _bool(row.get('return_trip_alerts_enabled'))
+        self.coverage_type = _null(row.get('coverage_type'))
+        self.activity_departments = _array(row.get('activity_departments'))
+
+    @property
+    def notifiable(self):
+        """verified, active and email notifications on (zone and nearby triggers)"""
+        return (self.verification_status == 'verified' and self.is_active is True
+                and self.email_notifications_enabled is True)
+
+
+class Request:
+    def __init__(self, row):
+        self.id = row.get('id')
+        self.status = _null(row.get('status'))
+        self.from_postal_code = _null(row.get('from_postal_code'))
+        self.to_postal_code = _null(row.get('to_postal_code'))
+        self.from_city = _null(row.get('from_city'))
+        self.to_city = _null(row.get('to_city'))
+        self.moving_date = _day(row.get('moving_date'))
+        self.from_latitude = _float(row.get('from_latitude'))
+        self.from_longitude = _float(row.get('from_longitude'))
+        self.to_latitude = _float(row.get('to_latitude'))
+        self.to_longitude = _float(row.get('to_longitude'))
+
+
+class AcceptedMove:
+    def __init__(self, row):
+        self.mover_id = row['mover_id']
+        self.arrival_city = _null(row.get('arrival_city'))
+        self.estimated_arrival_date = _day(row.get('estimated_arrival_date'))
+        self.status = _null(row.get('status'))
+
+
+class Snapshot:
+    """Movers, accepted moves and the quotes / quote requests that make missions"""
+
+    def __init__(self, movers=(), accepted_moves=(), quotes=(), quote_requests=()):
+        self.movers = [Mover(row) for row in movers]
+        self.accepted_moves = [AcceptedMove(row) for row in accepted_moves]
+        self.quotes = [{'mover_id': row['mover_id'], 'quote_request_id': row['quote_request_id'],
+                        'status': _null(row.get('status'))} for row in quotes]
+        self.quote_requests = {row['id']: Request(row) for row in quote_requests}
+
+    def missions(self, today):
+        """{mover id: [(request id, to latitude, to longitude)]} of the upcoming
+        missions, as the inner loop of notify_movers_with_nearby_missions"""
+        missions = {}
+        seen = set()
+        for quote in self.quotes:
+            request = self.quote_requests.get(quote['quote_request_id'])
+            if (quote['status'] != 'accepted' or request is None or request.status not in MISSION_STATUSES
+                    or request.to_latitude is None or request.to_longitude is None
+                    or request.moving_date is None or request.moving_date < today):
+                continue
+            key = (quote['mover_id'], request.id)
+            if key not in seen:
+                seen.add(key)
+                missions.setdefault(quote['mover_id'], []).append(
+                    (request.id, request.to_latitude, request.to_longitude))
+        return missions
+
+
+def read_rows(path, columns):
+    """[{column: value}] of a CSV export, restricted to columns"""
+    data = market_price.load_csv(path, columns)
+    names = list(data)
+    return [dict(zip(names, values)) for values in zip(*(data[name] for name in names))]
+
+
+def load_snapshot(movers, accepted_moves=None, quotes=None, quote_requests=None):
+    return Snapshot(read_rows(movers, MOVER_COLUMNS),
+                    read_rows(accepted_moves, ACCEPTED_MOVE_COLUMNS) if accepted_moves else (),
+                    read_rows(quotes, QUOTE_COLUMNS) if quotes else (),
+                    read_rows(quote_requests, REQUEST_COLUMNS) if quote_requests else ())
+
+
+def reference_matches(snapshot, request, today, missions=None):
+    """{kind: sorted [...]} of one request, scanning every mover as the triggers do
+    (missions: snapshot.missions(today), when already computed)"""
+    from_dept = left(request.from_postal_code, 2)
+    to_dept = left(request.to_postal_code, 2)
+    zone = []
+    for mover in snapshot.movers:
+        departments = mover.activity_departments
+        has_departments = departments is not None and len(departments) > 0  # array_length('{}') is NULL
+        discovery = departments is None  # `array_length(...) = 0` is never true
+        if mover.notifiable and (
+                mover.coverage_type == 'all_france'
+                or (mover.coverage_type == 'departments' and has_departments
+                    and ((from_dept is not None and from_dept in departments)
+                         or (to_dept is not None and to_dept in departments)))
+                or (mover.coverage_type == 'departments' and discovery)):
+            zone.append(mover.id)
+
+    return_trip = set()
+    if request.moving_date is not None and request.from_city is not None:
+        movers = {mover.id: mover for mover in snapshot.movers}
+        for move in snapshot.accepted_moves:
+            mover = movers.get(move.mover_id)
+            if (mover is not None and move.status == 'scheduled' and move.arrival_city == request.from_city
+                    and move.estimated_arrival_date is not None
+                    and request.moving_date - RETURN_TRIP_DAYS_BEFORE <= move.estimated_arrival_date
+                    <= request.moving_date + RETURN_TRIP_DAYS_AFTER
+                    and mover.return_trip_alerts_enabled is True and mover.verification_status == 'verified'):
+                return_trip.add(mover.id)
+
+    nearby = []
+    if request.from_latitude is not None and request.from_longitude is not None:
+        if missions is None:
+            missions = snapshot.missions(today)
+        for mover in snapshot.movers:
+            if not mover.notifiable:
+                continue
+            for mission_id, latitude, longitude in missions.get(mover.id, ()):
+                distance = sql_distance_km(latitude, longitude, request.from_latitude, request.from_longitude)
+                if distance is not None and distance <= NEARBY_RADIUS_KM:
+                    nearby.append((mover.id, mission_id))
+    return {ZONE: sorted(set(zone)), RETURN_TRIP: sorted(return_trip), NEARBY: sorted(set(nearby))}
+
+
+class MissionGrid:
+    """Mission arrival points in square cells of radius_km of latitude"""
+
+    def __init__(self, points, radius_km=NEARBY_RADIUS_KM):
+        """points: [(mover id, mission id, latitude, longitude)]"""
+        require_numpy()
+        self.radius_km = radius_km
+        self.step = math.degrees(radius_km / EARTH_RADIUS_KM)
+        self.columns = math.ceil(360 / self.step)
+        cells = {}
+        for point in points:
+            cells.setdefault(self.cell(point[2], point[3]), []).append(point)
+        self.cells = {}
+        for cell, members in cells.items():
+            self.cells[cell] = (
+                [(mover_id, mission_id) for mover_id, mission_id, _, _ in members],
+                np.array([latitude for _, _, latitude, _ in members], dtype=np.float64),
+                np.array([longitude for _, _, _, longitude in members], dtype=np.float64),
+            )
+
+    def __len__(self):
+        return sum(len(cell[0]) for cell in self.cells.values())
+
+    def cell(self, latitude, longitude):
+        return math.floor(latitude / self.step), math.floor((longitude + 180) / self.step) % self.columns
+
+    def neighbours(self, cell):
+        """Cells that may hold a point within radius_km of any point of cell"""
+        row, column = cell
+        # Pole-most latitude of the rows a radius can reach from this row
+        edge = max(abs((row - 1) * self.step), abs((row + 2) * self.step))
+        sin_radius = math.sin(self.radius_km / EARTH_RADIUS_KM)
+        cos_edge = math.cos(math.radians(min(edge, 90)))
+        if cos_edge <= sin_radius:
+            columns = range(self.columns)
+        else:
+            span = math.degrees(math.asin(sin_radius / cos_edge))
+            reach = math.ceil(span / self.step)
+            columns = range(self.columns) if 2 * reach + 1 >= self.columns \
+                else [(column + offset) % self.columns for offset in range(-reach, reach + 1)]
+        return [(row + dr, c) for dr in (-1, 0, 1) for c in columns if (row + dr, c) in self.cells]
+
+    def candidates(self, cell):
+        cells = [self.cells[neighbour] for neighbour in self.neighbours(cell)]
+        if not cells:
+            return [], np.zeros(0), np.zeros(0)
+        return ([key for keys, _, _ in cells for key in keys], np.concatenate([lat for _, lat, _ in cells]),
+                np.concatenate([lon for _, _, lon in cells]))
+
+
+def distance_matrix(lat1, lon1, lat2, lon2):
+    """calculate_distance_km() between column vectors 1 and row vectors 2"""
+    dlat = np.radians(lat2 - lat1)
+    dlon = np.radians(lon2 - lon1)
+    a = (np.sin(dlat / 2) * np.sin(dlat / 2)
+         + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(dlon / 2) * np.sin(dlon / 2))
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class MatchIndex:
+    def __init__(self, snapshot, today=None):
+        require_numpy()
+        self.today = today if today is not None else datetime.date.today().toordinal()
+        order = {mover.id: position for position, mover in enumerate(snapshot.movers)}
+        self.order = order
+
+        everywhere = set()
+        by_department = {}
+        for mover in snapshot.movers:
+            if not mover.notifiable:
+                continue
+            if mover.coverage_type == 'all_france' or (mover.coverage_type == 'departments'
+                                                       and mover.activity_departments is None):
+                everywhere.add(mover.id)
+            elif mover.coverage_type == 'departments':
+                for department in set(mover.activity_departments):
+                    if department is not None:
+                        by_department.setdefault(department, set()).add(mover.id)
+        self.everywhere = tuple(sorted(everywhere, key=order.__getitem__))
+        self.by_department = by_department
+        self._zones = {}
+
+        movers = {mover.id: mover for mover in snapshot.movers}
+        arrivals = {}
+        for move in snapshot.accepted_moves:
+            mover = movers.get(move.mover_id)
+            if (mover is not None and move.status == 'scheduled' and move.arrival_city is not None
+                    and move.estimated_arrival_date is not None and mover.return_trip_alerts_enabled is True
+                    and mover.verification_status == 'verified'):
+                arrivals.setdefault(move.arrival_city, []).append((move.estimated_arrival_date, mover.id))
+        self.arrivals = {city: (tuple(day for day, _ in moves), tuple(mover_id for _, mover_id in moves))
+                         for city, moves in ((city, sorted(moves)) for city, moves in arrivals.items())}
+
+        missions = snapshot.missions(self.today)
+        self.grid = MissionGrid([(mover.id, mission_id, latitude, longitude)
+                                 for mover in snapshot.movers if mover.notifiable
+                                 for mission_id, latitude, longitude in missions.get(mover.id, ())])
+
+    def zone_movers(self, from_postal_code, to_postal_code):
+        """Movers of detect_activity_zone_matches, a tuple shared by all requests of the department pair"""
+        key = (left(from_postal_code, 2), left(to_postal_code, 2))
+        movers = self._zones.get(key)
+        if movers is None:
+            matched = set()
+            for department in key:
+                if department is not None:
+                    matched |= self.by_department.get(department, set())
+            movers = self.everywhere + tuple(sorted(matched, key=self.order.__getitem__))
+            self._zones[key] = movers
+        return movers
+
+    def return_trip_movers(self, from_city, moving_date):
+        if from_city is None or moving_date is None or from_city not in self.arrivals:
+            return ()
+        days, movers = self.arrivals[from_city]
+        start = bisect.bisect_left(days, moving_date - RETURN_TRIP_DAYS_BEFORE)
+        end = bisect.bisect_right(days, moving_date + RETURN_TRIP_DAYS_AFTER)
+        return tuple(dict.fromkeys(movers[start:end]))
+
+    def nearby_missions(self, requests):
+        """{position in requests: [(mover id, mission id, distance)]} for requests
+        with a departure point, the requests of a grid cell measured together"""
+        groups = {}
+        for position, request in enumerate(requests):
+            if request.from_latitude is not None and request.from_longitude is not None:
+                groups.setdefault(self.grid.cell(request.from_latitude, request.from_longitude), []).append(position)
+        found = {}
+        for cell, positions in groups.items():
+            keys, latitudes, longitudes = self.grid.candidates(cell)
+            if not keys:
+                continue
+            step = max(1, MATRIX_CELLS // len(keys))
+            for start in range(0, len(positions), step):
+                chunk = positions[start:start + step]
+                lat = np.array([requests[i].from_latitude for i in chunk])[:, None]
+                lon = np.array([requests[i].from_longitude for i in chunk])[:, None]
+                distances = distance_matrix(latitudes[None, :], longitudes[None, :], lat, lon)
+                rows, columns = np.nonzero(distances <= NEARBY_RADIUS_KM)
+                for row, column in zip(rows.tolist(), columns.tolist()):
+                    found.setdefault(chunk[row], []).append(keys[column] + (float(distances[row, column]),))
+        return found
+
+    def match(self, request):
+        return next(self.match_batch([request]))
+
+    def match_batch(self, requests):
+        """Yield {kind: matches} per request, in order: mover ids for zones and
+        return trips, (mover id, mission id, distance) for nearby missions.
+        Requests are measured BATCH_SIZE at a time, so memory stays bounded"""
+        for start in range(0, len(requests), BATCH_SIZE):
+            batch = requests[start:start + BATCH_SIZE]
+            nearby = self.nearby_missions(batch)
+            for position, request in enumerate(batch):
+                yield {
+                    ZONE: self.zone_movers(request.from_postal_code, request.to_postal_code),
+                    RETURN_TRIP: self.return_trip_movers(request.from_city, request.moving_date),
+                    NEARBY: nearby.get(position, []),
+                }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Match quote requests to movers like the quote_requests triggers')
+    parser.add_argument('requests', help='quote_requests CSV export of the requests to match')
+    parser.add_argument('--movers', required=True, metavar='CSV')
+    parser.add_argument('--accepted-moves', metavar='CSV')
+    parser.add_argument('--quotes', metavar='CSV', help='with --quote-requests: missions of the nearby trigger')
+    parser.add_argument('--quote-requests', metavar='CSV')
+    parser.add_argument('--today', help='CURRENT_DATE of the nearby trigger (YYYY-MM-DD, default: today)')
+    parser.add_argument('--output', metavar='FILE', help='write request_id, mover_id, type, mission_id, distance_km')
+    parser.add_argument('--json', metavar='FILE', help='write the counts as JSON')
+    args = parser.parse_args()
+
+    try:
+        require_numpy()
+        today = _day(args.today) if args.today else None
+        started = time.perf_counter()
+        snapshot = load_snapshot(args.movers, args.accepted_moves, args.quotes, args.quote_requests)
+        requests = [Request(row) for row in read_rows(args.requests, REQUEST_COLUMNS)]
+        loaded = time.perf_counter()
+        index = MatchIndex(snapshot, today)
+        built = time.perf_counter()
+    except (OSError, RuntimeError, ValueError, KeyError) as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
+    counts = {ZONE: 0, RETURN_TRIP: 0, NEARBY: 0}
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else None
+    writer = csv.writer(output, lineterminator='\n') if output else None
+    if writer:
+        writer.writerow(['request_id', 'mover_id', 'notification_type', 'mission_id', 'distance_km'])
+    for request, match in zip(requests, index.match_batch(requests)):
+        for kind in counts:
+            counts[kind] += len(match[kind])
+        if writer:
+            for mover_id in match[ZONE]:
+                writer.writerow([request.id, mover_id, ZONE, '', ''])
+            for mover_id in match[RETURN_TRIP]:
+                writer.writerow([request.id, mover_id, RETURN_TRIP, '', ''])
+            for mover_id, mission_id, distance in match[NEARBY]:
+                writer.writerow([request.id, mover_id, NEARBY, mission_id, round(distance, 1)])
+    if output:
+        output.close()
+    matched = time.perf_counter()
+
+    print("=" * 80)
+    print(f"APPARIEMENT: {len(requests)} demandes × {len(snapshot.movers)} déménageurs "
+          f"({len(index.grid)} missions à venir, {sum(len(days) for days, _ in index.arrivals.values())} retours)")
+    print("=" * 80)
+    print(f"   lecture {loaded - started:.2f}s, index {built - loaded:.3f}s, appariement {matched - built:.3f}s "
+          f"({len(requests) / max(matched - built, 1e-9):,.0f} demandes/s)")
+    print(f"   zones d'activité      : {counts[ZONE]:>10} notifications "
+          f"({len(index.everywhere)} déménageurs reçoivent tout)")
+    print(f"   trajets retour        : {counts[RETURN_TRIP]:>10}")
+    print(f"   {f'missions à ≤ {NEARBY_RADIUS_KM} km':22}: {counts[NEARBY]:>10}")
+    without_coordinates = sum(1 for request in requests if request.from_latitude is None)
+    if without_coordinates:
+        print(f"   ⚠️  {without_coordinates} demandes sans from_latitude/from_longitude (pas de missions proches)")
+
+    if args.output:
+        print(f"\n📝 {args.output}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'requests': len(requests), 'movers': len(snapshot.movers),
+                       'seconds': round(matched - built, 4), **counts}, f, indent=2)
+        print(f"📝 Rapport: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
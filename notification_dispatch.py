@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the notification_queue dispatcher, on a SQLite stand-in
+
+process-notification-queue selects `.limit(50)` unsent rows (no order, joined
+movers and quote_requests), then for each one: an accepted_moves query for
+return trips, a POST to send-notification, an UPDATE sent = true. Sends are
+sequential, rows it cannot send (new_quote notifications, return trips
+without a single scheduled move, movers without an email) stay unsent at the
+head of the next batch, failures are retried on the next call without delay,
+and two overlapping invocations send the same rows twice.
+
+This harness:
+
+  - replays supabase/migrations/ (migration_replay.Schema) and creates
+    notification_queue, movers, quote_requests and accepted_moves in a
+    SQLite file with the replayed columns (plus any column the function
+    reads that the migrations lack, reported), seeded with --backlog
+    pending notifications; --rate adds new ones for --duration seconds
+  - MailSink stands in for send-notification: log-normal latency around
+    --latency-ms, --failure-rate 5xx errors and --timeout-rate sends that
+    are delivered but whose answer is lost. It counts every delivery, so
+    double sends show
+  - legacy_drain() runs the function's algorithm as is, with
+    --legacy-workers overlapping invocations
+  - Dispatcher is the reference batched dispatcher: --workers threads, each
+    claiming --batch-size rows with a lease (claimed_by, claim token,
+    lease_until: a row is claimable when unsent, not dead, past its
+    next_attempt_at and unleased or its lease expired), loading their movers,
+    requests and return-trip moves in 3 queries, and sending them with at
+    most --concurrency requests in flight. Failures set next_attempt_at with
+    exponential backoff and jitter, up to --max-attempts, then the row is
+    dead-lettered (failed) with its error, like unsendable rows; a worker
+    whose lease expired does not reschedule a row another worker holds now
+    (claim token). Sends carry the notification id as idempotency key, so a
+    retry after a lost answer or an expired lease does not deliver twice
+
+Each configuration of --batch-sizes × --concurrency is drained from the same
+seed; reported: notifications/s, end-to-end latency percentiles (created_at
+to sent_at), sink calls, double deliveries, retries and dead letters.
+
+The lease columns are the proposal for the real table (LEASE_COLUMNS); in
+Postgres the claim is the same UPDATE ... WHERE id IN (SELECT ... FOR UPDATE
+SKIP LOCKED LIMIT n) RETURNING.
+
+Usage:
+    python3 notification_dispatch.py
+    python3 notification_dispatch.py --backlog 5000 --batch-sizes 50,200 --concurrency 8,32 --workers 2
+    python3 notification_dispatch.py --backlog 0 --rate 200 --duration 20 --json dispatch.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import migration_replay
+
+TABLES = ('movers', 'quote_requests', 'accepted_moves', 'notification_queue')
+# Columns read by process-notification-queue
+FUNCTION_COLUMNS = {
+    'notification_queue': ['id', 'mover_id', 'quote_request_id', 'notification_type', 'sent', 'sent_at', 'created_at'],
+    'movers': ['id', 'company_name', 'contact_email'],
+    'quote_requests': ['id', 'from_city', 'from_postal_code', 'to_city', 'to_postal_code', 'moving_date', 'home_size',
+                       'volume_m3', 'surface_m2', 'services_needed'],
+    'accepted_moves': ['id', 'mover_id', 'arrival_city', 'estimated_arrival_date', 'status'],
+}
+LEASE_COLUMNS = [('attempts', 'INTEGER NOT NULL DEFAULT 0'), ('next_attempt_at', 'REAL'), ('claimed_by', 'TEXT'),
+                 ('claim_token', 'TEXT'), ('lease_until', 'REAL'), ('failed', 'INTEGER NOT NULL DEFAULT 0'),
+                 ('last_error', 'TEXT')]
+STANDIN_INDEXES = [
+    'CREATE INDEX notification_queue_claimable ON notification_queue(sent, failed, created_at)',
+    'CREATE INDEX accepted_moves_return_trip ON accepted_moves(mover_id, arrival_city, status)',
+]
+LEGACY_LIMIT = 50
+# Legacy invocations in a row that send nothing before the queue counts as stuck
+STALLED_INVOCATIONS = 5
+POLL_INTERVAL = 0.02
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))]
+
+
+def sqlite_type(pg_type):
+    pg_type = pg_type.lower()
+    if pg_type.startswith(('int', 'bigint', 'smallint', 'serial')) or pg_type == 'boolean':
+        return 'INTEGER'
+    if pg_type.startswith(('numeric', 'decimal', 'real', 'double', 'float')):
+        return 'REAL'
+    return 'TEXT'
+
+
+def replayed_tables(migrations_dir=migration_replay.MIGRATIONS_DIR):
+    schema = migration_replay.Schema()
+    schema.replay(migration_replay.migration_files(migrations_dir))
+    return {table: schema.tables.get(table) for table in TABLES}
+
+
+def create_standin(path, tables):
+    """SQLite file with the replayed tables; returns the columns the
+    function reads that the replayed schema does not have"""
+    missing = []
+    connection = connect(path)
+    for table_name in TABLES:
+        table = tables.get(table_name)
+        columns = {column.name: sqlite_type(column.type) for column in table.columns.values()} if table else {}
+        for column in FUNCTION_COLUMNS[table_name]:
+            if column not in columns:
+                missing.append(f'{table_name}.{column}')
+                columns[column] = 'TEXT'
+        definitions = [f'"{column}" {kind}' + (' PRIMARY KEY' if column == 'id' else '')
+                       for column, kind in columns.items()]
+        if table_name == 'notification_queue':
+            definitions += [f'{column} {kind}' for column, kind in LEASE_COLUMNS if column not in columns]
+        connection.execute(f'CREATE TABLE {table_name} ({", ".join(definitions)})')
+    for statement in STANDIN_INDEXES:
+        connection.execute(statement)
+    connection.close()
+    return missing
+
+
+def connect(path):
+    connection = sqlite3.connect(path, isolation_level=None, timeout=30, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    return connection
+
+
+CITIES = ['Paris', 'Lyon', 'Marseille', 'Lille', 'Bordeaux', 'Nantes', 'Toulouse', 'Nice', 'Rennes', 'Strasbourg']
+
+
+class Seeder:
+    """Movers, quote requests, return-trip moves and notifications of a run"""
+
+    def __init__(self, path, seed, movers=500, requests=2000):
+        self.path = path
+        self.rng = random.Random(seed)
+        self.movers = [f'mover-{n}' for n in range(movers)]
+        self.requests = [f'request-{n}' for n in range(requests)]
+        self.count = 0
+        rng = self.rng
+        connection = connect(path)
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO movers (id, company_name, contact_email) VALUES (?, ?, ?)',
+            [(mover, f'Déménagements {n}', None if rng.random() < 0.02 else f'contact{n}@demenageur.fr')
+             for n, mover in enumerate(self.movers)])
+        cities = {}
+        rows = []
+        for request in self.requests:
+            cities[request] = rng.choice(CITIES)
+            rows.append((request, cities[request], f'{rng.randint(1, 95):02d}000', rng.choice(CITIES), '75011',
+                         f'2026-0{rng.randint(3, 9)}-1{rng.randint(0, 9)}', rng.choice(['T2', 'T3', 'Maison']),
+                         rng.choice([None, 30, 45]), rng.choice([None, 60]), '{packing}'))
+        connection.executemany(
+            'INSERT INTO quote_requests (id, from_city, from_postal_code, to_city, to_postal_code, moving_date, '
+            'home_size, volume_m3, surface_m2, services_needed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        connection.executemany(
+            'INSERT INTO accepted_moves (id, mover_id, arrival_city, estimated_arrival_date, status) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(f'move-{n}', rng.choice(self.movers), rng.choice(CITIES), '2026-03-15',
+              rng.choice(['scheduled', 'scheduled', 'completed'])) for n in range(movers)])
+        connection.execute('COMMIT')
+        connection.close()
+
+    def rows(self, count, now):
+        rng = self.rng
+        rows = []
+        for _ in range(count):
+            kind = rng.choices(['activity_zone', 'return_trip', 'new_quote'], [80, 15, 5])[0]
+            rows.append((f'notification-{self.count}', rng.choice(self.movers), rng.choice(self.requests), kind,
+                         0, now))
+            self.count += 1
+        return rows
+
+    def insert(self, connection, count):
+        connection.executemany(
+            'INSERT INTO notification_queue (id, mover_id, quote_request_id, notification_type, sent, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)', self.rows(count, time.time()))
+
+
+class SinkError(Exception):
+    pass
+
+
+class MailSink:
+    """send-notification stand-in: latency, errors, lost answers and a delivery log"""
+
+    def __init__(self, latency_ms, failure_rate=0.0, timeout_rate=0.0, seed=0):
+        self.median = latency_ms / 1000
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.deliveries = {}  # notification id -> times delivered
+        self.suppressed = 0   # sends deduplicated by their idempotency key
+
+    async def send(self, notification_id, email_type, recipient, data, idempotency_key=None):
+        with self.lock:
+            self.calls += 1
+            delay = self.median * math.exp(self.rng.gauss(0, 0.5))
+            draw = self.rng.random()
+        await asyncio.sleep(delay)
+        with self.lock:
+            if draw < self.failure_rate:
+                self.errors += 1
+                raise SinkError('send-notification: 500')
+            if idempotency_key is not None and idempotency_key in self.deliveries:
+                self.suppressed += 1
+            else:
+                key = idempotency_key or notification_id
+                self.deliveries[key] = self.deliveries.get(key, 0) + 1
+            if draw < self.failure_rate + self.timeout_rate:
+                self.errors += 1
+                raise SinkError('send-notification: timeout')
+
+    @property
+    def double_deliveries(self):
+        return sum(count - 1 for count in self.deliveries.values() if count > 1)
+
+
+def email_for(row, move):
+    """(emailType, data) of a notification as process-notification-queue builds
+    it, or (None, reason) when it sends nothing"""
+    if not row['contact_email']:
+        return None, 'déménageur sans email'
+    if row['notification_type'] == 'return_trip':
+        if move is None:
+            return None, 'trajet retour sans déménagement prévu unique'
+        return 'return_trip_opportunity', {
+            'yourArrivalCity': move['arrival_city'], 'yourArrivalDate': move['estimated_arrival_date'],
+            'newDepartureCity': row['from_city'], 'newDeparturePostalCode': row['from_postal_code'],
+            'newArrivalCity': row['to_city'], 'newArrivalPostalCode': row['to_postal_code'],
+            'newMovingDate': row['moving_date'], 'homeSize': row['home_size'], 'volumeM3': row['volume_m3'],
+        }
+    if row['notification_type'] == 'activity_zone':
+        return 'activity_zone_new_quote', {
+            'fromCity': row['from_city'], 'fromPostalCode': row['from_postal_code'], 'toCity': row['to_city'],
+            'toPostalCode': row['to_postal_code'], 'movingDate': row['moving_date'], 'homeSize': row['home_size'],
+            'volumeM3': row['volume_m3'], 'surfaceM2': row['surface_m2'], 'servicesNeeded': row['services_needed'],
+        }
+    return None, f"type {row['notification_type']} sans modèle d'email"
+
+
+_JOINED = '''SELECT n.id, n.mover_id, n.quote_request_id, n.notification_type, m.contact_email,
+                    q.from_city, q.from_postal_code, q.to_city, q.to_postal_code, q.moving_date, q.home_size,
+                    q.volume_m3, q.surface_m2, q.services_needed
+             FROM notification_queue n
+             LEFT JOIN movers m ON m.id = n.mover_id
+             LEFT JOIN quote_requests q ON q.id = n.quote_request_id'''
+_FIELDS = ['id', 'mover_id', 'quote_request_id', 'notification_type', 'contact_email', 'from_city',
+           'from_postal_code', 'to_city', 'to_postal_code', 'moving_date', 'home_size', 'volume_m3', 'surface_m2',
+           'services_needed']
+
+
+def legacy_drain(path, sink, done, time_limit):
+    """process-notification-queue invoked back to back until the queue is
+    empty, stuck (a full batch of rows it cannot send) or time_limit runs
+    out; returns (invocations, stuck rows)"""
+    connection = connect(path)
+    invocations = 0
+    started = time.monotonic()
+
+    async def invocation():
+        rows = [dict(zip(_FIELDS, row)) for row in
+                connection.execute(f'{_JOINED} WHERE n.sent = 0 LIMIT {LEGACY_LIMIT}')]
+        sent = 0
+        for row in rows:
+            move = None
+            if row['notification_type'] == 'return_trip':
+                moves = connection.execute(
+                    'SELECT arrival_city, estimated_arrival_date FROM accepted_moves '
+                    "WHERE mover_id = ? AND arrival_city = ? AND status = 'scheduled'",
+                    (row['mover_id'], row['from_city'])).fetchall()
+                # .maybeSingle(): no row or several rows give no data
+                move = dict(zip(['arrival_city', 'estimated_arrival_date'], moves[0])) if len(moves) == 1 else None
+            email_type, data = email_for(row, move)
+            if email_type is None:
+                continue
+            try:
+                await sink.send(row['id'], email_type, row['contact_email'], data)
+            except SinkError:
+                continue
+            connection.execute('UPDATE notification_queue SET sent = 1, sent_at = ? WHERE id = ?',
+                               (time.time(), row['id']))
+            sent += 1
+        return len(rows), sent
+
+    stuck = idle = 0
+    while time.monotonic() - started < time_limit:
+        fetched, sent = asyncio.run(invocation())
+        invocations += 1
+        if fetched == 0:
+            if done():
+                break
+            time.sleep(POLL_INTERVAL)
+        idle = idle + 1 if fetched and not sent else 0
+        if idle >= STALLED_INVOCATIONS and done():
+            stuck = fetched
+            break
+    connection.close()
+    return invocations, stuck
+
+
+class Dispatcher:
+    """Reference dispatcher: leased batch claims, bounded concurrent sends, backoff"""
+
+    def __init__(self, path, sink, batch_size=50, concurrency=8, lease_seconds=30, max_attempts=5,
+                 backoff_base=1.0, backoff_cap=60.0, seed=0):
+        self.connection = connect(path)
+        self.sink = sink
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.worker = f'worker-{uuid.uuid4().hex[:8]}'
+        self.rng = random.Random(seed)
+        self.claims = 0
+        self.retries = 0
+        self.dead = 0
+        self.lease_lost = 0
+
+    def claim(self):
+        """Lease up to batch_size claimable rows; returns (token, joined rows)"""
+        now = time.time()
+        token = uuid.uuid4().hex
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            ids = [row[0] for row in connection.execute(
+                '''UPDATE notification_queue SET claimed_by = ?, claim_token = ?, lease_until = ?
+                   WHERE id IN (SELECT id FROM notification_queue
+                                WHERE sent = 0 AND failed = 0
+                                  AND (next_attempt_at IS NULL OR next_attempt_at <= ?)
+                                  AND (lease_until IS NULL OR lease_until < ?)
+                                ORDER BY created_at LIMIT ?)
+                   RETURNING id''',
+                (self.worker, token, now + self.lease_seconds, now, now, self.batch_size))]
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        if not ids:
+            return token, []
+        self.claims += 1
+        marks = ','.join('?' * len(ids))
+        rows = [dict(zip(_FIELDS, row)) for row in
+                connection.execute(f'{_JOINED} WHERE n.id IN ({marks}) ORDER BY n.created_at', ids)]
+        trips = {(row['mover_id'], row['from_city']) for row in rows if row['notification_type'] == 'return_trip'}
+        moves = {}
+        if trips:
+            movers = sorted({mover for mover, _ in trips})
+            for mover_id, city, day in connection.execute(
+                    f'''SELECT mover_id, arrival_city, estimated_arrival_date FROM accepted_moves
+                        WHERE status = 'scheduled' AND mover_id IN ({','.join('?' * len(movers))})
+                        ORDER BY estimated_arrival_date''', movers):
+                moves.setdefault((mover_id, city), {'arrival_city': city, 'estimated_arrival_date': day})
+        for row in rows:
+            row['move'] = moves.get((row['mover_id'], row['from_city']))
+        return token, rows
+
+    def pending(self):
+        return self.connection.execute(
+            'SELECT EXISTS (SELECT 1 FROM notification_queue WHERE sent = 0 AND failed = 0)').fetchone()[0]
+
+    def backoff(self, attempts):
+        delay = min(self.backoff_cap, self.backoff_base * 2 ** (attempts - 1))
+        return delay * self.rng.uniform(0.5, 1.0)
+
+    async def _send(self, semaphore, row):
+        email_type, data = email_for(row, row['move'])
+        if email_type is None:
+            return row['id'], 'dead', data
+        async with semaphore:
+            try:
+                await self.sink.send(row['id'], email_type, row['contact_email'], data, idempotency_key=row['id'])
+            except SinkError as exc:
+                return row['id'], 'retry', str(exc)
+        return row['id'], 'sent', None
+
+    def complete(self, token, results):
+        now = time.time()
+        ids = [row_id for row_id, _, _ in results]
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        held = {row[0] for row in connection.execute(
+            f'SELECT id FROM notification_queue WHERE claim_token = ? AND id IN ({",".join("?" * len(ids))})',
+            [token] + ids)}
+        self.lease_lost += len(ids) - len(held)
+        # Deliveries and unsendable rows are final whoever holds the lease now;
+        # only retries, which reschedule the row, are fenced by the claim token
+        connection.executemany(
+            '''UPDATE notification_queue SET sent = 1, sent_at = ?, claimed_by = NULL, claim_token = NULL,
+                                           lease_until = NULL
+               WHERE id = ? AND sent = 0''',
+            [(now, row_id) for row_id, status, _ in results if status == 'sent'])
+        self.dead += connection.executemany(
+            '''UPDATE notification_queue SET failed = 1, last_error = ?, claimed_by = NULL, claim_token = NULL,
+                                           lease_until = NULL
+               WHERE id = ? AND sent = 0 AND failed = 0''',
+            [(error, row_id) for row_id, status, error in results if status == 'dead']).rowcount
+        for row_id, status, error in results:
+            if status != 'retry':
+                continue
+            attempts = connection.execute('SELECT attempts FROM notification_queue WHERE id = ? AND claim_token = ?',
+                                          (row_id, token)).fetchone()
+            if attempts is None:
+                continue
+            attempts = attempts[0] + 1
+            if attempts >= self.max_attempts:
+                connection.execute(
+                    '''UPDATE notification_queue SET attempts = ?, failed = 1, last_error = ?, claimed_by = NULL,
+                                                   claim_token = NULL, lease_until = NULL WHERE id = ?''',
+                    (attempts, error, row_id))
+                self.dead += 1
+            else:
+                connection.execute(
+                    '''UPDATE notification_queue SET attempts = ?, next_attempt_at = ?, last_error = ?,
+                                                   claimed_by = NULL, claim_token = NULL, lease_until = NULL
+                       WHERE id = ?''', (attempts, now + self.backoff(attempts), error, row_id))
+                self.retries += 1
+        connection.execute('COMMIT')
+
+    async def run(self, done):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        while True:
+            token, rows = self.claim()
+            if not rows:
+                if done() and not self.pending():
+                    break
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+            results = await asyncio.gather(*(self._send(semaphore, row) for row in rows))
+            self.complete(token, results)
+        self.connection.close()
+
+
+def run_load(tables, args, mode, batch_size=None, concurrency=None):
+    """Seed a fresh stand-in, drain it with mode ('legacy' or 'batched'); returns the metrics"""
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'queue.db')
+        missing = create_standin(path, tables)
+        seeder = Seeder(path, args.seed)
+        connection = connect(path)
+        seeder.insert(connection, args.backlog)
+        sink = MailSink(args.latency_ms, args.failure_rate, args.timeout_rate, args.seed)
+        producing = threading.Event()
+        if args.rate:
+            producing.set()
+
+        def produce():
+            period = 0.05
+            ends = time.monotonic() + args.duration
+            producer = connect(path)
+            carry = 0.0
+            while time.monotonic() < ends:
+                carry += args.rate * period
+                producer.execute('BEGIN IMMEDIATE')
+                seeder.insert(producer, int(carry))
+                producer.execute('COMMIT')
+                carry -= int(carry)
+                time.sleep(period)
+            producer.close()
+            producing.clear()
+
+        def done():
+            return not producing.is_set()
+
+        dispatchers = []
+        stuck = [0]
+        invocations = [0]
+        threads = []
+        started = time.monotonic()
+        if args.rate:
+            threads.append(threading.Thread(target=produce))
+        if mode == 'legacy':
+            def legacy():
+                calls, blocked = legacy_drain(path, sink, done, args.legacy_time_limit)
+                invocations[0] += calls
+                stuck[0] = max(stuck[0], blocked)
+            threads += [threading.Thread(target=legacy) for _ in range(args.legacy_workers)]
+        else:
+            for worker in range(args.workers):
+                dispatcher = Dispatcher(path, sink, batch_size, concurrency, args.lease_seconds, args.max_attempts,
+                                        args.backoff_base, args.backoff_cap, seed=args.seed + worker)
+                dispatchers.append(dispatcher)
+                threads.append(threading.Thread(target=asyncio.run, args=(dispatcher.run(done),)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.monotonic() - started
+
+        total, sent, dead = connection.execute(
+            'SELECT count(*), sum(sent), sum(failed) FROM notification_queue').fetchone()
+        latencies = sorted(row[0] for row in connection.execute(
+            'SELECT sent_at - created_at FROM notification_queue WHERE sent = 1'))
+        connection.close()
+    return {
+        'mode': mode, 'batch_size': batch_size, 'concurrency': concurrency,
+        'workers': args.legacy_workers if mode == 'legacy' else args.workers,
+        'notifications': total, 'sent': sent or 0, 'dead_letters': dead or 0, 'left': total - (sent or 0) - (dead or 0),
+        'stuck': stuck[0], 'seconds': round(seconds, 3), 'per_second': round((sent or 0) / max(seconds, 1e-9), 1),
+        'latency_s': {name: round(percentile(latencies, q), 3)
+                      for name, q in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))},
+        'sink_calls': sink.calls, 'sink_errors': sink.errors, 'double_deliveries': sink.double_deliveries,
+        'suppressed_duplicates': sink.suppressed,
+        'retries': sum(dispatcher.retries for dispatcher in dispatchers),
+        'claims': sum(dispatcher.claims for dispatcher in dispatchers) or invocations[0],
+        'lease_lost': sum(dispatcher.lease_lost for dispatcher in dispatchers),
+        'missing_columns': missing,
+    }
+
+
+def _integers(text):
+    return [int(value) for value in text.split(',') if value.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test notification_queue dispatchers on a SQLite stand-in')
+    parser.add_argument('--backlog', type=int, default=2000, help='pending notifications at start')
+    parser.add_argument('--rate', type=float, default=0, help='new notifications per second while --duration runs')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--latency-ms', type=float, default=20, help='median send-notification latency')
+    parser.add_argument('--failure-rate', type=float, default=0.02)
+    parser.add_argument('--timeout-rate', type=float, default=0.01, help='delivered sends whose answer is lost')
+    parser.add_argument('--batch-sizes', default='10,50,200')
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--workers', type=int, default=2, help='parallel dispatcher workers')
+    parser.add_argument('--lease-seconds', type=float, default=30)
+    parser.add_argument('--max-attempts', type=int, default=5)
+    parser.add_argument('--backoff-base', type=float, default=0.2, help='seconds before the first retry')
+    parser.add_argument('--backoff-cap', type=float, default=5)
+    parser.add_argument('--legacy-workers', type=int, default=2, help='overlapping legacy invocations')
+    parser.add_argument('--legacy-time-limit', type=float, default=20)
+    parser.add_argument('--no-legacy', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', metavar='FILE', help='write every run as JSON')
+    args = parser.parse_args()
+
+    try:
+        batch_sizes, concurrencies = _integers(args.batch_sizes), _integers(args.concurrency)
+        tables = replayed_tables()
+    except (OSError, ValueError) as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    if not tables['notification_queue']:
+        print("❌ notification_queue introuvable dans supabase/migrations/")
+        sys.exit(1)
+
+    print("=" * 80)
+    print(f"FILE DE NOTIFICATIONS: {args.backlog} en attente"
+          + (f" + {args.rate:g}/s pendant {args.duration:g}s" if args.rate else '')
+          + f", envoi {args.latency_ms:g} ms, {args.failure_rate:.0%} erreurs, {args.timeout_rate:.0%} réponses perdues")
+    print("=" * 80)
+    runs = []
+    if not args.no_legacy:
+        runs.append(run_load(tables, args, 'legacy'))
+    for batch_size in batch_sizes:
+        for concurrency in concurrencies:
+            runs.append(run_load(tables, args, 'batched', batch_size, concurrency))
+    if runs[0]['missing_columns']:
+        print(f"⚠️  colonnes lues par process-notification-queue absentes des migrations (ajoutées au stand-in): "
+              f"{', '.join(runs[0]['missing_columns'])}")
+
+    print(f"\n{'mode':<22} {'envoyés':>8} {'/s':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'appels':>7} "
+          f"{'doublons':>8} {'retries':>7} {'morts':>6} {'restants':>8}")
+    for run in runs:
+        label = (f"legacy ×{run['workers']}" if run['mode'] == 'legacy'
+                 else f"batch {run['batch_size']} / {run['concurrency']} ×{run['workers']}")
+        latency = run['latency_s']
+        print(f"{label:<22} {run['sent']:>8} {run['per_second']:>8.1f} {latency['p50']:>7.2f} {latency['p95']:>7.2f} "
+              f"{latency['p99']:>7.2f} {run['sink_calls']:>7} {run['double_deliveries']:>8} {run['retries']:>7} "
+              f"{run['dead_letters']:>6} {run['left']:>8}")
+    legacy = next((run for run in runs if run['mode'] == 'legacy'), None)
+    if legacy and legacy['stuck']:
+        print(f"\n⚠️  legacy bloqué: {legacy['stuck']} notifications jamais envoyables en tête de file "
+              f"(.limit({LEGACY_LIMIT}) sans ordre ni état d'échec)")
+    batched = [run for run in runs if run['mode'] == 'batched']
+    if batched:
+        best = max(batched, key=lambda run: run['per_second'])
+        print(f"\n🏁 meilleur débit: batch {best['batch_size']}, concurrence {best['concurrency']}, "
+              f"{best['workers']} worker(s): {best['per_second']:.0f} notifications/s, p95 {best['latency_s']['p95']:.2f}s")
+    doubled = [run for run in batched if run['double_deliveries']]
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(runs, f, indent=2)
+        print(f"📝 Rapport: {args.json}")
+    if doubled:
+        print(f"❌ {len(doubled)} configuration(s) du dispatcher avec des envois en double")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Persistent incremental cache for the page checks
+
+Per-file results of the cacheable rules (verify_navigation,
+check_navigate_declaration, ...) are stored in .page_cache.json, keyed by
+file path and validated with size + mtime, then with a content hash when the
+stat changed. Each result carries the version of the rule that produced it,
+so bumping a rule's `version` only invalidates that rule's entries.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+CACHE_FORMAT = 1
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.page_cache.json')
+
+# Files modified this close to a save may change again within the same mtime
+# tick without a size change, so their stat is not trusted on the next run.
+RACY_WINDOW_NS = 2 * 10**9
+
+
+def content_hash(content):
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class PageCache:
+    """On-disk map of file path -> stat, content hash and per-rule results"""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') == CACHE_FORMAT:
+                self.entries = data['files']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def lookup(self, filepath, st, rules, digest=None):
+        """Return {rule name: result} for the rules still valid for filepath
+
+        Without digest the entry is trusted only if size and mtime match;
+        with digest it is trusted if the content hash matches, and its stat
+        key is refreshed.
+        """
+        entry = self.entries.get(filepath)
+        if entry is None:
+            return {}
+
+        if digest is None:
+            if entry['size'] != st.st_size or entry['mtime_ns'] != st.st_mtime_ns:
+                return {}
+        else:
+            if entry['hash'] != digest:
+                return {}
+            if entry['size'] != st.st_size or entry['mtime_ns'] != st.st_mtime_ns:
+                entry['size'] = st.st_size
+                entry['mtime_ns'] = st.st_mtime_ns
+                self.dirty = True
+
+        cached = {}
+        for rule in rules:
+            stored = entry['rules'].get(rule.name)
+            if rule.cacheable and stored is not None and stored['version'] == rule.version:
+                cached[rule.name] = stored['result']
+        return cached
+
+    def store(self, filepath, st, digest, rule_results):
+        """Record results ({rule: result}) computed on the content hashing to digest"""
+        entry = self.entries.get(filepath)
+        if entry is None or entry['hash'] != digest:
+            entry = {'rules': {}}
+            self.entries[filepath] = entry
+        entry['size'] = st.st_size
+        entry['mtime_ns'] = st.st_mtime_ns
+        entry['hash'] = digest
+        for rule, result in rule_results.items():
+            entry['rules'][rule.name] = {'version': rule.version, 'result': result}
+        self.dirty = True
+
+    def prune(self, directory, seen):
+        """Forget the files of directory that were not seen in the last pass"""
+        prefix = os.path.join(directory, '')
+        for filepath in [p for p in self.entries if p.startswith(prefix) and p not in seen]:
+            del self.entries[filepath]
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        racy_after = time.time_ns() - RACY_WINDOW_NS
+        for entry in self.entries.values():
+            if entry['mtime_ns'] is not None and entry['mtime_ns'] >= racy_after:
+                entry['mtime_ns'] = None
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': CACHE_FORMAT, 'files': self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Single-pass engine shared by the page scripts
+
+Each page script (verify_navigation.py, check_navigate_declaration.py,
+add_logo_correctly.py, add_back_buttons_where_needed.py,
+fix_navigate_placement.py) exposes its logic as a rule. The engine reads every
+page of src/pages/ once, runs all registered rules on it in order and writes
+the file back at most once, instead of every script re-reading and re-scanning
+the whole tree on its own.
+
+Usage:
+    python3 page_engine.py                      # all rules, pre-deploy order
+    python3 page_engine.py --rules verify_navigation,check_navigate_declaration
+    python3 page_engine.py --rules check_navigate_declaration --root src/pages --root src/components
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+import edit_plan
+import emitters
+import page_cache
+import profiler
+import tree_walk
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGES_DIR = os.path.join(PROJECT_DIR, 'src', 'pages')
+
+# Pre-deploy order: codemods first, then the checks on the fixed content
+RULE_MODULES = [
+    'fix_navigate_placement',
+    'add_logo_correctly',
+    'add_back_buttons_where_needed',
+    'check_navigate_declaration',
+    'verify_navigation',
+]
+
+
+class Page:
+    """A page loaded once and shared by every rule of the pass"""
+
+    def __init__(self, path, content):
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.original = content
+        self.content = content
+
+    @property
+    def changed(self):
+        return self.content != self.original
+
+    def apply(self, edits):
+        """Apply a rule's non-overlapping edit_plan edits to the current content"""
+        self.content = edit_plan.apply_edits(self.content, edits)
+
+
+class Rule:
+    """Base class for a check or a fix run by the engine
+
+    `process` receives the Page and may edit it with `page.apply(edits)`; whatever it
+    returns is collected as the per-file result and handed to `report` once
+    the whole tree has been processed.
+
+    `findings` turns a result into (level, message) pairs ('note', 'warning'
+    or 'error') for the machine-readable output formats.
+
+    Read-only checks whose result depends only on the file content set
+    `cacheable`; their JSON results are reused by page_cache until the file
+    or the rule `version` changes.
+    """
+
+    name = None
+    description = None
+    version = 1
+    cacheable = False
+
+    def applies_to(self, filename):
+        return True
+
+    def process(self, page):
+        raise NotImplementedError
+
+    def report(self, results):
+        """Print the summary; results is a list of (filename, result)"""
+
+    def status(self, filename, result):
+        """One-line status of a page, printed by watch mode when it changes"""
+        return None
+
+    def findings(self, filename, result):
+        """[(level, message)] of a page for the jsonl/sarif outputs"""
+        return []
+
+
+def list_pages(pages_dir=PAGES_DIR):
+    """Return the .tsx names of pages_dir (and its subdirectories), in name order"""
+    return [name for name, _ in tree_walk.walk([pages_dir])]
+
+
+def load_rules(names=None):
+    """Import the rule modules and return their RULE objects"""
+    return [importlib.import_module(name).RULE for name in (names or RULE_MODULES)]
+
+
+def iter_results(rules, roots=PAGES_DIR, cache=None, dry_run=False, out=None,
+                 include=None, exclude=None, gitignore=True):
+    """Run all rules over the files of roots in a single pass, one page at a time
+
+    roots is a directory or a list of directories, walked recursively by
+    tree_walk with the include/exclude globs. Yields (name, filepath,
+    {rule name: result}) as soon as each page is done, in rule order.
+    With a PageCache, files whose cached results are still valid for every
+    active rule are not read at all (the DirEntry stat data is enough), and
+    only stale rules are re-run. Changed pages are written once, atomically;
+    with dry_run their unified diff is printed to out (stdout) instead.
+    """
+    roots = [roots] if isinstance(roots, str) else roots
+    seen = set()
+
+    for name, entry in tree_walk.walk(roots, include, exclude, gitignore):
+        active = [rule for rule in rules if rule.applies_to(entry.name)]
+        if not active:
+            continue
+
+        filepath = entry.path
+        file_results = {}
+
+        if cache is not None:
+            seen.add(filepath)
+            st = entry.stat()
+            file_results = cache.lookup(filepath, st, active)
+            if len(file_results) == len(active):
+                yield name, filepath, {rule.name: file_results[rule.name] for rule in active}
+                continue
+
+        page = Page(filepath, edit_plan.read_text(filepath))
+
+        if cache is not None:
+            digest = page_cache.content_hash(page.original)
+            file_results.update(cache.lookup(filepath, st, active, digest))
+
+        # Codemods may change the content, so cached check results only hold
+        # when every active rule is a cacheable check
+        if not all(rule.cacheable for rule in active):
+            file_results = {}
+
+        computed = {}
+        page_results = {}
+        for rule in active:
+            if rule.name in file_results:
+                result = file_results[rule.name]
+            else:
+                before = page.content
+                result = rule.process(page)
+                if rule.cacheable:
+                    computed[rule] = (before, result)
+            page_results[rule.name] = result
+
+        edit_plan.write_if_changed(filepath, page.original, page.content, dry_run, out)
+
+        if cache is not None and computed and not (dry_run and page.changed):
+            if page.changed:
+                st = os.stat(filepath)
+                digest = page_cache.content_hash(page.content)
+            cache.store(filepath, st, digest, {
+                rule: result for rule, (before, result) in computed.items()
+                if before == page.content
+            })
+
+        yield name, filepath, page_results
+
+    if cache is not None:
+        for root in roots:
+            cache.prune(os.path.abspath(root), seen)
+        cache.save()
+
+
+def run(rules, roots=PAGES_DIR, cache=None, dry_run=False):
+    """Run all rules over roots in a single pass
+
+    Returns a dict mapping each rule name to its list of (name, result).
+    """
+    results = {rule.name: [] for rule in rules}
+    for name, _, page_results in iter_results(rules, roots, cache, dry_run):
+        for rule_name, result in page_results.items():
+            results[rule_name].append((name, result))
+    return results
+
+
+def main(rules=None, argv=None):
+    # A script running its own rules is described by them, not by the engine
+    descriptions = [rule.description for rule in rules or () if rule.description]
+    parser = argparse.ArgumentParser(description='; '.join(descriptions) or __doc__.strip().splitlines()[0])
+    parser.add_argument('--pages-dir', default=PAGES_DIR,
+                        help='pages directory (default: src/pages/), unless --root is given')
+    tree_walk.add_arguments(parser)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='ignore and do not update .page_cache.json')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='print unified diffs instead of writing the pages')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and re-check pages as they change (checks only)')
+    parser.add_argument('--poll', action='store_true',
+                        help='with --watch, poll file stats instead of using inotify')
+    emitters.add_argument(parser)
+    profiler.add_argument(parser)
+    if rules is None:
+        parser.add_argument('--rules',
+                            help='comma-separated rule modules (default: all, pre-deploy order)')
+    args = parser.parse_args(argv)
+
+    if rules is None:
+        rules = load_rules(args.rules.split(',') if args.rules else None)
+
+    cache = None if args.no_cache else page_cache.PageCache()
+
+    if args.profile:
+        profiler.enable(args.profile)
+        profiler.profile_rules(rules)
+
+    if args.watch:
+        if not all(rule.cacheable for rule in rules):
+            parser.error('--watch only runs read-only checks')
+        if args.format != 'text':
+            parser.error('--watch only prints text')
+        if args.root:
+            parser.error('--watch only watches --pages-dir')
+        import page_watch
+        page_watch.watch(rules, os.path.abspath(args.pages_dir), cache, args.poll)
+        profiler.report()
+        return
+
+    # Diffs would corrupt a machine-readable stream
+    diff_out = sys.stderr if args.format != 'text' else None
+    emitter = emitters.make(args.format, rules)
+    roots = [os.path.abspath(root) for root in args.root or [args.pages_dir]]
+    try:
+        for name, filepath, page_results in iter_results(rules, roots, cache, args.dry_run, diff_out,
+                                                         args.include, args.exclude, args.gitignore):
+            for rule in rules:
+                if rule.name in page_results:
+                    emitter.emit(name, filepath, rule, page_results[rule.name])
+        emitter.close()
+    except BrokenPipeError:
+        emitters.exit_on_broken_pipe()
+    profiler.report()
+
+
+if __name__ == '__main__':
+    main()
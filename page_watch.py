@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Watch mode for the page checks (verify_navigation.py, check_navigate_declaration.py)
+
+    python3 verify_navigation.py --watch
+    python3 check_navigate_declaration.py --watch --poll
+
+After one full pass the results of every page stay in memory. Changed .tsx
+files are detected with inotify (through ctypes, Linux) or by polling
+os.scandir stats elsewhere, in the pages directory and in every subdirectory
+the walker descends into, including the ones created later; a burst of
+events (editor save = write + rename) is debounced, only the changed pages
+are re-checked, and only the statuses that changed are printed, with the
+processing time and the latency since the first event of the burst.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+import edit_plan
+import page_cache
+import page_engine
+import tree_walk
+
+# inotify(7) event masks
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Changed file names of a directory tree, from the kernel's inotify queue
+
+    inotify is not recursive: every directory tree_walk descends into gets its
+    own watch, and directories created or moved in later are added as their
+    events come. A directory event is reported as 'name/' (its pages may have
+    changed without events of their own).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.prefixes = {}  # watch descriptor -> name prefix ('' or 'sub/')
+        try:
+            self._add('')
+            for name in tree_walk.directories(directory):
+                self._add(name)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _add(self, name):
+        path = os.path.join(self.directory, name) if name else self.directory
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f'inotify_add_watch failed on {path}')
+        self.prefixes[wd] = name + '/' if name else ''
+
+    def _add_new_directories(self):
+        watched = set(self.prefixes.values())
+        try:
+            for name in tree_walk.directories(self.directory):
+                if name + '/' not in watched:
+                    self._add(name)
+        except OSError:
+            pass  # removed again before we got to it
+
+    def _forget(self, name):
+        """Drop the watches of a directory moved away (deleted ones go by themselves)"""
+        for wd, prefix in list(self.prefixes.items()):
+            if prefix.startswith(name + '/'):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.prefixes[wd]
+
+    def wait(self, timeout=None):
+        """Names changed within timeout seconds (None: block until one does)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        names = set()
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        new_directories = False
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _, length = _EVENT.unpack_from(buf, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(buf[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_IGNORED:
+                self.prefixes.pop(wd, None)
+                continue
+            prefix = self.prefixes.get(wd)
+            if prefix is None:
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    new_directories = True
+                elif mask & IN_MOVED_FROM:
+                    self._forget(prefix + name)
+                names.add(prefix + name + '/')
+            else:
+                names.add(prefix + name)
+        if new_directories:
+            self._add_new_directories()
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher comparing the stats of the walked pages every interval"""
+
+    def __init__(self, directory, interval=0.05):
+        self.directory = directory
+        self.interval = interval
+        self.snapshot = {}
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        snapshot = {}
+        try:
+            for name, entry in tree_walk.walk([self.directory]):
+                st = entry.stat()
+                snapshot[name] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return self.snapshot  # removed mid-walk: compare again next interval
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval if deadline is None
+                       else max(0.0, min(self.interval, deadline - time.monotonic())))
+            snapshot = self._snapshot()
+            names = {name for name in snapshot.keys() | self.snapshot.keys()
+                     if snapshot.get(name) != self.snapshot.get(name)}
+            self.snapshot = snapshot
+            if names or (deadline is not None and time.monotonic() >= deadline):
+                return names
+
+    def close(self):
+        pass
+
+
+def make_watcher(directory, poll=False):
+    if not poll:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directory)
+
+
+def page_names(pages_dir, state, names):
+    """Page names of names; 'sub/' stands for every page under sub, known or on disk"""
+    pages = {name for name in names if not name.endswith('/')}
+    directories = tuple(name for name in names if name.endswith('/'))
+    if directories:
+        pages.update(name for name in state if name.startswith(directories))
+        pages.update(name for name, _ in tree_walk.walk([pages_dir]) if name.startswith(directories))
+    return pages
+
+
+def recheck(rules, pages_dir, state, names, cache=None):
+    """Re-run the rules on the changed pages; return the status lines that changed"""
+    lines = []
+    for filename in sorted(names):
+        if not filename.endswith('.tsx'):
+            continue
+        active = [rule for rule in rules if rule.applies_to(os.path.basename(filename))]
+        filepath = os.path.join(pages_dir, filename)
+        previous = state.get(filename, {})
+
+        try:
+            st = os.stat(filepath)
+            page = page_engine.Page(filepath, edit_plan.read_text(filepath))
+        except FileNotFoundError:
+            if state.pop(filename, None) is not None:
+                lines.append(f"🗑  {filename} supprimé")
+            continue
+
+        current = {rule.name: rule.process(page) for rule in active}
+        state[filename] = current
+        if cache is not None:
+            cache.store(filepath, st, page_cache.content_hash(page.content),
+                        {rule: current[rule.name] for rule in active})
+
+        for rule in active:
+            if rule.name in previous and previous[rule.name] == current[rule.name]:
+                continue
+            line = rule.status(filename, current[rule.name])
+            if line:
+                lines.append(line)
+    return lines
+
+
+def watch(rules, pages_dir, cache=None, poll=False, debounce=0.03):
+    """Full pass, then re-check changed pages until interrupted"""
+    results = page_engine.run(rules, pages_dir, cache)
+    for rule in rules:
+        rule.report(results[rule.name])
+
+    state = {}
+    for rule in rules:
+        for filename, result in results[rule.name]:
+            state.setdefault(filename, {})[rule.name] = result
+
+    watcher = make_watcher(pages_dir, poll)
+    print(f"\n👀 Surveillance de {pages_dir} ({type(watcher).__name__}), Ctrl+C pour arrêter")
+
+    try:
+        while True:
+            names = watcher.wait()
+            if not names:
+                continue
+            first_event = time.perf_counter()
+
+            # Debounce: wait until the editor's burst of events is over
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                names |= more
+
+            start = time.perf_counter()
+            names = page_names(pages_dir, state, names)
+            lines = recheck(rules, pages_dir, state, names, cache)
+            done = time.perf_counter()
+            if cache is not None:
+                cache.save()
+
+            checked = sum(1 for name in names if name.endswith('.tsx'))
+            if not checked:
+                continue
+            stamp = time.strftime('%H:%M:%S')
+            for line in lines or ["= aucun changement de statut"]:
+                print(f"[{stamp}] {line}")
+            print(f"[{stamp}] Δ {checked} page(s) en {(done - start) * 1000:.1f} ms, "
+                  f"latence {(done - first_event) * 1000:.0f} ms", flush=True)
+    except KeyboardInterrupt:
+        print("\n👋 Fin de la surveillance")
+    finally:
+        watcher.close()
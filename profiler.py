@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling of the page scripts (--profile)
+
+Nothing is instrumented unless enable() is called: it swaps the functions the
+scripts look up at call time for timed wrappers, so a normal run executes
+exactly the same code as before. Once enabled, it records calls, wall time,
+bytes scanned and matches of:
+
+  - rule:    each rule's process() and each codemod's plan function
+  - pattern: every re.search/match/fullmatch/finditer/findall/sub call,
+             keyed by pattern (fix_all_props' fixes, verify_navigation's
+             back_patterns, ...)
+  - scan:    tsx_scanner.scan (lru-cached, so repeated calls are cheap)
+  - io:      edit_plan.read_text and edit_plan.atomic_write
+
+report() prints a table sorted by total time (to stderr, so that it does not
+mix with --format jsonl/sarif on stdout) and writes PREFIX.json (the
+same numbers) and PREFIX.trace.json, a Chrome trace (chrome://tracing,
+https://ui.perfetto.dev) with one row per kind.
+
+    python3 verify_navigation.py --profile
+    python3 fix_all_props.py --profile /tmp/fix_all_props
+"""
+
+import functools
+import json
+import os
+import re
+import sys
+import time
+
+import edit_plan
+import tsx_scanner
+
+# Chrome trace events kept (aggregated stats are always complete)
+MAX_EVENTS = 200000
+
+_TIDS = {'rule': 1, 'pattern': 2, 'scan': 3, 'io': 4}
+
+_clock = time.perf_counter
+_profiler = None
+
+
+def add_argument(parser):
+    parser.add_argument('--profile', nargs='?', const='profile', metavar='PREFIX',
+                        help='time rules, regex patterns and file I/O; print a table and write '
+                             'PREFIX.json and PREFIX.trace.json (default prefix: profile)')
+
+
+class Profiler:
+    def __init__(self, prefix, max_events=MAX_EVENTS):
+        self.prefix = prefix
+        self.max_events = max_events
+        self.stats = {}   # (kind, name) -> [calls, seconds, bytes, matches]
+        self.events = []  # (kind, name, start, end)
+        self.dropped = 0
+        self.origin = _clock()
+        self._patches = []
+
+    def record(self, kind, name, start, end, size=0, matches=0):
+        entry = self.stats.get((kind, name))
+        if entry is None:
+            entry = self.stats[(kind, name)] = [0, 0.0, 0, 0]
+        entry[0] += 1
+        entry[1] += end - start
+        entry[2] += size
+        entry[3] += matches
+        if len(self.events) < self.max_events:
+            self.events.append((kind, name, start, end))
+        else:
+            self.dropped += 1
+
+    def patch(self, owner, attr, wrapper):
+        original = getattr(owner, attr)
+        self._patches.append((owner, attr, original))
+        setattr(owner, attr, functools.update_wrapper(wrapper, original))
+
+    def restore(self):
+        for owner, attr, original in reversed(self._patches):
+            setattr(owner, attr, original)
+        self._patches = []
+
+    def wrap(self, owner, attr, kind, name, size=None, matches=None):
+        """Time owner.attr; size(args, result) and matches(result) fill the other columns"""
+        func = getattr(owner, attr)
+
+        def wrapper(*args, **kwargs):
+            start = _clock()
+            result = func(*args, **kwargs)
+            self.record(kind, name, start, _clock(),
+                        size(args, result) if size else 0, matches(result) if matches else 0)
+            return result
+        self.patch(owner, attr, wrapper)
+
+    def wrap_re(self):
+        for attr in ('search', 'match', 'fullmatch'):
+            self._wrap_re_call(attr, lambda result: result is not None)
+        self._wrap_re_call('findall', len)
+        self._wrap_re_finditer()
+        self._wrap_re_sub()
+
+    def _wrap_re_call(self, attr, count):
+        func = getattr(re, attr)
+
+        def wrapper(pattern, string, flags=0):
+            start = _clock()
+            result = func(pattern, string, flags)
+            self.record('pattern', _pattern_name(pattern), start, _clock(), len(string), count(result))
+            return result
+        self.patch(re, attr, wrapper)
+
+    def _wrap_re_finditer(self):
+        finditer = re.finditer
+
+        def wrapper(pattern, string, flags=0):
+            # Only the time spent inside the iterator counts, not the caller's loop body
+            start = _clock()
+            iterator = finditer(pattern, string, flags)
+            elapsed = _clock() - start
+            matches = 0
+            try:
+                while True:
+                    step = _clock()
+                    match = next(iterator, None)
+                    elapsed += _clock() - step
+                    if match is None:
+                        return
+                    matches += 1
+                    yield match
+            finally:
+                self.record('pattern', _pattern_name(pattern), start, start + elapsed, len(string), matches)
+        self.patch(re, 'finditer', wrapper)
+
+    def _wrap_re_sub(self):
+        subn = re.subn
+
+        def wrapper(pattern, repl, string, count=0, flags=0):
+            start = _clock()
+            result, matches = subn(pattern, repl, string, count=count, flags=flags)
+            self.record('pattern', _pattern_name(pattern), start, _clock(), len(string), matches)
+            return result
+        self.patch(re, 'sub', wrapper)
+
+    def wrap_rules(self, rules):
+        for rule in rules:
+            process = rule.process
+
+            def wrapper(page, rule=rule, process=process):
+                before = page.content
+                start = _clock()
+                result = process(page)
+                self.record('rule', rule.name, start, _clock(), len(before), int(page.content != before))
+                return result
+            self.patch(rule, 'process', wrapper)
+
+    def entries(self):
+        """[(kind, name, calls, seconds, bytes, matches)] by decreasing time"""
+        rows = [(kind, name, *entry) for (kind, name), entry in self.stats.items()]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def print_table(self, wall, out):
+        print("\n" + "=" * 80, file=out)
+        print(f"PROFIL ({wall * 1000:.1f} ms au total)", file=out)
+        print("=" * 80, file=out)
+        print(f"{'kind':8} {'name':44} {'calls':>7} {'ms':>9} {'%':>5} {'KB':>9} {'matches':>8}", file=out)
+        for kind, name, calls, seconds, size, matches in self.entries():
+            label = name if len(name) <= 44 else name[:41] + '...'
+            share = seconds / wall * 100 if wall else 0
+            print(f"{kind:8} {label:44} {calls:7} {seconds * 1000:9.2f} {share:5.1f} "
+                  f"{size / 1024:9.0f} {matches:8}", file=out)
+        print("(rule/scan/pattern se chevauchent: un pattern appelé par une règle compte dans les deux)", file=out)
+
+    def write(self, wall):
+        with open(self.prefix + '.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                'wall_seconds': wall,
+                'entries': [
+                    {'kind': kind, 'name': name, 'calls': calls, 'seconds': seconds,
+                     'bytes': size, 'matches': matches}
+                    for kind, name, calls, seconds, size, matches in self.entries()
+                ],
+            }, f, indent=2)
+
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': kind}}
+                  for kind, tid in _TIDS.items()]
+        events.extend({
+            'name': name, 'cat': kind, 'ph': 'X', 'pid': pid, 'tid': _TIDS[kind],
+            'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6,
+        } for kind, name, start, end in self.events)
+        with open(self.prefix + '.trace.json', 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'dropped_events': self.dropped}}, f)
+
+
+def _pattern_name(pattern):
+    return pattern.pattern if isinstance(pattern, re.Pattern) else str(pattern)
+
+
+def enabled():
+    return _profiler is not None
+
+
+def enable(prefix='profile'):
+    """Instrument the regex calls, tsx_scanner.scan and the file I/O"""
+    global _profiler
+    if _profiler is not None:
+        return
+    _profiler = Profiler(prefix)
+    _profiler.wrap_re()
+    _profiler.wrap(tsx_scanner, 'scan', 'scan', 'tsx_scanner.scan',
+                   size=lambda args, result: len(args[0]))
+    _profiler.wrap(edit_plan, 'read_text', 'io', 'read',
+                   size=lambda args, result: len(result))
+    _profiler.wrap(edit_plan, 'atomic_write', 'io', 'write',
+                   size=lambda args, result: len(args[1]))
+
+
+def profile_rules(rules):
+    """Time each rule's process(); no-op unless enabled"""
+    if _profiler is not None:
+        _profiler.wrap_rules(rules)
+
+
+def profile_function(owner, attr, name):
+    """Time a codemod plan function (…, content) -> edits; no-op unless enabled"""
+    if _profiler is not None:
+        _profiler.wrap(owner, attr, 'rule', name,
+                       size=lambda args, result: len(args[-1]), matches=len)
+
+
+def report():
+    """Print the table, write the JSON files and remove the instrumentation"""
+    global _profiler
+    if _profiler is None:
+        return
+    profiler, _profiler = _profiler, None
+    wall = _clock() - profiler.origin
+    profiler.restore()
+    profiler.print_table(wall, sys.stderr)
+    profiler.write(wall)
+    print(f"⏱  Profil écrit dans {profiler.prefix}.json et {profiler.prefix}.trace.json", file=sys.stderr)
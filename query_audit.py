@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+Static audit of the Supabase queries of src/: over-fetching, N+1 and
+unbounded lists
+
+Every `supabase.from(table)` chain is read by supabase_queries, with the
+variable its rows are bound to and the loop around it, and checked against
+the schema replayed from supabase/migrations:
+
+  - over-fetch: `.select('*')` whose rows are only read for a few columns.
+    The reads are followed from the bound variable to the end of its block:
+    `rows.map((row) => row.price)`, `data?.status`, `const { id } = data`,
+    aliases (`const list = data || []`) and React state (`setQuotes(data)`
+    then `quotes.map(...)` anywhere in the component). When the rows leave
+    that reach (passed to a function or a component, spread into another
+    object, returned), the columns read elsewhere are unknown and the finding
+    is only shown with --all
+  - n+1: a query run once per item of a `for` loop or of a
+    `.map`/`.forEach`/`.flatMap` callback. Filtered on the item
+    (`.eq('mover_id', quote.mover_id)`), it becomes one `.in(...)` query
+    over the collection, or an embedded select on the parent query when a
+    foreign key joins the two tables; inserts become one batch insert
+  - pagination: a list select with no `.limit()`/`.range()`, not narrowed
+    to one row by `.single()` or by an `.eq()` on a unique column
+
+Each finding has the file:line of its `.from(` and a suggested rewrite.
+
+Usage:
+    python3 query_audit.py
+    python3 query_audit.py --kind n+1 --kind over-fetch --all
+    python3 query_audit.py --json findings.json
+"""
+
+import argparse
+import bisect
+import functools
+import json
+import re
+
+import emitters
+import migration_replay
+import supabase_queries
+from migration_replay import split_top
+
+KINDS = ['over-fetch', 'n+1', 'pagination']
+
+PAGE_SIZE = 50
+
+# Array methods whose callback gets the rows; for reduce the row is the second parameter
+ROW_CALLBACKS = {'map', 'forEach', 'filter', 'find', 'findIndex', 'some', 'every', 'flatMap', 'reduce', 'sort'}
+# Array members that do not read columns
+ARRAY_MEMBERS = {'length', 'slice', 'concat', 'reverse', 'includes', 'indexOf', 'join', 'at'}
+# Results that are rows again (`const open = data.filter(...)`)
+ROW_RESULTS = {'filter', 'sort', 'slice', 'reverse', 'concat'}
+
+_LITERAL = re.compile(r'''\s*(['"`])((?:[^'"`\\]|\\.)*?)\1''')
+_EMBED = re.compile(r'^(?:([\w]+)\s*:\s*)?([\w]+)')
+_IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+_LOCAL = re.compile(r'\b(?:const|let|var)\s+(?:[{\[]([^{}\[\]]*)[}\]]|([A-Za-z_$][\w$]*))')
+_PROPERTY = re.compile(r'\s*(?:\?\.|!?\.)\s*([A-Za-z_$][\w$]*)')
+_KEY = re.compile(r'''\s*(?:\?\.)?\[\s*(['"])(\w+)\1\s*\]''')
+_ELEMENT = re.compile(r'\s*(?:\?\.)?\[[^\]]*\]')
+_CALL_OPEN = re.compile(r'\s*\(')
+_ASSIGNED = re.compile(r'(?:(?:const|let|var)\s+|(?<![\w$.])(?=[A-Za-z_$]))([A-Za-z_$][\w$]*)\s*(?::[^=;?]+)?=\s*(?:await\s+)?$')
+_DESTRUCTURED = re.compile(r'(?:const|let|var)\s*\{([^{}]*)\}\s*(?::[^=;]+)?=\s*$')
+_EXPRESSION_END = re.compile(r'\s*(?:(?:\|\||\?\?)\s*(?:\[\]|null|\{\}|undefined))?\s*(?:as\s+[\w<>\[\]|\s]+?)?\s*[;\n]')
+_SETTER = re.compile(r'\b(set[A-Z][\w$]*)\s*\(\s*$')
+_SETTER_END = re.compile(r'\s*(?:(?:\|\||\?\?)\s*(?:\[\]|null))?\s*(?:as\s+[\w<>\[\]|\s]+?)?\s*\)')
+_TEST_BEFORE = re.compile(r'(?:!|&&|\bif\s*\(\s*!?)\s*$')
+_FOR_OF = re.compile(r'\bfor\s*\(\s*(?:const|let|var)\s+([A-Za-z_$][\w$]*|\{[^{}]*\})\s+of\s+$')
+_LOOP_BODY = re.compile(r'\s*\)\s*\{')
+_OR_EMPTY = re.compile(r'\s*(?:\|\||\?\?)\s*\[\]\s*\)(?=\s*\??\.)')
+_JSX_LEFT = re.compile(r'''((?<=[\w"'}/])>|[{}();])[^>{}();]*$''')
+_JSX_RIGHT = re.compile(r'[<{};]')
+_REASSIGNED = re.compile(r'\s*=(?![=>])')
+# console.log(..., rows), a useEffect dependency list
+_NEUTRAL_BEFORE = re.compile(r'console\.\w+\([^;]*$|\}\s*,\s*\[[\w$.,\s?]*$')
+_LITERAL_OR_COMMENT = re.compile(r'''
+    '(?:[^'\\\n]|\\.)*'
+  | "(?:[^"\\\n]|\\.)*"
+  | `(?:[^`\\]|\\.)*`
+  | //[^\n]*
+  | /\*.*?\*/
+''', re.VERBOSE | re.DOTALL)
+_TEST_AFTER = re.compile(r'\s*(?:&&|[=!]==?|\?(?![.\[])|\)\s*(?:\{|return\b|throw\b))')
+
+
+class Finding:
+    def __init__(self, kind, query, message, suggestion=None, certain=True):
+        self.kind = kind
+        self.query = query
+        self.message = message
+        self.suggestion = suggestion
+        self.certain = certain    # False when part of the evidence is out of reach
+
+    def location(self):
+        return f"{emitters.display_path(self.query.path)}:{self.query.line}"
+
+    def to_dict(self):
+        return {'kind': self.kind, 'path': emitters.display_path(self.query.path), 'line': self.query.line,
+                'table': self.query.table, 'message': self.message, 'suggestion': self.suggestion,
+                'certain': self.certain}
+
+
+class Reads:
+    """Columns read from a query's rows, and where the rows escape"""
+
+    def __init__(self):
+        self.fields = set()
+        self.escapes = []         # (line, source line) where the rows leave
+        self.length = False       # only counted somewhere
+
+    def escape(self, content, pos):
+        start = content.rfind('\n', 0, pos) + 1
+        end = content.find('\n', pos)
+        self.escapes.append((content.count('\n', 0, pos) + 1, content[start:end if end >= 0 else None].strip()))
+
+
+def select_list(query):
+    """(select text, extra arguments, head only) of the query's .select()"""
+    calls = query.find('select')
+    if not calls:
+        return None, '', False
+    args = calls[0].args
+    literal = _LITERAL.match(args)
+    if literal is None:
+        return ('*' if not args.strip() else None), '', False
+    if literal.group(1) == '`' and '${' in literal.group(2):
+        return None, '', False
+    extra = args[literal.end():]
+    return literal.group(2), extra, bool(re.search(r'\bhead\s*:\s*true\b', extra))
+
+
+def _entries(text):
+    return [' '.join(entry.split()) for entry in split_top(text) if entry.strip()]
+
+
+def _embed_name(entry):
+    match = _EMBED.match(entry)
+    return (match.group(1) or match.group(2)) if match else entry
+
+
+def _params(header, kind):
+    """(row parameter names, destructured fields, offset of the body) of an
+    array callback"""
+    callback = supabase_queries._CALLBACK.match(header)
+    if callback is None:
+        return [], set(), 0
+    if callback.group(2) is not None:
+        params = [callback.group(2)]
+    else:
+        params = [p.strip() for p in split_top(callback.group(1))]
+    if kind == 'reduce':
+        params = params[1:2]
+    elif kind != 'sort':
+        params = params[:1]
+    names, fields = [], set()
+    for param in params:
+        if param.startswith('{'):
+            fields.update(_destructured(param.strip('{} ')))
+        else:
+            param = param.split(':')[0].strip()
+            if _IDENTIFIER.fullmatch(param):
+                names.append(param)
+    return names, fields, callback.end()
+
+
+def _destructured(body):
+    """Property names of a destructuring pattern (`a, b: c, d = 1`)"""
+    fields = set()
+    for part in split_top(body):
+        part = part.strip()
+        match = _IDENTIFIER.match(part)
+        if match and not part.startswith('...'):
+            fields.add(match.group())
+    return fields
+
+
+def _state(content, setter):
+    """(state variable, offset of its declaration) of a useState setter"""
+    match = re.search(r'const\s*\[\s*([A-Za-z_$][\w$]*)\s*,\s*' + re.escape(setter) + r'\s*\]', content)
+    return (match.group(1), match.end()) if match else (None, None)
+
+
+@functools.lru_cache(maxsize=8)
+def _layout(content):
+    """(string and comment spans, {...} blocks) of a source file"""
+    literals = [match.span() for match in _LITERAL_OR_COMMENT.finditer(content)
+                if not (match.group().startswith('`') and '${' in match.group())]
+    return literals, supabase_queries._blocks(content)
+
+
+def _inside(spans, pos):
+    i = bisect.bisect_right(spans, (pos, float('inf'))) - 1
+    return i >= 0 and spans[i][0] <= pos < spans[i][1]
+
+
+def _jsx_text(content, pos):
+    """Whether pos is in the text of a JSX element (`<p>Aucun contrat</p>`)"""
+    left = _JSX_LEFT.search(content, max(0, pos - 200), pos)
+    right = _JSX_RIGHT.search(content, pos)
+    return bool(left and right and left.group(1) == '>' and right.group() == '<')
+
+
+def _declaration_scope(content, name, pos):
+    """End of the block declaring name (the last `let name` before pos)"""
+    declared = None
+    for declared in re.compile(r'\b(?:let|var)\s+' + re.escape(name) + r'(?![\w$])').finditer(content, 0, pos):
+        pass
+    if declared is None:
+        return len(content)
+    block = supabase_queries._innermost(_layout(content)[1], declared.start())
+    return block[1] if block else len(content)
+
+
+def follow(content, name, start, end, rows, reads, skip=(), seen=None):
+    """Collect into reads what is done with variable name in content[start:end]
+
+    rows: name holds one row (else an array of rows). skip: (start, end)
+    spans where another declaration shadows name.
+    """
+    seen = set() if seen is None else seen
+    literals = _layout(content)[0]
+    pattern = re.compile(r'(?<![\w$])' + re.escape(name) + r'(?![\w$])')
+    for match in pattern.finditer(content, start, end):
+        pos, after = match.start(), match.end()
+        if any(s <= pos < e for s, e in skip) or _inside(literals, pos) or _jsx_text(content, pos):
+            continue
+        before = content[max(0, pos - 120):pos]
+        if before.endswith('...'):
+            reads.escape(content, pos)
+            continue
+        if re.search(r'(?:\?\.|\.)\s*$', before) or re.match(r'\s*:(?!:)', content[after:after + 3]) and \
+                re.search(r'[{,]\s*$', before):
+            continue                                    # obj.name, or a { name: ... } key
+        if _REASSIGNED.match(content, after):
+            continue                                    # name = other value
+        wrapped = _OR_EMPTY.match(content, after)
+        if wrapped and before.rstrip().endswith('('):    # (rows || []).map(...)
+            after, before = wrapped.end(), before.rstrip()[:-1]
+        row = rows
+        element = None if rows else _ELEMENT.match(content, after)
+        if element:                                     # rows[0]
+            after, row = element.end(), True
+
+        prop = _PROPERTY.match(content, after)
+        if prop and not row and prop.group(1) in ROW_CALLBACKS:
+            call = _CALL_OPEN.match(content, prop.end())
+            close = supabase_queries._close_paren(content, call.end()) if call else None
+            if close is None:
+                reads.escape(content, pos)
+                continue
+            names, fields, body = _params(content[call.end():close - 1], prop.group(1))
+            reads.fields |= fields
+            for param in names:
+                follow(content, param, call.end() + body, close, True, reads, seen=seen)
+            alias = _ASSIGNED.search(before)
+            if alias and prop.group(1) in ROW_RESULTS | {'find'} and _EXPRESSION_END.match(content, close):
+                follow(content, alias.group(1), close, _alias_end(content, alias, pos, end),
+                       prop.group(1) == 'find', reads, seen=seen)
+            continue
+        if prop and not row and prop.group(1) in ARRAY_MEMBERS:
+            reads.length = reads.length or prop.group(1) == 'length'
+            continue
+        if prop:
+            reads.fields.add(prop.group(1))
+            continue
+        key = _KEY.match(content, after)
+        if key:
+            reads.fields.add(key.group(2))
+            continue
+
+        loop = _FOR_OF.search(before) if not row else None
+        body = _LOOP_BODY.match(content, after) if loop else None
+        if body:                                        # for (const row of rows) {
+            close = supabase_queries._close_paren(content, body.end()) or end
+            if loop.group(1).startswith('{'):
+                reads.fields |= _destructured(loop.group(1).strip('{} '))
+            else:
+                follow(content, loop.group(1), body.end(), close, True, reads, seen=seen)
+            continue
+        destructured = _DESTRUCTURED.search(before)
+        if destructured and _EXPRESSION_END.match(content, after):
+            if '...' in destructured.group(1):
+                reads.escape(content, pos)
+            reads.fields |= _destructured(destructured.group(1))
+            continue
+        alias = _ASSIGNED.search(before)
+        if alias and _EXPRESSION_END.match(content, after):
+            follow(content, alias.group(1), after, _alias_end(content, alias, pos, end), row, reads, seen=seen)
+            continue
+        setter = _SETTER.search(before)
+        if setter and _SETTER_END.match(content, after):
+            state, declared = _state(content, setter.group(1))
+            if state is None:
+                reads.escape(content, pos)
+            elif state not in seen:
+                seen.add(state)
+                follow(content, state, declared, len(content), row, reads, seen=seen)
+            continue
+        if _TEST_BEFORE.search(before) or _TEST_AFTER.match(content, after) or _NEUTRAL_BEFORE.search(before):
+            continue
+        reads.escape(content, pos)
+    return reads
+
+
+def _alias_end(content, alias, pos, end):
+    """Reach of an alias: the current one for a declaration, the declaring
+    block for an assignment to an outer `let`"""
+    if alias.group(0).startswith(('const', 'let', 'var')):
+        return end
+    return max(end, _declaration_scope(content, alias.group(1), pos))
+
+
+class Auditor:
+    def __init__(self, schema, queries):
+        self.schema = schema
+        self.queries = queries
+        self.by_path = {}
+        for query in queries:
+            self.by_path.setdefault(query.path, []).append(query)
+        self.contents = {}
+
+    def content(self, path):
+        if path not in self.contents:
+            self.contents[path] = supabase_queries.edit_plan.read_text(path)
+        return self.contents[path]
+
+    def columns(self, table):
+        """Column names of a table in definition order, None for views and unknown tables"""
+        table = self.schema.tables.get(table)
+        return list(table.columns) if table else None
+
+    def audit(self):
+        findings = []
+        for query in self.queries:
+            findings.extend(self.over_fetch(query))
+            findings.extend(self.n_plus_one(query))
+            findings.extend(self.pagination(query))
+        return findings
+
+    # -- over-fetch --------------------------------------------------------
+
+    def reads(self, query):
+        content = self.content(query.path)
+        skip = [(other.statement, other.scope_end) for other in self.by_path[query.path]
+                if other is not query and other.binding == query.binding
+                and query.statement < other.statement < query.scope_end]
+        return follow(content, query.binding, query.end, query.scope_end, query.single, Reads(), skip)
+
+    def over_fetch(self, query):
+        if query.action != 'select' or query.binding is None:
+            return []
+        text, extra, head = select_list(query)
+        if text is None or head:
+            return []
+        entries = _entries(text)
+        if '*' not in entries:
+            return []
+        embeds = [entry for entry in entries if '(' in entry]
+        reads = self.reads(query)
+        columns = self.columns(query.table)
+        embedded = {_embed_name(entry) for entry in embeds}
+        if columns is None:
+            used = sorted(reads.fields - embedded)
+            unknown = []
+        else:
+            used = [column for column in columns if column in reads.fields]
+            unknown = sorted(field for field in reads.fields - set(columns) - embedded if field.islower())
+        kept = [entry for entry in embeds if _embed_name(entry) in reads.fields or reads.escapes]
+
+        if not used and not kept and reads.length and not reads.escapes:
+            suggestion = ".select('id', { count: 'exact', head: true }) puis lire count"
+        else:
+            suggestion = f".select('{', '.join((used or ['id']) + kept)}'{extra.rstrip()})"
+        total = f"/{len(columns)}" if columns is not None else ''
+        message = f"select('*') sur {query.table}: {len(used)}{total} colonne(s) lue(s) via {query.binding}"
+        if unknown:
+            message += f" (⚠️ champs absents du schéma: {', '.join(unknown)})"
+        if reads.escapes:
+            line, source = reads.escapes[0]
+            message += f"; les lignes sortent ligne {line} ({source[:60]}), colonnes lues ailleurs inconnues"
+            suggestion += f" + les colonnes lues après la ligne {line}"
+        elif columns is not None and len(used) >= len(columns):
+            return []
+        return [Finding('over-fetch', query, message, suggestion, certain=not reads.escapes)]
+
+    # -- n+1 ---------------------------------------------------------------
+
+    def parent(self, query):
+        """The query whose rows the loop around query iterates, if known"""
+        loop = query.loop
+        if not loop.collection:
+            return None
+        root = loop.collection.split('.')[0]
+        parents = [other for other in self.by_path[query.path]
+                   if other.binding == root and other.start < loop.start]
+        return parents[-1] if parents else None
+
+    def loop_names(self, query):
+        """Variables that change per item: the loop variable and the ones
+        declared in the loop body before the query"""
+        loop = query.loop
+        names = {loop.item} if loop.item else set()
+        body = self.content(query.path)[loop.body:query.start]
+        for match in _LOCAL.finditer(body):
+            if match.group(1) is not None:
+                names |= _destructured(match.group(1))
+            else:
+                names.add(match.group(2))
+        return names
+
+    def item_filter(self, query):
+        """(call, column, item path) of the first filter on the loop item"""
+        item = query.loop.item
+        if not item:
+            return None
+        for call in query.calls:
+            if call.method not in ('eq', 'match', 'in'):
+                continue
+            column = call.first_string()
+            value = split_top(call.args)[1].strip() if len(split_top(call.args)) > 1 else ''
+            match = re.fullmatch(re.escape(item) + r'(?:(?:\?\.|!?\.)([\w$.?]+))?', value)
+            if column and match and call.method == 'eq':
+                return call, column, (match.group(1) or '').replace('?.', '.')
+        return None
+
+    def relation(self, table, parent_table, column, path):
+        """Foreign key joining table.column and parent_table.path, if any"""
+        for owner, other, own, theirs in ((table, parent_table, column, path),
+                                          (parent_table, table, path, column)):
+            model = self.schema.tables.get(owner)
+            if model is None:
+                continue
+            for fk in model.foreign_keys():
+                if fk.ref_table == other and fk.columns == [own] and fk.ref_columns == [theirs]:
+                    return fk, len(self.foreign_keys_between(table, parent_table)) > 1
+        return None
+
+    def foreign_keys_between(self, a, b):
+        """Foreign keys from a to b and from b to a: PostgREST needs the
+        constraint name (`table!fkey(...)`) to embed when there are several"""
+        keys = []
+        for owner, other in ((a, b), (b, a)):
+            model = self.schema.tables.get(owner)
+            if model is not None:
+                keys.extend(fk for fk in model.foreign_keys() if fk.ref_table == other)
+        return keys
+
+    def n_plus_one(self, query):
+        loop = query.loop
+        if loop is None:
+            return []
+        per = f"{loop.collection}.length" if loop.collection else 'N'
+        where = f"boucle {loop.kind} ligne {loop.line}"
+        rows = loop.collection or 'items'
+        item = loop.item or 'item'
+        if query.action in ('insert', 'upsert'):
+            message = f"{query.action} sur {query.table} dans une {where}: 1 requête par élément ({per})"
+            suggestion = (f"construire les lignes dans la boucle puis un seul "
+                          f"supabase.from('{query.table}').{query.action}(lignes) après")
+            return [Finding('n+1', query, message, suggestion)]
+
+        found = self.item_filter(query)
+        message = f"{query.action or 'requête'} sur {query.table} dans une {where}: 1 + {per} requêtes"
+        if found is None:
+            return [Finding('n+1', query, message, "sortir la requête de la boucle (filtre .in() sur la collection)")]
+        call, column, path = found
+        ids = f"{rows}.map(({item}) => {item}.{path})" if path else rows
+        local = self.loop_names(query)
+        chained = [c for c in query.calls
+                   if c is not call and c.method not in ('select', 'single', 'maybeSingle', 'update', 'delete')]
+        # Filters on values computed per item cannot move out of the loop: applied in memory
+        per_item = [c for c in chained if local & set(_IDENTIFIER.findall(c.args))]
+        rest = ''.join(f".{c.method}({' '.join(c.args.split())})" for c in chained if c not in per_item)
+        in_memory = ', '.join(c.first_string() or c.method for c in per_item)
+        if query.action in ('update', 'delete'):
+            payload = query.find('update')
+            head = f".update({' '.join(payload[0].args.split())})" if payload else '.delete()'
+            suggestion = f"supabase.from('{query.table}'){head}.in('{column}', {ids}){rest}"
+            if payload and re.search(r'(?<![\w$])' + re.escape(item) + r'(?![\w$])', payload[0].args):
+                suggestion = f"une seule requête .upsert() avec une ligne par élément de {rows}"
+            return [Finding('n+1', query, message, suggestion)]
+
+        text, extra, head = select_list(query)
+        selected = ' '.join((text or '*').split())
+        if head:
+            selected = column
+        elif selected != '*' and column not in [_embed_name(e) for e in _entries(selected)]:
+            selected = f"{column}, {selected}"
+        group = "compter par" if head else ("indexer par" if query.single and not in_memory else "regrouper par")
+        suggestion = (f"supabase.from('{query.table}').select('{selected}').in('{column}', {ids}){rest}, "
+                      f"puis {group} {column} (Map) avant la boucle")
+        if in_memory:
+            suggestion += f", {in_memory} filtré(s) en mémoire"
+        parent = self.parent(query)
+        if parent is not None and path and '.' not in path:
+            relation = self.relation(query.table, parent.table, column, path)
+            if relation is not None:
+                fk, ambiguous = relation
+                target = f"{query.table}!{fk.name}" if ambiguous else query.table
+                inner = 'count' if head else ' '.join((text or '*').split())
+                suggestion += (f"; ou select embarqué dans la requête ligne {parent.line}: "
+                               f".from('{parent.table}').select('*, {target}({inner})')")
+        return [Finding('n+1', query, message, suggestion)]
+
+    # -- pagination --------------------------------------------------------
+
+    def bounded(self, query):
+        """Whether the query's filters select at most a known number of rows"""
+        if query.single or query.find('limit') or query.find('range') or query.find('in'):
+            return True
+        equal = {call.first_string() for call in query.find('eq')} - {None}
+        if 'id' in equal:
+            return True
+        return any(index.unique and index.where is None and set(index.columns) <= equal
+                   for index in self.schema.table_indexes(query.table))
+
+    def pagination(self, query):
+        if query.action != 'select' or self.bounded(query):
+            return []
+        text, extra, head = select_list(query)
+        if head:
+            return []
+        filters = [call.first_string() for call in query.find('eq')]
+        scope = f"filtrée sur {', '.join(str(f) for f in filters)}" if filters else 'sans filtre'
+        message = f"liste {query.table} {scope}, sans .limit()/.range()"
+        suggestion = f".range(page * {PAGE_SIZE}, page * {PAGE_SIZE} + {PAGE_SIZE - 1})"
+        if not extra.strip():
+            suggestion += " avec .select(…, { count: 'exact' }) pour le total"
+        if not query.find('order'):
+            suggestion += ", après un .order() stable"
+        return [Finding('pagination', query, message, suggestion)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flag over-fetching, N+1 queries and unbounded lists in src/')
+    parser.add_argument('--src-dir', default=supabase_queries.SRC_DIR)
+    parser.add_argument('--migrations-dir', default=migration_replay.MIGRATIONS_DIR)
+    parser.add_argument('--kind', action='append', choices=KINDS, help='only these checks (repeatable)')
+    parser.add_argument('--all', action='store_true',
+                        help='also list over-fetches whose rows are read out of reach')
+    parser.add_argument('--json', metavar='FILE', help='write the findings as JSON')
+    args = parser.parse_args()
+
+    schema = migration_replay.Schema().replay(migration_replay.migration_files(args.migrations_dir))
+    queries = list(supabase_queries.iter_queries([args.src_dir]))
+    findings = [f for f in Auditor(schema, queries).audit() if not args.kind or f.kind in args.kind]
+    shown = [f for f in findings if f.certain or args.all]
+
+    print("=" * 80)
+    print(f"AUDIT DES REQUÊTES SUPABASE ({len(queries)} requêtes)")
+    print("=" * 80)
+    titles = {'over-fetch': '📦 Colonnes inutilisées', 'n+1': '🔁 Requêtes par élément (N+1)',
+              'pagination': '📄 Listes sans pagination'}
+    for kind in KINDS:
+        group = [f for f in shown if f.kind == kind]
+        if not group:
+            continue
+        print(f"\n{titles[kind]} ({len(group)}):")
+        for finding in sorted(group, key=lambda f: (f.query.path, f.query.line)):
+            print(f"   {finding.location()}  {finding.message}")
+            if finding.suggestion:
+                print(f"      → {finding.suggestion}")
+
+    print("\n" + "=" * 80)
+    counts = {kind: sum(1 for f in findings if f.kind == kind) for kind in KINDS}
+    print(', '.join(f"{kind} {count}" for kind, count in counts.items()))
+    hidden = len(findings) - len(shown)
+    if hidden:
+        print(f"{hidden} over-fetch dont les lignes sortent de la fonction (--all pour les voir)")
+    print("=" * 80)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([finding.to_dict() for finding in findings], f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Constats écrits dans {args.json}")
+
+
+if __name__ == '__main__':
+    main()
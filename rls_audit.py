@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Performance audit of the row level security policies
+
+The migrations are replayed with migration_replay, so only the effective
+policies are audited (the ones still there after every DROP POLICY and
+DROP TABLE). Each policy's USING and WITH CHECK expressions are evaluated
+by Postgres for every row the query touches; the audit flags what makes
+that per-row work expensive:
+
+  - auth.uid(), auth.jwt(), current_setting() and the project's own
+    functions called bare: wrapped in `(select auth.uid())` they become an
+    initplan evaluated once per statement
+  - functions called with row columns as arguments, which cannot be hoisted
+  - EXISTS / IN subqueries, and those whose filter columns have no index
+    (one scan of the subquery table per row)
+  - cross-table chains: a subquery on a table with RLS runs that table's
+    policies too; a chain coming back to its own table is recursive
+    (Postgres raises "infinite recursion detected in policy")
+  - tables with policies but RLS disabled (the policies are ignored) and
+    tables with RLS enabled but no policy (every row is hidden)
+
+Each finding gets an estimated per-row cost in arbitrary units (COSTS), and
+tables are ranked by the total cost of their findings.
+
+Usage:
+    python3 rls_audit.py
+    python3 rls_audit.py --table movers --min-cost 10
+"""
+
+import argparse
+import re
+
+import migration_replay
+import supabase_queries
+from migration_replay import IDENT, QUALIFIED, name, paren_group
+
+# Estimated per-row cost of each kind of finding, in arbitrary units
+COSTS = {
+    'bare_auth_call': 1,
+    'bare_function_call': 5,
+    'row_function_call': 10,
+    'subquery': 10,
+    'unindexed_subquery': 100,
+    'function_subquery': 20,
+    'cross_table': 10,
+    'recursive': 1000,
+    'rls_disabled': 0,
+    'no_policy': 0,
+}
+
+# Per-call functions that only depend on the session
+_SESSION_CALL = re.compile(r'\b(auth\s*\.\s*(?:uid|jwt|role|email)|current_setting|current_user_id)\s*\(')
+_CALL = re.compile(rf'({QUALIFIED})\s*\(')
+_SELECT_WRAPPED = re.compile(r'\(\s*SELECT\s+$', re.IGNORECASE)
+_SUBQUERY = re.compile(r'\(\s*SELECT\b', re.IGNORECASE)
+_FROM = re.compile(rf'\b(?:FROM|JOIN)\s+({QUALIFIED})(?:\s+(?:AS\s+)?(?!WHERE\b|JOIN\b|ON\b|LEFT\b|INNER\b|'
+                   rf'RIGHT\b|CROSS\b|GROUP\b|ORDER\b|LIMIT\b)({IDENT}))?', re.IGNORECASE)
+_WHERE = re.compile(r'\bWHERE\b(.*)$', re.IGNORECASE | re.DOTALL)
+_DOLLAR_BODY = re.compile(r'(\$\w*\$)(.*?)\1', re.DOTALL)
+_SECURITY_DEFINER = re.compile(r'\bSECURITY\s+DEFINER\b', re.IGNORECASE)
+
+
+class Finding:
+    def __init__(self, table, policy, kind, message, suggestion=None, cost=None):
+        self.table = table
+        self.policy = policy      # policy name, None for table-level findings
+        self.kind = kind
+        self.message = message
+        self.suggestion = suggestion
+        self.cost = COSTS[kind] if cost is None else cost
+
+
+class Function:
+    """A project function as called from policies"""
+
+    def __init__(self, statement):
+        self.statement = statement
+        body = _DOLLAR_BODY.search(statement.text)
+        self.body = body.group(2) if body else ''
+        self.definer = bool(_SECURITY_DEFINER.search(statement.text))
+        self.tables = sorted({name(m.group(1)) for m in _FROM.finditer(self.body)})
+
+
+class Subquery:
+    def __init__(self, text):
+        self.text = text
+        self.tables = []          # (table, alias)
+        for match in _FROM.finditer(text):
+            table = name(match.group(1))
+            self.tables.append((table, name(match.group(2)) if match.group(2) else table))
+        where = _WHERE.search(text)
+        self.where = where.group(1) if where else ''
+
+
+def subqueries(expression):
+    """Text of each `(SELECT ...)` group of expression, outermost first"""
+    found = []
+    for match in _SUBQUERY.finditer(expression):
+        inner, _ = paren_group(expression, match.start())
+        if inner is not None:
+            found.append(inner)
+    return found
+
+
+def equality_columns(subquery, table, alias, schema_table):
+    """Columns of table compared with = or IN in the subquery's WHERE"""
+    columns = set()
+    for match in re.finditer(rf'(?:({IDENT})\s*\.\s*)?({IDENT})\s*(?:=|\bIN\b)|=\s*(?:({IDENT})\s*\.\s*)?({IDENT})\b(?!\s*\()',
+                             subquery.where, re.IGNORECASE):
+        qualifier = match.group(1) or match.group(3)
+        column = match.group(2) or match.group(4)
+        column = name(column)
+        if qualifier is not None and name(qualifier) not in (alias, table):
+            continue
+        if column in schema_table.columns:
+            columns.add(column)
+    return columns
+
+
+class Auditor:
+    def __init__(self, schema):
+        self.schema = schema
+        self.functions = {fn: Function(statement) for fn, statement in schema.functions.items()}
+        self.findings = []
+        self.edges = {}           # table -> {referenced table: [(policy, command)]}
+
+    def audit(self):
+        for table in self.schema.tables.values():
+            if table.policies and not table.rls:
+                self.findings.append(Finding(
+                    table.name, None, 'rls_disabled',
+                    f"{len(table.policies)} policies mais RLS désactivé: elles sont ignorées",
+                    f"ALTER TABLE {table.name} ENABLE ROW LEVEL SECURITY;"))
+            elif table.rls and not table.policies:
+                self.findings.append(Finding(table.name, None, 'no_policy',
+                                             "RLS activé sans aucune policy: aucune ligne n'est visible"))
+            for policy in table.policies.values():
+                for clause, expression in (('USING', policy.using), ('WITH CHECK', policy.check)):
+                    if expression:
+                        self._expression(table, policy, clause, expression)
+        self._chains()
+        return self.findings
+
+    def _expression(self, table, policy, clause, expression):
+        calls = {}
+        for match in _SESSION_CALL.finditer(expression):
+            if not _SELECT_WRAPPED.search(expression, 0, match.start()):
+                call = ' '.join(match.group(1).split()) + '()'
+                calls[call] = calls.get(call, 0) + 1
+        for call, count in calls.items():
+            self.findings.append(Finding(
+                table.name, policy.name, 'bare_auth_call',
+                f"{clause}: {call}{f' x{count}' if count > 1 else ''} évalué pour chaque ligne",
+                f"remplacer {call} par (select {call})", cost=COSTS['bare_auth_call'] * count))
+
+        for match in _CALL.finditer(expression):
+            function = self.functions.get(name(match.group(1)))
+            if function is None:
+                continue
+            args, _ = paren_group(expression, match.end() - 1)
+            fn = name(match.group(1))
+            row_args = [column for column in table.columns if re.search(rf'\b{re.escape(column)}\b', args or '')]
+            if row_args:
+                self.findings.append(Finding(
+                    table.name, policy.name, 'row_function_call',
+                    f"{clause}: {fn}({args}) dépend de la ligne ({', '.join(row_args)}), appelée pour chaque ligne",
+                    "passer la condition en jointure/EXISTS indexé, ou comparer la colonne à une liste "
+                    "calculée une fois: col = ANY (select ...)"))
+            elif not _SELECT_WRAPPED.search(expression, 0, match.start()):
+                self.findings.append(Finding(
+                    table.name, policy.name, 'bare_function_call',
+                    f"{clause}: {fn}() évalué pour chaque ligne",
+                    f"remplacer {fn}() par (select {fn}())"))
+            if function.tables:
+                self._add_edges(table, policy, function.tables, via=fn, definer=function.definer)
+                if row_args or not _SELECT_WRAPPED.search(expression, 0, match.start()):
+                    self.findings.append(Finding(
+                        table.name, policy.name, 'function_subquery',
+                        f"{clause}: {fn}() lit {', '.join(function.tables)} à chaque appel"))
+
+        for text in subqueries(expression):
+            subquery = Subquery(text)
+            if not subquery.tables:
+                continue
+            # A subquery that only uses session values is an initplan, run once
+            hoisted = not self._correlated(subquery, table)
+            self._add_edges(table, policy, [t for t, _ in subquery.tables])
+            for sub_table, alias in subquery.tables:
+                schema_table = self.schema.tables.get(sub_table)
+                if schema_table is None:
+                    continue
+                columns = equality_columns(subquery, sub_table, alias, schema_table)
+                indexed = [c for c in columns if self._leading_index(sub_table, c)]
+                label = 'sous-requête' + (' (évaluée une fois)' if hoisted else ' par ligne')
+                if columns and not indexed:
+                    cols = ', '.join(sorted(columns))
+                    first = sorted(columns)[0]
+                    self.findings.append(Finding(
+                        table.name, policy.name, 'unindexed_subquery',
+                        f"{clause}: {label} sur {sub_table} filtrée par {cols} sans index",
+                        f"CREATE INDEX IF NOT EXISTS idx_{sub_table}_{first} ON {sub_table}({first});",
+                        cost=COSTS['unindexed_subquery'] // (10 if hoisted else 1)))
+                elif not hoisted:
+                    self.findings.append(Finding(
+                        table.name, policy.name, 'subquery',
+                        f"{clause}: {label} sur {sub_table}"
+                        + (f" (index sur {', '.join(sorted(indexed))})" if indexed else ''),
+                        "déplacer la sous-requête dans une fonction SECURITY DEFINER STABLE appelée "
+                        "via (select fn())" if sub_table != table.name else None))
+
+    def _correlated(self, subquery, table):
+        """True if the subquery refers to the outer row (table.col or a bare outer column)"""
+        if re.search(rf'\b{re.escape(table.name)}\s*\.\s*{IDENT}', subquery.where):
+            inner = {alias for _, alias in subquery.tables}
+            if table.name not in inner:
+                return True
+        inner_columns = set()
+        for sub_table, _ in subquery.tables:
+            if sub_table in self.schema.tables:
+                inner_columns.update(self.schema.tables[sub_table].columns)
+        for word in re.findall(rf'(?<![.\w]){IDENT}(?!\s*[.(])', subquery.where):
+            word = name(word)
+            if word in table.columns and word not in inner_columns:
+                return True
+        return False
+
+    def _leading_index(self, table_name, column):
+        return any(index.columns and index.columns[0] == column
+                   for index in self.schema.table_indexes(table_name))
+
+    def _add_edges(self, table, policy, tables, via=None, definer=False):
+        # SECURITY DEFINER functions read their tables without RLS
+        if definer:
+            return
+        for target in tables:
+            if target in self.schema.tables and self.schema.tables[target].rls and self.schema.tables[target].policies:
+                self.edges.setdefault(table.name, {}).setdefault(target, []).append((policy.name, policy.command))
+
+    def _read_edges(self, table):
+        """Tables whose policies run when table is read by a subquery (its
+        SELECT and ALL policies)"""
+        return sorted(target for target, policies in self.edges.get(table, {}).items()
+                      if any(command in ('SELECT', 'ALL') for _, command in policies))
+
+    def _chains(self):
+        for source, targets in sorted(self.edges.items()):
+            for target, policies in sorted(targets.items()):
+                names = sorted({policy for policy, _ in policies})
+                cycle = self._path(target, source)
+                if cycle is not None:
+                    chain = ' → '.join([source] + cycle)
+                    self.findings.append(Finding(
+                        source, names[0], 'recursive',
+                        f"chaîne récursive {chain}: \"infinite recursion detected in policy\" "
+                        f"ou évaluation en boucle",
+                        "lire la table dans une fonction SECURITY DEFINER (qui contourne RLS)"))
+                elif target != source:
+                    depth = self._depth(target, {source, target})
+                    self.findings.append(Finding(
+                        source, names[0], 'cross_table',
+                        f"déclenche les policies SELECT de {target}"
+                        + (f" (chaîne de profondeur {depth + 1})" if depth else '')
+                        + (f", depuis {len(names)} policies" if len(names) > 1 else ''),
+                        cost=COSTS['cross_table'] * (depth + 1) * len(names)))
+
+    def _path(self, start, goal, seen=None):
+        """Tables from start back to goal through read edges, or None"""
+        if start == goal:
+            return [goal]
+        seen = seen or {start}
+        for target in self._read_edges(start):
+            if target in seen and target != goal:
+                continue
+            seen.add(target)
+            rest = self._path(target, goal, seen)
+            if rest is not None:
+                return [start] + rest
+        return None
+
+    def _depth(self, table, seen):
+        depths = [1 + self._depth(target, seen | {target})
+                  for target in self._read_edges(table) if target not in seen]
+        return max(depths, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit the performance of the effective RLS policies')
+    parser.add_argument('--migrations-dir', default=migration_replay.MIGRATIONS_DIR)
+    parser.add_argument('--table', action='append', help='only these tables (repeatable)')
+    parser.add_argument('--min-cost', type=int, default=0, help='hide findings cheaper than this')
+    args = parser.parse_args()
+
+    schema = migration_replay.Schema().replay(migration_replay.migration_files(args.migrations_dir))
+    findings = [f for f in Auditor(schema).audit()
+                if f.cost >= args.min_cost and (not args.table or f.table in args.table)]
+
+    queries = {}
+    for query in supabase_queries.iter_queries():
+        queries[query.table] = queries.get(query.table, 0) + 1
+
+    by_table = {}
+    for finding in findings:
+        by_table.setdefault(finding.table, []).append(finding)
+    ranked = sorted(by_table.items(), key=lambda item: (-sum(f.cost for f in item[1]), item[0]))
+
+    policies = sum(len(table.policies) for table in schema.tables.values())
+    print("=" * 80)
+    print(f"AUDIT RLS ({policies} policies effectives sur {len(schema.tables)} tables)")
+    print("=" * 80)
+    for table_name, table_findings in ranked:
+        table = schema.tables[table_name]
+        total = sum(f.cost for f in table_findings)
+        print(f"\n📋 {table_name}: coût estimé {total}/ligne, {len(table.policies)} policies, "
+              f"RLS {'on' if table.rls else 'OFF'}, {queries.get(table_name, 0)} requêtes dans src/")
+        for finding in sorted(table_findings, key=lambda f: -f.cost):
+            label = f" \"{finding.policy}\"" if finding.policy else ''
+            print(f"   [{finding.cost:4}]{label} {finding.message}")
+            if finding.suggestion:
+                print(f"          → {finding.suggestion}")
+
+    print("\n" + "=" * 80)
+    counts = {}
+    for finding in findings:
+        counts[finding.kind] = counts.get(finding.kind, 0) + 1
+    print(f"{len(findings)} constats: " + ', '.join(f"{kind} {count}" for kind, count in sorted(counts.items())))
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Supabase query chains of the TypeScript sources
+
+Finds every `.from('table')` call on a database client (storage buckets,
+`supabase.storage.from(...)`, are skipped) and reads the method chain that
+follows it, across lines:
+
+    supabase
+      .from('quotes')
+      .select('*, payments(*)')
+      .eq('mover_id', moverData.id)
+      .order('created_at', { ascending: false });
+
+gives Query(table='quotes', calls=[select, eq, order]) with the line of each
+call. Arguments are kept as source text; first_string() reads a leading
+string literal ('mover_id'), None when it is computed.
+
+Each query also records where its rows go and where it runs:
+  - binding: the variable `data` is destructured into
+    (`const { data: quotesData, error } = await supabase...` gives
+    'quotesData'), None when the result is not destructured
+  - scope_end: end of the block holding the statement, the reach of binding
+  - loop: the innermost `for`/`while` loop or `.map`/`.forEach`/`.flatMap`
+    callback around the query, with its item variable and collection
+"""
+
+import os
+import re
+
+import edit_plan
+import page_engine
+import tree_walk
+
+SRC_DIR = os.path.join(page_engine.PROJECT_DIR, 'src')
+SOURCE_GLOBS = ('*.ts', '*.tsx')
+
+_FROM = re.compile(r'''\.\s*from\s*\(\s*(['"`])([A-Za-z_][\w.]*)\1\s*\)''')
+_STORAGE = re.compile(r'\.\s*storage\s*$')
+_METHOD = re.compile(r'\s*(?:\?\.|\.)\s*([A-Za-z_$][\w$]*)\s*(?:<[^<>()]*>)?\s*\(')
+_STRING = re.compile(r'''\s*(['"`])((?:[^'"`\\]|\\.)*?)\1''')
+# Skipped whole inside argument lists
+_ARG_TOKEN = re.compile(r'''
+    '(?:[^'\\\n]|\\.)*'
+  | "(?:[^"\\\n]|\\.)*"
+  | `(?:[^`\\]|\\.)*`
+  | //[^\n]*
+  | /\*.*?\*/
+  | [()\[\]{}]
+  | [^'"`/()\[\]{}]+
+  | [/'"`]
+''', re.VERBOSE | re.DOTALL)
+# `const { data: rows, error } = await supabase` just before `.from(`
+_BINDING = re.compile(r'(?:const|let|var)\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}\s*=\s*(?:await\s+)?[\w$.\s]*$')
+_DATA = re.compile(r'(?<![\w$])data\s*(?::\s*([A-Za-z_$][\w$]*))?\s*(?=,|$)')
+_LOOP = re.compile(r'\b(?:for\s+await|for|while)\s*\(|\.\s*(?:map|forEach|flatMap)\s*\(')
+_FOR_OF = re.compile(r'^\s*(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s+(?:of|in)\s+(.+?)\s*$', re.DOTALL)
+_FOR_LENGTH = re.compile(r'<\s*([\w$.]+?)(?:\?)?\.length\b')
+_CALLBACK = re.compile(r'\s*(?:async\s*)?(?:\(\s*([^()]*?)\s*\)|([A-Za-z_$][\w$]*))\s*(?::\s*[^=]+)?=>')
+_FUNCTION_BODY = re.compile(r'(?:=>|\bfunction\b[^;{}]*\))\s*(?::\s*[^;{}=]+)?$')
+_RECEIVER = re.compile(r'(\(\s*[\w$.?\[\]]+\s*(?:\|\||\?\?)\s*\[\]\s*\)|[\w$.?\[\]]+)\s*$')
+
+
+class Call:
+    def __init__(self, method, args, line, start, end):
+        self.method = method
+        self.args = args      # source text between the parentheses
+        self.line = line
+        self.start = start    # offset of the method name
+        self.end = end        # offset after the closing `)`
+
+    def first_string(self):
+        match = _STRING.match(self.args)
+        if match is None or (match.group(1) == '`' and '${' in match.group(2)):
+            return None
+        return match.group(2)
+
+
+class Loop:
+    """A loop, or an array callback, whose body runs once per item"""
+
+    def __init__(self, kind, start, end, line, item=None, collection=None, body=None):
+        self.kind = kind              # 'for', 'while', 'map', 'forEach', ...
+        self.start = start
+        self.end = end
+        self.body = start if body is None else body  # where the repeated code starts
+        self.line = line
+        self.item = item              # loop variable / first callback parameter
+        self.collection = collection  # expression iterated, `(rows || [])` -> 'rows'
+
+
+class Query:
+    def __init__(self, path, table, line, start, calls, binding=None, statement=None,
+                 scope_end=None, loop=None):
+        self.path = path
+        self.table = table
+        self.line = line      # line of `.from(`
+        self.start = start
+        self.calls = calls    # Calls chained after .from()
+        self.binding = binding
+        self.statement = start if statement is None else statement
+        self.scope_end = scope_end
+        self.loop = loop
+
+    @property
+    def end(self):
+        return self.calls[-1].end if self.calls else self.start
+
+    def methods(self):
+        return [call.method for call in self.calls]
+
+    def find(self, method):
+        return [call for call in self.calls if call.method == method]
+
+    @property
+    def action(self):
+        """select, insert, update, upsert or delete (the first one chained)"""
+        for call in self.calls:
+            if call.method in ('select', 'insert', 'update', 'upsert', 'delete'):
+                return call.method
+        return None
+
+    @property
+    def single(self):
+        return any(call.method in ('single', 'maybeSingle') for call in self.calls)
+
+
+def _close_paren(content, pos):
+    """Offset after the `)` closing the `(` just before pos, or None"""
+    depth = 1
+    n = len(content)
+    while pos < n:
+        match = _ARG_TOKEN.match(content, pos)
+        if match is None:
+            return None
+        token = match.group()
+        if token in '([{' and len(token) == 1:
+            depth += 1
+        elif token in ')]}' and len(token) == 1:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+        pos = match.end()
+    return None
+
+
+def _line_counter(content):
+    """line(offset) for increasing offsets, counting newlines incrementally"""
+    state = [0, 1]
+
+    def line(offset):
+        if offset < state[0]:
+            return content.count('\n', 0, offset) + 1
+        state[1] += content.count('\n', state[0], offset)
+        state[0] = offset
+        return state[1]
+    return line
+
+
+def _blocks(content):
+    """(start, end) of every {...} of content, by start offset"""
+    blocks = []
+    stack = []
+    pos = 0
+    n = len(content)
+    while pos < n:
+        match = _ARG_TOKEN.match(content, pos)
+        token = match.group()
+        if len(token) == 1 and token in '([{':
+            stack.append((token, match.start()))
+        elif len(token) == 1 and token in ')]}':
+            if stack:
+                opening, start = stack.pop()
+                if opening == '{':
+                    blocks.append((start, match.end()))
+        pos = match.end()
+    blocks.sort()
+    return blocks
+
+
+def _innermost(spans, pos):
+    """The shortest (start, end, ...) of spans that contains pos"""
+    best = None
+    for span in spans:
+        if span[0] > pos:
+            break
+        if pos < span[1] and (best is None or span[1] - span[0] < best[1] - best[0]):
+            best = span
+    return best
+
+
+def _collection(expression):
+    """`(quotesData || [])` -> 'quotesData', `data?.items` -> 'data.items'"""
+    expression = expression.strip()
+    if expression.startswith('(') and expression.endswith(')'):
+        expression = expression[1:-1].strip()
+    expression = re.split(r'\s*(?:\|\||\?\?)\s*', expression)[0]
+    return expression.replace('?.', '.').replace('!', '') or None
+
+
+def _loops(content, line):
+    loops = []
+    for match in _LOOP.finditer(content):
+        end = _close_paren(content, match.end())
+        if end is None:
+            continue
+        header = content[match.end():end - 1]
+        if match.group().startswith('.'):
+            kind = match.group().lstrip('.').split('(')[0].strip()
+            callback = _CALLBACK.match(header)
+            item = None
+            body = match.end() + callback.end() if callback else match.end()
+            if callback:
+                params = callback.group(1) if callback.group(1) is not None else callback.group(2)
+                first = params.split(',')[0].split(':')[0].strip()
+                item = first if re.fullmatch(r'[A-Za-z_$][\w$]*', first) else None
+            receiver = _RECEIVER.search(content, max(0, match.start() - 120), match.start())
+            collection = _collection(receiver.group(1)) if receiver else None
+            loops.append(Loop(kind, match.start(), end, line(match.start()), item, collection, body))
+            continue
+        kind = match.group().split('(')[0].strip()
+        item = collection = None
+        for_of = _FOR_OF.match(header)
+        if for_of:
+            item, collection = for_of.group(1), _collection(for_of.group(2))
+        else:
+            length = _FOR_LENGTH.search(header)
+            collection = _collection(length.group(1)) if length else None
+        body = re.compile(r'\s*\{').match(content, end)
+        body_end = _close_paren(content, body.end()) if body else content.find(';', end) + 1
+        if body_end:
+            loops.append(Loop(kind, match.start(), body_end, line(match.start()), item, collection))
+    loops.sort(key=lambda loop: loop.start)
+    return loops
+
+
+def _deferred(content, blocks, loop, pos):
+    """Whether pos sits in a function defined inside the loop body (an
+    onClick handler of a row rendered by .map()), which does not run per item"""
+    for start, end in blocks:
+        if start > pos:
+            break
+        if start < loop.body or pos >= end or not content[loop.body:start].strip():
+            continue
+        if _FUNCTION_BODY.search(content, max(0, start - 200), start):
+            return True
+    return False
+
+
+def _binding(content, start):
+    """(variable bound to `data`, statement start) of the query at start"""
+    match = _BINDING.search(content, max(0, start - 300), start)
+    if match is None:
+        return None, start
+    data = _DATA.search(match.group(1).strip())
+    if data is None:
+        return None, match.start()
+    return data.group(1) or 'data', match.start()
+
+
+def scan(path, content):
+    """Queries of one file, in source order"""
+    queries = []
+    line = _line_counter(content)
+    blocks = loops = None
+    for match in _FROM.finditer(content):
+        start = match.start()
+        if _STORAGE.search(content[max(0, start - 40):start]):
+            continue
+        if blocks is None:
+            blocks = _blocks(content)
+            loops = [(loop.start, loop.end, loop) for loop in _loops(content, _line_counter(content))]
+        from_line = line(start)
+        binding, statement = _binding(content, start)
+        block = _innermost(blocks, statement)
+        loop = _innermost(loops, start)
+        if loop and _deferred(content, blocks, loop[2], start):
+            loop = None
+        calls = []
+        pos = match.end()
+        while True:
+            method = _METHOD.match(content, pos)
+            if method is None:
+                break
+            end = _close_paren(content, method.end())
+            if end is None:
+                break
+            calls.append(Call(method.group(1), content[method.end():end - 1],
+                              line(method.start(1)), method.start(1), end))
+            pos = end
+        queries.append(Query(path, match.group(2), from_line, start, calls, binding, statement,
+                             block[1] if block else len(content), loop[2] if loop else None))
+    return queries
+
+
+def iter_queries(roots=(SRC_DIR,)):
+    """Yield every Query of the .ts/.tsx files under roots"""
+    for _, entry in tree_walk.walk(list(roots), include=SOURCE_GLOBS):
+        yield from scan(entry.path, edit_plan.read_text(entry.path))
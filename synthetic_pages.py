@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Synthetic page corpus generator for the page script benchmarks
+
+Pages are modelled on the real shapes of src/pages/: lucide-react imports,
+legacy `Props` types with onBack (before the fix_* codemods), navigate
+declared inside the destructured params (fix_navigate_placement), pages
+without logo nor router (add_logo_correctly), migrated pages with the logo
+button and `navigate(-1)`, and long `return (` JSX blocks (~400 lines on
+average, like the real pages).
+
+Usage:
+    python3 synthetic_pages.py /tmp/corpus 5000
+"""
+
+import argparse
+import os
+import random
+
+ICONS = ['Truck', 'Shield', 'Users', 'Heart', 'Sparkles', 'Mail', 'CheckCircle',
+         'Calendar', 'MapPin', 'Package', 'Star', 'Clock', 'Phone', 'Euro']
+
+LOGO_BUTTON = '''      <button
+        onClick={() => navigate('/')}
+        className="fixed top-4 left-4 z-50 hover:opacity-80 transition-opacity bg-white dark:bg-gray-800 rounded-lg shadow-lg p-2"
+      >
+        <img
+          src="/capture_d'écran_2026-01-20_à_12.07.10.png"
+          alt="TrouveTonDemenageur"
+          className="h-12 w-auto"
+        />
+      </button>
+'''
+
+BACK_BUTTON = '''        <button
+          onClick={BACK_HANDLER}
+          className="flex items-center space-x-2 text-gray-600 hover:text-blue-600 transition mb-8 group"
+        >
+          <ArrowLeft className="w-5 h-5 group-hover:-translate-x-1 transition-transform" />
+          <span className="font-medium">Retour</span>
+        </button>
+'''
+
+SECTION = '''        <section className="bg-white rounded-2xl shadow-lg p-8 mb-8">
+          <div className="flex items-center space-x-3 mb-6">
+            <ICON className="w-8 h-8 text-blue-600" />
+            <h2 className="text-2xl font-bold text-gray-900">Section INDEX</h2>
+          </div>
+          <div className="grid md:grid-cols-3 gap-6">
+            {items.map((item) => (
+              <div key={item.id} className="p-4 border border-gray-200 rounded-xl">
+                <h3 className="font-semibold text-gray-900">{item.title}</h3>
+                <p className="text-gray-600 text-sm">{item.description}</p>
+              </div>
+            ))}
+          </div>
+          <p className="text-gray-700 leading-relaxed">
+            Lorem ipsum dolor sit amet, déménagement {INDEX} consectetur adipiscing elit.
+          </p>
+        </section>
+'''
+
+# Page shapes and their share of the corpus
+SHAPES = [
+    ('legacy_type', 0.25),        # type XProps = { onBack }, export function X({onBack}: XProps)
+    ('legacy_interface', 0.15),   # interface XProps { onBack; ... }, export default function
+    ('misplaced_navigate', 0.05), # export function X({ const navigate = useNavigate(); onBack }: ...
+    ('plain', 0.15),              # no router, no logo, no back button
+    ('migrated', 0.4),            # useNavigate + logo button, already fixed
+]
+
+
+def pick_shape(rng):
+    roll = rng.random()
+    for shape, share in SHAPES:
+        if roll < share:
+            return shape
+        roll -= share
+    return SHAPES[-1][0]
+
+
+def render_page(name, shape, rng, sections):
+    icons = rng.sample(ICONS, 4)
+    lines = ["import { useState, useEffect } from 'react';"]
+    if shape in ('migrated', 'misplaced_navigate'):
+        lines.append("import { useNavigate } from 'react-router-dom';")
+    lines.append(f"import {{ ArrowLeft, {', '.join(icons)} }} from 'lucide-react';")
+    lines.append("import { supabase } from '../lib/supabase';")
+    lines.append('')
+
+    if shape == 'legacy_type':
+        lines.append(f'type {name}Props = {{ onBack: () => void; }};')
+        lines.append('')
+        lines.append(f'export function {name}({{onBack}}: {name}Props) {{')
+        back_handler = 'onBack'
+    elif shape == 'legacy_interface':
+        lines.append(f'interface {name}Props {{')
+        lines.append('  onBack: () => void;')
+        lines.append('  onSelect?: (id: string) => void;')
+        lines.append('}')
+        lines.append('')
+        lines.append(f'export default function {name}({{onBack }}: {name}Props) {{')
+        back_handler = 'onBack'
+    elif shape == 'misplaced_navigate':
+        lines.append(f'type {name}Props = {{ onBack: () => void; }};')
+        lines.append('')
+        lines.append(f'export function {name}({{')
+        lines.append('  const navigate = useNavigate();')
+        lines.append(f'onBack }}: {name}Props) {{')
+        back_handler = 'onBack'
+    elif shape == 'plain':
+        lines.append(f'export default function {name}() {{')
+        back_handler = None
+    else:
+        lines.append(f'export function {name}() {{')
+        lines.append('  const navigate = useNavigate();')
+        back_handler = '() => navigate(-1)'
+
+    lines.append('  const [items, setItems] = useState<any[]>([]);')
+    lines.append('')
+    lines.append('  useEffect(() => {')
+    lines.append("    supabase.from('quote_requests').select('*').then(({ data }) => setItems(data || []));")
+    lines.append('  }, []);')
+    lines.append('')
+    lines.append('  return (')
+    lines.append('    <div className="min-h-screen relative bg-gradient-to-br from-blue-50 to-cyan-50">')
+    body = ''
+    if shape == 'migrated':
+        body += LOGO_BUTTON
+    body += '      <div className="absolute inset-0 bg-white/80"></div>\n'
+    body += '      <div className="relative max-w-6xl mx-auto px-4 py-12">\n'
+    if back_handler:
+        body += BACK_BUTTON.replace('BACK_HANDLER', back_handler)
+    for index in range(sections):
+        body += SECTION.replace('ICON', icons[index % len(icons)]).replace('INDEX', str(index))
+    body += '      </div>\n'
+    body += '    </div>\n'
+    body += '  );\n'
+    body += '}\n'
+    return '\n'.join(lines) + '\n' + body
+
+
+def generate(directory, count, seed=0, sections=(8, 30)):
+    """Write count synthetic pages into directory and return their paths"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(count):
+        name = f'Synthetic{index:05d}Page'
+        content = render_page(name, pick_shape(rng), rng, rng.randint(*sections))
+        path = os.path.join(directory, name + '.tsx')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic page corpus')
+    parser.add_argument('directory')
+    parser.add_argument('count', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate(args.directory, args.count, args.seed)
+    print(f"✓ {len(paths)} pages générées dans {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
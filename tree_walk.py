@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Recursive source tree walker shared by the page scripts
+
+    for name, entry in tree_walk.walk(['src/pages', 'src/components']):
+        entry.path, entry.stat()      # DirEntry: stat data without a 2nd lookup
+
+Built on os.scandir, depth-first in name order (a flat directory comes out
+like sorted(os.listdir())). It never descends into .git, node_modules or
+dist, nor into anything ignored by the .gitignore files between the git top
+and each directory; files are kept if they match one of the include globs
+and none of the exclude globs. Globs without '/' match the file name, the
+others the path relative to the root (both with fnmatch).
+
+Names are relative to the root, or to the roots' common directory when
+there are several roots, so two files never share a name. directories()
+lists the subdirectories the walk descends into (watch mode watches them).
+"""
+
+import fnmatch
+import os
+import re
+
+# Never worth a scandir, ignored or not
+PRUNED_DIRS = {'.git', 'node_modules', 'dist'}
+
+DEFAULT_INCLUDE = ('*.tsx',)
+
+
+def add_arguments(parser):
+    parser.add_argument('--root', action='append', metavar='DIR',
+                        help='directory to scan recursively (repeatable)')
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help="files to keep (repeatable, default: '*.tsx')")
+    parser.add_argument('--exclude', action='append', metavar='GLOB',
+                        help='files or directories to skip (repeatable)')
+    parser.add_argument('--no-gitignore', dest='gitignore', action='store_false',
+                        help='also scan the files ignored by .gitignore')
+
+
+def _translate(pattern):
+    """gitignore glob -> regex over a '/'-separated relative path"""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            out.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 2:]:
+            end = pattern.index(']', i + 2)
+            body = pattern[i + 1:end]
+            out.append('[' + ('^' + body[1:] if body.startswith('!') else body) + ']')
+            i = end + 1
+        elif pattern[i] == '\\' and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(out)
+
+
+class GitIgnore:
+    """The rules of one .gitignore file, relative to its directory"""
+
+    def __init__(self, base, lines):
+        self.base = os.path.abspath(base)
+        self.rules = []  # (negate, dir_only, regex)
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            # A slash anywhere but at the end anchors the pattern to base
+            anchored = '/' in line
+            regex = _translate(line.lstrip('/'))
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            self.rules.append((negate, dir_only, re.compile(regex + r'\Z')))
+
+    @classmethod
+    def load(cls, directory):
+        try:
+            with open(os.path.join(directory, '.gitignore'), 'r', encoding='utf-8') as f:
+                return cls(directory, f.readlines())
+        except OSError:
+            return None
+
+    def match(self, path, is_dir):
+        """True (ignored), False (re-included by a ! rule) or None (no rule)
+
+        path is absolute and inside base.
+        """
+        rel = path[len(self.base) + 1:].replace(os.sep, '/')
+        result = None
+        for negate, dir_only, regex in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel):
+                result = not negate
+        return result
+
+
+def _ancestor_ignores(root):
+    """.gitignore files from the git top (or the filesystem root) down to root's parent"""
+    directories = []
+    directory = os.path.dirname(root)
+    while True:
+        directories.append(directory)
+        if os.path.exists(os.path.join(directory, '.git')):
+            break
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    if os.path.exists(os.path.join(root, '.git')):
+        directories = []
+    ignores = [GitIgnore.load(directory) for directory in reversed(directories)]
+    return [ignore for ignore in ignores if ignore is not None]
+
+
+def _ignored(ignores, path, is_dir):
+    # Deeper .gitignore files override the ones above them
+    for ignore in reversed(ignores):
+        result = ignore.match(path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+
+def _matches(globs, name, rel):
+    for glob in globs:
+        if fnmatch.fnmatchcase(rel if '/' in glob else name, glob):
+            return True
+    return False
+
+
+def _pruned(entry, rel, abs_path, ignores, exclude):
+    return (entry.name in PRUNED_DIRS or _matches(exclude, entry.name, rel)
+            or (ignores and _ignored(ignores, abs_path, True)))
+
+
+def _walk_dir(directory, abs_dir, prefix, ignores, include, exclude, gitignore):
+    """directory as given by the caller, its absolute path, and its name prefix"""
+    if gitignore:
+        own = GitIgnore.load(abs_dir)
+        if own is not None:
+            ignores = ignores + [own]
+
+    with os.scandir(directory) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+
+    for entry in entries:
+        rel = prefix + entry.name
+        abs_path = os.path.join(abs_dir, entry.name)
+        if entry.is_dir(follow_symlinks=False):
+            if _pruned(entry, rel, abs_path, ignores, exclude):
+                continue
+            yield from _walk_dir(entry.path, abs_path, rel + '/', ignores, include, exclude, gitignore)
+        elif entry.is_file():
+            if (_matches(include, entry.name, rel) and not _matches(exclude, entry.name, rel)
+                    and not (ignores and _ignored(ignores, abs_path, False))):
+                yield rel, entry
+
+
+def walk(roots, include=DEFAULT_INCLUDE, exclude=(), gitignore=True):
+    """Yield (name, DirEntry) for every kept file under roots
+
+    DirEntry paths start with the root as given (relative roots give
+    relative paths).
+    """
+    abs_roots = [os.path.abspath(root) for root in roots]
+    base = abs_roots[0] if len(roots) == 1 else os.path.commonpath(abs_roots)
+    for root, abs_root in zip(roots, abs_roots):
+        prefix = os.path.relpath(abs_root, base).replace(os.sep, '/') + '/' if abs_root != base else ''
+        ignores = _ancestor_ignores(abs_root) if gitignore else []
+        yield from _walk_dir(root, abs_root, prefix, ignores, include or DEFAULT_INCLUDE, exclude or (), gitignore)
+
+
+def _walk_subdirs(directory, abs_dir, prefix, ignores, exclude, gitignore):
+    if gitignore:
+        own = GitIgnore.load(abs_dir)
+        if own is not None:
+            ignores = ignores + [own]
+
+    with os.scandir(directory) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            rel = prefix + entry.name
+            abs_path = os.path.join(abs_dir, entry.name)
+            if _pruned(entry, rel, abs_path, ignores, exclude):
+                continue
+            yield rel
+            yield from _walk_subdirs(entry.path, abs_path, rel + '/', ignores, exclude, gitignore)
+
+
+def directories(root, exclude=(), gitignore=True):
+    """Yield the names of the subdirectories walk([root]) descends into, parents first"""
+    abs_root = os.path.abspath(root)
+    ignores = _ancestor_ignores(abs_root) if gitignore else []
+    yield from _walk_subdirs(root, abs_root, '', ignores, exclude or (), gitignore)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Linear-time structural scanner for the TSX subset touched by the page scripts
+
+One forward pass over the source records:
+  - imports (module, default import, named specifiers, offsets)
+  - exported function signatures (name, default, params span, body start)
+  - `type X = { ... }` and `interface X { ... }` blocks
+  - `return (` blocks
+  - JSX opening and closing tags, in source order
+
+Strings, template literals, comments, regex literals and JSX text (French
+apostrophes included) are skipped without backtracking, and brackets are
+matched with a stack, so the scan is O(n) whatever the input. Scripts use the
+offsets to locate insertion points instead of DOTALL regexes that can
+backtrack badly on large pages or pages with no match.
+"""
+
+import functools
+import re
+
+_TOKEN = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<num>\d[\w.]*)
+  | (?P<str>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+  | (?P<punct>=>|.)
+''', re.VERBOSE | re.DOTALL)
+
+_TAG_NAME = re.compile(r'[A-Za-z_$][\w$.:-]*')
+_CLOSING_TAG = re.compile(r'</\s*([A-Za-z_$][\w$.:-]*)?\s*>')
+_JSX_TEXT = re.compile(r'[^<{]+')
+_ATTR_TEXT = re.compile(r'''[^\s/>{'"]+|\s+''')
+_TEMPLATE_TEXT = re.compile(r'[^`\\$]+|\\.|\$(?!\{)', re.DOTALL)
+_REGEX_LITERAL = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*')
+
+IMPORT = re.compile(r'''
+    import\s+(?:type\s+)?
+    (?:(?P<default>[A-Za-z_$][\w$]*)\s*,?\s*)?
+    (?:\{(?P<names>[^}]*)\}\s*|\*\s*as\s+[A-Za-z_$][\w$]*\s*)?
+    (?:from\s*)?
+    (?P<quote>['"])(?P<module>[^'"\n]+)(?P=quote)[ \t]*;?
+''', re.VERBOSE)
+_EXPORT_FUNCTION = re.compile(r'export\s+(?P<default>default\s+)?(?:async\s+)?function\s+(?P<name>[A-Za-z_$][\w$]*)\s*')
+_TYPE_ALIAS = re.compile(r'(?:export\s+)?type\s+(?P<name>[A-Za-z_$][\w$]*)\s*(?:<[^<>=;{}]*>)?\s*=\s*(?=\{)')
+_INTERFACE = re.compile(r'(?:export\s+)?interface\s+(?P<name>[A-Za-z_$][\w$]*)\s*(?:<[^<>;{}]*>)?\s*(?:extends\s+[^;{}]*)?(?=\{)')
+_RETURN_PAREN = re.compile(r'return\s*(?=\()')
+
+# Previous significant token after which `<` opens JSX and `/` a regex
+_EXPR_START = set('(,=:?&|{}[!;') | {'=>', 'return', None}
+
+
+class Import:
+    def __init__(self, match):
+        self.start, self.end = match.span()
+        self.module = match.group('module')
+        self.default = match.group('default')
+        self.default_span = match.span('default') if self.default else None
+        names = match.group('names')
+        self.names = [n.strip() for n in names.split(',') if n.strip()] if names is not None else []
+        self.names_span = match.span('names') if names is not None else None
+
+
+class ExportedFunction:
+    def __init__(self, name, default, start):
+        self.name = name
+        self.default = default
+        self.start = start
+        self.params_start = None   # index of `(`
+        self.params_end = None     # index after `)`
+        self.body_start = None     # index after `{`
+
+
+class TypeBlock:
+    def __init__(self, kind, name, start, body_start):
+        self.kind = kind           # 'type' or 'interface'
+        self.name = name
+        self.start = start
+        self.body_start = body_start
+        self.end = None            # index after `}` (and `;` when present)
+
+
+class ReturnBlock:
+    def __init__(self, start, paren_start):
+        self.start = start
+        self.paren_start = paren_start
+        self.paren_end = None      # index after the matching `)`
+
+
+class JsxTag:
+    def __init__(self, name, start, closing=False):
+        self.name = name
+        self.start = start
+        self.end = None
+        self.closing = closing
+        self.self_closing = False
+        self.name_end = start + 1 + len(name)
+
+    def attrs(self, content):
+        return content[self.name_end:self.end - (2 if self.self_closing else 1)]
+
+
+class TsxScan:
+    def __init__(self):
+        self.imports = []
+        self.functions = []
+        self.types = []
+        self.returns = []
+        self.tags = []
+
+
+@functools.lru_cache(maxsize=256)
+def scan(content):
+    """Scan content once; results are cached per distinct file content"""
+    result = TsxScan()
+    n = len(content)
+    i = 0
+    prev = None
+    pending = None
+    # Each frame: [mode, closer, kind, payload]
+    stack = [['code', None, 'top', None]]
+
+    while i < n:
+        frame = stack[-1]
+        mode = frame[0]
+
+        if mode == 'children':
+            c = content[i]
+            if c == '<':
+                if content.startswith('</', i):
+                    m = _CLOSING_TAG.match(content, i)
+                    if m:
+                        tag = JsxTag(m.group(1) or '', i, closing=True)
+                        tag.end = m.end()
+                        result.tags.append(tag)
+                        stack.pop()
+                        i = m.end()
+                        prev = ')'
+                        continue
+                    i += 1
+                    continue
+                i = _open_tag(content, i, result, stack)
+                continue
+            if c == '{':
+                stack.append(['code', '}', 'jsxexpr', None])
+                prev = '{'
+                i += 1
+                continue
+            i = _JSX_TEXT.match(content, i).end()
+            continue
+
+        if mode == 'tag':
+            c = content[i]
+            tag = frame[3]
+            if c == '>':
+                tag.end = i + 1
+                stack[-1] = ['children', None, 'element', tag]
+                i += 1
+            elif c == '/' and content.startswith('/>', i):
+                tag.end = i + 2
+                tag.self_closing = True
+                stack.pop()
+                prev = ')'
+                i += 2
+            elif c == '{':
+                stack.append(['code', '}', 'jsxexpr', None])
+                prev = '{'
+                i += 1
+            elif c in '"\'':
+                end = content.find(c, i + 1)
+                i = n if end < 0 else end + 1
+            else:
+                m = _ATTR_TEXT.match(content, i)
+                i = m.end() if m else i + 1
+            continue
+
+        if mode == 'template':
+            c = content[i]
+            if c == '`':
+                stack.pop()
+                prev = ')'
+                i += 1
+            elif content.startswith('${', i):
+                stack.append(['code', '}', 'template_expr', None])
+                prev = '{'
+                i += 2
+            else:
+                m = _TEMPLATE_TEXT.match(content, i)
+                i = m.end() if m else i + 1
+            continue
+
+        # Code mode
+        c = content[i]
+        if c == '/':
+            if content.startswith('//', i):
+                end = content.find('\n', i)
+                i = n if end < 0 else end
+                continue
+            if content.startswith('/*', i):
+                end = content.find('*/', i + 2)
+                i = n if end < 0 else end + 2
+                continue
+            if prev in _EXPR_START:
+                m = _REGEX_LITERAL.match(content, i)
+                if m:
+                    i = m.end()
+                    prev = ')'
+                    continue
+        elif c == '`':
+            stack.append(['template', None, 'template', None])
+            i += 1
+            continue
+        elif c == '<' and prev in _EXPR_START and i + 1 < n and (content[i + 1] == '>' or _TAG_NAME.match(content, i + 1)):
+            i = _open_tag(content, i, result, stack)
+            continue
+
+        m = _TOKEN.match(content, i)
+        kind = m.lastgroup
+        text = m.group()
+
+        if kind == 'ws':
+            i = m.end()
+            continue
+
+        if kind == 'ident':
+            top_level = len(stack) == 1
+            if top_level and text == 'import':
+                im = IMPORT.match(content, i)
+                if im:
+                    result.imports.append(Import(im))
+                    i = im.end()
+                    prev = ';'
+                    continue
+            elif top_level and text == 'export':
+                fm = _EXPORT_FUNCTION.match(content, i)
+                if fm:
+                    function = ExportedFunction(fm.group('name'), bool(fm.group('default')), i)
+                    result.functions.append(function)
+                    pending = ('params', function)
+                    i = fm.end()
+                    prev = 'ident'
+                    continue
+            if top_level and text in ('export', 'type', 'interface'):
+                tm = _TYPE_ALIAS.match(content, i) or _INTERFACE.match(content, i)
+                if tm:
+                    block_kind = 'type' if tm.re is _TYPE_ALIAS else 'interface'
+                    block = TypeBlock(block_kind, tm.group('name'), i, tm.end() + 1)
+                    result.types.append(block)
+                    stack.append(['code', '}', 'type', block])
+                    prev = '{'
+                    i = tm.end() + 1
+                    continue
+            if text == 'return':
+                rm = _RETURN_PAREN.match(content, i)
+                if rm:
+                    block = ReturnBlock(i, rm.end())
+                    result.returns.append(block)
+                    stack.append(['code', ')', 'return', block])
+                    prev = '('
+                    i = rm.end() + 1
+                    continue
+                prev = 'return'
+            else:
+                prev = 'ident'
+            i = m.end()
+            continue
+
+        if kind in ('num', 'str'):
+            prev = 'ident'
+            i = m.end()
+            continue
+
+        # Punctuation
+        if text in '([{':
+            closer = {'(': ')', '[': ']', '{': '}'}[text]
+            frame_kind = None
+            payload = None
+            if pending is not None:
+                if pending[0] == 'params' and text == '(':
+                    frame_kind, payload = 'params', pending[1]
+                    payload.params_start = i
+                elif pending[0] == 'body' and text == '{':
+                    frame_kind, payload = 'body', pending[1]
+                    payload.body_start = i + 1
+                pending = None
+            stack.append(['code', closer, frame_kind, payload])
+        elif text in ')]}':
+            if len(stack) > 1 and stack[-1][1] == text:
+                _, _, frame_kind, payload = stack.pop()
+                if frame_kind == 'params':
+                    payload.params_end = i + 1
+                    pending = ('body', payload)
+                elif frame_kind == 'type':
+                    payload.end = i + 2 if content.startswith(';', i + 1) else i + 1
+                elif frame_kind == 'return':
+                    payload.paren_end = i + 1
+        elif pending is not None and pending[0] == 'params':
+            pending = None
+        prev = text
+        i = m.end()
+
+    return result
+
+
+def _open_tag(content, i, result, stack):
+    """Record the JSX opening tag at i and push its attribute frame"""
+    m = _TAG_NAME.match(content, i + 1)
+    tag = JsxTag(m.group() if m else '', i)
+    result.tags.append(tag)
+    if tag.name == '':
+        # Fragment <>
+        tag.end = i + 2
+        stack.append(['children', None, 'element', tag])
+        return i + 2
+    stack.append(['tag', None, 'tag', tag])
+    return tag.name_end
+
+
+def function_body_start(content):
+    """Offset right after the `{` of the first exported function, or None"""
+    for function in scan(content).functions:
+        if function.body_start is not None:
+            return function.body_start
+    return None
+
+
+def extend_through_newline(content, end):
+    """Extend end over following whitespace up to its last newline (like `\\s*\\n`)
+
+    Returns None when the whitespace run contains no newline.
+    """
+    stop = end
+    n = len(content)
+    while stop < n and content[stop].isspace():
+        stop += 1
+    newline = content.rfind('\n', end, stop)
+    return None if newline < 0 else newline + 1
+
+
+def skip_whitespace(content, pos):
+    n = len(content)
+    while pos < n and content[pos].isspace():
+        pos += 1
+    return pos